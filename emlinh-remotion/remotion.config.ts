@@ -12,5 +12,6 @@ RemotionConfig.setVideoImageFormat("jpeg");
 RemotionConfig.setPixelFormat("yuv420p");
 RemotionConfig.setEntryPoint("src/index.ts"); // Chỉ định entry point
 
-// Fix timeout issue với ThreeCanvas - set concurrency thấp
+// Fix timeout issue với ThreeCanvas - set concurrency thấp khi render thủ công.
+// Backend Python luôn truyền --concurrency (do RenderScheduler tính) nên giá trị này bị ghi đè.
 RemotionConfig.setConcurrency(1);
@@ -0,0 +1,255 @@
+/**
+ * Render server - bundle project Remotion một lần, giữ Chromium mở và nhận job render
+ * qua stdin (mỗi dòng một JSON), thay cho việc chạy `npx remotion render` cho từng video.
+ *
+ * Request (stdin):
+ *   {"type": "render", "id": "...", "composition": "Scene-Portrait", "outputPath": "/abs/out.mp4",
+ *    "inputProps": {...}, "concurrency": 2, "frameRange": [0, 299], "muted": false,
+ *    "scale": 0.5, "x264Preset": "ultrafast"}   // scale/x264Preset: preview render
+ *   {"type": "cancel", "id": "..."}
+ *   {"type": "compositions", "id": "..."}
+ *   {"type": "rebundle"}   // bundle lại sau khi sửa src/
+ *   {"type": "ping"}
+ *   {"type": "shutdown"}
+ *
+ * Response (stdout, mỗi dòng một JSON):
+ *   {"type": "ready", "bundleMs": 1234}
+ *   {"type": "progress", "id": "...", "renderedFrames": 10, "encodedFrames": 5, "totalFrames": 450, "progress": 0.02}
+ *   {"type": "done", "id": "...", "outputPath": "..."}
+ *   {"type": "compositions", "id": "...", "compositions": [{"id", "width", "height", "fps", "durationInFrames"}]}
+ *   {"type": "error", "id": "...", "message": "..."}
+ *
+ * Log của Remotion được chuyển sang stderr để stdout chỉ chứa protocol.
+ */
+
+import fs from "node:fs";
+import path from "node:path";
+import readline from "node:readline";
+import { fileURLToPath } from "node:url";
+import { bundle } from "@remotion/bundler";
+import {
+  getCompositions,
+  makeCancelSignal,
+  openBrowser,
+  renderMedia,
+  selectComposition,
+} from "@remotion/renderer";
+
+const projectRoot = path.dirname(fileURLToPath(import.meta.url));
+const publicDir = path.join(projectRoot, "public");
+
+// Các tùy chọn trong remotion.config.ts không áp dụng cho Node API nên khai báo lại ở đây
+const chromiumOptions = { gl: "angle" };
+const renderOptions = { codec: "h264", imageFormat: "jpeg", pixelFormat: "yuv420p" };
+
+console.log = (...args) => console.error(...args);
+console.info = (...args) => console.error(...args);
+
+const send = (message) => {
+  process.stdout.write(JSON.stringify(message) + "\n");
+};
+
+let serveUrl = null;
+let browser = null;
+const jobs = new Map();
+
+const createBundle = async () => {
+  const startedAt = Date.now();
+  serveUrl = await bundle({
+    entryPoint: path.join(projectRoot, "src", "index.ts"),
+    rootDir: projectRoot,
+    publicDir,
+  });
+  return Date.now() - startedAt;
+};
+
+/**
+ * Bundle chứa bản copy của public/ tại thời điểm bundle. Audio và mouth cues được
+ * tạo sau đó (mỗi video một file) nên cần copy các file mới/thay đổi trước mỗi render.
+ */
+const syncPublicDir = (sourceDir, targetDir) => {
+  if (!fs.existsSync(sourceDir)) {
+    return;
+  }
+  fs.mkdirSync(targetDir, { recursive: true });
+  for (const entry of fs.readdirSync(sourceDir, { withFileTypes: true })) {
+    if (entry.name.startsWith(".")) {
+      continue; // Bỏ qua .tts_cache và file ẩn
+    }
+    const source = path.join(sourceDir, entry.name);
+    const target = path.join(targetDir, entry.name);
+    if (entry.isDirectory()) {
+      syncPublicDir(source, target);
+      continue;
+    }
+    const sourceStat = fs.statSync(source);
+    const targetStat = fs.existsSync(target) ? fs.statSync(target) : null;
+    if (!targetStat || targetStat.mtimeMs < sourceStat.mtimeMs || targetStat.size !== sourceStat.size) {
+      fs.copyFileSync(source, target);
+    }
+  }
+};
+
+const ensureBrowser = async () => {
+  if (!browser) {
+    browser = await openBrowser("chrome", { chromiumOptions });
+  }
+  return browser;
+};
+
+const render = async (request) => {
+  const {
+    id,
+    composition: compositionId,
+    outputPath,
+    inputProps = {},
+    concurrency = 1,
+    frameRange = null,
+    muted = false,
+    scale = 1,
+    x264Preset = null,
+  } = request;
+  const { cancelSignal, cancel } = makeCancelSignal();
+  jobs.set(id, cancel);
+
+  try {
+    syncPublicDir(publicDir, path.join(serveUrl, "public"));
+    const puppeteerInstance = await ensureBrowser();
+
+    const composition = await selectComposition({
+      serveUrl,
+      id: compositionId,
+      inputProps,
+      puppeteerInstance,
+      chromiumOptions,
+    });
+
+    // Segment render (frameRange) báo tiến độ theo số frame của đoạn
+    const totalFrames = frameRange ? frameRange[1] - frameRange[0] + 1 : composition.durationInFrames;
+    let lastSent = 0;
+    await renderMedia({
+      ...renderOptions,
+      serveUrl,
+      composition,
+      inputProps,
+      outputLocation: outputPath,
+      concurrency,
+      frameRange,
+      muted,
+      scale,
+      ...(x264Preset ? { x264Preset } : {}),
+      puppeteerInstance,
+      chromiumOptions,
+      cancelSignal,
+      onProgress: ({ renderedFrames, encodedFrames, progress }) => {
+        // Tối đa ~4 message/giây cho mỗi job
+        const now = Date.now();
+        if (now - lastSent < 250 && progress < 1) {
+          return;
+        }
+        lastSent = now;
+        send({
+          type: "progress",
+          id,
+          renderedFrames,
+          encodedFrames,
+          totalFrames,
+          progress,
+        });
+      },
+    });
+
+    send({ type: "done", id, outputPath });
+  } catch (error) {
+    send({ type: "error", id, message: error?.stack || String(error) });
+    // Browser bị crash thì mở lại ở job sau
+    if (browser && /Target closed|Browser closed|Protocol error/i.test(String(error))) {
+      browser = null;
+    }
+  } finally {
+    jobs.delete(id);
+  }
+};
+
+const shutdown = async () => {
+  for (const cancel of jobs.values()) {
+    cancel();
+  }
+  if (browser) {
+    await browser.close({ silent: true }).catch(() => {});
+  }
+  process.exit(0);
+};
+
+const handle = async (request) => {
+  switch (request.type) {
+    case "render":
+      // Không await: nhiều job chạy song song trên cùng browser (Python giới hạn bằng RenderScheduler)
+      render(request);
+      break;
+    case "compositions": {
+      const compositions = await getCompositions(serveUrl, {
+        puppeteerInstance: await ensureBrowser(),
+        chromiumOptions,
+      });
+      send({
+        type: "compositions",
+        id: request.id,
+        compositions: compositions.map(({ id, width, height, fps, durationInFrames }) => ({
+          id,
+          width,
+          height,
+          fps,
+          durationInFrames,
+        })),
+      });
+      break;
+    }
+    case "cancel":
+      jobs.get(request.id)?.();
+      break;
+    case "rebundle": {
+      const bundleMs = await createBundle();
+      send({ type: "ready", bundleMs });
+      break;
+    }
+    case "ping":
+      send({ type: "pong", activeJobs: jobs.size });
+      break;
+    case "shutdown":
+      await shutdown();
+      break;
+    default:
+      send({ type: "error", id: request.id, message: `Unknown request type: ${request.type}` });
+  }
+};
+
+const main = async () => {
+  const bundleMs = await createBundle();
+  await ensureBrowser();
+  send({ type: "ready", bundleMs });
+
+  const lines = readline.createInterface({ input: process.stdin });
+  lines.on("line", (line) => {
+    if (!line.trim()) {
+      return;
+    }
+    let request;
+    try {
+      request = JSON.parse(line);
+    } catch (error) {
+      send({ type: "error", message: `Invalid JSON: ${error.message}` });
+      return;
+    }
+    handle(request).catch((error) => {
+      send({ type: "error", id: request.id, message: error?.stack || String(error) });
+    });
+  });
+  // Process Python đóng stdin (thoát hoặc crash) -> dọn browser và thoát theo
+  lines.on("close", shutdown);
+};
+
+main().catch((error) => {
+  console.error(`Render server failed to start: ${error?.stack || error}`);
+  process.exit(1);
+});
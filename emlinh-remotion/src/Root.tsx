@@ -24,6 +24,7 @@ export const myCompSchema = z.object({
   audioFileName: z.string().default("None"), // Thay đổi từ enum sang string để cho phép tên file động
   cameraFov: z.number().default(30),
   cameraPosition: z.tuple([z.number(), z.number(), z.number()]).default([0, 0.7, 4.5]),
+  fps: z.number().min(1).max(60).optional(), // Ghi đè fps, dùng cho preview render (vd. 15fps)
 });
 
 // Lấy giá trị mặc định từ schema để tính durationInFrames
@@ -36,9 +37,11 @@ const calculateSceneMetadata: CalculateMetadataFunction<z.infer<typeof myCompSch
   // props ở đây đã được parse và validate bởi myCompSchema (do schema được cung cấp cho Composition)
   // và cũng đã bao gồm defaultValues nếu input props không có durationInSeconds.
   const COMPOSITION_FPS = 30; // Giả định FPS giống như trong Composition
-  const durationInFrames = Math.round(props.durationInSeconds * COMPOSITION_FPS);
+  const fps = props.fps ?? COMPOSITION_FPS;
+  const durationInFrames = Math.round(props.durationInSeconds * fps);
   return {
     durationInFrames,
+    fps,
     props, // Trả về props đã được validate/resolve
   };
 };
@@ -1,6 +1,6 @@
 // src/hooks/lipSync/useRemotionLipSync.tsx
 import { useRef } from 'react';
-import { useCurrentFrame, spring } from 'remotion';
+import { useCurrentFrame, useVideoConfig, spring } from 'remotion';
 import { DEFAULT_LIPSYNC_OPTIONS, VISEME_MAPPING, NEUTRAL_VISEME_NAME } from './constants';
 import { findVisemeAtTime } from './visemeProcessor';
 import { useMouthCues } from './useMouthCues';
@@ -16,7 +16,7 @@ export const useRemotionLipSync = (
   options?: LipSyncOptions
 ): RemotionLipSyncResult => {
   const frame = useCurrentFrame();
-  const fps = 30;
+  const { fps } = useVideoConfig(); // Preview render chạy ở fps thấp hơn 30
   const time = frame / fps;
 
   const { cues, isLoading } = useMouthCues(mouthCuesUrl);
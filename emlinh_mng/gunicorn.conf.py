@@ -3,4 +3,10 @@ workers = 2
 timeout = 1200
 loglevel = "info"
 errorlog = "gunicorn-error.log"
-accesslog = "gunicorn-access.log"
\ No newline at end of file
+accesslog = "gunicorn-access.log"
+
+
+def post_worker_init(worker):
+    # Render worker thread chạy trong từng gunicorn worker (sau fork, kể cả khi preload_app)
+    from src.app.app import start_background_workers
+    start_background_workers(worker.wsgi)
@@ -0,0 +1,32 @@
+#!/usr/bin/env python3
+"""
+Script để chuyển embedding của bảng vectors từ list JSON sang blob nhị phân
+
+    python migrate_vector_embeddings.py [--dtype float32|float16] [--batch-size 500]
+
+Chạy sql/10_add_vector_embedding_blob.sql trước (hoặc create_tables.py với SQLite mới).
+"""
+
+import argparse
+
+from src.app.app import create_app
+from src.utils.embedding_codec import EMBEDDING_DTYPES, migrate_json_embeddings
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Migrate vectors.embedding (JSON) sang embedding_blob')
+    parser.add_argument('--dtype', choices=list(EMBEDDING_DTYPES), default=None,
+                        help='Kiểu lưu (mặc định EMBEDDING_STORAGE_DTYPE)')
+    parser.add_argument('--batch-size', type=int, default=500)
+    args = parser.parse_args()
+
+    app = create_app()
+    with app.app_context():
+        dtype = args.dtype or app.config.get('EMBEDDING_STORAGE_DTYPE', 'float32')
+        print(f"🔍 Chuyển embeddings JSON sang {dtype}...")
+        migrated = migrate_json_embeddings(batch_size=args.batch_size, dtype=dtype)
+        print(f"✅ Đã chuyển {migrated} embeddings")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,24 @@
+-- Bảng tts_jobs: Trạng thái TTS job dùng chung giữa các worker
+CREATE TABLE IF NOT EXISTS tts_jobs (
+    id SERIAL PRIMARY KEY,
+    job_id VARCHAR(255) UNIQUE NOT NULL,
+    status VARCHAR(50) DEFAULT 'starting', -- 'starting', 'generating_speech', ..., 'completed', 'failed'
+    progress INTEGER DEFAULT 0,
+    error TEXT,
+    data JSONB, -- Các trường còn lại của job (filename, wav_path, cache_key, ...)
+    start_time TIMESTAMP,
+    end_time TIMESTAMP,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Tạo index để tăng hiệu suất truy vấn
+CREATE INDEX IF NOT EXISTS idx_tts_jobs_job_id ON tts_jobs(job_id);
+CREATE INDEX IF NOT EXISTS idx_tts_jobs_status ON tts_jobs(status);
+CREATE INDEX IF NOT EXISTS idx_tts_jobs_updated_at ON tts_jobs(updated_at);
+
+-- Trigger để tự động cập nhật updated_at
+CREATE TRIGGER update_tts_jobs_updated_at 
+    BEFORE UPDATE ON tts_jobs 
+    FOR EACH ROW 
+    EXECUTE FUNCTION update_updated_at_column();
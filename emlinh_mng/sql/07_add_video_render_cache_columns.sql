@@ -0,0 +1,8 @@
+-- Thêm cột render cache cho bảng videos
+-- render_cache_key: SHA-256 của composition, props và hash nội dung audio/mouth cues
+-- cache_hit: TRUE nếu video được tái sử dụng từ render trước đó thay vì render lại
+
+ALTER TABLE videos ADD COLUMN IF NOT EXISTS render_cache_key VARCHAR(64);
+ALTER TABLE videos ADD COLUMN IF NOT EXISTS cache_hit BOOLEAN DEFAULT FALSE;
+
+CREATE INDEX IF NOT EXISTS idx_videos_render_cache_key ON videos(render_cache_key);
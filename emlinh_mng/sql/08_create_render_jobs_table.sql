@@ -0,0 +1,33 @@
+-- Bảng render_jobs: Hàng đợi render bền vững dùng chung giữa các worker
+CREATE TABLE IF NOT EXISTS render_jobs (
+    id SERIAL PRIMARY KEY,
+    job_id VARCHAR(255) UNIQUE NOT NULL,
+    composition_id VARCHAR(100) NOT NULL,
+    props JSONB,
+    output_path VARCHAR(500) NOT NULL,
+    priority INTEGER DEFAULT 5, -- Số nhỏ chạy trước: 0 = chat tương tác, 10 = batch
+    status VARCHAR(50) DEFAULT 'queued', -- 'queued', 'rendering', 'completed', 'failed'
+    progress INTEGER DEFAULT 0,
+    attempts INTEGER DEFAULT 0,
+    max_attempts INTEGER DEFAULT 3,
+    error TEXT,
+    data JSONB, -- Tiến độ chi tiết (frames, fps, eta_seconds, cache_hit, ...)
+    worker_id VARCHAR(255), -- "<hostname>:<pid>" của worker đang render
+    available_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP, -- Retry backoff
+    heartbeat_at TIMESTAMP,
+    start_time TIMESTAMP,
+    end_time TIMESTAMP,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Tạo index để tăng hiệu suất truy vấn
+CREATE INDEX IF NOT EXISTS idx_render_jobs_job_id ON render_jobs(job_id);
+CREATE INDEX IF NOT EXISTS idx_render_jobs_status ON render_jobs(status);
+CREATE INDEX IF NOT EXISTS idx_render_jobs_claim ON render_jobs(status, priority, available_at);
+
+-- Trigger để tự động cập nhật updated_at
+CREATE TRIGGER update_render_jobs_updated_at 
+    BEFORE UPDATE ON render_jobs 
+    FOR EACH ROW 
+    EXECUTE FUNCTION update_updated_at_column();
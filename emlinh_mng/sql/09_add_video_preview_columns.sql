@@ -0,0 +1,6 @@
+-- Thêm cột preview render cho bảng videos
+-- preview_path: file MP4 preview (scale thấp, fps thấp, x264 ultrafast) render trước bản full
+-- preview_status: 'completed' hoặc 'skipped' (render lỗi, hoặc bản full đã có trong render cache)
+
+ALTER TABLE videos ADD COLUMN IF NOT EXISTS preview_path VARCHAR(500);
+ALTER TABLE videos ADD COLUMN IF NOT EXISTS preview_status VARCHAR(50);
@@ -0,0 +1,7 @@
+-- Lưu embedding dạng nhị phân cho bảng vectors
+-- embedding_blob: mảng float little-endian (768 chiều: 3 KB float32 / 1.5 KB float16 thay vì ~15 KB JSON)
+-- embedding_dtype: 'float32' hoặc 'float16'
+-- Dữ liệu cũ ở cột embedding (JSON) được chuyển sang bằng: python migrate_vector_embeddings.py
+
+ALTER TABLE vectors ADD COLUMN IF NOT EXISTS embedding_blob BYTEA;
+ALTER TABLE vectors ADD COLUMN IF NOT EXISTS embedding_dtype VARCHAR(10);
@@ -27,9 +27,25 @@ def create_app(config_name=None):
     with app.app_context():
         db.create_all()
     
+    # TTS job store dùng chung database để status đúng trên mọi worker
+    from src.services.job_store import init_job_store
+    init_job_store(app)
+    
+    # Render queue bền vững; worker thread do entry point của server khởi động
+    # (start_background_workers), không chạy theo mỗi lần create_app()
+    from src.services.render_queue import init_render_queue
+    init_render_queue(app)
+    
     # Register routes
     from src.app.routes import register_routes
     register_routes(app)
     
     return app
 
+
+def start_background_workers(app):
+    """Khởi động render worker của process hiện tại (wsgi.py, run.py, hook gunicorn)"""
+    if app.config.get('RENDER_QUEUE_AUTOSTART'):
+        from src.services.video_service import get_video_service
+        with app.app_context():
+            get_video_service().start_render_workers()
@@ -93,10 +93,125 @@ class Config:
         
         return len(failed_dirs) == 0
     
+    # Render Scheduler Configuration (0 = tự tính theo số core và RAM của máy)
+    # RENDER_MAX_CONCURRENT (hoặc giá trị tự tính) là giới hạn job 'rendering' của render queue
+    # trên toàn bảng render_jobs, dùng chung cho mọi gunicorn worker; slot() trong process chỉ
+    # giới hạn thêm các render trực tiếp (preview) của chính process đó
+    RENDER_CONCURRENCY = int(os.environ.get('RENDER_CONCURRENCY', '0'))
+    RENDER_MAX_CONCURRENT = int(os.environ.get('RENDER_MAX_CONCURRENT', '0'))
+    RENDER_MAX_CONCURRENCY_PER_JOB = int(os.environ.get('RENDER_MAX_CONCURRENCY_PER_JOB', '8'))
+    RENDER_MEMORY_PER_TAB_MB = int(os.environ.get('RENDER_MEMORY_PER_TAB_MB', '512'))
+    RENDER_RESERVED_CORES = int(os.environ.get('RENDER_RESERVED_CORES', '1'))
+    
+    # Segment Render Configuration
+    # Chia video thành tối đa RENDER_SEGMENTS đoạn frame render song song (<= 1 = tắt),
+    # mỗi đoạn dài ít nhất RENDER_SEGMENT_MIN_SECONDS giây
+    RENDER_SEGMENTS = int(os.environ.get('RENDER_SEGMENTS', '0'))
+    RENDER_SEGMENT_MIN_SECONDS = float(os.environ.get('RENDER_SEGMENT_MIN_SECONDS', '15'))
+    
+    # Render Queue Configuration
+    # Job render lưu trong bảng render_jobs; lỗi được retry với backoff, job của worker chết
+    # (hoặc không heartbeat quá RENDER_QUEUE_HEARTBEAT_TIMEOUT giây) được đưa lại hàng đợi
+    RENDER_QUEUE_AUTOSTART = os.environ.get('RENDER_QUEUE_AUTOSTART', 'True').lower() == 'true'
+    RENDER_QUEUE_MAX_ATTEMPTS = int(os.environ.get('RENDER_QUEUE_MAX_ATTEMPTS', '3'))
+    RENDER_QUEUE_BACKOFF_SECONDS = float(os.environ.get('RENDER_QUEUE_BACKOFF_SECONDS', '30'))
+    RENDER_QUEUE_HEARTBEAT_TIMEOUT = float(os.environ.get('RENDER_QUEUE_HEARTBEAT_TIMEOUT', '300'))
+    # Render chạy quá thời gian này bị kill và job được retry (heartbeat không giữ job treo mãi)
+    RENDER_TIMEOUT_SECONDS = float(os.environ.get('RENDER_TIMEOUT_SECONDS', '1200'))
+    
+    # Render Cache Configuration
+    # Dùng lại MP4 của Video đã completed có cùng composition, props và nội dung audio/mouth cues
+    RENDER_CACHE_ENABLED = os.environ.get('RENDER_CACHE_ENABLED', 'True').lower() == 'true'
+    
+    # Preview Render Configuration
+    # Bản preview (độ phân giải thấp, fps thấp, x264 preset nhanh) render trước bản full
+    # trong chat flow để người dùng xem được sau vài giây
+    PREVIEW_ENABLED = os.environ.get('PREVIEW_ENABLED', 'True').lower() == 'true'
+    PREVIEW_SCALE = float(os.environ.get('PREVIEW_SCALE', '0.5'))
+    PREVIEW_FPS = int(os.environ.get('PREVIEW_FPS', '15'))
+    PREVIEW_X264_PRESET = os.environ.get('PREVIEW_X264_PRESET', 'ultrafast')
+    
+    # Batch Video Configuration (/api/videos/batch)
+    BATCH_MAX_TOPICS = int(os.environ.get('BATCH_MAX_TOPICS', '50'))
+    BATCH_MAX_PARALLEL = int(os.environ.get('BATCH_MAX_PARALLEL', '4'))  # Video chạy TTS/render cùng lúc
+    BATCH_SCRIPT_SIZE = int(os.environ.get('BATCH_SCRIPT_SIZE', '5'))  # Số chủ đề mỗi lần gọi LLM
+    BATCH_RENDER_TIMEOUT = int(os.environ.get('BATCH_RENDER_TIMEOUT', '3600'))  # Giây chờ một job render trong queue
+    
+    # Render Server Configuration
+    # Node sidecar (emlinh-remotion/render-server.mjs) bundle một lần và giữ Chromium mở;
+    # tắt hoặc thiếu node_modules thì quay về `npx remotion render` cho từng job
+    RENDER_SERVER_ENABLED = os.environ.get('RENDER_SERVER_ENABLED', 'True').lower() == 'true'
+    RENDER_SERVER_NODE = os.environ.get('RENDER_SERVER_NODE', 'node')
+    RENDER_SERVER_STARTUP_TIMEOUT = int(os.environ.get('RENDER_SERVER_STARTUP_TIMEOUT', '300'))
+    
+    # File cache metadata composition (mặc định: emlinh-remotion/.cache/compositions.json)
+    COMPOSITION_CACHE_FILE = os.environ.get('COMPOSITION_CACHE_FILE')
+    
+    # TTS Streaming Configuration
+    # Bật streaming để transcode song song với việc tải audio từ OpenAI
+    TTS_STREAMING = os.environ.get('TTS_STREAMING', 'True').lower() == 'true'
+    TTS_STREAM_CHUNK_SIZE = int(os.environ.get('TTS_STREAM_CHUNK_SIZE', '16384'))
+    
+    # TTS Worker Pool Configuration
+    # Số TTS job chạy đồng thời và số job tối đa được xếp hàng (vượt quá -> HTTP 429)
+    TTS_MAX_CONCURRENCY = int(os.environ.get('TTS_MAX_CONCURRENCY', '2'))
+    TTS_QUEUE_SIZE = int(os.environ.get('TTS_QUEUE_SIZE', '20'))
+    
+    # TTS Chunking Configuration
+    # Text dài hơn TTS_CHUNK_THRESHOLD ký tự được chia câu và tổng hợp song song (0 = tắt)
+    TTS_CHUNK_THRESHOLD = int(os.environ.get('TTS_CHUNK_THRESHOLD', '1200'))
+    TTS_CHUNK_MAX_CHARS = int(os.environ.get('TTS_CHUNK_MAX_CHARS', '600'))
+    TTS_CHUNK_WORKERS = int(os.environ.get('TTS_CHUNK_WORKERS', '4'))
+    
+    # Lip Sync Configuration
+    # 'native': ước lượng viseme bằng NumPy trong process; 'rhubarb': gọi Rhubarb (chậm hơn, cần cài đặt)
+    LIP_SYNC_ENGINE = os.environ.get('LIP_SYNC_ENGINE', 'native').lower()
+    
+    # TTS Job Store Configuration
+    # 'database': bảng tts_jobs dùng chung giữa các worker; 'memory': chỉ trong một process
+    TTS_JOB_STORE = os.environ.get('TTS_JOB_STORE', 'database').lower()
+    TTS_JOB_TTL_SECONDS = int(os.environ.get('TTS_JOB_TTL_SECONDS', '3600'))
+    
+    # Progress Bus Configuration (sự kiện tiến độ video cho SSE)
+    # 'sqlite': file SQLite dùng chung giữa các worker; 'memory': chỉ trong một process
+    PROGRESS_BUS = os.environ.get('PROGRESS_BUS', 'sqlite').lower()
+    PROGRESS_BUS_PATH = os.environ.get('PROGRESS_BUS_PATH')  # Mặc định: <tmp>/emlinh_progress.db
+    PROGRESS_BUS_TTL_SECONDS = int(os.environ.get('PROGRESS_BUS_TTL_SECONDS', '3600'))
+    PROGRESS_BUS_MAX_EVENTS = int(os.environ.get('PROGRESS_BUS_MAX_EVENTS', '200'))  # Ring buffer mỗi job
+    
+    # TTS Cache Configuration
+    # Mặc định emlinh_mng/.cache/tts: nằm ngoài public/ để Remotion không copy cache vào mỗi bundle
+    # (file được hardlink/copy sang public/audios khi dùng)
+    TTS_CACHE_ENABLED = os.environ.get('TTS_CACHE_ENABLED', 'True').lower() == 'true'
+    TTS_CACHE_DIR = os.environ.get('TTS_CACHE_DIR') or os.path.abspath(
+        os.path.join(os.path.dirname(__file__), '..', '..', '.cache', 'tts')
+    )
+    TTS_CACHE_MAX_BYTES = int(os.environ.get('TTS_CACHE_MAX_MB', '1024')) * 1024 * 1024
+    TTS_CACHE_MAX_ENTRIES = int(os.environ.get('TTS_CACHE_MAX_ENTRIES', '500'))
+    
     # Ollama Embedding Configuration
     OLLAMA_BASE_URL = os.environ.get('OLLAMA_BASE_URL') or 'http://192.168.1.10:11434'
     OLLAMA_EMBED_MODEL = os.environ.get('OLLAMA_EMBED_MODEL') or 'nomic-embed-text'
     EMBEDDING_DIMENSION = int(os.environ.get('EMBEDDING_DIMENSION', '768'))
+    EMBEDDING_STORAGE_DTYPE = os.environ.get('EMBEDDING_STORAGE_DTYPE', 'float32')  # Kiểu lưu Vector.embedding_blob: float32 | float16
+    OLLAMA_EMBED_BATCH_SIZE = int(os.environ.get('OLLAMA_EMBED_BATCH_SIZE', '32'))  # Số text mỗi request /api/embed
+    OLLAMA_EMBED_MAX_RETRIES = int(os.environ.get('OLLAMA_EMBED_MAX_RETRIES', '2'))
+    OLLAMA_EMBED_RETRY_BACKOFF = float(os.environ.get('OLLAMA_EMBED_RETRY_BACKOFF', '0.5'))
+    OLLAMA_CONNECT_TIMEOUT = float(os.environ.get('OLLAMA_CONNECT_TIMEOUT', '3.05'))
+    OLLAMA_READ_TIMEOUT = float(os.environ.get('OLLAMA_READ_TIMEOUT', '60'))
+    OLLAMA_POOL_SIZE = int(os.environ.get('OLLAMA_POOL_SIZE', '10'))  # Số connection keep-alive tới Ollama
+    OLLAMA_HTTP_RETRIES = int(os.environ.get('OLLAMA_HTTP_RETRIES', '2'))  # Retry lỗi kết nối/5xx ở tầng HTTP
+    OLLAMA_HTTP_BACKOFF = float(os.environ.get('OLLAMA_HTTP_BACKOFF', '0.3'))
+    
+    # Embedding Cache Configuration
+    EMBEDDING_CACHE_ENABLED = os.environ.get('EMBEDDING_CACHE_ENABLED', 'True').lower() == 'true'
+    EMBEDDING_CACHE_MAX_ENTRIES = int(os.environ.get('EMBEDDING_CACHE_MAX_ENTRIES', '2048'))  # LRU trong bộ nhớ
+    EMBEDDING_CACHE_PATH = os.environ.get('EMBEDDING_CACHE_PATH')  # File SQLite; để trống = chỉ cache bộ nhớ
+    EMBEDDING_CACHE_DISK_MAX_ENTRIES = int(os.environ.get('EMBEDDING_CACHE_DISK_MAX_ENTRIES', '100000'))
+    
+    # Vector Index Configuration (index NumPy cho tìm kiếm hội thoại tương tự)
+    VECTOR_INDEX_SYNC_WINDOW = int(os.environ.get('VECTOR_INDEX_SYNC_WINDOW', '1000'))  # Số id gần nhất được đối chiếu lại mỗi lần sync
+    VECTOR_INDEX_RESYNC_INTERVAL = int(os.environ.get('VECTOR_INDEX_RESYNC_INTERVAL', '300'))  # Giây giữa hai lần đối chiếu toàn bộ id
     
     # Facebook API Configuration
     FACEBOOK_ACCESS_TOKEN = os.environ.get('FACEBOOK_ACCESS_TOKEN')
@@ -138,6 +253,7 @@ class TestingConfig(Config):
     TESTING = True
     SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
     WTF_CSRF_ENABLED = False
+    RENDER_QUEUE_AUTOSTART = False
 
 # Configuration dictionary
 config = {
@@ -2,6 +2,9 @@ from src.app.extensions import db
 from datetime import datetime
 from sqlalchemy import Text, JSON
 import uuid
+import numpy as np
+
+from src.utils.embedding_codec import decode_embedding, encode_embedding
 
 class User(db.Model):
     """User model"""
@@ -78,6 +81,10 @@ class Video(db.Model):
     thumbnail_path = db.Column(db.String(500))
     related_chat_id = db.Column(db.Integer, db.ForeignKey('chats.id'))
     session_id = db.Column(db.String(255), index=True)
+    render_cache_key = db.Column(db.String(64), index=True)  # Digest của composition + props + asset
+    cache_hit = db.Column(db.Boolean, default=False)  # True nếu tái sử dụng MP4 đã render
+    preview_path = db.Column(db.String(500))  # Bản preview độ phân giải/fps thấp, có trước bản full
+    preview_status = db.Column(db.String(50))  # 'completed' hoặc 'skipped' (lỗi / bản full có sẵn trong render cache)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
@@ -106,6 +113,11 @@ class Video(db.Model):
             'thumbnail_path': self.thumbnail_path,
             'related_chat_id': self.related_chat_id,
             'session_id': self.session_id,
+            'render_cache_key': self.render_cache_key,
+            'cache_hit': bool(self.cache_hit),
+            'preview_path': self.preview_path,
+            'preview_status': self.preview_status,
+            'preview_url': f"/api/videos/{self.id}/preview" if self.preview_status == 'completed' else None,
             'created_at': self.created_at.isoformat() if self.created_at else None,
             'updated_at': self.updated_at.isoformat() if self.updated_at else None
         }
@@ -166,7 +178,9 @@ class Vector(db.Model):
     content_id = db.Column(db.Integer, index=True)  # ID tham chiếu đến nội dung gốc
     content_type = db.Column(db.String(50), nullable=False, index=True)  # 'chat', 'idea', 'plan'
     content_text = db.Column(db.Text, nullable=False)  # Nội dung text gốc
-    embedding = db.Column(JSON)  # Vector embedding as array of floats (stored as JSON)
+    embedding = db.Column(JSON)  # Legacy: list float dạng JSON (dòng cũ chưa migrate sang embedding_blob)
+    embedding_blob = db.Column(db.LargeBinary)  # Embedding nhị phân little-endian (xem embedding_codec)
+    embedding_dtype = db.Column(db.String(10))  # 'float32' | 'float16'
     meta_data = db.Column(db.JSON)  # Thông tin bổ sung dạng JSON (renamed from metadata)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -174,6 +188,19 @@ class Vector(db.Model):
     def __repr__(self):
         return f'<Vector {self.id} - {self.content_type}>'
     
+    def set_embedding(self, values, dtype=None):
+        """Lưu embedding dạng blob (float32 mặc định hoặc float16)"""
+        self.embedding_dtype = dtype or 'float32'
+        self.embedding_blob = encode_embedding(values, self.embedding_dtype)
+    
+    def get_embedding_array(self):
+        """Embedding dạng mảng NumPy (zero-copy từ blob; fallback cột JSON cũ) hoặc None"""
+        if self.embedding_blob is not None:
+            return decode_embedding(self.embedding_blob, self.embedding_dtype)
+        if self.embedding:
+            return np.asarray(self.embedding, dtype=np.float32)
+        return None
+    
     def to_dict(self):
         """Convert model to dictionary"""
         return {
@@ -236,6 +263,87 @@ class ChatSession(db.Model):
         last_chat = self.messages.order_by(Chat.timestamp.desc()).first()
         return last_chat.user_message if last_chat else None
 
+class TTSJob(db.Model):
+    """TTS job model - trạng thái job dùng chung giữa các gunicorn worker"""
+    __tablename__ = 'tts_jobs'
+    __table_args__ = {'extend_existing': True}
+    
+    id = db.Column(db.Integer, primary_key=True)
+    job_id = db.Column(db.String(255), unique=True, nullable=False, index=True)
+    status = db.Column(db.String(50), default='starting', index=True)
+    progress = db.Column(db.Integer, default=0)
+    error = db.Column(db.Text)
+    data = db.Column(JSON)  # Các trường còn lại của job (filename, wav_path, cache_key, ...)
+    start_time = db.Column(db.DateTime)
+    end_time = db.Column(db.DateTime)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
+    
+    def __repr__(self):
+        return f'<TTSJob {self.job_id} - {self.status}>'
+    
+    def to_dict(self):
+        """Convert model to job dictionary (cùng format với in-memory store)"""
+        job = dict(self.data or {})
+        job.update({
+            'status': self.status,
+            'progress': self.progress,
+            'error': self.error,
+            'start_time': self.start_time,
+            'end_time': self.end_time
+        })
+        return job
+
+class RenderJob(db.Model):
+    """Render job model - hàng đợi render bền vững, dùng chung giữa các gunicorn worker"""
+    __tablename__ = 'render_jobs'
+    __table_args__ = (
+        db.Index('idx_render_jobs_claim', 'status', 'priority', 'available_at'),
+        {'extend_existing': True}
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    job_id = db.Column(db.String(255), unique=True, nullable=False, index=True)
+    composition_id = db.Column(db.String(100), nullable=False)
+    props = db.Column(JSON)
+    output_path = db.Column(db.String(500), nullable=False)
+    priority = db.Column(db.Integer, default=5)  # Số nhỏ chạy trước (0: chat tương tác, 10: batch)
+    status = db.Column(db.String(50), default='queued', index=True)  # 'queued', 'rendering', 'completed', 'failed'
+    progress = db.Column(db.Integer, default=0)
+    attempts = db.Column(db.Integer, default=0)
+    max_attempts = db.Column(db.Integer, default=3)
+    error = db.Column(db.Text)
+    data = db.Column(JSON)  # Tiến độ chi tiết (frames, fps, eta_seconds, cache_hit, ...)
+    worker_id = db.Column(db.String(255))  # "<hostname>:<pid>" của worker đang render
+    available_at = db.Column(db.DateTime, default=datetime.utcnow)  # Retry backoff: chưa claim trước thời điểm này
+    heartbeat_at = db.Column(db.DateTime)
+    start_time = db.Column(db.DateTime)
+    end_time = db.Column(db.DateTime)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<RenderJob {self.job_id} - {self.status}>'
+    
+    def to_dict(self):
+        """Convert model to job dictionary (cùng format với render_jobs cũ của VideoService)"""
+        job = dict(self.data or {})
+        job.update({
+            'status': self.status,
+            'progress': self.progress,
+            'output_path': self.output_path,
+            'composition_id': self.composition_id,
+            'props': self.props or {},
+            'priority': self.priority,
+            'attempts': self.attempts,
+            'max_attempts': self.max_attempts,
+            'error': self.error,
+            'worker_id': self.worker_id,
+            'start_time': self.start_time,
+            'end_time': self.end_time
+        })
+        return job
+
 def generate_session_id():
     """Generate a unique session ID for chat"""
     return str(uuid.uuid4())
\ No newline at end of file
@@ -2,6 +2,11 @@ from flask import render_template, request, jsonify, session, send_file, abort,
 from src.app.extensions import db, csrf
 from src.services.flow_service import flow_service
 from src.services.chat_service import get_chat_service
+from src.services.tts_service import get_tts_service
+from src.services.video_service import get_video_service
+from src.services.embedding_service import get_embedding_service
+from src.services.progress_bus import get_progress_bus, publish_progress
+from src.utils.bounded_executor import QueueFullError
 from src.app.models import Chat, Idea, Video
 import threading
 import uuid
@@ -142,6 +147,20 @@ def register_routes(app):
             print(f"Error serving video {video_id}: {str(e)}")
             abort(500, f"Error serving video: {str(e)}")
 
+    @app.route('/api/videos/<int:video_id>/preview')
+    def serve_video_preview(video_id):
+        """Serve bản preview (độ phân giải và fps thấp), có trước khi render full xong"""
+        video = Video.query.get_or_404(video_id)
+        if video.preview_status != 'completed' or not video.preview_path or not os.path.exists(video.preview_path):
+            abort(404, "Preview not available")
+        
+        return send_file(
+            video.preview_path,
+            mimetype='video/mp4',
+            as_attachment=False,
+            download_name=os.path.basename(video.preview_path)
+        )
+
     @app.route('/api/videos/<int:video_id>', methods=['DELETE'])
     @csrf.exempt
     def delete_video(video_id):
@@ -157,6 +176,10 @@ def register_routes(app):
             if video.thumbnail_path and os.path.exists(video.thumbnail_path):
                 os.remove(video.thumbnail_path)
             
+            # Xóa bản preview nếu có
+            if video.preview_path and os.path.exists(video.preview_path):
+                os.remove(video.preview_path)
+            
             db.session.delete(video)
             db.session.commit()
             
@@ -269,6 +292,19 @@ def register_routes(app):
             data = request.get_json()
             query = data.get('query', '').strip()
             limit = data.get('limit', 5)
+            content_type = data.get('content_type')  # 'chat_user' | 'chat_ai'
+            session_id = data.get('session_id')
+            min_similarity = data.get('min_similarity')
+            if min_similarity is not None:
+                try:
+                    min_similarity = float(min_similarity)
+                except (TypeError, ValueError):
+                    min_similarity = None
+                if min_similarity is None or not -1.0 <= min_similarity <= 1.0:
+                    return jsonify({
+                        'success': False,
+                        'message': 'min_similarity phải là số trong khoảng [-1, 1]'
+                    }), 400
             
             if not query:
                 return jsonify({
@@ -277,7 +313,12 @@ def register_routes(app):
                 }), 400
             
             chat_service = get_chat_service()
-            results = chat_service.search_similar_conversations(query, limit)
+            results = chat_service.search_similar_conversations(
+                query, limit,
+                content_type=content_type,
+                session_id=session_id,
+                min_similarity=min_similarity
+            )
             
             return jsonify({
                 'success': True,
@@ -291,6 +332,22 @@ def register_routes(app):
                 'message': f'Lỗi server: {str(e)}'
             }), 500
 
+    @app.route('/api/embeddings/stats')
+    @csrf.exempt
+    def get_embedding_stats():
+        """Thống kê embedding cache (hit rate, số entry)"""
+        try:
+            return jsonify({
+                'success': True,
+                'cache': get_embedding_service().get_cache_stats()
+            })
+            
+        except Exception as e:
+            return jsonify({
+                'success': False,
+                'message': f'Lỗi server: {str(e)}'
+            }), 500
+
     # === Chat Session Management Routes ===
     
     @app.route('/api/chat/sessions')
@@ -609,7 +666,8 @@ def register_routes(app):
             
             return jsonify({
                 'success': True,
-                'jobs': jobs
+                'jobs': jobs,
+                'scheduler': video_service.get_scheduler_stats()
             })
             
         except Exception as e:
@@ -640,21 +698,24 @@ def register_routes(app):
                     'message': 'Text quá dài (tối đa 4000 ký tự)'
                 }), 400
             
-            # Tạo job ID trước
+            # Đưa job vào worker pool có giới hạn
             tts_service = get_tts_service()
-            job_id = f"tts_{int(datetime.now().timestamp())}"
-            
-            # Chạy TTS trong thread riêng
-            def run_tts():
-                tts_service.generate_speech(text, filename, job_id)
             
-            thread = threading.Thread(target=run_tts)
-            thread.daemon = True
-            thread.start()
+            try:
+                job_id, queue_position = tts_service.submit_speech(text, filename)
+            except QueueFullError as e:
+                response = jsonify({
+                    'success': False,
+                    'message': 'Hệ thống đang bận, vui lòng thử lại sau',
+                    'retry_after': e.retry_after
+                })
+                response.headers['Retry-After'] = str(e.retry_after)
+                return response, 429
             
             return jsonify({
                 'success': True,
                 'job_id': job_id,
+                'queue_position': queue_position,
                 'message': 'Bắt đầu tạo speech thành công'
             })
             
@@ -712,7 +773,9 @@ def register_routes(app):
             
             return jsonify({
                 'success': True,
-                'jobs': jobs
+                'jobs': jobs,
+                'cache': tts_service.get_cache_stats(),
+                'queue': tts_service.get_queue_stats()
             })
             
         except Exception as e:
@@ -744,33 +807,46 @@ def register_routes(app):
     def video_progress_stream(job_id):
         """
         Enhanced Server-Sent Events endpoint với auto-reconnection support
+        
+        Mỗi progress event có trường SSE `id:`; khi reconnect (header Last-Event-ID
+        hoặc query ?lastEventId=) chỉ gửi lại các event sau id đó.
         """
+        resume_from = request.headers.get('Last-Event-ID') or request.args.get('lastEventId') or 0
+        try:
+            resume_from = max(int(resume_from), 0)
+        except (TypeError, ValueError):
+            resume_from = 0
+        
         def generate_progress_events():
             import time
             import json
-            from collections import defaultdict
             
-            # Initialize progress store nếu chưa có
-            if not hasattr(app, 'video_progress_store'):
-                app.video_progress_store = defaultdict(list)
+            bus = get_progress_bus()
             
             # Send initial connection confirmation
-            yield f"data: {json.dumps({'type': 'connected', 'job_id': job_id, 'timestamp': datetime.now().isoformat()})}\n\n"
+            yield f"data: {json.dumps({'type': 'connected', 'job_id': job_id, 'resumed_from': resume_from, 'timestamp': datetime.now().isoformat()})}\n\n"
             
-            last_event_index = 0
-            max_wait = 600  # 10 minutes timeout (increased from 5)
-            wait_count = 0
+            last_event_id = resume_from
+            
+            # Job đã kết thúc và client đã nhận event cuối: đóng stream ngay
+            latest = bus.latest(job_id)
+            if latest and latest['id'] <= last_event_id and latest.get('step') in ['completed', 'failed']:
+                yield f"data: {json.dumps({'type': 'stream_end', 'job_id': job_id, 'final_step': latest.get('step'), 'timestamp': datetime.now().isoformat()})}\n\n"
+                return
+            
+            max_wait = 600  # Đóng stream nếu không có event mới trong 10 phút
             heartbeat_interval = 30  # Send heartbeat every 30 seconds
-            last_heartbeat = 0
+            last_activity = time.time()
             
-            print(f"📡 [SSE] Starting stream for job {job_id}")
+            print(f"📡 [SSE] Starting stream for job {job_id} (after event {last_event_id})")
             
-            while wait_count < max_wait:
+            while time.time() - last_activity < max_wait:
                 try:
-                    current_time = time.time()
+                    # Block tới khi có event mới (không poll), tối đa tới lần heartbeat kế tiếp
+                    events = bus.wait(job_id, last_event_id, timeout=heartbeat_interval)
                     
-                    # Send heartbeat để keep connection alive
-                    if current_time - last_heartbeat > heartbeat_interval:
+                    if not events:
+                        # Send heartbeat để keep connection alive
                         heartbeat_data = {
                             'type': 'heartbeat',
                             'job_id': job_id,
@@ -778,53 +854,32 @@ def register_routes(app):
                             'alive': True
                         }
                         yield f"data: {json.dumps(heartbeat_data)}\n\n"
-                        last_heartbeat = current_time
-                        print(f"💓 [SSE] Heartbeat sent for job {job_id}")
-                    
-                    # Check for new events cho job này
-                    events = app.video_progress_store.get(job_id, [])
+                        continue
                     
-                    if len(events) > last_event_index:
-                        print(f"📡 [SSE] Found {len(events) - last_event_index} new events for job {job_id}")
+                    last_activity = time.time()
+                    for event_data in events:
+                        last_event_id = event_data['id']
+                        yield f"id: {last_event_id}\ndata: {json.dumps(event_data)}\n\n"
                         
-                        # Send tất cả events mới
-                        for i in range(last_event_index, len(events)):
-                            event_data = events[i]
-                            print(f"📡 [SSE] Sending event: {event_data.get('step', 'unknown')}")
-                            yield f"data: {json.dumps(event_data)}\n\n"
+                        # Nếu completed hoặc failed, gửi final event và stop
+                        if event_data.get('step') in ['completed', 'failed']:
+                            print(f"📡 [SSE] Job {job_id} finished with step: {event_data.get('step')}")
                             
-                            # Nếu completed hoặc failed, gửi final event và stop
-                            if event_data.get('step') in ['completed', 'failed']:
-                                print(f"📡 [SSE] Job {job_id} finished with step: {event_data.get('step')}")
-                                
-                                # Send final goodbye message
-                                final_message = {
-                                    'type': 'stream_end',
-                                    'job_id': job_id,
-                                    'final_step': event_data.get('step'),
-                                    'timestamp': datetime.now().isoformat()
-                                }
-                                yield f"data: {json.dumps(final_message)}\n\n"
-                                
-                                # Cleanup - xóa events sau khi hoàn thành để tiết kiệm memory
-                                try:
-                                    if job_id in app.video_progress_store:
-                                        del app.video_progress_store[job_id]
-                                        print(f"🧹 [SSE] Cleaned up events for completed job {job_id}")
-                                except Exception as cleanup_error:
-                                    print(f"⚠️ [SSE] Cleanup error: {cleanup_error}")
-                                
-                                return
-                        
-                        last_event_index = len(events)
-                    
-                    # Short sleep to avoid busy waiting
-                    time.sleep(0.5)  # Check twice per second for responsiveness
-                    wait_count += 0.5
+                            # Send final goodbye message
+                            final_message = {
+                                'type': 'stream_end',
+                                'job_id': job_id,
+                                'final_step': event_data.get('step'),
+                                'timestamp': datetime.now().isoformat()
+                            }
+                            yield f"data: {json.dumps(final_message)}\n\n"
+                            
+                            # Không xóa events: tab khác / reconnect vẫn đọc được, bus tự evict theo TTL
+                            return
                     
                 except GeneratorExit:
                     print(f"🔌 [SSE] Client disconnected from job {job_id}")
-                    break
+                    return
                 except Exception as e:
                     print(f"❌ [SSE] Error in progress stream for job {job_id}: {str(e)}")
                     error_data = {
@@ -834,7 +889,7 @@ def register_routes(app):
                         'timestamp': datetime.now().isoformat()
                     }
                     yield f"data: {json.dumps(error_data)}\n\n"
-                    break
+                    return
             
             # Timeout reached
             print(f"⏰ [SSE] Timeout reached for job {job_id}")
@@ -870,12 +925,7 @@ def register_routes(app):
         Kiểm tra trạng thái của video job mà không cần SSE stream
         """
         try:
-            # Initialize progress store nếu chưa có
-            if not hasattr(app, 'video_progress_store'):
-                from collections import defaultdict
-                app.video_progress_store = defaultdict(list)
-            
-            events = app.video_progress_store.get(job_id, [])
+            events = get_progress_bus().events(job_id)
             
             if not events:
                 return jsonify({
@@ -906,6 +956,11 @@ def register_routes(app):
                     status_info['video_id'] = event_data['video_id']
                     status_info['video_url'] = f"/api/videos/{event_data['video_id']}/file"
             
+            # Preview đã sẵn sàng trong lúc bản full còn render
+            preview_event = next((e for e in reversed(events) if e.get('step') == 'preview_ready'), None)
+            if preview_event:
+                status_info['preview_url'] = preview_event.get('data', {}).get('preview_url')
+            
             return jsonify(status_info)
             
         except Exception as e:
@@ -921,44 +976,19 @@ def register_routes(app):
     def cleanup_old_progress():
         """
         Cleanup old progress events để tiết kiệm memory
+        
+        Progress bus đã tự evict job hết hạn (PROGRESS_BUS_TTL_SECONDS) và giới hạn số
+        event mỗi job; endpoint này chỉ chạy eviction ngay lập tức.
         """
         try:
-            if not hasattr(app, 'video_progress_store'):
-                return jsonify({
-                    'success': True,
-                    'message': 'Không có progress store nào để cleanup',
-                    'cleaned_jobs': 0
-                })
-            
-            # Tìm và xóa các jobs đã completed/failed cũ hơn 1 giờ
-            from datetime import datetime, timedelta
-            import json
-            
-            now = datetime.now()
-            cutoff_time = now - timedelta(hours=1)
-            jobs_to_remove = []
-            
-            for job_id, events in app.video_progress_store.items():
-                if events:
-                    latest_event = events[-1]
-                    if latest_event.get('step') in ['completed', 'failed']:
-                        try:
-                            event_time = datetime.fromisoformat(latest_event.get('timestamp', ''))
-                            if event_time < cutoff_time:
-                                jobs_to_remove.append(job_id)
-                        except:
-                            # Nếu không parse được timestamp, coi như cũ
-                            jobs_to_remove.append(job_id)
-            
-            # Xóa các jobs cũ
-            for job_id in jobs_to_remove:
-                del app.video_progress_store[job_id]
+            bus = get_progress_bus()
+            cleaned = bus.evict_expired()
             
             return jsonify({
                 'success': True,
-                'message': f'Đã cleanup {len(jobs_to_remove)} jobs cũ',
-                'cleaned_jobs': len(jobs_to_remove),
-                'remaining_jobs': len(app.video_progress_store)
+                'message': f'Đã cleanup {cleaned} jobs cũ',
+                'cleaned_jobs': cleaned,
+                'remaining_jobs': bus.job_count()
             })
             
         except Exception as e:
@@ -979,6 +1009,7 @@ def register_routes(app):
             background = data.get('background', 'office')
             voice = data.get('voice', 'nova')
             session_id = data.get('session_id')  # Nhận session_id từ request
+            preview = data.get('preview', app.config.get('PREVIEW_ENABLED', True))
             
             if not topic:
                 return jsonify({
@@ -1007,7 +1038,8 @@ def register_routes(app):
                         voice=voice,
                         job_id=job_id,
                         app_instance=app,  # Truyền app instance từ route context
-                        session_id=session_id  # Truyền session_id để lưu progress vào database
+                        session_id=session_id,  # Truyền session_id để lưu progress vào database
+                        preview=bool(preview)
                     )
                     
                     print(f"🎬 [API] Video production completed for job: {job_id}")
@@ -1016,20 +1048,7 @@ def register_routes(app):
                     print(f"❌ [API] Video production failed for job {job_id}: {str(e)}")
                     # Store error event using app instance
                     try:
-                        from collections import defaultdict
-                        
-                        if not hasattr(app, 'video_progress_store'):
-                            app.video_progress_store = defaultdict(list)
-                        
-                        error_event = {
-                            'job_id': job_id,
-                            'step': 'failed',
-                            'message': f'Lỗi tạo video: {str(e)}',
-                            'progress': 0,
-                            'data': {'error': str(e)},
-                            'timestamp': datetime.now().isoformat()
-                        }
-                        app.video_progress_store[job_id].append(error_event)
+                        publish_progress(job_id, 'failed', f'Lỗi tạo video: {str(e)}', 0, {'error': str(e)})
                         print(f"✅ [API] Error event stored for job: {job_id}")
                     except Exception as store_error:
                         print(f"❌ [API] Failed to store error event: {str(store_error)}")
@@ -1051,6 +1070,118 @@ def register_routes(app):
                 'message': f'Lỗi server: {str(e)}'
             }), 500
 
+    @app.route('/api/videos/batch', methods=['POST'])
+    @csrf.exempt
+    def create_video_batch():
+        """
+        Tạo nhiều video từ danh sách chủ đề trong một request
+        
+        Tiến độ từng video và tổng được đẩy qua SSE /api/video-progress/<batch_id>
+        (step 'batch_progress'), trạng thái mới nhất ở GET /api/videos/batch/<batch_id>.
+        """
+        try:
+            from .config import Config
+            
+            data = request.get_json() or {}
+            topics = [str(t).strip() for t in data.get('topics', []) if str(t).strip()]
+            duration = data.get('duration', 15)
+            composition = data.get('composition', 'Scene-Landscape')
+            background = data.get('background', 'office')
+            voice = data.get('voice', 'nova')
+            
+            if not topics:
+                return jsonify({
+                    'success': False,
+                    'message': 'Vui lòng cung cấp danh sách chủ đề'
+                }), 400
+            if len(topics) > Config.BATCH_MAX_TOPICS:
+                return jsonify({
+                    'success': False,
+                    'message': f'Tối đa {Config.BATCH_MAX_TOPICS} chủ đề mỗi batch'
+                }), 400
+            
+            batch_id = f"batch_{int(datetime.now().timestamp())}_{uuid.uuid4().hex[:8]}"
+            # Trạng thái batch nằm trong progress bus (mọi worker đọc được, hết hạn theo TTL của bus);
+            # mỗi event mang snapshot đầy đủ để GET /api/videos/batch/<batch_id> chỉ cần event cuối
+            batch_state = {
+                'batch_id': batch_id,
+                'items': [{'index': i, 'topic': t, 'status': 'queued', 'progress': 0} for i, t in enumerate(topics)],
+                'aggregate': {'total': len(topics), 'queued': len(topics), 'in_progress': 0,
+                              'completed': 0, 'failed': 0, 'progress': 0}
+            }
+            batch_lock = threading.Lock()
+            
+            def store_batch_event(step, message, progress, data):
+                publish_progress(batch_id, step, message, progress, data)
+            
+            store_batch_event('batch_queued', f'Đã nhận {len(topics)} chủ đề', 0, batch_state)
+            
+            def on_progress(event):
+                item, aggregate = event['item'], event['aggregate']
+                with batch_lock:
+                    batch_state['items'][item['index']] = item
+                    batch_state['aggregate'] = aggregate
+                    store_batch_event(
+                        'batch_progress',
+                        f"[{item['index'] + 1}/{aggregate['total']}] {item['topic']}: {item['status']}",
+                        aggregate['progress'],
+                        dict(event, batch_id=batch_id, items=list(batch_state['items']))
+                    )
+            
+            def run_batch():
+                try:
+                    from ..services.video_production_flow import create_videos_from_topics
+                    
+                    with app.app_context():
+                        result = create_videos_from_topics(
+                            topics, duration=duration, composition=composition, background=background,
+                            voice=voice, batch_id=batch_id, progress_callback=on_progress
+                        )
+                    aggregate = result['aggregate']
+                    store_batch_event(
+                        'completed' if result['success'] else 'failed',
+                        f"Batch xong: {aggregate['completed']}/{aggregate['total']} video thành công",
+                        100,
+                        result
+                    )
+                except Exception as e:
+                    print(f"❌ [API] Batch {batch_id} failed: {str(e)}")
+                    with batch_lock:
+                        store_batch_event('failed', f'Lỗi tạo batch video: {str(e)}', 0,
+                                          dict(batch_state, error=str(e)))
+            
+            thread = threading.Thread(target=run_batch, name=f"video-{batch_id}", daemon=True)
+            thread.start()
+            
+            return jsonify({
+                'success': True,
+                'batch_id': batch_id,
+                'total': len(topics),
+                'message': 'Batch video creation initiated. Use SSE endpoint to track progress.'
+            })
+            
+        except Exception as e:
+            return jsonify({
+                'success': False,
+                'message': f'Lỗi server: {str(e)}'
+            }), 500
+
+    @app.route('/api/videos/batch/<batch_id>')
+    def get_video_batch(batch_id):
+        """Trạng thái mới nhất của batch video (snapshot trong event cuối trên progress bus)"""
+        batch = None
+        for event in reversed(get_progress_bus().events(batch_id)):
+            event_data = event.get('data') or {}
+            if 'items' in event_data:
+                batch = {key: event_data[key] for key in ('batch_id', 'items', 'aggregate')}
+                break
+        if batch is None:
+            return jsonify({
+                'success': False,
+                'message': 'Batch không tồn tại'
+            }), 404
+        return jsonify({'success': True, **batch})
+
     # Ideas management endpoints
     @app.route('/api/ideas')
     @csrf.exempt
@@ -2,7 +2,7 @@ import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
 
-from src.app.app import create_app
+from src.app.app import create_app, start_background_workers
 
 app = create_app()
 
@@ -14,6 +14,7 @@ if __name__ == '__main__':
     # Configure based on environment
     if is_production or is_docker:
         # Production/Docker environment
+        start_background_workers(app)
         app.run(
             debug=False, 
             host='0.0.0.0', 
@@ -21,4 +22,7 @@ if __name__ == '__main__':
         )
     else:
         # Development environment
+        # Reloader chạy app trong process con; process giám sát không chạy render worker
+        if os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+            start_background_workers(app)
         app.run(debug=True, host='0.0.0.0', port=5000)
\ No newline at end of file
@@ -1,17 +1,25 @@
 import json
 import logging
+import threading
+import time
 from datetime import datetime
 from typing import Dict, List, Optional
 from flask import current_app
+from sqlalchemy.orm import load_only
+from ..app.config import Config
 from ..app.models import Chat, ChatSession, Idea, Vector, generate_session_id
 from ..app.extensions import db
 from .embedding_service import get_embedding_service
 from .flow_service import flow_service
 from .logic.response_generator import ResponseGenerator
 from .logic.idea_manager import IdeaManager
+from ..utils.vector_index import VectorIndex
 
 logger = logging.getLogger(__name__)
 
+# content_type của vector sinh ra từ chat (tin nhắn user và phản hồi AI)
+CHAT_CONTENT_TYPES = ('chat_user', 'chat_ai')
+
 class ChatService:
     """Service để xử lý chat logic và tích hợp với AI"""
     
@@ -19,6 +27,13 @@ class ChatService:
         self.embedding_service = get_embedding_service()
         self.response_generator = ResponseGenerator(flow_service)
         self.idea_manager = IdeaManager(db.session)
+        
+        # Index NumPy cho bảng vectors: load một lần, sau đó chỉ đọc thêm các dòng mới
+        self._vector_index = VectorIndex()
+        self._vector_index_synced_id = 0
+        self._vector_index_resynced_at: Optional[float] = None
+        self._vector_index_skipped = set()  # Dòng không đưa vào index: embedding không hợp lệ hoặc chat đã bị xóa
+        self._vector_index_lock = threading.Lock()
     
     def send_message(self, user_message: str, session_id: str = None, message_type: str = 'conversation') -> Dict:
         """
@@ -109,16 +124,21 @@ class ChatService:
             logger.error(f"Error in get_chat_history: {str(e)}")
             return []
     
-    def search_similar_conversations(self, query: str, limit: int = 5) -> List[Dict]:
+    def search_similar_conversations(self, query: str, limit: int = 5, content_type: str = None,
+                                     session_id: str = None, min_similarity: float = None) -> List[Dict]:
         """
-        Tìm kiếm các cuộc hội thoại tương tự
+        Tìm kiếm các cuộc hội thoại tương tự (top-k cosine similarity trên bảng vectors)
         
         Args:
             query (str): Câu truy vấn
             limit (int): Số lượng kết quả tối đa
+            content_type (str): Chỉ tìm trong 'chat_user' hoặc 'chat_ai' (mặc định cả hai)
+            session_id (str): Chỉ tìm trong một session
+            min_similarity (float): Bỏ kết quả có similarity thấp hơn ngưỡng
             
         Returns:
-            List[Dict]: Danh sách cuộc hội thoại tương tự
+            List[Dict]: Danh sách cuộc hội thoại tương tự (Chat.to_dict() kèm similarity,
+            matched_type), similarity giảm dần
         """
         try:
             # Tạo embedding cho query
@@ -126,14 +146,112 @@ class ChatService:
             if not query_embedding:
                 return []
             
-            # Tìm kiếm trong vectors table (cần implement function search tương tự)
-            # Tạm thời trả về empty, sẽ implement sau khi có pgvector
-            return []
+            self._sync_vector_index()
+            content_types = [content_type] if content_type else CHAT_CONTENT_TYPES
+            
+            # Vector của chat đã bị xóa ở worker khác được bỏ khỏi index rồi tìm lại để đủ limit
+            for _ in range(3):
+                # Mỗi chat có tối đa 2 vector (user + AI) nên lấy dư để còn đủ limit chat sau khi gộp
+                k = limit * 2
+                matches = self._vector_index.search(
+                    query_embedding,
+                    k=k,
+                    content_types=content_types,
+                    session_id=session_id,
+                    min_similarity=min_similarity
+                )
+                
+                # Giữ vector khớp nhất của mỗi chat
+                best_matches = {}
+                for match in matches:
+                    if match['content_id'] is not None and match['content_id'] not in best_matches:
+                        best_matches[match['content_id']] = match
+                
+                chats = {chat.id: chat for chat in Chat.query.filter(Chat.id.in_(list(best_matches))).all()}
+                
+                orphaned = [m['vector_id'] for m in matches if m['content_id'] is not None and m['content_id'] not in chats]
+                if orphaned:
+                    with self._vector_index_lock:
+                        self._vector_index.remove(orphaned)
+                        self._vector_index_skipped.update(orphaned)
+                
+                results = []
+                for chat_id, match in best_matches.items():
+                    chat = chats.get(chat_id)
+                    if chat is None:
+                        continue
+                    result = chat.to_dict()
+                    result['similarity'] = match['similarity']
+                    result['matched_type'] = match['content_type']
+                    results.append(result)
+                    if len(results) >= limit:
+                        break
+                
+                if not orphaned or len(results) >= limit or len(matches) < k:
+                    break
+            return results
             
         except Exception as e:
             logger.error(f"Error in search_similar_conversations: {str(e)}")
             return []
     
+    def _sync_vector_index(self):
+        """
+        Đưa các dòng vectors mới (kể cả do worker khác ghi) vào index
+        
+        Trên PostgreSQL id được cấp lúc insert nhưng transaction có thể commit muộn, nên
+        mỗi lần sync đối chiếu lại VECTOR_INDEX_SYNC_WINDOW id gần nhất thay vì chỉ id lớn
+        hơn id đã sync. Mỗi VECTOR_INDEX_RESYNC_INTERVAL giây đối chiếu toàn bộ id để thêm
+        dòng còn thiếu và bỏ vector đã bị worker khác xóa. Chỉ đọc cột id khi đối chiếu.
+        """
+        with self._vector_index_lock:
+            now = time.monotonic()
+            full = self._vector_index_resynced_at is None or \
+                now - self._vector_index_resynced_at >= Config.VECTOR_INDEX_RESYNC_INTERVAL
+            min_id = 0 if full else max(0, self._vector_index_synced_id - Config.VECTOR_INDEX_SYNC_WINDOW)
+            
+            # Chụp index trước khi đọc DB: vector vừa được _create_embeddings thêm không bị coi là đã xóa
+            indexed = self._vector_index.vector_ids()
+            db_ids = {row[0] for row in db.session.query(Vector.id).filter(Vector.id > min_id)}
+            missing = sorted(db_ids - indexed - self._vector_index_skipped)
+            
+            added = 0
+            for start in range(0, len(missing), 500):
+                # Không load content_text; embedding_blob được đọc bằng np.frombuffer
+                rows = Vector.query.options(load_only(
+                    Vector.id, Vector.content_id, Vector.content_type, Vector.meta_data,
+                    Vector.embedding_blob, Vector.embedding_dtype, Vector.embedding
+                )).filter(Vector.id.in_(missing[start:start + 500])).all()
+                for vector in rows:
+                    if self._index_vector(vector):
+                        added += 1
+                    else:
+                        self._vector_index_skipped.add(vector.id)
+            if db_ids:
+                self._vector_index_synced_id = max(self._vector_index_synced_id, max(db_ids))
+            
+            removed = 0
+            if full:
+                removed = self._vector_index.remove(indexed - db_ids)
+                self._vector_index_skipped &= db_ids
+                self._vector_index_resynced_at = now
+            
+            if added or removed:
+                logger.info(f"Vector index: added {added}, removed {removed} vectors ({len(self._vector_index)} total)")
+    
+    def _index_vector(self, vector: Vector) -> bool:
+        """Thêm một dòng Vector vào index, False nếu embedding rỗng hoặc không hợp lệ"""
+        embedding = vector.get_embedding_array()
+        if embedding is None:
+            return False
+        return self._vector_index.add(
+            vector.id,
+            embedding,
+            vector.content_id,
+            vector.content_type,
+            (vector.meta_data or {}).get('session_id')
+        )
+    
     def _get_context(self, user_message: str, session_id: str) -> str:
         """Lấy context từ lịch sử chat và similar content"""
         try:
@@ -171,32 +289,39 @@ class ChatService:
     def _create_embeddings(self, chat: Chat):
         """Tạo và lưu embeddings cho chat"""
         try:
-            # Tạo embedding cho user message
-            user_embedding = self.embedding_service.get_embedding(chat.user_message)
+            # Một request cho cả user message và AI response
+            user_embedding, ai_embedding = self.embedding_service.get_embeddings_batch(
+                [chat.user_message, chat.ai_response]
+            )
+            user_vector = ai_vector = None
+            
             if user_embedding:
                 user_vector = Vector(
                     content_id=chat.id,
                     content_type='chat_user',
                     content_text=chat.user_message,
-                    embedding=user_embedding,  # Lưu trực tiếp list thay vì JSON string
                     meta_data={'session_id': chat.session_id, 'message_type': chat.message_type}
                 )
+                user_vector.set_embedding(user_embedding, Config.EMBEDDING_STORAGE_DTYPE)
                 db.session.add(user_vector)
             
-            # Tạo embedding cho AI response
-            ai_embedding = self.embedding_service.get_embedding(chat.ai_response)
             if ai_embedding:
                 ai_vector = Vector(
                     content_id=chat.id,
                     content_type='chat_ai',
                     content_text=chat.ai_response,
-                    embedding=ai_embedding,  # Lưu trực tiếp list thay vì JSON string
                     meta_data={'session_id': chat.session_id, 'message_type': chat.message_type}
                 )
+                ai_vector.set_embedding(ai_embedding, Config.EMBEDDING_STORAGE_DTYPE)
                 db.session.add(ai_vector)
             
             db.session.commit()
             
+            # Cập nhật index ngay, không chờ lần search sau
+            for vector in (user_vector, ai_vector):
+                if vector is not None:
+                    self._index_vector(vector)
+            
         except Exception as e:
             logger.error(f"Error creating embeddings: {str(e)}")
             # Không rollback vì chat đã được lưu thành công
@@ -421,6 +546,14 @@ class ChatService:
             Dict: Kết quả xóa
         """
         try:
+            # Xóa vectors của các tin nhắn trong session
+            chat_ids = db.session.query(Chat.id).filter_by(session_id=session_id)
+            vector_ids = [row.id for row in db.session.query(Vector.id).filter(
+                Vector.content_id.in_(chat_ids), Vector.content_type.in_(CHAT_CONTENT_TYPES)
+            ).all()]
+            if vector_ids:
+                Vector.query.filter(Vector.id.in_(vector_ids)).delete(synchronize_session=False)
+            
             # Xóa tất cả tin nhắn trong session
             Chat.query.filter_by(session_id=session_id).delete()
             
@@ -428,6 +561,7 @@ class ChatService:
             ChatSession.query.filter_by(session_id=session_id).delete()
             
             db.session.commit()
+            self._vector_index.remove(vector_ids)
             return {'success': True, 'message': 'Session đã được xóa'}
             
         except Exception as e:
@@ -1,18 +1,88 @@
 import requests
 import json
 import logging
-from typing import List, Optional
+import time
+from typing import Any, Dict, List, Optional
 from flask import current_app
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import ProtocolError
+from urllib3.util.retry import Retry
+
+from ..app.config import Config
+from ..utils.embedding_cache import EmbeddingCache
 
 logger = logging.getLogger(__name__)
 
+
+def create_ollama_session(pool_size: int = None, retries: int = None, backoff_factor: float = None) -> requests.Session:
+    """
+    Tạo requests.Session dùng chung cho Ollama: connection pool keep-alive và retry
+    ở tầng HTTP cho lỗi không kết nối được và 5xx.
+    
+    POST /api/embed không có side effect nên được phép retry. Lỗi sau khi request đã gửi
+    (read timeout, connection reset) không retry ở đây (read=0) mà để _embed_with_retry
+    xử lý, tránh nhân số lần thử của hai tầng.
+    """
+    pool_size = pool_size or Config.OLLAMA_POOL_SIZE
+    retries = Config.OLLAMA_HTTP_RETRIES if retries is None else retries
+    backoff_factor = Config.OLLAMA_HTTP_BACKOFF if backoff_factor is None else backoff_factor
+    
+    retry = Retry(
+        total=retries,
+        connect=retries,
+        read=0,
+        status=retries,
+        backoff_factor=backoff_factor,
+        status_forcelist=(500, 502, 503, 504),
+        allowed_methods=frozenset({'GET', 'POST'}),
+        raise_on_status=False  # Trả về response 5xx cuối cùng để caller log nội dung lỗi
+    )
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=retry)
+    
+    session = requests.Session()
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    session.headers.update({'Content-Type': 'application/json', 'Connection': 'keep-alive'})
+    return session
+
+
+def _is_retryable(error: Exception) -> bool:
+    """Lỗi xảy ra sau khi request đã tới Ollama (session không retry, xem create_ollama_session)"""
+    if isinstance(error, (ValueError, requests.exceptions.ReadTimeout, requests.exceptions.ChunkedEncodingError)):
+        return True
+    if isinstance(error, requests.exceptions.ConnectionError) and not isinstance(error, requests.exceptions.ConnectTimeout):
+        # Connection reset/đóng khi chờ response; lỗi mở kết nối (refused...) session đã retry
+        reason = getattr(error.args[0], 'reason', None) if error.args else None
+        return isinstance(reason, ProtocolError)
+    return False
+
+
 class OllamaEmbeddingService:
     """Service để tương tác với Ollama API cho embedding"""
     
-    def __init__(self, base_url: str = None, model: str = None):
+    def __init__(self, base_url: str = None, model: str = None, batch_size: int = None, max_retries: int = None):
         self.base_url = base_url or current_app.config.get('OLLAMA_BASE_URL', 'http://192.168.1.10:11434')
         self.model = model or current_app.config.get('OLLAMA_EMBED_MODEL', 'nomic-embed-text')
         self.embed_endpoint = f"{self.base_url}/api/embed"
+        self.batch_size = max(1, batch_size or Config.OLLAMA_EMBED_BATCH_SIZE)
+        self.max_retries = Config.OLLAMA_EMBED_MAX_RETRIES if max_retries is None else max_retries
+        self.retry_backoff = Config.OLLAMA_EMBED_RETRY_BACKOFF
+        # (connect, read): fail nhanh khi host không tới được, nhưng chờ đủ lâu cho model tính embedding
+        self.timeout = (Config.OLLAMA_CONNECT_TIMEOUT, Config.OLLAMA_READ_TIMEOUT)
+        # Dùng lại connection (keep-alive) giữa các lần gọi
+        self.session = create_ollama_session()
+        
+        # Cache theo (model, text đã chuẩn hóa): LRU trong bộ nhớ + SQLite tùy chọn
+        self.cache = None
+        if Config.EMBEDDING_CACHE_ENABLED:
+            try:
+                self.cache = EmbeddingCache(
+                    max_entries=Config.EMBEDDING_CACHE_MAX_ENTRIES,
+                    disk_path=Config.EMBEDDING_CACHE_PATH,
+                    max_disk_entries=Config.EMBEDDING_CACHE_DISK_MAX_ENTRIES
+                )
+            except Exception as e:
+                logger.warning(f"Embedding cache disabled: {e}")
         
     def get_embedding(self, text: str) -> Optional[List[float]]:
         """
@@ -24,56 +94,97 @@ class OllamaEmbeddingService:
         Returns:
             List[float]: Vector embedding hoặc None nếu có lỗi
         """
-        try:
-            payload = {
-                "model": self.model,
-                "input": text
-            }
-            
-            response = requests.post(
-                self.embed_endpoint,
-                json=payload,
-                headers={'Content-Type': 'application/json'},
-                timeout=30
-            )
-            
-            if response.status_code == 200:
-                result = response.json()
-                # Ollama API trả về embedding trong trường 'embeddings'
-                embeddings = result.get('embeddings', [])
-                if embeddings and len(embeddings) > 0:
-                    return embeddings[0]  # Lấy embedding đầu tiên
-                else:
-                    logger.error(f"No embeddings found in response: {result}")
-                    return None
-            else:
-                logger.error(f"Ollama API error: {response.status_code} - {response.text}")
-                return None
-                
-        except requests.exceptions.RequestException as e:
-            logger.error(f"Request error when calling Ollama API: {str(e)}")
-            return None
-        except json.JSONDecodeError as e:
-            logger.error(f"JSON decode error: {str(e)}")
-            return None
-        except Exception as e:
-            logger.error(f"Unexpected error in get_embedding: {str(e)}")
-            return None
+        if self.cache:
+            cached = self.cache.get(self.model, text)
+            if cached is not None:
+                return cached
+        
+        embedding = self._fetch_embedding(text)
+        if embedding is not None and self.cache:
+            self.cache.put(self.model, text, embedding)
+        return embedding
     
-    def get_embeddings_batch(self, texts: List[str]) -> List[Optional[List[float]]]:
+    def _fetch_embedding(self, text: str) -> Optional[List[float]]:
+        """Gọi Ollama cho một text (không qua cache)"""
+        embeddings = self._embed_with_retry([text])
+        return embeddings[0] if embeddings else None
+    
+    def get_embeddings_batch(self, texts: List[str], batch_size: int = None) -> List[Optional[List[float]]]:
         """
         Lấy embedding cho nhiều text cùng lúc
         
+        Gửi mỗi sub-batch (tối đa batch_size text) trong một request /api/embed
+        (trường input là list). Sub-batch lỗi được retry riêng; nếu vẫn lỗi thì các
+        vị trí tương ứng là None, các sub-batch khác không bị ảnh hưởng.
+        Text đã có trong cache không được gửi, text trùng nhau chỉ gửi một lần.
+        
         Args:
             texts (List[str]): Danh sách các text cần tạo embedding
+            batch_size (int): Số text mỗi request (mặc định OLLAMA_EMBED_BATCH_SIZE)
             
         Returns:
-            List[Optional[List[float]]]: Danh sách các vector embedding
+            List[Optional[List[float]]]: Danh sách các vector embedding, cùng thứ tự với texts
+        """
+        batch_size = max(1, batch_size or self.batch_size)
+        embeddings: List[Optional[List[float]]] = [None] * len(texts)
+        
+        # text cần gọi Ollama -> các vị trí trong texts
+        pending: Dict[str, List[int]] = {}
+        for index, text in enumerate(texts):
+            cached = self.cache.get(self.model, text) if self.cache else None
+            if cached is not None:
+                embeddings[index] = cached
+            else:
+                pending.setdefault(text, []).append(index)
+        
+        unique_texts = list(pending)
+        for start in range(0, len(unique_texts), batch_size):
+            chunk = unique_texts[start:start + batch_size]
+            chunk_embeddings = self._embed_with_retry(chunk)
+            if chunk_embeddings is None:
+                continue
+            for text, embedding in zip(chunk, chunk_embeddings):
+                if self.cache:
+                    self.cache.put(self.model, text, embedding)
+                for index in pending[text]:
+                    embeddings[index] = embedding
+        return embeddings
+    
+    def _embed_with_retry(self, texts: List[str]) -> Optional[List[List[float]]]:
+        """
+        Gọi _embed_request, retry với backoff tăng dần; None nếu hết số lần thử
+        
+        Chỉ retry lỗi session không retry (read timeout, connection reset giữa chừng,
+        response thiếu embeddings); lỗi kết nối và 5xx đã được retry ở tầng HTTP.
         """
-        embeddings = []
-        for text in texts:
-            embedding = self.get_embedding(text)
-            embeddings.append(embedding)
+        for attempt in range(self.max_retries + 1):
+            try:
+                return self._embed_request(texts)
+            except (requests.exceptions.RequestException, ValueError) as e:
+                if not _is_retryable(e):
+                    logger.error(f"Embedding batch of {len(texts)} failed: {str(e)}")
+                    return None
+                if attempt >= self.max_retries:
+                    logger.error(f"Embedding batch of {len(texts)} failed after {attempt + 1} attempts: {str(e)}")
+                    return None
+                delay = self.retry_backoff * (2 ** attempt)
+                logger.warning(f"Embedding batch of {len(texts)} failed ({str(e)}), retrying in {delay:.1f}s")
+                time.sleep(delay)
+        return None
+    
+    def _embed_request(self, texts: List[str]) -> List[List[float]]:
+        """Một request /api/embed cho cả list text, lỗi thì raise"""
+        response = self.session.post(
+            self.embed_endpoint,
+            json={"model": self.model, "input": texts},
+            timeout=self.timeout
+        )
+        if response.status_code != 200:
+            raise requests.exceptions.HTTPError(f"Ollama API error: {response.status_code} - {response.text}")
+        # json.JSONDecodeError là subclass của ValueError
+        embeddings = response.json().get('embeddings') or []
+        if len(embeddings) != len(texts):
+            raise ValueError(f"Expected {len(texts)} embeddings, got {len(embeddings)}")
         return embeddings
     
     def test_connection(self) -> bool:
@@ -84,11 +195,18 @@ class OllamaEmbeddingService:
             bool: True nếu kết nối thành công
         """
         try:
-            test_embedding = self.get_embedding("test connection")
+            # Không qua cache để thật sự gọi tới Ollama
+            test_embedding = self._fetch_embedding("test connection")
             return test_embedding is not None
         except Exception as e:
             logger.error(f"Connection test failed: {str(e)}")
             return False
+    
+    def get_cache_stats(self) -> Dict[str, Any]:
+        """Lấy thống kê embedding cache (hit rate, số entry từng tầng)"""
+        if not self.cache:
+            return {'enabled': False}
+        return {'enabled': True, 'model': self.model, **self.cache.get_stats()}
 
 # Singleton instance
 _embedding_service = None
@@ -0,0 +1,282 @@
+"""
+Job Store - Lưu trạng thái TTS job, dùng chung được giữa các gunicorn worker
+
+Hai backend:
+    - InMemoryJobStore: dict + lock, chỉ đúng trong một process
+    - SQLAlchemyJobStore: bảng tts_jobs trong database của app (SQLite/PostgreSQL)
+
+Cả hai đều hỗ trợ TTL eviction và chuyển trạng thái nguyên tử (transition).
+"""
+
+import copy
+import threading
+import time
+from contextlib import nullcontext
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, Optional
+
+from ..app.config import Config
+
+
+# Job ở các trạng thái này đã kết thúc, không được chuyển sang trạng thái khác
+TERMINAL_STATUSES = ('completed', 'failed')
+
+
+class InMemoryJobStore:
+    """Job store trong bộ nhớ của process hiện tại"""
+
+    def __init__(self, ttl_seconds: int = 3600):
+        self.ttl_seconds = ttl_seconds
+        self._jobs: Dict[str, Dict[str, Any]] = {}
+        self._updated_at: Dict[str, datetime] = {}
+        self._lock = threading.Lock()
+
+    def create(self, job_id: str, data: Dict[str, Any]):
+        """Tạo (hoặc ghi đè) job"""
+        self.evict_expired()
+        with self._lock:
+            self._jobs[job_id] = dict(data)
+            self._updated_at[job_id] = datetime.utcnow()
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Lấy bản sao của job, None nếu không tồn tại"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return copy.deepcopy(job) if job is not None else None
+
+    def update(self, job_id: str, **fields: Any) -> bool:
+        """Cập nhật các trường của job, trả về False nếu job không tồn tại"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return False
+            job.update(fields)
+            self._updated_at[job_id] = datetime.utcnow()
+            return True
+
+    def transition(
+        self,
+        job_id: str,
+        status: str,
+        from_statuses: Optional[Iterable[str]] = None,
+        **fields: Any
+    ) -> bool:
+        """
+        Chuyển trạng thái nguyên tử
+
+        Chỉ thành công khi trạng thái hiện tại nằm trong from_statuses
+        (mặc định: mọi trạng thái chưa kết thúc).
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or not _can_transition(job.get('status'), from_statuses):
+                return False
+            job.update(fields)
+            job['status'] = status
+            self._updated_at[job_id] = datetime.utcnow()
+            return True
+
+    def list_jobs(self) -> Dict[str, Dict[str, Any]]:
+        """Lấy tất cả job còn hiệu lực"""
+        self.evict_expired()
+        with self._lock:
+            return copy.deepcopy(self._jobs)
+
+    def evict_expired(self) -> int:
+        """Xóa job không được cập nhật trong ttl_seconds, trả về số job đã xóa"""
+        cutoff = datetime.utcnow() - timedelta(seconds=self.ttl_seconds)
+        with self._lock:
+            expired = [job_id for job_id, updated in self._updated_at.items() if updated < cutoff]
+            for job_id in expired:
+                self._jobs.pop(job_id, None)
+                self._updated_at.pop(job_id, None)
+        return len(expired)
+
+
+class SQLAlchemyJobStore:
+    """
+    Job store trên bảng tts_jobs, dùng chung giữa các worker
+
+    Mỗi thao tác chạy trong app context riêng nên gọi được từ thread nền.
+    Job hết hạn được dọn tối đa một lần mỗi EVICT_INTERVAL giây (không phải mỗi lần create).
+
+    Cập nhật trường JSON là đọc - gộp - ghi. PostgreSQL khóa dòng bằng SELECT ... FOR UPDATE;
+    SQLite bỏ qua FOR UPDATE nên các lần gộp được tuần tự hóa bằng lock trong process.
+    Lock này không bảo vệ giữa nhiều process: nhiều gunicorn worker cần dùng PostgreSQL.
+    """
+
+    # Các trường được lưu thành cột riêng, phần còn lại nằm trong cột JSON data
+    COLUMNS = ('status', 'progress', 'error', 'start_time', 'end_time')
+    EVICT_INTERVAL = 60
+
+    # Dùng chung cho mọi instance trong process (cùng file SQLite)
+    _sqlite_merge_lock = threading.Lock()
+
+    def __init__(self, app, ttl_seconds: int = 3600):
+        self.app = app
+        self.ttl_seconds = ttl_seconds
+        self._last_evicted_at = time.monotonic()
+
+    def _maybe_evict(self):
+        now = time.monotonic()
+        if now - self._last_evicted_at < self.EVICT_INTERVAL:
+            return
+        self._last_evicted_at = now
+        try:
+            evicted = self.evict_expired()
+            if evicted:
+                print(f"🧹 [TTS] Evicted {evicted} expired jobs")
+        except Exception as e:
+            print(f"⚠️ [TTS] Job eviction error: {e}")
+
+    def _split_fields(self, fields: Dict[str, Any]):
+        columns = {key: value for key, value in fields.items() if key in self.COLUMNS}
+        data = {key: value for key, value in fields.items() if key not in self.COLUMNS}
+        return columns, data
+
+    def create(self, job_id: str, data: Dict[str, Any]):
+        """Tạo (hoặc ghi đè) job"""
+        from ..app.extensions import db
+        from ..app.models import TTSJob
+
+        self._maybe_evict()
+        columns, extra = self._split_fields(data)
+        with self.app.app_context():
+            job = TTSJob.query.filter_by(job_id=job_id).first() or TTSJob(job_id=job_id)
+            job.status = columns.get('status', 'starting')
+            job.progress = columns.get('progress', 0)
+            job.error = columns.get('error')
+            job.start_time = columns.get('start_time')
+            job.end_time = columns.get('end_time')
+            job.data = extra
+            job.updated_at = datetime.utcnow()
+            db.session.add(job)
+            db.session.commit()
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Lấy job theo job_id (index unique), None nếu không tồn tại"""
+        from ..app.models import TTSJob
+
+        with self.app.app_context():
+            job = TTSJob.query.filter_by(job_id=job_id).first()
+            return job.to_dict() if job else None
+
+    def _apply(self, job_id: str, fields: Dict[str, Any], from_statuses=None, check_status=False) -> bool:
+        from ..app.extensions import db
+        from ..app.models import TTSJob
+
+        columns, extra = self._split_fields(fields)
+        columns['updated_at'] = datetime.utcnow()
+
+        with self.app.app_context():
+            query = TTSJob.query.filter(TTSJob.job_id == job_id)
+            if check_status:
+                if from_statuses is None:
+                    query = query.filter(TTSJob.status.notin_(TERMINAL_STATUSES))
+                else:
+                    query = query.filter(TTSJob.status.in_(list(from_statuses)))
+
+            if extra:
+                # Trường JSON cần đọc - gộp - ghi, khóa dòng để không mất cập nhật
+                merge_lock = self._sqlite_merge_lock if db.engine.dialect.name == 'sqlite' else nullcontext()
+                with merge_lock:
+                    job = query.with_for_update().first()
+                    if job is None:
+                        db.session.rollback()
+                        return False
+                    data = dict(job.data or {})
+                    data.update(extra)
+                    job.data = data
+                    for key, value in columns.items():
+                        setattr(job, key, value)
+                    db.session.commit()
+                    return True
+
+            # Chỉ cập nhật cột: một câu UPDATE ... WHERE là đủ nguyên tử
+            updated = query.update(columns, synchronize_session=False)
+            db.session.commit()
+            return updated > 0
+
+    def update(self, job_id: str, **fields: Any) -> bool:
+        """Cập nhật các trường của job, trả về False nếu job không tồn tại"""
+        return self._apply(job_id, fields)
+
+    def transition(
+        self,
+        job_id: str,
+        status: str,
+        from_statuses: Optional[Iterable[str]] = None,
+        **fields: Any
+    ) -> bool:
+        """Chuyển trạng thái nguyên tử bằng UPDATE ... WHERE status IN (...)"""
+        fields['status'] = status
+        return self._apply(job_id, fields, from_statuses=from_statuses, check_status=True)
+
+    def list_jobs(self) -> Dict[str, Dict[str, Any]]:
+        """Lấy tất cả job còn hiệu lực"""
+        from ..app.models import TTSJob
+
+        self._maybe_evict()
+        with self.app.app_context():
+            jobs = TTSJob.query.order_by(TTSJob.created_at.desc()).all()
+            return {job.job_id: job.to_dict() for job in jobs}
+
+    def evict_expired(self) -> int:
+        """Xóa job không được cập nhật trong ttl_seconds, trả về số job đã xóa"""
+        from ..app.extensions import db
+        from ..app.models import TTSJob
+
+        cutoff = datetime.utcnow() - timedelta(seconds=self.ttl_seconds)
+        with self.app.app_context():
+            deleted = TTSJob.query.filter(TTSJob.updated_at < cutoff).delete(synchronize_session=False)
+            db.session.commit()
+            return deleted
+
+
+def _can_transition(current_status: Optional[str], from_statuses: Optional[Iterable[str]]) -> bool:
+    if from_statuses is None:
+        return current_status not in TERMINAL_STATUSES
+    return current_status in from_statuses
+
+
+# Singleton instance, được cấu hình trong create_app()
+_job_store = None
+_job_store_lock = threading.Lock()
+
+
+def init_job_store(app=None):
+    """
+    Khởi tạo job store theo Config.TTS_JOB_STORE ('database' hoặc 'memory')
+
+    Backend 'database' cần Flask app; nếu không có app thì dùng bộ nhớ.
+    Store đã khởi tạo được giữ nguyên (create_app() còn được gọi lại trong thread nền,
+    thay store sẽ mất job đang chạy); chỉ thay store bộ nhớ tạm khi đã có app cho 'database'.
+    """
+    global _job_store
+
+    with _job_store_lock:
+        use_database = Config.TTS_JOB_STORE == 'database' and app is not None
+        if _job_store is not None and not (use_database and isinstance(_job_store, InMemoryJobStore)):
+            return _job_store
+
+        ttl_seconds = Config.TTS_JOB_TTL_SECONDS
+        if use_database:
+            _job_store = SQLAlchemyJobStore(app, ttl_seconds=ttl_seconds)
+        else:
+            if Config.TTS_JOB_STORE == 'database':
+                print("⚠️ No Flask app for database job store, using in-memory TTS job store")
+            _job_store = InMemoryJobStore(ttl_seconds=ttl_seconds)
+        return _job_store
+
+
+def get_tts_job_store():
+    """Lấy job store hiện tại (tự khởi tạo nếu create_app chưa cấu hình)"""
+    if _job_store is None:
+        app = None
+        try:
+            from flask import current_app
+            app = current_app._get_current_object()
+        except RuntimeError:
+            pass
+        return init_job_store(app)
+    return _job_store
@@ -0,0 +1,283 @@
+"""
+Progress Bus - Pub/sub sự kiện tiến độ video (SSE) thay cho app.video_progress_store
+
+Hai backend:
+    - InMemoryProgressBus: list + threading.Condition, chỉ đúng trong một process
+    - SQLiteProgressBus: file SQLite dùng chung giữa các gunicorn worker
+
+Subscriber gọi wait() và bị block tới khi có event mới: cùng process được đánh thức
+ngay qua Condition; event do process khác ghi được phát hiện qua PRAGMA data_version
+(không query bảng khi database không đổi).
+
+Mỗi event được gán id tăng dần, subscriber đọc tiếp từ id cuối cùng đã nhận
+(SSE Last-Event-ID). Mỗi job chỉ giữ max_events event gần nhất (ring buffer) và
+job không có event mới trong ttl_seconds bị xóa tự động khi publish.
+"""
+
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from ..app.config import Config
+
+
+class _EvictionMixin:
+    """Gọi evict_expired() tối đa một lần mỗi EVICT_INTERVAL giây khi publish"""
+
+    EVICT_INTERVAL = 60
+
+    def _maybe_evict(self):
+        now = time.monotonic()
+        if now - self._last_evicted_at < self.EVICT_INTERVAL:
+            return
+        self._last_evicted_at = now
+        try:
+            evicted = self.evict_expired()
+            if evicted:
+                print(f"🧹 [ProgressBus] Evicted {evicted} expired jobs")
+        except Exception as e:
+            print(f"⚠️ [ProgressBus] Eviction error: {e}")
+
+
+class InMemoryProgressBus(_EvictionMixin):
+    """Progress bus trong bộ nhớ của process hiện tại"""
+
+    def __init__(self, ttl_seconds: int = 3600, max_events: int = 200):
+        self.ttl_seconds = ttl_seconds
+        self.max_events = max_events
+        self._events: Dict[str, deque] = {}
+        self._updated_at: Dict[str, float] = {}
+        self._next_id = 1
+        self._cond = threading.Condition()
+        self._last_evicted_at = time.monotonic()
+
+    def publish(self, job_id: str, event: Dict[str, Any]) -> Dict[str, Any]:
+        """Thêm event cho job và đánh thức subscriber, trả về event kèm id"""
+        self._maybe_evict()
+        with self._cond:
+            event = dict(event, id=self._next_id)
+            self._next_id += 1
+            if job_id not in self._events:
+                self._events[job_id] = deque(maxlen=self.max_events)
+            self._events[job_id].append(event)
+            self._updated_at[job_id] = time.time()
+            self._cond.notify_all()
+        return event
+
+    def events(self, job_id: str, after_id: int = 0) -> List[Dict[str, Any]]:
+        """Các event có id > after_id (không block)"""
+        with self._cond:
+            return [dict(e) for e in self._events.get(job_id, []) if e['id'] > after_id]
+
+    def wait(self, job_id: str, after_id: int = 0, timeout: Optional[float] = None) -> List[Dict[str, Any]]:
+        """Block tới khi có event id > after_id hoặc hết timeout (trả về [])"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while True:
+                events = [dict(e) for e in self._events.get(job_id, []) if e['id'] > after_id]
+                if events:
+                    return events
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return []
+                self._cond.wait(remaining)
+
+    def latest(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._cond:
+            events = self._events.get(job_id)
+            return dict(events[-1]) if events else None
+
+    def clear(self, job_id: str):
+        with self._cond:
+            self._events.pop(job_id, None)
+            self._updated_at.pop(job_id, None)
+
+    def job_count(self) -> int:
+        with self._cond:
+            return len(self._events)
+
+    def evict_expired(self, max_age_seconds: Optional[float] = None) -> int:
+        """Xóa job không có event mới trong max_age_seconds (mặc định ttl_seconds)"""
+        cutoff = time.time() - (self.ttl_seconds if max_age_seconds is None else max_age_seconds)
+        with self._cond:
+            expired = [job_id for job_id, updated in self._updated_at.items() if updated < cutoff]
+            for job_id in expired:
+                self._events.pop(job_id, None)
+                self._updated_at.pop(job_id, None)
+        return len(expired)
+
+
+class SQLiteProgressBus(_EvictionMixin):
+    """
+    Progress bus trên một file SQLite (WAL), dùng chung giữa các process trên cùng máy
+
+    Mỗi thread dùng connection riêng. Subscriber khác process phát hiện event mới
+    sau tối đa poll_interval giây.
+    """
+
+    def __init__(self, path: str, ttl_seconds: int = 3600, poll_interval: float = 0.1, max_events: int = 200):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.poll_interval = poll_interval
+        self.max_events = max_events
+        self._local = threading.local()
+        self._cond = threading.Condition()
+        self._generation = 0
+        self._last_evicted_at = time.monotonic()
+
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        conn = self._connection()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS progress_events ("
+            " id INTEGER PRIMARY KEY AUTOINCREMENT,"
+            " job_id TEXT NOT NULL,"
+            " payload TEXT NOT NULL,"
+            " created_at REAL NOT NULL)"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_progress_events_job ON progress_events(job_id, id)")
+        conn.commit()
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10)
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _data_version(self) -> int:
+        """Thay đổi khi connection khác (kể cả process khác) commit vào database"""
+        return self._connection().execute("PRAGMA data_version").fetchone()[0]
+
+    def publish(self, job_id: str, event: Dict[str, Any]) -> Dict[str, Any]:
+        """Ghi event và đánh thức subscriber trong process này, trả về event kèm id"""
+        self._maybe_evict()
+        conn = self._connection()
+        payload = json.dumps(event, ensure_ascii=False, default=str)
+        with conn:
+            cursor = conn.execute(
+                "INSERT INTO progress_events (job_id, payload, created_at) VALUES (?, ?, ?)",
+                (job_id, payload, time.time())
+            )
+            # Ring buffer: chỉ giữ max_events event mới nhất của job
+            conn.execute(
+                "DELETE FROM progress_events WHERE job_id = ? AND id <= ("
+                " SELECT id FROM progress_events WHERE job_id = ? ORDER BY id DESC LIMIT 1 OFFSET ?)",
+                (job_id, job_id, self.max_events)
+            )
+        event = dict(event, id=cursor.lastrowid)
+        with self._cond:
+            self._generation += 1
+            self._cond.notify_all()
+        return event
+
+    def events(self, job_id: str, after_id: int = 0) -> List[Dict[str, Any]]:
+        """Các event có id > after_id (không block)"""
+        rows = self._connection().execute(
+            "SELECT id, payload FROM progress_events WHERE job_id = ? AND id > ? ORDER BY id",
+            (job_id, after_id)
+        ).fetchall()
+        return [dict(json.loads(payload), id=row_id) for row_id, payload in rows]
+
+    def wait(self, job_id: str, after_id: int = 0, timeout: Optional[float] = None) -> List[Dict[str, Any]]:
+        """Block tới khi có event id > after_id hoặc hết timeout (trả về [])"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        last_version = None
+        while True:
+            with self._cond:
+                generation = self._generation
+            version = self._data_version()
+            if version != last_version:
+                events = self.events(job_id, after_id)
+                if events:
+                    return events
+                last_version = version
+
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if remaining is not None and remaining <= 0:
+                return []
+            wait_for = self.poll_interval if remaining is None else min(self.poll_interval, remaining)
+            with self._cond:
+                # publish() trong cùng process đánh thức ngay
+                if self._cond.wait_for(lambda: self._generation != generation, wait_for):
+                    last_version = None
+
+    def latest(self, job_id: str) -> Optional[Dict[str, Any]]:
+        row = self._connection().execute(
+            "SELECT id, payload FROM progress_events WHERE job_id = ? ORDER BY id DESC LIMIT 1",
+            (job_id,)
+        ).fetchone()
+        return dict(json.loads(row[1]), id=row[0]) if row else None
+
+    def clear(self, job_id: str):
+        conn = self._connection()
+        with conn:
+            conn.execute("DELETE FROM progress_events WHERE job_id = ?", (job_id,))
+
+    def job_count(self) -> int:
+        return self._connection().execute("SELECT COUNT(DISTINCT job_id) FROM progress_events").fetchone()[0]
+
+    def evict_expired(self, max_age_seconds: Optional[float] = None) -> int:
+        """Xóa job không có event mới trong max_age_seconds (mặc định ttl_seconds)"""
+        cutoff = time.time() - (self.ttl_seconds if max_age_seconds is None else max_age_seconds)
+        conn = self._connection()
+        with conn:
+            expired = [row[0] for row in conn.execute(
+                "SELECT job_id FROM progress_events GROUP BY job_id HAVING MAX(created_at) < ?", (cutoff,)
+            ).fetchall()]
+            conn.executemany("DELETE FROM progress_events WHERE job_id = ?", [(job_id,) for job_id in expired])
+        return len(expired)
+
+
+def make_progress_event(job_id: str, step: str, message: str, progress: int, data: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Event cùng format mà frontend (VideoManager.js) đang đọc"""
+    return {
+        'job_id': job_id,
+        'step': step,
+        'message': message,
+        'progress': progress,
+        'data': data or {},
+        'timestamp': datetime.now().isoformat()
+    }
+
+
+# Singleton instance
+_progress_bus = None
+_progress_bus_lock = threading.Lock()
+
+
+def init_progress_bus():
+    """Khởi tạo progress bus theo Config.PROGRESS_BUS ('sqlite' hoặc 'memory')"""
+    global _progress_bus
+    ttl_seconds = Config.PROGRESS_BUS_TTL_SECONDS
+    max_events = Config.PROGRESS_BUS_MAX_EVENTS
+    if Config.PROGRESS_BUS == 'sqlite':
+        path = Config.PROGRESS_BUS_PATH or os.path.join(tempfile.gettempdir(), 'emlinh_progress.db')
+        try:
+            _progress_bus = SQLiteProgressBus(path, ttl_seconds=ttl_seconds, max_events=max_events)
+            return _progress_bus
+        except (sqlite3.Error, OSError) as e:
+            print(f"⚠️ Cannot open progress bus at {path}: {e}, using in-memory progress bus")
+    _progress_bus = InMemoryProgressBus(ttl_seconds=ttl_seconds, max_events=max_events)
+    return _progress_bus
+
+
+def get_progress_bus():
+    """Lấy progress bus hiện tại (khởi tạo lần đầu khi cần)"""
+    with _progress_bus_lock:
+        if _progress_bus is None:
+            init_progress_bus()
+        return _progress_bus
+
+
+def publish_progress(job_id: str, step: str, message: str, progress: int, data: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Tạo event tiến độ và publish lên progress bus"""
+    return get_progress_bus().publish(job_id, make_progress_event(job_id, step, message, progress, data))
@@ -0,0 +1,439 @@
+"""
+Render Queue - Hàng đợi render bền vững trên bảng render_jobs
+
+    - Ưu tiên: priority nhỏ chạy trước (chat tương tác trước batch), cùng priority thì FIFO
+    - Claim nguyên tử: UPDATE ... WHERE status = 'queued', chỉ một worker thắng
+    - Retry với exponential backoff qua cột available_at
+    - Job 'rendering' bị bỏ dở (process chết, heartbeat quá hạn) được đưa lại hàng đợi
+    - max_active_renders giới hạn số job 'rendering' trên toàn bảng, dùng chung mọi process
+
+Mỗi process chạy tối đa một nhóm worker thread (start_workers gọi nhiều lần vẫn an toàn).
+"""
+
+import os
+import socket
+import threading
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from ..app.config import Config
+from ..utils.render_scheduler import get_render_scheduler
+
+
+PRIORITY_INTERACTIVE = 0
+PRIORITY_DEFAULT = 5
+PRIORITY_BATCH = 10
+
+
+def make_worker_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def _is_local_worker_dead(worker_id: Optional[str]) -> bool:
+    """Worker cùng máy mà PID không còn tồn tại (restart/crash)"""
+    if not worker_id or ':' not in worker_id:
+        return False
+    hostname, _, pid = worker_id.rpartition(':')
+    if hostname != socket.gethostname() or not pid.isdigit():
+        return False
+    if int(pid) == os.getpid():
+        return False
+    try:
+        os.kill(int(pid), 0)
+    except ProcessLookupError:
+        return True
+    except (PermissionError, OSError):
+        return False
+    return False
+
+
+class RenderQueue:
+    """
+    Render queue trên SQLAlchemy, mỗi thao tác chạy trong app context riêng
+
+    Cách dùng:
+        queue.enqueue(job_id, 'Scene-Portrait', props, output_path, priority=PRIORITY_INTERACTIVE)
+        queue.start_workers(handler, num_workers=2)   # handler(job: dict) -> None
+    """
+
+    def __init__(
+        self,
+        app,
+        worker_id: Optional[str] = None,
+        max_attempts: int = 3,
+        backoff_seconds: float = 30,
+        backoff_max_seconds: float = 600,
+        heartbeat_timeout: float = 300,
+        poll_interval: float = 2.0,
+        max_active_renders: Optional[int] = None
+    ):
+        self.app = app
+        self.worker_id = worker_id or make_worker_id()
+        self.max_attempts = max_attempts
+        self.backoff_seconds = backoff_seconds
+        self.backoff_max_seconds = backoff_max_seconds
+        self.heartbeat_timeout = heartbeat_timeout
+        self.poll_interval = poll_interval
+        self.max_active_renders = max_active_renders
+
+        self._wakeup = threading.Event()
+        self._stop = threading.Event()
+        self._workers: List[threading.Thread] = []
+        self._workers_pid: Optional[int] = None
+        self._workers_lock = threading.Lock()
+
+    def enqueue(
+        self,
+        job_id: str,
+        composition_id: str,
+        props: Dict[str, Any],
+        output_path: str,
+        priority: int = PRIORITY_DEFAULT,
+        max_attempts: Optional[int] = None,
+        **data: Any
+    ) -> Dict[str, Any]:
+        """Thêm job vào hàng đợi và đánh thức worker trong process này"""
+        from ..app.extensions import db
+        from ..app.models import RenderJob
+
+        now = datetime.utcnow()
+        with self.app.app_context():
+            job = RenderJob(
+                job_id=job_id,
+                composition_id=composition_id,
+                props=props,
+                output_path=output_path,
+                priority=priority,
+                status='queued',
+                progress=0,
+                attempts=0,
+                max_attempts=max_attempts or self.max_attempts,
+                data=data,
+                available_at=now,
+                start_time=now,
+                created_at=now,
+                updated_at=now
+            )
+            db.session.add(job)
+            db.session.commit()
+            result = job.to_dict()
+
+        self._wakeup.set()
+        return result
+
+    def claim(self) -> Optional[Dict[str, Any]]:
+        """
+        Lấy job ưu tiên cao nhất đang chờ và chuyển sang 'rendering' một cách nguyên tử
+
+        Không claim khi số job 'rendering' (của mọi process) đã đạt max_active_renders.
+
+        Returns:
+            Optional[Dict[str, Any]]: Job đã claim (kèm job_id), None nếu hàng đợi trống hoặc đã đủ slot
+        """
+        from ..app.extensions import db
+        from ..app.models import RenderJob
+
+        with self.app.app_context():
+            now = datetime.utcnow()
+            if self.max_active_renders and self._active_count() >= self.max_active_renders:
+                return None
+            candidates = (
+                db.session.query(RenderJob.id)
+                .filter(RenderJob.status == 'queued', RenderJob.available_at <= now)
+                .order_by(RenderJob.priority.asc(), RenderJob.created_at.asc(), RenderJob.id.asc())
+                .limit(5)
+                .all()
+            )
+            for (row_id,) in candidates:
+                # Chỉ một worker cập nhật được dòng còn ở trạng thái 'queued'
+                updated = (
+                    RenderJob.query
+                    .filter(RenderJob.id == row_id, RenderJob.status == 'queued')
+                    .update({
+                        'status': 'rendering',
+                        'worker_id': self.worker_id,
+                        'attempts': RenderJob.attempts + 1,
+                        'heartbeat_at': now,
+                        'error': None,
+                        'updated_at': now
+                    }, synchronize_session=False)
+                )
+                db.session.commit()
+                if updated and self.max_active_renders and self._active_count() > self.max_active_renders:
+                    # Process khác claim cùng lúc và vượt giới hạn: trả job về hàng đợi
+                    (
+                        RenderJob.query
+                        .filter(RenderJob.id == row_id, RenderJob.worker_id == self.worker_id,
+                                RenderJob.status == 'rendering')
+                        .update({
+                            'status': 'queued',
+                            'worker_id': None,
+                            'attempts': RenderJob.attempts - 1,
+                            'updated_at': now
+                        }, synchronize_session=False)
+                    )
+                    db.session.commit()
+                    return None
+                if updated:
+                    job = db.session.get(RenderJob, row_id)
+                    result = job.to_dict()
+                    result['job_id'] = job.job_id
+                    return result
+            return None
+
+    def _active_count(self) -> int:
+        """Số job đang 'rendering' trên toàn bảng (gọi trong app context)"""
+        from ..app.models import RenderJob
+
+        return RenderJob.query.filter(RenderJob.status == 'rendering').count()
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Lấy job theo job_id, None nếu không tồn tại"""
+        from ..app.models import RenderJob
+
+        with self.app.app_context():
+            job = RenderJob.query.filter_by(job_id=job_id).first()
+            return job.to_dict() if job else None
+
+    def list_jobs(self, limit: int = 100) -> Dict[str, Dict[str, Any]]:
+        """Các job gần nhất (mới nhất trước)"""
+        from ..app.models import RenderJob
+
+        with self.app.app_context():
+            jobs = RenderJob.query.order_by(RenderJob.created_at.desc()).limit(limit).all()
+            return {job.job_id: job.to_dict() for job in jobs}
+
+    def update(self, job_id: str, **fields: Any) -> bool:
+        """Cập nhật tiến độ của job đang chạy (đồng thời là heartbeat)"""
+        return self._apply(job_id, fields, only_worker=True)
+
+    def complete(self, job_id: str, **fields: Any) -> bool:
+        fields.update({'status': 'completed', 'progress': 100, 'end_time': datetime.utcnow()})
+        return self._apply(job_id, fields, only_worker=True)
+
+    def fail(self, job_id: str, error: str, retry: bool = True) -> str:
+        """
+        Ghi nhận lỗi: đưa lại hàng đợi với backoff nếu còn lượt, ngược lại đánh dấu 'failed'
+
+        Returns:
+            str: Trạng thái mới ('queued' hoặc 'failed')
+        """
+        from ..app.models import RenderJob
+
+        with self.app.app_context():
+            job = RenderJob.query.filter_by(job_id=job_id).first()
+            attempts = job.attempts if job else 0
+            max_attempts = job.max_attempts if job else 0
+
+        if retry and attempts < max_attempts:
+            delay = self.backoff_delay(attempts)
+            self._apply(job_id, {
+                'status': 'queued',
+                'error': error,
+                'worker_id': None,
+                'available_at': datetime.utcnow() + timedelta(seconds=delay)
+            }, only_worker=True)
+            print(f"🔁 Render job {job_id} failed (attempt {attempts}/{max_attempts}), retry in {delay:.0f}s")
+            return 'queued'
+
+        self._apply(job_id, {'status': 'failed', 'error': error, 'end_time': datetime.utcnow()}, only_worker=True)
+        return 'failed'
+
+    @contextmanager
+    def heartbeat(self, job_id: str) -> Iterator[None]:
+        """Giữ heartbeat cho job trong lúc chờ slot / render không báo tiến độ"""
+        stop = threading.Event()
+        interval = max(1.0, self.heartbeat_timeout / 4)
+
+        def beat():
+            while not stop.wait(interval):
+                try:
+                    self._apply(job_id, {}, only_worker=True)
+                except Exception as e:
+                    print(f"⚠️ Render heartbeat failed: {e}")
+
+        thread = threading.Thread(target=beat, name=f"heartbeat-{job_id}", daemon=True)
+        thread.start()
+        try:
+            yield
+        finally:
+            stop.set()
+            thread.join(timeout=1)
+
+    def backoff_delay(self, attempts: int) -> float:
+        """Exponential backoff: backoff_seconds * 2^(attempts-1), tối đa backoff_max_seconds"""
+        return min(self.backoff_max_seconds, self.backoff_seconds * (2 ** max(0, attempts - 1)))
+
+    def _apply(self, job_id: str, fields: Dict[str, Any], only_worker: bool = False) -> bool:
+        from ..app.extensions import db
+        from ..app.models import RenderJob
+
+        columns = {key: value for key, value in fields.items() if hasattr(RenderJob, key) and key != 'data'}
+        extra = {key: value for key, value in fields.items() if not hasattr(RenderJob, key)}
+        now = datetime.utcnow()
+
+        with self.app.app_context():
+            query = RenderJob.query.filter(RenderJob.job_id == job_id)
+            if only_worker:
+                # Job đã bị recover và giao cho worker khác thì không ghi đè
+                query = query.filter(RenderJob.worker_id == self.worker_id, RenderJob.status == 'rendering')
+            job = query.with_for_update().first()
+            if job is None:
+                db.session.rollback()
+                return False
+            if extra:
+                data = dict(job.data or {})
+                data.update(extra)
+                job.data = data
+            for key, value in columns.items():
+                setattr(job, key, value)
+            job.heartbeat_at = now
+            job.updated_at = now
+            db.session.commit()
+            return True
+
+    def recover_orphans(self) -> int:
+        """
+        Đưa job 'rendering' bị bỏ dở về hàng đợi (hoặc 'failed' nếu hết lượt)
+
+        Orphan là job của worker cùng máy đã chết, hoặc không có heartbeat trong
+        heartbeat_timeout giây (worker ở máy khác).
+
+        Returns:
+            int: Số job đã recover
+        """
+        from ..app.extensions import db
+        from ..app.models import RenderJob
+
+        stale_before = datetime.utcnow() - timedelta(seconds=self.heartbeat_timeout)
+        recovered = 0
+        with self.app.app_context():
+            jobs = RenderJob.query.filter(RenderJob.status == 'rendering').all()
+            for job in jobs:
+                is_stale = job.heartbeat_at is None or job.heartbeat_at < stale_before
+                if not (is_stale or _is_local_worker_dead(job.worker_id)):
+                    continue
+
+                exhausted = (job.attempts or 0) >= (job.max_attempts or 0)
+                values = {
+                    'status': 'failed' if exhausted else 'queued',
+                    'error': f"Worker {job.worker_id} stopped during render",
+                    'worker_id': None,
+                    'available_at': datetime.utcnow(),
+                    'updated_at': datetime.utcnow()
+                }
+                if exhausted:
+                    values['end_time'] = datetime.utcnow()
+                # Điều kiện worker_id cũ để không đụng vào job vừa được claim lại
+                updated = (
+                    RenderJob.query
+                    .filter(RenderJob.id == job.id, RenderJob.status == 'rendering',
+                            RenderJob.worker_id == job.worker_id)
+                    .update(values, synchronize_session=False)
+                )
+                recovered += updated
+            db.session.commit()
+
+        if recovered:
+            print(f"♻️ Recovered {recovered} orphaned render job(s)")
+            self._wakeup.set()
+        return recovered
+
+    def start_workers(self, handler: Callable[[Dict[str, Any]], None], num_workers: int = 1) -> bool:
+        """
+        Khởi động worker thread (một lần cho mỗi process, kể cả sau fork)
+
+        Returns:
+            bool: True nếu lần gọi này khởi động worker
+        """
+        with self._workers_lock:
+            if self._workers_pid == os.getpid() and any(t.is_alive() for t in self._workers):
+                return False
+            # Sau fork (gunicorn preload) worker_id phải theo PID mới
+            self.worker_id = make_worker_id()
+            self._workers_pid = os.getpid()
+            self._stop.clear()
+            self._workers = [
+                threading.Thread(target=self._worker_loop, args=(handler,), name=f"render-worker-{i}", daemon=True)
+                for i in range(max(1, num_workers))
+            ]
+            for thread in self._workers:
+                thread.start()
+
+        print(f"🎞️ Render queue: {len(self._workers)} worker(s) started ({self.worker_id})")
+        return True
+
+    def stop_workers(self, timeout: float = 5):
+        self._stop.set()
+        self._wakeup.set()
+        for thread in self._workers:
+            thread.join(timeout)
+
+    def _worker_loop(self, handler: Callable[[Dict[str, Any]], None]):
+        last_recovery = None
+        while not self._stop.is_set():
+            try:
+                now = datetime.utcnow()
+                if last_recovery is None or (now - last_recovery).total_seconds() >= self.heartbeat_timeout / 2:
+                    self.recover_orphans()
+                    last_recovery = now
+
+                job = self.claim()
+            except Exception as e:
+                print(f"⚠️ Render queue error: {e}")
+                job = None
+
+            if job is None:
+                self._wakeup.wait(self.poll_interval)
+                self._wakeup.clear()
+                continue
+
+            try:
+                with self.app.app_context():
+                    handler(job)
+            except Exception as e:
+                print(f"❌ Render job {job['job_id']} crashed: {e}")
+                try:
+                    self.fail(job['job_id'], str(e))
+                except Exception as fail_error:
+                    print(f"⚠️ Could not record render failure: {fail_error}")
+
+
+def new_render_job_id(composition_id: str) -> str:
+    return f"render_{datetime.utcnow().strftime('%Y%m%d%H%M%S')}_{uuid.uuid4().hex[:8]}_{composition_id}"
+
+
+# Singleton instance, được cấu hình trong create_app()
+_render_queue = None
+_render_queue_lock = threading.Lock()
+
+
+def init_render_queue(app) -> RenderQueue:
+    """Khởi tạo render queue trên database của app"""
+    global _render_queue
+    with _render_queue_lock:
+        # Giữ queue đầu tiên: create_app() còn được gọi lại trong thread nền
+        if _render_queue is None:
+            _render_queue = RenderQueue(
+                app,
+                max_attempts=Config.RENDER_QUEUE_MAX_ATTEMPTS,
+                backoff_seconds=Config.RENDER_QUEUE_BACKOFF_SECONDS,
+                heartbeat_timeout=Config.RENDER_QUEUE_HEARTBEAT_TIMEOUT,
+                max_active_renders=get_render_scheduler().max_concurrent_renders
+            )
+        return _render_queue
+
+
+def get_render_queue() -> RenderQueue:
+    """Lấy render queue hiện tại (tự tạo app nếu create_app chưa chạy)"""
+    if _render_queue is not None:
+        return _render_queue
+    try:
+        from flask import current_app
+        app = current_app._get_current_object()
+    except RuntimeError:
+        from ..app.app import create_app
+        app = create_app()
+    return init_render_queue(app)
@@ -0,0 +1,449 @@
+"""
+Render Server - Quản lý Node sidecar (emlinh-remotion/render-server.mjs) chạy lâu dài
+
+Sidecar bundle project Remotion một lần và giữ Chromium mở, nên mỗi job render không
+còn tốn thời gian resolve npx, bundle webpack và khởi động browser. Giao tiếp qua
+stdin/stdout, mỗi dòng một JSON (xem đầu file render-server.mjs).
+
+Khi không chạy được sidecar (thiếu node / node_modules, crash khi khởi động), render()
+raise RenderServerUnavailable để caller quay về `npx remotion render`.
+
+Bundle được gắn với hash của emlinh-remotion/src (cùng hash với composition cache và
+render cache); code đổi thì sidecar bundle lại trước job render kế tiếp.
+"""
+
+import atexit
+import json
+import os
+import shutil
+import subprocess
+import threading
+import time
+import uuid
+from collections import deque
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from ..app.config import Config
+from ..utils.composition_cache import hash_directory
+from ..utils.remotion_progress import RemotionProgressParser
+
+
+class RenderServerUnavailable(Exception):
+    """Sidecar không khởi động được hoặc đã chết giữa chừng, nên dùng Remotion CLI"""
+
+
+class _PendingRender:
+    """Trạng thái của một job đang chờ kết quả từ sidecar"""
+
+    def __init__(self, on_progress: Optional[Callable[[Dict[str, Any]], None]]):
+        self.on_progress = on_progress
+        self.parser = RemotionProgressParser()
+        self.done = threading.Event()
+        self.returncode: Optional[int] = None
+        self.message = ''
+        self.result: Any = None
+        self.server_died = False
+
+
+class RenderServer:
+    """
+    Một sidecar Node cho mỗi process, khởi động lười ở job đầu tiên
+
+    Cách dùng:
+        returncode, output = server.render('Scene-Portrait', output_path, props, concurrency=2)
+    """
+
+    def __init__(
+        self,
+        remotion_path: str,
+        script: str = 'render-server.mjs',
+        node_bin: str = 'node',
+        startup_timeout: float = 300,
+        popen: Callable[..., subprocess.Popen] = subprocess.Popen
+    ):
+        self.remotion_path = remotion_path
+        self.script = script
+        self.node_bin = node_bin
+        self.startup_timeout = startup_timeout
+        self._popen = popen
+
+        self._process: Optional[subprocess.Popen] = None
+        self._ready = threading.Event()
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._pending: Dict[str, _PendingRender] = {}
+        self._stderr_tail = deque(maxlen=30)
+        self._rebundle_lock = threading.Lock()
+        self._bundle_hash: Optional[str] = None
+        self.bundle_ms: Optional[int] = None
+        self.renders_completed = 0
+        self.rebundles = 0
+
+    def _command(self) -> List[str]:
+        return [self.node_bin, self.script]
+
+    def _source_hash(self) -> Optional[str]:
+        try:
+            return hash_directory(os.path.join(self.remotion_path, 'src'))
+        except OSError as e:
+            print(f"⚠️ Could not hash Remotion src: {e}")
+            return None
+
+    def is_installed(self) -> bool:
+        """Có node, script sidecar và @remotion/renderer trong node_modules"""
+        if not self.remotion_path or shutil.which(self.node_bin) is None:
+            return False
+        if not os.path.exists(os.path.join(self.remotion_path, self.script)):
+            return False
+        return os.path.isdir(os.path.join(self.remotion_path, 'node_modules', '@remotion', 'renderer'))
+
+    def is_running(self) -> bool:
+        return self._process is not None and self._process.poll() is None and self._ready.is_set()
+
+    def start(self, wait: bool = True) -> bool:
+        """
+        Khởi động sidecar nếu chưa chạy
+
+        Args:
+            wait: Chờ sidecar bundle xong và báo "ready" (tối đa startup_timeout giây)
+
+        Returns:
+            bool: True nếu sidecar đã sẵn sàng (hoặc đang khởi động khi wait=False)
+        """
+        with self._lock:
+            if self._process is None or self._process.poll() is not None:
+                if not self.is_installed():
+                    return False
+                self._spawn()
+            process = self._process
+
+        if not wait:
+            return True
+
+        # Chờ "ready" nhưng dừng sớm nếu sidecar thoát trong lúc bundle
+        deadline = time.monotonic() + self.startup_timeout
+        while not self._ready.wait(0.2):
+            if process.poll() is not None or time.monotonic() > deadline:
+                print(f"⚠️ Render server failed to start: {self._stderr_text()}")
+                self._kill(process)
+                return False
+        return True
+
+    def warm_up(self):
+        """Khởi động sidecar ở nền (bundle + mở browser) trước khi có job render"""
+        threading.Thread(target=self.start, kwargs={'wait': True}, daemon=True).start()
+
+    def _spawn(self):
+        print(f"🚀 Starting render server: {' '.join(self._command())}")
+        self._ready.clear()
+        self._stderr_tail.clear()
+        # Sidecar bundle src/ lúc khởi động: code sửa sau thời điểm này sẽ được bundle lại
+        self._bundle_hash = self._source_hash()
+        process = self._popen(
+            self._command(),
+            cwd=self.remotion_path,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            text=True,
+            encoding='utf-8',
+            errors='replace',
+            bufsize=1
+        )
+        self._process = process
+        threading.Thread(target=self._read_stdout, args=(process,), daemon=True).start()
+        threading.Thread(target=self._read_stderr, args=(process,), daemon=True).start()
+
+    def _read_stdout(self, process: subprocess.Popen):
+        for line in iter(process.stdout.readline, ''):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                message = json.loads(line)
+            except ValueError:
+                self._stderr_tail.append(line)
+                continue
+            self._handle_message(message)
+
+        # stdout đóng = sidecar đã thoát: mọi job đang chờ bị hủy để caller fallback
+        process.stdout.close()
+        process.wait()
+        if self._process is process:
+            self._ready.clear()
+        with self._lock:
+            pending = [job for job in self._pending.values() if not job.done.is_set()]
+        for job in pending:
+            job.server_died = True
+            job.returncode = process.returncode if process.returncode else 1
+            job.message = self._stderr_text()
+            job.done.set()
+
+    def _read_stderr(self, process: subprocess.Popen):
+        for line in iter(process.stderr.readline, ''):
+            line = line.strip()
+            if line:
+                self._stderr_tail.append(line)
+        process.stderr.close()
+
+    def _handle_message(self, message: Dict[str, Any]):
+        message_type = message.get('type')
+        if message_type == 'ready':
+            self.bundle_ms = message.get('bundleMs')
+            print(f"✅ Render server ready (bundle {self.bundle_ms} ms)")
+            self._ready.set()
+            return
+
+        with self._lock:
+            job = self._pending.get(message.get('id'))
+        if job is None:
+            if message_type == 'error':
+                print(f"⚠️ Render server error: {message.get('message')}")
+            return
+
+        if message_type == 'progress':
+            snapshot = job.parser.update(
+                int(message.get('totalFrames') or 0),
+                frames_rendered=int(message.get('renderedFrames') or 0),
+                frames_encoded=int(message.get('encodedFrames') or 0)
+            )
+            if snapshot and job.on_progress:
+                try:
+                    job.on_progress(snapshot)
+                except Exception as e:
+                    print(f"⚠️ Render progress callback error: {e}")
+        elif message_type == 'compositions':
+            job.returncode = 0
+            job.result = message.get('compositions') or []
+            job.done.set()
+        elif message_type == 'done':
+            job.returncode = 0
+            job.message = message.get('outputPath', '')
+            job.done.set()
+        elif message_type == 'error':
+            job.returncode = 1
+            job.message = message.get('message', 'Unknown render server error')
+            job.done.set()
+
+    def _send(self, message: Dict[str, Any]):
+        process = self._process
+        if process is None or process.poll() is not None:
+            raise RenderServerUnavailable("Render server is not running")
+        try:
+            with self._write_lock:
+                process.stdin.write(json.dumps(message) + '\n')
+                process.stdin.flush()
+        except (BrokenPipeError, OSError, ValueError) as e:
+            raise RenderServerUnavailable(f"Render server pipe closed: {e}")
+
+    def render(
+        self,
+        composition: str,
+        output_path: str,
+        props: Dict[str, Any],
+        concurrency: int = 1,
+        on_progress: Optional[Callable[[Dict[str, Any]], None]] = None,
+        timeout: Optional[float] = None,
+        frame_range: Optional[Tuple[int, int]] = None,
+        muted: bool = False,
+        scale: float = 1.0,
+        x264_preset: Optional[str] = None
+    ) -> Tuple[int, str]:
+        """
+        Render một video trên sidecar, cùng kiểu trả về với run_remotion_command
+
+        frame_range (start, end inclusive) và muted dùng cho segment render,
+        scale và x264_preset dùng cho preview render.
+
+        Returns:
+            Tuple[int, str]: (0, output_path) nếu thành công, (1, thông báo lỗi) nếu thất bại
+
+        Raises:
+            RenderServerUnavailable: Sidecar không khởi động được hoặc chết giữa chừng
+            subprocess.TimeoutExpired: Render chạy quá timeout (job đã được hủy)
+        """
+        if not self.start(wait=True):
+            raise RenderServerUnavailable("Render server is not available")
+        self.ensure_fresh_bundle()
+
+        job_id = uuid.uuid4().hex
+        job = _PendingRender(on_progress)
+        with self._lock:
+            self._pending[job_id] = job
+
+        try:
+            self._send({
+                'type': 'render',
+                'id': job_id,
+                'composition': composition,
+                'outputPath': os.path.abspath(output_path),
+                'inputProps': props,
+                'concurrency': concurrency,
+                'frameRange': list(frame_range) if frame_range else None,
+                'muted': muted,
+                'scale': scale,
+                'x264Preset': x264_preset
+            })
+
+            if not job.done.wait(timeout):
+                try:
+                    self._send({'type': 'cancel', 'id': job_id})
+                except RenderServerUnavailable:
+                    pass
+                raise subprocess.TimeoutExpired(self._command(), timeout)
+        finally:
+            with self._lock:
+                self._pending.pop(job_id, None)
+
+        if job.server_died:
+            raise RenderServerUnavailable(f"Render server exited during render: {job.message}")
+        if job.returncode == 0:
+            self.renders_completed += 1
+        return job.returncode, job.message
+
+    def get_compositions(self, timeout: float = 30) -> List[Dict[str, Any]]:
+        """
+        Đọc metadata composition từ bundle đang chạy (không khởi động sidecar)
+
+        Raises:
+            RenderServerUnavailable: Sidecar chưa chạy, lỗi hoặc quá timeout
+        """
+        if not self.is_running():
+            raise RenderServerUnavailable("Render server is not running")
+
+        job_id = uuid.uuid4().hex
+        job = _PendingRender(None)
+        with self._lock:
+            self._pending[job_id] = job
+        try:
+            self._send({'type': 'compositions', 'id': job_id})
+            finished = job.done.wait(timeout)
+        finally:
+            with self._lock:
+                self._pending.pop(job_id, None)
+
+        if not finished or job.server_died or job.returncode != 0:
+            raise RenderServerUnavailable(f"Could not list compositions: {job.message or 'timeout'}")
+        return job.result
+
+    def rebundle(self) -> bool:
+        """Yêu cầu sidecar bundle lại src/ (sau khi sửa composition), chờ "ready" mới"""
+        if not self.is_running():
+            return False
+        source_hash = self._source_hash()
+        self._ready.clear()
+        self._send({'type': 'rebundle'})
+        if not self._ready.wait(self.startup_timeout):
+            return False
+        self._bundle_hash = source_hash
+        self.rebundles += 1
+        return True
+
+    def ensure_fresh_bundle(self) -> bool:
+        """
+        Bundle lại nếu hash của src/ khác với lúc bundle gần nhất
+
+        Render đồng thời chỉ gây ra một lần rebundle; render đang chạy tiếp tục trên bundle cũ.
+
+        Returns:
+            bool: True nếu đã bundle lại
+
+        Raises:
+            RenderServerUnavailable: Sidecar chết khi đang nhận yêu cầu rebundle
+        """
+        if not self.is_running():
+            return False
+        with self._rebundle_lock:
+            source_hash = self._source_hash()
+            if source_hash is None or source_hash == self._bundle_hash:
+                return False
+            print("🔄 Remotion src changed, rebundling render server")
+            return self.rebundle()
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            active = len(self._pending)
+        return {
+            'running': self.is_running(),
+            'pid': self._process.pid if self._process is not None else None,
+            'bundle_ms': self.bundle_ms,
+            'active_renders': active,
+            'renders_completed': self.renders_completed,
+            'rebundles': self.rebundles
+        }
+
+    def shutdown(self, timeout: float = 10):
+        """Yêu cầu sidecar đóng browser và thoát, kill nếu quá timeout"""
+        with self._lock:
+            process = self._process
+            self._process = None
+        if process is None or process.poll() is not None:
+            return
+        try:
+            process.stdin.write(json.dumps({'type': 'shutdown'}) + '\n')
+            process.stdin.flush()
+            process.stdin.close()
+            process.wait(timeout=timeout)
+        except (BrokenPipeError, OSError, ValueError, subprocess.TimeoutExpired):
+            self._kill(process)
+
+    def _kill(self, process: subprocess.Popen):
+        if process.poll() is None:
+            process.kill()
+            process.wait()
+
+    def _stderr_text(self) -> str:
+        return '\n'.join(self._stderr_tail)
+
+
+# Singleton instance, tạo khi cần để đọc Config mới nhất
+_render_server = None
+_render_server_lock = threading.Lock()
+
+
+def get_render_server() -> Optional[RenderServer]:
+    """Lấy RenderServer dùng chung trong process, None nếu RENDER_SERVER_ENABLED=False"""
+    global _render_server
+    if not Config.RENDER_SERVER_ENABLED:
+        return None
+    with _render_server_lock:
+        if _render_server is None:
+            _render_server = RenderServer(
+                Config.REMOTION_PATH,
+                node_bin=Config.RENDER_SERVER_NODE,
+                startup_timeout=Config.RENDER_SERVER_STARTUP_TIMEOUT
+            )
+            atexit.register(_render_server.shutdown)
+        return _render_server
+
+
+def render_with_server(
+    composition: str,
+    output_path: str,
+    props: Dict[str, Any],
+    concurrency: int,
+    on_progress: Optional[Callable[[Dict[str, Any]], None]] = None,
+    timeout: Optional[float] = None,
+    frame_range: Optional[Tuple[int, int]] = None,
+    muted: bool = False,
+    scale: float = 1.0,
+    x264_preset: Optional[str] = None
+) -> Optional[Tuple[int, str]]:
+    """
+    Render qua sidecar nếu được bật và khởi động được
+
+    Returns:
+        Optional[Tuple[int, str]]: Kết quả như run_remotion_command, None nếu caller
+        cần fallback sang `npx remotion render`
+    """
+    server = get_render_server()
+    if server is None:
+        return None
+    try:
+        return server.render(
+            composition, output_path, props, concurrency, on_progress, timeout,
+            frame_range=frame_range, muted=muted, scale=scale, x264_preset=x264_preset
+        )
+    except RenderServerUnavailable as e:
+        print(f"⚠️ {e} - falling back to npx remotion render")
+        return None
@@ -1,16 +1,35 @@
 import os
+import re
+import json
+import wave
 import subprocess
 import tempfile
 import shutil
 import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, List, Tuple
 import openai
 from pathlib import Path
 from ..app.config import Config
+from ..utils.tts_cache import TTSCache
+from ..utils.audio_transcoder import AudioTranscoder
+from ..utils.viseme_estimator import VisemeEstimator
+from ..utils.bounded_executor import BoundedExecutor, QueueFullError
+from ..utils.job_events import JobCompletionEvents
+from .job_store import get_tts_job_store
 
 
 class TTSService:
+    # Khoảng cách tối thiểu giữa hai lần ghi progress khi streaming (giây)
+    PROGRESS_UPDATE_INTERVAL = 0.5
+    
+    @staticmethod
+    def _new_job_id() -> str:
+        """Job ID duy nhất; timestamp theo giây bị trùng khi nhiều request đến cùng lúc"""
+        return f"tts_{uuid.uuid4().hex}"
+
     def __init__(self):
         # Sử dụng config để lấy đường dẫn
         self.remotion_path = Config.REMOTION_PATH
@@ -62,26 +81,66 @@ class TTSService:
         # OpenAI client
         self.client = openai.OpenAI()
         
-        # Lưu trữ trạng thái TTS jobs
-        self.tts_jobs = {}
+        # Trạng thái TTS jobs (mặc định lấy từ job store dùng chung, xem job_store.py)
+        self._job_store = None
+        self.completion_events = JobCompletionEvents()
+        
+        # Worker pool giới hạn số TTS job chạy đồng thời cho API
+        self.executor = BoundedExecutor(
+            max_workers=Config.TTS_MAX_CONCURRENCY,
+            queue_size=Config.TTS_QUEUE_SIZE,
+            name='tts',
+            on_queue_change=self._publish_queue_positions
+        )
+        
+        # Lip sync engine: 'native' (NumPy, in-process) hoặc 'rhubarb' (subprocess)
+        self.lip_sync_engine = Config.LIP_SYNC_ENGINE
+        self.viseme_estimator = VisemeEstimator()
+        
+        # Content-addressed cache cho kết quả TTS (WAV, OGG, mouthCues, duration)
+        self.cache = None
+        if Config.TTS_CACHE_ENABLED:
+            try:
+                self.cache = TTSCache(
+                    cache_dir=Config.TTS_CACHE_DIR,
+                    max_bytes=Config.TTS_CACHE_MAX_BYTES,
+                    max_entries=Config.TTS_CACHE_MAX_ENTRIES
+                )
+            except OSError as e:
+                print(f"⚠️ TTS cache disabled: {e}")
+        
+    def generate_speech(
+        self,
+        text: str,
+        filename: Optional[str] = None,
+        job_id: Optional[str] = None,
+        voice: str = "nova",
+        model: str = "tts-1",
+        speed: float = 1.0,
+        use_cache: bool = True,
+        chunked: Optional[bool] = None
+    ) -> str:
+        """
+        Tạo speech từ text và convert sang format phù hợp
         
-    def generate_speech(self, text: str, filename: Optional[str] = None, job_id: Optional[str] = None) -> str:
-        """Tạo speech từ text và convert sang format phù hợp"""
+        chunked=None tự bật chế độ chia câu khi text dài hơn TTS_CHUNK_THRESHOLD
+        """
         
         # Tạo job ID (hoặc sử dụng job_id được truyền vào)
         if not job_id:
-            job_id = f"tts_{int(datetime.now().timestamp())}"
+            job_id = self._new_job_id()
         
         # Tạo filename nếu không có
         if not filename:
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            filename = f"tts_speech_{timestamp}"
+            filename = f"tts_speech_{timestamp}_{job_id[-8:]}"
         
         # Đảm bảo filename không có extension
         filename = os.path.splitext(filename)[0]
         
         # Khởi tạo job status
-        self.tts_jobs[job_id] = {
+        self.completion_events.register(job_id)
+        self.job_store.create(job_id, {
             'status': 'starting',
             'progress': 0,
             'text': text,
@@ -89,142 +148,360 @@ class TTSService:
             'start_time': datetime.now(),
             'error': None,
             'wav_path': None,
-            'json_path': None
-        }
+            'json_path': None,
+            'cache_hit': False
+        })
+        
+        wav_path = os.path.join(self.audio_dir, f"{filename}.wav")
+        json_path = os.path.join(self.audio_dir, f"{filename}.json")
         
         try:
-            self.tts_jobs[job_id]['status'] = 'generating_speech'
-            self.tts_jobs[job_id]['progress'] = 20
-            
-            # Gọi OpenAI TTS API
-            response = self.client.audio.speech.create(
-                model="tts-1",  # hoặc tts-1-hd cho chất lượng cao hơn
-                voice="nova",
-                input=text,
-                speed=1.0  # Có thể điều chỉnh tốc độ nói
-            )
-            
-            self.tts_jobs[job_id]['progress'] = 50
-            
-            # Lưu file MP3 tạm
-            temp_mp3 = os.path.join(self.audio_dir, f"{filename}_temp.mp3")
-            response.stream_to_file(temp_mp3)
-            
-            self.tts_jobs[job_id]['status'] = 'converting_to_wav'
-            self.tts_jobs[job_id]['progress'] = 60
-            
-            # Convert MP3 to WAV
-            wav_path = os.path.join(self.audio_dir, f"{filename}.wav")
-            self._convert_mp3_to_wav(temp_mp3, wav_path)
+            # Kiểm tra cache trước khi gọi OpenAI
+            cache_key = None
+            if self.cache and use_cache:
+                cache_key = TTSCache.make_key(text, voice, model, speed, lip_sync=self.lip_sync_engine)
+                self._update_job(job_id, cache_key=cache_key)
+                
+                if self._restore_from_cache(job_id, cache_key, wav_path, json_path):
+                    return job_id
             
-            # Xóa file MP3 tạm
-            os.remove(temp_mp3)
+            # Xóa output cũ (có thể là hardlink tới cache) trước khi ghi mới
+            for stale_path in (wav_path, json_path):
+                if os.path.lexists(stale_path):
+                    os.remove(stale_path)
             
-            self.tts_jobs[job_id]['wav_path'] = wav_path
-            self.tts_jobs[job_id]['progress'] = 70
+            if chunked is None:
+                chunked = 0 < Config.TTS_CHUNK_THRESHOLD < len(text)
             
-            # Convert WAV to OGG và sau đó tạo JSON với Rhubarb
-            self.tts_jobs[job_id]['status'] = 'converting_to_ogg'
-            ogg_path = os.path.join(self.audio_dir, f"{filename}.ogg")
-            self._convert_wav_to_ogg(wav_path, ogg_path)
+            if chunked:
+                # Tổng hợp song song từng nhóm câu, ghép WAV và mouthCues theo thứ tự
+                ogg_path = None
+                actual_duration = self._synthesize_chunked(job_id, text, voice, model, speed, wav_path, json_path)
+                self._update_job(job_id, wav_path=wav_path, actual_duration=actual_duration)
+            else:
+                # Gọi OpenAI TTS API và transcode MP3 -> WAV (+ OGG cho Rhubarb) trong một lần chạy ffmpeg
+                ogg_path = os.path.join(self.audio_dir, f"{filename}.ogg") if self._uses_rhubarb() else None
+                actual_duration = self._synthesize_audio(job_id, text, voice, model, speed, wav_path, ogg_path)
+                
+                self._update_job(job_id, wav_path=wav_path, actual_duration=actual_duration, progress=80)
+                
+                # Tạo JSON mouthCues
+                self._update_job(job_id, status='generating_lip_sync')
+                self._generate_lip_sync_json(wav_path, ogg_path, text, json_path)
             
-            self.tts_jobs[job_id]['progress'] = 80
+            self._update_job(job_id, json_path=json_path)
             
-            # Tạo JSON với Rhubarb
-            self.tts_jobs[job_id]['status'] = 'generating_lip_sync'
-            json_path = os.path.join(self.audio_dir, f"{filename}.json")
-            self._generate_lip_sync_json(ogg_path, text, json_path)
+            # Lưu kết quả vào cache cho các lần render lại
+            if cache_key:
+                self.cache.put(cache_key, wav_path, json_path, actual_duration, ogg_path=ogg_path)
             
             # Xóa file OGG tạm
-            os.remove(ogg_path)
-            
-            self.tts_jobs[job_id]['json_path'] = json_path
-            
-            # Lấy duration thực tế của file audio
-            actual_duration = self._get_audio_duration(wav_path)
-            self.tts_jobs[job_id]['actual_duration'] = actual_duration
+            if ogg_path:
+                os.remove(ogg_path)
             
-            self.tts_jobs[job_id]['status'] = 'completed'
-            self.tts_jobs[job_id]['progress'] = 100
-            self.tts_jobs[job_id]['end_time'] = datetime.now()
+            self._finish_job(job_id, 'completed', progress=100, end_time=datetime.now())
             
             return job_id
             
         except Exception as e:
-            self.tts_jobs[job_id]['status'] = 'failed'
-            self.tts_jobs[job_id]['error'] = str(e)
+            self._finish_job(job_id, 'failed', error=str(e), end_time=datetime.now())
             raise e
     
-    def _convert_mp3_to_wav(self, mp3_path: str, wav_path: str):
-        """Convert MP3 to WAV using ffmpeg with cross-platform compatibility"""
-        # Detect operating system and choose appropriate ffmpeg executable
-        import platform
-        system = platform.system().lower()
+    def submit_speech(self, text: str, filename: str = None, job_id: str = None, **kwargs) -> Tuple[str, int]:
+        """
+        Đưa TTS job vào worker pool thay vì chạy ngay
         
-        if system == 'windows':
-            ffmpeg_executables = ['ffmpeg.exe', 'ffmpeg']
-        else:
-            # Linux, macOS, etc.
-            ffmpeg_executables = ['ffmpeg']
+        Returns:
+            Tuple[str, int]: (job_id, vị trí trong hàng đợi)
         
-        for ffmpeg_cmd in ffmpeg_executables:
-            try:
-                cmd = [
-                    ffmpeg_cmd, '-i', mp3_path,
-                    '-acodec', 'pcm_s16le',
-                    '-ar', '44100',
-                    '-ac', '2',
-                    '-y',  # Overwrite output files
-                    wav_path
-                ]
+        Raises:
+            QueueFullError: Khi hàng đợi đã đầy
+        """
+        if not job_id:
+            job_id = self._new_job_id()
+        
+        self.completion_events.register(job_id)
+        self.job_store.create(job_id, {
+            'status': 'queued',
+            'progress': 0,
+            'text': text,
+            'filename': filename,
+            'start_time': datetime.now(),
+            'error': None,
+            'queue_position': None
+        })
+        
+        try:
+            position = self.executor.submit(job_id, self.generate_speech, text, filename, job_id, **kwargs)
+        except QueueFullError as e:
+            self._finish_job(job_id, 'failed', error='TTS queue is full', end_time=datetime.now())
+            raise e
+        
+        # Job có thể đã bắt đầu chạy trước khi tới đây
+        self.job_store.transition(job_id, 'queued', from_statuses=['queued'], queue_position=position)
+        return job_id, position
+    
+    def _publish_queue_positions(self, positions: Dict[str, int]):
+        """Cập nhật queue_position của các job đang chờ"""
+        for queued_job_id, position in positions.items():
+            self.job_store.transition(queued_job_id, 'queued', from_statuses=['queued'], queue_position=position)
+    
+    def get_queue_stats(self) -> Dict[str, Any]:
+        """Lấy thống kê worker pool (đang chạy, đang chờ)"""
+        return self.executor.get_stats()
+    
+    def _synthesize_audio(
+        self,
+        job_id: str,
+        text: str,
+        voice: str,
+        model: str,
+        speed: float,
+        wav_path: str,
+        ogg_path: Optional[str]
+    ) -> float:
+        """Gọi OpenAI TTS và ghi WAV/OGG, trả về duration thực tế"""
+        self._update_job(job_id, status='generating_speech', progress=20)
+        
+        if not Config.TTS_STREAMING:
+            response = self.client.audio.speech.create(
+                model=model,  # tts-1 hoặc tts-1-hd cho chất lượng cao hơn
+                voice=voice,
+                input=text,
+                speed=speed  # Có thể điều chỉnh tốc độ nói
+            )
+            
+            self._update_job(job_id, status='transcoding', progress=50)
+            return AudioTranscoder.transcode(response.content, wav_path, ogg_path)
+        
+        # Streaming: đẩy từng chunk vào ffmpeg ngay khi nhận được
+        transcoder = AudioTranscoder(wav_path, ogg_path)
+        transcoder.start()
+        try:
+            with self.client.audio.speech.with_streaming_response.create(
+                model=model,
+                voice=voice,
+                input=text,
+                speed=speed
+            ) as response:
+                content_length = response.headers.get('content-length')
+                expected_bytes = int(content_length) if content_length else self._estimate_audio_bytes(text, speed)
+                self._update_job(job_id, status='streaming_speech')
                 
-                result = subprocess.run(cmd, capture_output=True, text=True)
-                if result.returncode == 0:
-                    return  # Success
-                else:
-                    print(f"❌ FFmpeg conversion failed with {ffmpeg_cmd}: {result.stderr}")
-            except FileNotFoundError:
-                print(f"⚠️ {ffmpeg_cmd} not found, trying next option...")
+                last_progress = None
+                last_update = 0.0
+                for chunk in response.iter_bytes(chunk_size=Config.TTS_STREAM_CHUNK_SIZE):
+                    transcoder.write(chunk)
+                    
+                    # Progress 20 -> 75 theo số byte đã nhận; chỉ ghi job store khi % đổi và
+                    # tối đa mỗi PROGRESS_UPDATE_INTERVAL giây (database store commit mỗi lần ghi)
+                    received_ratio = min(transcoder.bytes_written / max(expected_bytes, 1), 1.0)
+                    progress = 20 + int(received_ratio * 55)
+                    now = time.monotonic()
+                    if progress != last_progress and now - last_update >= self.PROGRESS_UPDATE_INTERVAL:
+                        self._update_job(job_id, progress=progress, bytes_received=transcoder.bytes_written)
+                        last_progress = progress
+                        last_update = now
+        except Exception:
+            transcoder.abort()
+            raise
+        
+        self._update_job(job_id, status='transcoding', bytes_received=transcoder.bytes_written)
+        return transcoder.finish()
+    
+    @staticmethod
+    def _split_into_chunks(text: str, max_chars: int) -> List[str]:
+        """
+        Chia text theo ranh giới câu tiếng Việt rồi gom thành các chunk <= max_chars
+        
+        Câu quá dài được chia tiếp theo dấu phẩy/chấm phẩy, cuối cùng theo từ.
+        """
+        sentences = [s.strip() for s in re.split(r'(?<=[.!?…])\s+|\n+', text) if s.strip()]
+        
+        pieces = []
+        for sentence in sentences:
+            if len(sentence) <= max_chars:
+                pieces.append(sentence)
                 continue
+            for clause in re.split(r'(?<=[,;:])\s+', sentence):
+                while len(clause) > max_chars:
+                    cut = clause.rfind(' ', 0, max_chars)
+                    cut = cut if cut > 0 else max_chars
+                    pieces.append(clause[:cut].strip())
+                    clause = clause[cut:].strip()
+                if clause:
+                    pieces.append(clause)
         
-        # If all ffmpeg attempts fail, use fallback
-        raise Exception(f"FFmpeg not found or conversion failed. Please install FFmpeg: https://ffmpeg.org/download.html")
+        chunks = []
+        current = ''
+        for piece in pieces:
+            candidate = f"{current} {piece}".strip()
+            if current and len(candidate) > max_chars:
+                chunks.append(current)
+                current = piece
+            else:
+                current = candidate
+        if current:
+            chunks.append(current)
+        
+        return chunks
     
-    def _convert_wav_to_ogg(self, wav_path: str, ogg_path: str):
-        """Convert WAV to OGG using ffmpeg with cross-platform compatibility"""
-        # Detect operating system and choose appropriate ffmpeg executable
-        import platform
-        system = platform.system().lower()
+    def _synthesize_chunked(
+        self,
+        job_id: str,
+        text: str,
+        voice: str,
+        model: str,
+        speed: float,
+        wav_path: str,
+        json_path: str
+    ) -> float:
+        """
+        Tổng hợp các chunk song song qua worker pool giới hạn, ghép WAV liền mạch
+        và nối mouthCues của từng chunk lên cùng một timeline
+        """
+        chunks = self._split_into_chunks(text, Config.TTS_CHUNK_MAX_CHARS)
+        self._update_job(
+            job_id,
+            status='generating_speech',
+            progress=20,
+            chunks_total=len(chunks),
+            chunks_completed=0
+        )
         
-        if system == 'windows':
-            ffmpeg_executables = ['ffmpeg.exe', 'ffmpeg']
-        else:
-            # Linux, macOS, etc.
-            ffmpeg_executables = ['ffmpeg']
+        work_dir = tempfile.mkdtemp(prefix='.tts_chunks_', dir=self.audio_dir)
+        try:
+            def synthesize_chunk(index: int, chunk_text: str) -> Tuple[str, List[Dict[str, Any]]]:
+                chunk_wav = os.path.join(work_dir, f"chunk_{index:03d}.wav")
+                chunk_ogg = os.path.join(work_dir, f"chunk_{index:03d}.ogg") if self._uses_rhubarb() else None
+                chunk_json = os.path.join(work_dir, f"chunk_{index:03d}.json")
+                
+                response = self.client.audio.speech.create(
+                    model=model,
+                    voice=voice,
+                    input=chunk_text,
+                    speed=speed
+                )
+                AudioTranscoder.transcode(response.content, chunk_wav, chunk_ogg)
+                self._generate_lip_sync_json(chunk_wav, chunk_ogg, chunk_text, chunk_json)
+                
+                with open(chunk_json, 'r', encoding='utf-8') as f:
+                    cues = json.load(f).get('mouthCues', [])
+                return chunk_wav, cues
+            
+            results = [None] * len(chunks)
+            completed = 0
+            max_workers = max(1, min(Config.TTS_CHUNK_WORKERS, len(chunks)))
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                futures = {
+                    executor.submit(synthesize_chunk, index, chunk_text): index
+                    for index, chunk_text in enumerate(chunks)
+                }
+                for future in as_completed(futures):
+                    results[futures[future]] = future.result()
+                    
+                    completed += 1
+                    self._update_job(
+                        job_id,
+                        chunks_completed=completed,
+                        progress=20 + int(completed / len(chunks) * 65)
+                    )
+            
+            self._update_job(job_id, status='concatenating')
+            return self._concatenate_chunks(results, wav_path, json_path)
         
-        for ffmpeg_cmd in ffmpeg_executables:
-            try:
-                cmd = [
-                    ffmpeg_cmd, '-i', wav_path,
-                    '-c:a', 'libvorbis',
-                    '-q:a', '4',  # Quality level
-                    '-y',  # Overwrite output files
-                    ogg_path
-                ]
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+    
+    @staticmethod
+    def _concatenate_chunks(
+        results: List[Tuple[str, List[Dict[str, Any]]]],
+        wav_path: str,
+        json_path: str
+    ) -> float:
+        """Ghép PCM của các chunk theo thứ tự và dịch mouthCues theo offset, trả về duration"""
+        mouth_cues = []
+        offset = 0.0
+        
+        with wave.open(wav_path, 'wb') as output:
+            for index, (chunk_wav, cues) in enumerate(results):
+                with wave.open(chunk_wav, 'rb') as chunk:
+                    if index == 0:
+                        output.setparams(chunk.getparams())
+                    frames = chunk.readframes(chunk.getnframes())
+                    chunk_duration = chunk.getnframes() / float(chunk.getframerate())
+                output.writeframes(frames)
                 
-                result = subprocess.run(cmd, capture_output=True, text=True)
-                if result.returncode == 0:
-                    return  # Success
-                else:
-                    print(f"❌ WAV to OGG conversion failed with {ffmpeg_cmd}: {result.stderr}")
-            except FileNotFoundError:
-                print(f"⚠️ {ffmpeg_cmd} not found, trying next option...")
-                continue
+                for cue in cues:
+                    start = round(offset + cue['start'], 2)
+                    end = round(min(offset + cue['end'], offset + chunk_duration), 2)
+                    if end > start:
+                        mouth_cues.append({'start': start, 'end': end, 'value': cue['value']})
+                offset += chunk_duration
+        
+        with open(json_path, 'w', encoding='utf-8') as f:
+            json.dump({
+                'metadata': {
+                    'soundFile': os.path.basename(wav_path),
+                    'duration': round(offset, 2)
+                },
+                'mouthCues': mouth_cues
+            }, f, indent=2)
+        
+        return offset
+    
+    @staticmethod
+    def _estimate_audio_bytes(text: str, speed: float) -> int:
+        """Ước tính dung lượng MP3 khi server không trả về Content-Length"""
+        # ~14 ký tự/giây khi đọc tiếng Việt, MP3 ~128 kbps = 16 KB/giây
+        estimated_seconds = len(text) / 14.0 / max(speed, 0.25)
+        return int(max(estimated_seconds, 1.0) * 16000)
+    
+    def _restore_from_cache(self, job_id: str, cache_key: str, wav_path: str, json_path: str) -> bool:
+        """Hoàn thành job từ cache nếu có entry, trả về True nếu cache hit"""
+        entry = self.cache.get(cache_key)
+        if not entry:
+            return False
+        
+        try:
+            TTSCache.materialize(entry['wav_path'], wav_path)
+            TTSCache.materialize(entry['json_path'], json_path)
+        except OSError as e:
+            print(f"⚠️ Could not restore TTS cache entry {cache_key[:12]}: {e}")
+            return False
         
-        # If all ffmpeg attempts fail, use fallback
-        raise Exception(f"FFmpeg not found or WAV to OGG conversion failed. Please install FFmpeg: https://ffmpeg.org/download.html")
+        print(f"✅ TTS cache hit: {cache_key[:12]}")
+        self._finish_job(
+            job_id,
+            'completed',
+            progress=100,
+            wav_path=wav_path,
+            json_path=json_path,
+            actual_duration=entry['duration'],
+            cache_hit=True,
+            end_time=datetime.now()
+        )
+        return True
     
-    def _generate_lip_sync_json(self, ogg_path: str, text: str, json_path: str):
+    def _uses_rhubarb(self) -> bool:
+        return self.lip_sync_engine == 'rhubarb'
+    
+    def _generate_lip_sync_json(self, wav_path: str, ogg_path: Optional[str], text: str, json_path: str):
+        """Tạo JSON mouthCues bằng engine đã cấu hình (native hoặc Rhubarb)"""
+        if self._uses_rhubarb() and ogg_path:
+            self._generate_rhubarb_lip_sync_json(wav_path, ogg_path, text, json_path)
+        else:
+            self._create_native_lip_sync_json(json_path, wav_path)
+    
+    def _create_native_lip_sync_json(self, json_path: str, wav_path: str):
+        """Ước lượng mouthCues từ WAV bằng NumPy, fallback về JSON đơn giản nếu lỗi"""
+        try:
+            self.viseme_estimator.write_json(wav_path, json_path)
+        except Exception as e:
+            print(f"⚠️ Native lip sync failed: {e}")
+            self._create_simple_lip_sync_json(json_path, wav_path)
+    
+    def _generate_rhubarb_lip_sync_json(self, wav_path: str, ogg_path: str, text: str, json_path: str):
         """Generate lip sync JSON using Rhubarb with cross-platform compatibility"""
         try:
             # Tạo file text tạm
@@ -278,14 +555,14 @@ class TTSService:
                 pass
             
             if not rhubarb_success:
-                print("⚠️ Rhubarb not available or failed, using simple lip sync fallback")
-                # Nếu Rhubarb không có, tạo JSON đơn giản
-                self._create_simple_lip_sync_json(json_path, ogg_path)
+                print("⚠️ Rhubarb not available or failed, using native lip sync fallback")
+                # Nếu Rhubarb không có, ước lượng mouthCues từ WAV
+                self._create_native_lip_sync_json(json_path, wav_path)
                 
         except Exception as e:
             print(f"⚠️ Lip sync generation error: {e}")
-            # Fallback: tạo JSON đơn giản nếu Rhubarb không hoạt động
-            self._create_simple_lip_sync_json(json_path, ogg_path)
+            # Fallback: ước lượng mouthCues từ WAV nếu Rhubarb không hoạt động
+            self._create_native_lip_sync_json(json_path, wav_path)
     
     def _create_simple_lip_sync_json(self, json_path: str, audio_path: str):
         """Tạo JSON lip sync đơn giản nếu Rhubarb không có"""
@@ -349,13 +626,43 @@ class TTSService:
             print("⚠️ Using default duration: 5.0s")
             return 5.0  # Default duration
     
+    @property
+    def job_store(self):
+        """Job store đang dùng (InMemoryJobStore hoặc SQLAlchemyJobStore)"""
+        return self._job_store or get_tts_job_store()
+    
+    def _update_job(self, job_id: str, **fields: Any):
+        """Cập nhật trạng thái job trong job store"""
+        self.job_store.update(job_id, **fields)
+    
+    def _finish_job(self, job_id: str, status: str, **fields: Any):
+        """Chuyển job sang trạng thái cuối và đánh thức các caller đang chờ"""
+        self.job_store.transition(job_id, status, **fields)
+        self.completion_events.notify(job_id)
+    
+    def wait_for_completion(self, job_id: str, timeout: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """
+        Chờ TTS job kết thúc (completed/failed) mà không cần sleep polling
+        
+        Returns:
+            Optional[Dict[str, Any]]: Status cuối cùng, chưa kết thúc nếu hết timeout,
+            None nếu không tìm thấy job
+        """
+        return self.completion_events.wait(job_id, self.get_tts_status, timeout)
+    
     def get_tts_status(self, job_id: str) -> Optional[Dict[str, Any]]:
         """Lấy trạng thái TTS job"""
-        return self.tts_jobs.get(job_id)
+        return self.job_store.get(job_id)
     
     def get_all_tts_jobs(self) -> Dict[str, Dict[str, Any]]:
         """Lấy tất cả TTS jobs"""
-        return self.tts_jobs
+        return self.job_store.list_jobs()
+    
+    def get_cache_stats(self) -> Dict[str, Any]:
+        """Lấy thống kê TTS cache (hit/miss, dung lượng)"""
+        if not self.cache:
+            return {'enabled': False}
+        return {'enabled': True, **self.cache.get_stats()}
     
     def get_available_voices(self) -> list:
         """Lấy danh sách voices có sẵn"""
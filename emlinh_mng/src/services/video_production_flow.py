@@ -3,7 +3,7 @@
 Video Production Flow - Sử dụng CrewAI Flow để tối ưu quy trình sản xuất video
 """
 
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, List, Callable
 from pydantic import BaseModel, Field
 from crewai.flow.flow import Flow, listen, start, router
 from crewai import Agent, LLM
@@ -11,14 +11,64 @@ import time
 import os
 import asyncio
 import json
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
 from datetime import datetime
 
-from .video_service import VideoService
-from .tts_service import TTSService
+from .video_service import get_video_service
+from .tts_service import get_tts_service
+from .render_queue import PRIORITY_BATCH
+from .progress_bus import get_progress_bus, make_progress_event, publish_progress
+from src.app.config import Config
 from src.app.extensions import db
 from src.app.models import Video
-from src.utils.video_utils import VideoUtils
+from src.utils.video_utils import PreviewRender, VideoUtils
 from src.utils.tts_utils import TTSUtils
+from src.utils.bounded_executor import QueueFullError
+
+
+SCRIPT_SYSTEM_PROMPT = """Bạn là một chuyên gia viết nội dung. Nhiệm vụ của bạn là tạo ra một BÀI NÓI ngắn gọn và súc tích.
+
+QUAN TRỌNG: 
+- CHỈ viết nội dung BÀI NÓI, KHÔNG viết kịch bản
+- KHÔNG đề cập đến âm nhạc, hình ảnh, người dẫn chương trình
+- KHÔNG sử dụng format kịch bản như **[Mở đầu]**, **Người dẫn:**
+- CHỈ viết văn bản thuần túy như một bài nói tự nhiên
+- Sử dụng ngôn ngữ thân thiện, dễ hiểu
+- Nội dung phù hợp với thời lượng được yêu cầu"""
+
+
+def build_script_prompt(topic: str, duration: int) -> str:
+    """Yêu cầu viết bài nói cho một chủ đề"""
+    return f"""
+                    Hãy viết một bài nói ngắn về chủ đề: {topic}
+                    
+                    Yêu cầu:
+                    - Thời lượng: {duration} giây (khoảng {duration * 3} từ)
+                    - Bắt đầu với lời chào đơn giản
+                    - Nội dung chính súc tích về chủ đề
+                    - Kết thúc tích cực
+                    - Chỉ viết văn bản nói, không format kịch bản
+                    - Sử dụng tiếng Việt tự nhiên
+                    
+                    Ví dụ format mong muốn:
+                    "Xin chào các bạn! Hôm nay tôi muốn chia sẻ về [chủ đề]. [Nội dung chính 2-3 câu]. Cảm ơn các bạn đã lắng nghe!"
+                    """
+
+
+# LLM client dùng chung cho mọi flow (tạo một lần)
+_script_llm = None
+_script_llm_lock = threading.Lock()
+
+
+def get_script_llm() -> LLM:
+    global _script_llm
+    with _script_llm_lock:
+        if _script_llm is None:
+            _script_llm = LLM(model="openai/gpt-4o-mini")
+        return _script_llm
 
 
 class VideoProductionState(BaseModel):
@@ -36,6 +86,9 @@ class VideoProductionState(BaseModel):
     audio_file: str = ""
     video_file: str = ""
     actual_duration: Optional[float] = None  # Duration thực tế từ audio file
+    render_cache_key: Optional[str] = None
+    cache_hit: bool = False
+    preview_file: Optional[str] = None  # Bản preview render trước bản full (chat flow)
     
     # Status tracking
     current_step: str = "initialized"
@@ -68,13 +121,27 @@ class VideoProductionFlow(Flow[VideoProductionState]):
     This Flow orchestrates the complete video production process:
     1. Initialize → 2. Generate Script → 3. Create DB Record → 4. Start TTS 
     → 5. Monitor TTS → 6. Start Video Render → 7. Monitor Video → 8. Finalize
+    
+    Render preparation (render server bundle/browser, composition metadata) starts
+    together with TTS; only frame rendering waits for the audio and mouth cues.
     """
     
     def __init__(self):
         super().__init__()
-        self.video_service = VideoService()
-        self.tts_service = TTSService()
-        self.script_agent = self._create_script_agent()
+        # Service dùng chung (TTS pool, render queue) thay vì tạo mới cho mỗi flow
+        self.video_service = get_video_service()
+        self.tts_service = get_tts_service()
+        self._script_agent = None
+        # Nhận tiến độ render thật (frames, fps, ETA) từ Remotion, ví dụ để đẩy lên SSE
+        self.render_progress_callback = None
+        # Chuẩn bị render (render server, metadata composition) chạy song song với TTS
+        self.render_prep = None
+    
+    @property
+    def script_agent(self) -> Agent:
+        if self._script_agent is None:
+            self._script_agent = self._create_script_agent()
+        return self._script_agent
     
     def _create_script_agent(self) -> Agent:
         """Tạo agent chuyên về việc tạo script cho video"""
@@ -148,40 +215,13 @@ class VideoProductionFlow(Flow[VideoProductionState]):
             self.state.current_step = "generating_script"
             self.state.progress = 25.0
             
-            # Initialize LLM for script generation
-            llm = LLM(model="openai/gpt-4o-mini")
+            # LLM client dùng chung
+            llm = get_script_llm()
             
             # Create script generation prompt - CHỈ TẠO BÀI NÓI ĐƠN GIẢN
             messages = [
-                {
-                    "role": "system", 
-                    "content": """Bạn là một chuyên gia viết nội dung. Nhiệm vụ của bạn là tạo ra một BÀI NÓI ngắn gọn và súc tích.
-
-QUAN TRỌNG: 
-- CHỈ viết nội dung BÀI NÓI, KHÔNG viết kịch bản
-- KHÔNG đề cập đến âm nhạc, hình ảnh, người dẫn chương trình
-- KHÔNG sử dụng format kịch bản như **[Mở đầu]**, **Người dẫn:**
-- CHỈ viết văn bản thuần túy như một bài nói tự nhiên
-- Sử dụng ngôn ngữ thân thiện, dễ hiểu
-- Nội dung phù hợp với thời lượng được yêu cầu"""
-                },
-                {
-                    "role": "user", 
-                    "content": f"""
-                    Hãy viết một bài nói ngắn về chủ đề: {self.state.topic}
-                    
-                    Yêu cầu:
-                    - Thời lượng: {self.state.duration} giây (khoảng {self.state.duration * 3} từ)
-                    - Bắt đầu với lời chào đơn giản
-                    - Nội dung chính súc tích về chủ đề
-                    - Kết thúc tích cực
-                    - Chỉ viết văn bản nói, không format kịch bản
-                    - Sử dụng tiếng Việt tự nhiên
-                    
-                    Ví dụ format mong muốn:
-                    "Xin chào các bạn! Hôm nay tôi muốn chia sẻ về [chủ đề]. [Nội dung chính 2-3 câu]. Cảm ơn các bạn đã lắng nghe!"
-                    """
-                }
+                {"role": "system", "content": SCRIPT_SYSTEM_PROMPT},
+                {"role": "user", "content": build_script_prompt(self.state.topic, self.state.duration)}
             ]
             
             # Generate script
@@ -210,7 +250,8 @@ QUAN TRỌNG:
             print(f"❌ Script generation failed: {e}")
             raise
     
-    def _clean_script_content(self, script: str) -> str:
+    @staticmethod
+    def _clean_script_content(script: str) -> str:
         """
         Làm sạch script content, loại bỏ format kịch bản không mong muốn
         
@@ -353,58 +394,65 @@ QUAN TRỌNG:
             self.state.current_step = "starting_tts"
             self.state.progress = 45.0
             
+            # Setup render không cần audio: chạy song song để không nằm trên critical path
+            self.start_render_preparation()
+            
             # Import TTSService
             from ..services.tts_service import get_tts_service
             tts_service = get_tts_service()
             
-            # Generate TTS with job tracking
-            tts_job_id = tts_service.generate_speech(
-                text=self.state.script,
-                filename=f"video_{self.state.video_id}_audio"
-            )
+            # Đưa job vào worker pool dùng chung (BoundedExecutor) để batch không vượt
+            # giới hạn TTS đồng thời; job_id dùng uuid4 để các video cùng giây không trùng
+            max_wait = 60  # Maximum wait time in seconds (tính cả thời gian chờ trong hàng đợi)
+            deadline = time.monotonic() + max_wait
+            while True:
+                try:
+                    tts_job_id, _ = tts_service.submit_speech(
+                        self.state.script,
+                        f"video_{self.state.video_id}_audio",
+                        job_id=f"tts_{uuid.uuid4().hex}",
+                        voice=self.state.voice
+                    )
+                    break
+                except QueueFullError as e:
+                    if time.monotonic() + e.retry_after > deadline:
+                        raise Exception("TTS queue is full") from e
+                    print(f"⏳ TTS queue is full, retrying in {e.retry_after}s")
+                    time.sleep(e.retry_after)
             
-            # Wait for TTS completion and get actual duration
-            import time
-            max_wait = 60  # Maximum wait time in seconds
-            wait_time = 0
+            # Wait for TTS completion (event-driven) and get actual duration
+            tts_status = tts_service.wait_for_completion(tts_job_id, timeout=max(0.0, deadline - time.monotonic()))
             
-            while wait_time < max_wait:
-                tts_status = tts_service.get_tts_status(tts_job_id)
+            if tts_status and tts_status['status'] == 'completed':
+                # TTS completed successfully
+                audio_file = tts_status['wav_path']
+                actual_duration = tts_status.get('actual_duration', self.state.duration)
                 
-                if tts_status['status'] == 'completed':
-                    # TTS completed successfully
-                    audio_file = tts_status['wav_path']
-                    actual_duration = tts_status.get('actual_duration', self.state.duration)
-                    
-                    # Update state with actual duration
-                    self.state.audio_file = audio_file
-                    self.state.actual_duration = actual_duration
-                    self.state.duration = int(actual_duration)  # Update duration với actual value
-                    
-                    print(f"✅ TTS generated: {audio_file}")
-                    print(f"📊 Actual duration: {actual_duration}s (was {self.state.duration}s)")
-                    
-                    # Kiểm tra mouthCues JSON
-                    json_path = tts_status['json_path']
-                    if os.path.exists(json_path):
-                        print(f"✅ MouthCues JSON created: {json_path}")
-                    else:
-                        print(f"⚠️ MouthCues JSON not found: {json_path}")
-                    
-                    return {
-                        "audio_file": audio_file,
-                        "actual_duration": actual_duration,
-                        "video_id": self.state.video_id,
-                        "tts_job_id": tts_job_id,
-                        "status": "tts_completed"
-                    }
-                    
-                elif tts_status['status'] == 'failed':
-                    raise Exception(f"TTS generation failed: {tts_status.get('error', 'Unknown error')}")
+                # Update state with actual duration
+                self.state.audio_file = audio_file
+                self.state.actual_duration = actual_duration
+                self.state.duration = int(actual_duration)  # Update duration với actual value
+                
+                print(f"✅ TTS generated: {audio_file}")
+                print(f"📊 Actual duration: {actual_duration}s (was {self.state.duration}s)")
+                
+                # Kiểm tra mouthCues JSON
+                json_path = tts_status['json_path']
+                if os.path.exists(json_path):
+                    print(f"✅ MouthCues JSON created: {json_path}")
+                else:
+                    print(f"⚠️ MouthCues JSON not found: {json_path}")
+                
+                return {
+                    "audio_file": audio_file,
+                    "actual_duration": actual_duration,
+                    "video_id": self.state.video_id,
+                    "tts_job_id": tts_job_id,
+                    "status": "tts_completed"
+                }
                 
-                # Wait a bit before checking again
-                time.sleep(1)
-                wait_time += 1
+            elif tts_status and tts_status['status'] == 'failed':
+                raise Exception(f"TTS generation failed: {tts_status.get('error', 'Unknown error')}")
             
             # Timeout
             raise Exception(f"TTS generation timeout after {max_wait} seconds")
@@ -415,6 +463,86 @@ QUAN TRỌNG:
             print(f"❌ TTS generation failed: {e}")
             raise
     
+    def start_render_preparation(self):
+        """Bắt đầu khởi động render server / kiểm tra Remotion ở nền (một lần mỗi flow)"""
+        if self.render_prep is None:
+            self.render_prep = VideoUtils.prepare_render()
+    
+    def _wait_for_render_preparation(self):
+        """Chỉ bước render frame mới cần chờ phần chuẩn bị chạy song song với TTS xong"""
+        if self.render_prep is None or self.render_prep.is_done():
+            return
+        print("⏳ Waiting for render preparation...")
+        if not self.render_prep.wait(Config.RENDER_SERVER_STARTUP_TIMEOUT):
+            print("⚠️ Render preparation still running, rendering anyway")
+    
+    def start_preview_render(
+        self,
+        tts_data: Dict[str, Any],
+        on_finished: Optional[Callable[[Dict[str, Any]], None]] = None,
+        progress_callback: Optional[Callable[[Dict[str, Any]], None]] = None
+    ) -> PreviewRender:
+        """
+        Render bản preview nhanh (scale/fps thấp) ở thread riêng và lưu vào Video khi xong
+        
+        Không nằm trong chuỗi @listen: chat flow gọi khi bật preview rồi render bản full
+        ngay khi preview đã có slot, không chờ preview xong. Lỗi preview không làm hỏng flow.
+        
+        Args:
+            on_finished: Nhận dict preview_file (None nếu bỏ qua/thất bại), preview_status, video_id
+        """
+        print("👀 Starting preview render...")
+        self._wait_for_render_preparation()
+        render_duration = self.state.actual_duration if self.state.actual_duration else self.state.duration
+        
+        from flask import current_app
+        try:
+            app = current_app._get_current_object()
+        except RuntimeError:
+            app = None
+        
+        def finished(preview_file: Optional[str]):
+            result = self._save_preview(preview_file, app)
+            if on_finished:
+                on_finished(result)
+        
+        return PreviewRender(
+            on_done=finished,
+            app=app,
+            audio_file=self.state.audio_file,
+            duration=render_duration,
+            composition=self.state.composition,
+            background=self.state.background,
+            topic=self.state.topic,
+            progress_callback=progress_callback or self.render_progress_callback
+        ).start()
+    
+    def _save_preview(self, preview_file: Optional[str], app=None) -> Dict[str, Any]:
+        """Lưu preview vào Video (chạy trên thread của preview nên cần app context riêng)"""
+        self.state.preview_file = preview_file
+        preview_status = 'completed' if preview_file else 'skipped'
+        
+        if app is None:
+            from ..app.app import create_app
+            app = create_app()  # create_app returns app only
+        
+        with app.app_context():
+            try:
+                video = Video.query.get(self.state.video_id) if self.state.video_id else None
+                if video:
+                    video.preview_path = preview_file
+                    video.preview_status = preview_status
+                    db.session.commit()
+            except Exception as e:
+                db.session.rollback()
+                print(f"⚠️ Could not save preview for video {self.state.video_id}: {e}")
+        
+        return {
+            "preview_file": preview_file,
+            "preview_status": preview_status,
+            "video_id": self.state.video_id
+        }
+    
     @listen(start_tts_generation)
     def start_video_render(self, tts_data: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -430,6 +558,7 @@ QUAN TRỌNG:
             print("🎬 Starting video render...")
             self.state.current_step = "starting_render"
             self.state.progress = 65.0
+            self._wait_for_render_preparation()
             
             # Sử dụng actual duration nếu có, fallback to original duration
             render_duration = self.state.actual_duration if self.state.actual_duration else self.state.duration
@@ -437,16 +566,21 @@ QUAN TRỌNG:
             print(f"🎬 Rendering video with actual duration: {render_duration}s")
             
             # Start video rendering sử dụng VideoUtils đã cải thiện
+            cache_info = {}
             video_file = VideoUtils.render_video(
                 audio_file=self.state.audio_file,
                 duration=render_duration,
                 composition=self.state.composition,
                 background=self.state.background,
-                topic=self.state.topic
+                topic=self.state.topic,
+                progress_callback=self.render_progress_callback,
+                cache_info=cache_info
             )
             
             # Store video file path
             self.state.video_file = video_file
+            self.state.render_cache_key = cache_info.get('render_cache_key')
+            self.state.cache_hit = bool(cache_info.get('cache_hit'))
             
             # Check if it's a placeholder file
             if video_file.endswith('_placeholder.txt'):
@@ -468,6 +602,50 @@ QUAN TRỌNG:
             print(f"❌ Video rendering failed: {e}")
             raise
     
+    def start_queued_render(self, tts_data: Dict[str, Any], priority: int = PRIORITY_BATCH) -> Dict[str, Any]:
+        """
+        Render qua render queue dùng chung (worker giữ render server đã warm) thay vì
+        render trực tiếp trong thread của flow; dùng cho batch để chat tương tác được ưu tiên
+        
+        Returns:
+            Dict cùng format với start_video_render
+        
+        Raises:
+            RuntimeError: Render job thất bại hoặc quá BATCH_RENDER_TIMEOUT
+        """
+        print("🎬 Queueing video render...")
+        self.state.current_step = "starting_render"
+        self.state.progress = 65.0
+        self._wait_for_render_preparation()
+        
+        render_duration = self.state.actual_duration if self.state.actual_duration else self.state.duration
+        props = {
+            "durationInSeconds": render_duration,
+            "audioFileName": os.path.basename(self.state.audio_file),
+            "backgroundScene": self.state.background
+        }
+        output_name = f"video_{self.state.video_id}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.mp4"
+        
+        job_id = self.video_service.render_video(self.state.composition, props, output_name, priority=priority)
+        job = self.video_service.wait_for_completion(job_id, timeout=Config.BATCH_RENDER_TIMEOUT)
+        if not job or job.get('status') != 'completed':
+            error = (job or {}).get('error') or f"Render job {job_id} timed out"
+            self.state.error_message = error
+            self.state.current_step = "failed"
+            raise RuntimeError(error)
+        
+        self.state.video_file = job['output_path']
+        self.state.render_cache_key = job.get('render_cache_key')
+        self.state.cache_hit = bool(job.get('cache_hit'))
+        print(f"✅ Video rendered: {self.state.video_file}")
+        
+        return {
+            "video_file": self.state.video_file,
+            "audio_file": self.state.audio_file,
+            "video_id": self.state.video_id,
+            "status": "render_completed"
+        }
+    
     @listen(start_video_render)
     def finalize_production(self, render_data: Dict[str, Any]) -> VideoProductionResponse:
         """
@@ -510,6 +688,8 @@ QUAN TRỌNG:
                         print("ℹ️ Database updated with placeholder status")
                     else:
                         video.status = 'completed'
+                        video.render_cache_key = self.state.render_cache_key
+                        video.cache_hit = self.state.cache_hit
                     
                     # Update duration với actual duration từ audio
                     if self.state.actual_duration:
@@ -672,7 +852,8 @@ def create_video_from_topic_realtime(
     voice: str = "nova",
     job_id: str = "",
     app_instance=None,  # Flask app instance parameter
-    session_id: str = None  # Session ID for database storage
+    session_id: str = None,  # Session ID for database storage
+    preview: Optional[bool] = None
 ) -> Dict[str, Any]:
     """
     Hàm tạo video với realtime updates qua Server-Sent Events
@@ -684,7 +865,8 @@ def create_video_from_topic_realtime(
         background: Background scene
         voice: Giọng đọc TTS
         job_id: Job ID để tracking
-        app_instance: Flask app instance để access progress store
+        app_instance: Flask app instance (không còn dùng cho progress, giữ để tương thích)
+        preview: Render bản preview nhanh trước bản full (None = Config.PREVIEW_ENABLED)
         
     Returns:
         Dict chứa thông tin kết quả và trạng thái
@@ -693,29 +875,15 @@ def create_video_from_topic_realtime(
     def store_progress(step: str, message: str, progress: int, data: dict = None):
         """Helper function để store progress events cho SSE và database"""
         try:
-            event_data = {
-                'job_id': job_id,
-                'step': step,
-                'message': message,
-                'progress': progress,
-                'data': data or {},
-                'timestamp': datetime.now().isoformat()
-            }
+            event_data = make_progress_event(job_id, step, message, progress, data)
             
             print(f"📡 [SSE] Storing progress event: {step} ({progress}%)")
             print(f"📡 [SSE] Job ID: {job_id}")
             print(f"📡 [SSE] Event data: {event_data}")
             
-            # Store in SSE progress store
-            if app_instance:
-                if not hasattr(app_instance, 'video_progress_store'):
-                    from collections import defaultdict
-                    app_instance.video_progress_store = defaultdict(list)
-                
-                app_instance.video_progress_store[job_id].append(event_data)
-                print(f"✅ [SSE] Event stored successfully")
-            else:
-                print(f"⚠️ [SSE] No app instance provided - cannot store progress")
+            # Publish lên progress bus cho SSE (mọi worker đều đọc được)
+            get_progress_bus().publish(job_id, event_data)
+            print(f"✅ [SSE] Event stored successfully")
             
             # Store in database for chat history
             try:
@@ -808,6 +976,52 @@ def create_video_from_topic_realtime(
                          'original_duration': duration
                      })
         
+        # Đẩy tiến độ render thật lên SSE (không lưu vào chat history để tránh spam)
+        # Preview chạy song song với bản full nên chỉ bản full đẩy thanh tiến độ 75 -> 85
+        overall = {'progress': 75}
+        
+        def make_render_forwarder(label: str, span: int) -> Callable[[Dict[str, Any]], None]:
+            last_event = {'progress': -1, 'time': 0.0}
+            
+            def forward_render_progress(snapshot: Dict[str, Any]):
+                now = time.time()
+                if snapshot['progress'] == last_event['progress'] or now - last_event['time'] < 1.0:
+                    return
+                last_event.update(progress=snapshot['progress'], time=now)
+                if span:
+                    overall['progress'] = 75 + int(snapshot['progress'] * span / 100)
+                
+                eta = f", còn khoảng {int(snapshot['eta_seconds'])}s" if snapshot['eta_seconds'] is not None else ""
+                publish_progress(
+                    job_id,
+                    f"{label}_progress",
+                    f"Đã render {snapshot['frames_rendered']}/{snapshot['total_frames']} frames{eta}",
+                    overall['progress'],
+                    snapshot
+                )
+            return forward_render_progress
+        
+        flow.render_progress_callback = make_render_forwarder('render', 10)
+        
+        # Step 5a: Preview nhanh (scale/fps thấp) ở thread riêng; bản full bắt đầu ngay khi
+        # preview đã được cấp slot render, không chờ preview xong
+        preview_render = None
+        if (Config.PREVIEW_ENABLED if preview is None else preview):
+            store_progress('rendering_preview', 'Đang render bản xem trước...', 70)
+            
+            def preview_finished(preview_result: Dict[str, Any]):
+                if preview_result.get('preview_file'):
+                    store_progress('preview_ready', 'Bản xem trước đã sẵn sàng, bản chất lượng cao đang được render...',
+                                   overall['progress'], {
+                                       'video_id': preview_result.get('video_id'),
+                                       'preview_url': f"/api/videos/{preview_result.get('video_id')}/preview"
+                                   })
+            
+            preview_render = flow.start_preview_render(
+                tts_result, on_finished=preview_finished, progress_callback=make_render_forwarder('preview', 0)
+            )
+            preview_render.wait_submitted()
+        
         # Step 5: Render video
         store_progress('rendering_video', 
                      f'Đang render video có thời lượng thực tế {actual_duration_str} giây, background: {background}, composition: {composition}...',
@@ -823,6 +1037,10 @@ def create_video_from_topic_realtime(
                      f'Video đang được render với composition {composition} và thời lượng {actual_duration_str}s...',
                      85)
         
+        # Preview thường xong trước bản full; chờ thêm một chút để preview_ready không đến sau completed
+        if preview_render is not None and not preview_render.wait(60):
+            print("⚠️ Preview render still running after full render")
+        
         # Step 6: Finalize
         store_progress('finalizing', 'Đang hoàn thiện và lưu video...', 95)
         
@@ -857,5 +1075,263 @@ def create_video_from_topic_realtime(
         }
 
 
+def generate_scripts_batch(
+    topics: List[str],
+    duration: int,
+    llm=None,
+    batch_size: Optional[int] = None
+) -> List[Optional[str]]:
+    """
+    Tạo bài nói cho nhiều chủ đề, mỗi lần gọi LLM viết tối đa batch_size bài
+    
+    LLM trả về JSON array; bài nào thiếu hoặc parse lỗi thì gọi lại riêng cho chủ đề đó.
+    
+    Returns:
+        List[Optional[str]]: Script đã làm sạch theo đúng thứ tự topics (None nếu thất bại)
+    """
+    llm = llm or get_script_llm()
+    batch_size = max(1, batch_size or Config.BATCH_SCRIPT_SIZE)
+    scripts: List[Optional[str]] = [None] * len(topics)
+    
+    for start_index in range(0, len(topics), batch_size):
+        chunk = topics[start_index:start_index + batch_size]
+        listing = "\n".join(f"{i + 1}. {topic}" for i, topic in enumerate(chunk))
+        messages = [
+            {
+                "role": "system",
+                "content": SCRIPT_SYSTEM_PROMPT + """
+
+Bạn sẽ nhận nhiều chủ đề cùng lúc. Trả về DUY NHẤT một JSON array, mỗi phần tử có dạng
+{"index": <số thứ tự chủ đề>, "script": "<bài nói>"}, không kèm giải thích."""
+            },
+            {
+                "role": "user",
+                "content": f"""Hãy viết {len(chunk)} bài nói ngắn, mỗi bài cho một chủ đề trong danh sách dưới đây.
+
+Yêu cầu cho mỗi bài:
+- Thời lượng: {duration} giây (khoảng {duration * 3} từ)
+- Bắt đầu với lời chào đơn giản
+- Nội dung chính súc tích về chủ đề
+- Kết thúc tích cực
+- Chỉ viết văn bản nói, không format kịch bản
+- Sử dụng tiếng Việt tự nhiên
+
+Danh sách chủ đề:
+{listing}"""
+            }
+        ]
+        try:
+            response = llm.call(messages=messages)
+            for index, script in _parse_batch_scripts(response, len(chunk)).items():
+                cleaned = VideoProductionFlow._clean_script_content(script)
+                if cleaned:
+                    scripts[start_index + index] = cleaned
+        except Exception as e:
+            print(f"⚠️ Batch script generation failed for topics {start_index + 1}-{start_index + len(chunk)}: {e}")
+        
+        # Chủ đề bị thiếu trong kết quả batch: gọi riêng
+        for offset, topic in enumerate(chunk):
+            index = start_index + offset
+            if scripts[index]:
+                continue
+            try:
+                response = llm.call(messages=[
+                    {"role": "system", "content": SCRIPT_SYSTEM_PROMPT},
+                    {"role": "user", "content": build_script_prompt(topic, duration)}
+                ])
+                scripts[index] = VideoProductionFlow._clean_script_content(response.strip()) or None
+            except Exception as e:
+                print(f"❌ Script generation failed for topic '{topic}': {e}")
+    
+    return scripts
+
+
+def _parse_batch_scripts(response: str, count: int) -> Dict[int, str]:
+    """Parse JSON array từ LLM thành {vị trí (0-based): script}"""
+    text = (response or "").strip()
+    start_pos, end_pos = text.find('['), text.rfind(']')
+    if start_pos == -1 or end_pos <= start_pos:
+        return {}
+    items = json.loads(text[start_pos:end_pos + 1])
+    
+    scripts = {}
+    for position, item in enumerate(items):
+        if isinstance(item, str):
+            index, script = position, item
+        elif isinstance(item, dict):
+            index, script = int(item.get('index', position + 1)) - 1, item.get('script')
+        else:
+            continue
+        if 0 <= index < count and isinstance(script, str) and script.strip():
+            scripts[index] = script
+    return scripts
+
+
+class BatchProgress:
+    """Tiến độ của từng video trong batch và tiến độ tổng"""
+    
+    STAGE_PROGRESS = {
+        'queued': 0, 'script': 10, 'record': 20, 'tts': 35,
+        'rendering': 60, 'finalizing': 95, 'completed': 100, 'failed': 100
+    }
+    
+    def __init__(self, batch_id: str, topics: List[str], emit: Optional[Callable[[Dict[str, Any]], None]] = None):
+        self.batch_id = batch_id
+        self.emit = emit
+        self.items = [
+            {'index': i, 'topic': topic, 'status': 'queued', 'progress': 0, 'video_id': None, 'error': None}
+            for i, topic in enumerate(topics)
+        ]
+        self._lock = threading.Lock()
+    
+    def update(self, index: int, status: str, **fields: Any):
+        with self._lock:
+            item = self.items[index]
+            item.update(fields)
+            item['status'] = status
+            item['progress'] = self.STAGE_PROGRESS.get(status, item['progress'])
+            event = {'item': dict(item), 'aggregate': self._aggregate()}
+        if self.emit:
+            self.emit(event)
+    
+    def _aggregate(self) -> Dict[str, Any]:
+        counts = {'queued': 0, 'in_progress': 0, 'completed': 0, 'failed': 0}
+        for item in self.items:
+            if item['status'] in ('queued', 'completed', 'failed'):
+                counts[item['status']] += 1
+            else:
+                counts['in_progress'] += 1
+        total = len(self.items)
+        progress = int(sum(item['progress'] for item in self.items) / total) if total else 100
+        return dict(counts, total=total, progress=progress)
+    
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'batch_id': self.batch_id,
+                'items': [dict(item) for item in self.items],
+                'aggregate': self._aggregate()
+            }
+
+
+def _mark_video_failed(video_id: Optional[int], error: str):
+    """Đánh dấu Video của item lỗi là 'failed' để không kẹt ở 'processing'"""
+    if not video_id:
+        return
+    from flask import current_app
+    try:
+        current_app._get_current_object()
+        app_context = None
+    except RuntimeError:
+        from ..app.app import create_app
+        app_context = create_app().app_context()
+        app_context.push()
+    try:
+        video = Video.query.get(video_id)
+        if video:
+            video.status = 'failed'
+            db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        print(f"⚠️ Could not mark video {video_id} as failed ({error}): {e}")
+    finally:
+        if app_context:
+            app_context.pop()
+
+
+def create_videos_from_topics(
+    topics: List[str],
+    duration: int = 15,
+    composition: str = "Scene-Landscape",
+    background: str = "office",
+    voice: str = "nova",
+    batch_id: str = "",
+    progress_callback: Optional[Callable[[Dict[str, Any]], None]] = None,
+    max_parallel: Optional[int] = None
+) -> Dict[str, Any]:
+    """
+    Tạo nhiều video trong một lần với tài nguyên dùng chung
+    
+    - Script: gom nhiều chủ đề vào một lần gọi LLM (generate_scripts_batch)
+    - TTS: submit_speech vào worker pool (BoundedExecutor) và cache của TTSService singleton
+    - Render: qua render queue với PRIORITY_BATCH, worker giữ render server đã warm
+    
+    Args:
+        topics: Danh sách chủ đề
+        progress_callback: Nhận {'item': ..., 'aggregate': ...} mỗi khi một video đổi trạng thái
+        max_parallel: Số video xử lý TTS/render cùng lúc (mặc định Config.BATCH_MAX_PARALLEL)
+        
+    Returns:
+        Dict chứa batch_id, items (trạng thái từng video) và aggregate
+    """
+    batch_id = batch_id or f"batch_{datetime.now().strftime('%Y%m%d%H%M%S')}"
+    progress = BatchProgress(batch_id, topics, progress_callback)
+    print(f"📦 [BATCH] {batch_id}: {len(topics)} topics")
+    
+    # Bắt đầu warm render server ngay, song song với việc tạo script
+    render_prep = VideoUtils.prepare_render()
+    
+    for index in range(len(topics)):
+        progress.update(index, 'script')
+    scripts = generate_scripts_batch(topics, duration)
+    
+    # Worker thread dùng chung app context của caller thay vì mỗi bước tự create_app()
+    try:
+        from flask import current_app
+        app = current_app._get_current_object()
+    except RuntimeError:
+        app = None
+    
+    def produce(index: int):
+        with app.app_context() if app else nullcontext():
+            produce_item(index)
+    
+    def produce_item(index: int):
+        topic, script = topics[index], scripts[index]
+        if not script:
+            progress.update(index, 'failed', error='Script generation failed')
+            return
+        
+        flow = VideoProductionFlow()
+        flow.render_prep = render_prep
+        flow.state.topic = topic
+        flow.state.duration = duration
+        flow.state.composition = composition
+        flow.state.background = background
+        flow.state.voice = voice
+        try:
+            flow.initialize_production()
+            flow.state.script = script
+            
+            progress.update(index, 'record')
+            record_result = flow.create_database_record({'script': script})
+            
+            progress.update(index, 'tts', video_id=flow.state.video_id)
+            tts_result = flow.start_tts_generation(record_result)
+            
+            progress.update(index, 'rendering')
+            render_result = flow.start_queued_render(tts_result, priority=PRIORITY_BATCH)
+            
+            progress.update(index, 'finalizing')
+            response = flow.finalize_production(render_result)
+            if not response.success:
+                raise RuntimeError(response.error or 'Finalize failed')
+            
+            progress.update(index, 'completed', video_url=response.video_url)
+        except Exception as e:
+            print(f"❌ [BATCH] {batch_id} item {index} ('{topic}') failed: {e}")
+            _mark_video_failed(flow.state.video_id, str(e))
+            progress.update(index, 'failed', error=str(e))
+    
+    workers = max(1, max_parallel or Config.BATCH_MAX_PARALLEL)
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='batch-video') as pool:
+        list(pool.map(produce, range(len(topics))))
+    
+    result = progress.snapshot()
+    result['success'] = result['aggregate']['completed'] > 0
+    print(f"🏁 [BATCH] {batch_id} done: {result['aggregate']}")
+    return result
+
+
 if __name__ == "__main__":
     demo_video_production() 
\ No newline at end of file
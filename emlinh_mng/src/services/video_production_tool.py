@@ -7,8 +7,8 @@ import os
 from crewai.tools import BaseTool
 from pydantic import BaseModel, Field
 
-from .video_service import VideoService
-from .tts_service import TTSService
+from .video_service import get_video_service
+from .tts_service import get_tts_service
 from src.app.extensions import db
 from src.app.models import Video
 from src.app.config import Config
@@ -37,8 +37,9 @@ class VideoProductionTool(BaseTool):
     def __init__(self):
         super().__init__()
         # Use instance variables instead of class fields để tránh Pydantic issues
-        object.__setattr__(self, 'video_service', VideoService())
-        object.__setattr__(self, 'tts_service', TTSService())
+        # Dùng singleton: job được chạy và báo hoàn thành bởi service của process
+        object.__setattr__(self, 'video_service', get_video_service())
+        object.__setattr__(self, 'tts_service', get_tts_service())
         print("🎬 VideoProductionTool initialized successfully!")
 
     def _run(
@@ -95,22 +96,9 @@ class VideoProductionTool(BaseTool):
                 db.session.commit()
                 return f"❌ Lỗi: Không thể tạo speech từ script"
             
-            # Chờ TTS hoàn thành với timeout 60s thay vì 30s
-            tts_result = None
+            # Chờ TTS hoàn thành với timeout 60s (đánh thức ngay khi job kết thúc)
             timeout_seconds = 60
-            poll_interval = 2
-            max_attempts = timeout_seconds // poll_interval  # 30 attempts max
-            
-            for attempt in range(max_attempts):
-                status = self.tts_service.get_tts_status(tts_job_id)
-                if status and status['status'] == 'completed':
-                    tts_result = status
-                    break
-                elif status and status['status'] == 'failed':
-                    break
-                
-                print(f"TTS attempt {attempt + 1}/{max_attempts} - Status: {status['status'] if status else 'unknown'}")
-                time.sleep(poll_interval)
+            tts_result = self.tts_service.wait_for_completion(tts_job_id, timeout=timeout_seconds)
             
             if not tts_result or tts_result['status'] != 'completed':
                 video_record.status = 'failed'
@@ -137,25 +125,14 @@ class VideoProductionTool(BaseTool):
             db.session.commit()
             
             # Chờ video render hoàn thành với timeout 1200s (20 phút)
-            video_result = None
             video_timeout_seconds = 1200
-            video_poll_interval = 3
-            video_max_attempts = video_timeout_seconds // video_poll_interval  # 60 attempts max
-            
-            for attempt in range(video_max_attempts):
-                status = self.video_service.get_render_status(video_job_id)
-                if status and status['status'] == 'completed':
-                    video_result = status
-                    break
-                elif status and status['status'] == 'failed':
-                    break
-                
-                print(f"Video render attempt {attempt + 1}/{video_max_attempts} - Status: {status['status'] if status else 'unknown'}")
-                time.sleep(video_poll_interval)
+            video_result = self.video_service.wait_for_completion(video_job_id, timeout=video_timeout_seconds)
             
             if video_result and video_result['status'] == 'completed':
                 # Cập nhật video record với thông tin file
                 video_record.status = 'completed'
+                video_record.render_cache_key = video_result.get('render_cache_key')
+                video_record.cache_hit = bool(video_result.get('cache_hit'))
                 try:
                     if os.path.exists(output_path):
                         video_record.file_size = os.path.getsize(output_path)
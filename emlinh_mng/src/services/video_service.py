@@ -1,11 +1,17 @@
 import os
 import subprocess
 import json
-import threading
 import time
 from datetime import datetime
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, List, Tuple
 from ..app.config import Config
+from ..utils.composition_cache import CompositionCache, parse_compositions_output
+from ..utils.job_events import JobCompletionEvents
+from ..utils.render_cache import compute_render_cache_key, reuse_cached_render
+from ..utils.remotion_progress import run_remotion_command
+from ..utils.render_scheduler import get_render_scheduler
+from .render_queue import PRIORITY_INTERACTIVE, get_render_queue, new_render_job_id
+from .render_server import RenderServerUnavailable, get_render_server, render_with_server
 
 
 class VideoService:
@@ -14,62 +20,66 @@ class VideoService:
         self.remotion_path = Config.REMOTION_PATH
         self.output_dir = Config.WORKSPACE_ROOT
         
-        # Lưu trữ trạng thái render jobs
-        self.render_jobs = {}
+        # Trạng thái render job nằm trong render queue (bảng render_jobs)
+        self.completion_events = JobCompletionEvents()
+        
+        # Metadata composition chỉ tính lại khi code trong emlinh-remotion/src thay đổi
+        self.composition_cache = CompositionCache(
+            os.path.join(self.remotion_path, 'src'),
+            Config.COMPOSITION_CACHE_FILE or os.path.join(self.remotion_path, '.cache', 'compositions.json'),
+            self._load_compositions
+        )
         
     def get_compositions(self) -> List[Dict[str, Any]]:
-        """Lấy danh sách các composition có sẵn từ Remotion"""
-        try:
-            # Chạy lệnh để lấy thông tin compositions
-            result = subprocess.run(
-                ['npx', 'remotion', 'compositions'],
-                cwd=self.remotion_path,
-                capture_output=True,
-                text=True,
-                timeout=30
-            )
-            
-            if result.returncode == 0:
-                # Parse output để lấy thông tin compositions
-                compositions = []
-                lines = result.stdout.strip().split('\n')
-                for line in lines:
-                    if line.strip() and not line.startswith('Found'):
-                        # Giả định format output của remotion compositions
-                        parts = line.strip().split()
-                        if len(parts) >= 1:
-                            compositions.append({
-                                'id': parts[0],
-                                'description': ' '.join(parts[1:]) if len(parts) > 1 else ''
-                            })
-                
-                # Fallback với compositions mặc định nếu không parse được
-                if not compositions:
-                    compositions = [
-                        {'id': 'Scene-Landscape', 'description': 'Landscape format (16:9)'},
-                        {'id': 'Scene-Portrait', 'description': 'Portrait format (9:16)'}
-                    ]
-                    
-                return compositions
-            else:
-                # Trả về compositions mặc định nếu lỗi
-                return [
-                    {'id': 'Scene-Landscape', 'description': 'Landscape format (16:9)'},
-                    {'id': 'Scene-Portrait', 'description': 'Portrait format (9:16)'}
-                ]
-                
-        except Exception as e:
-            print(f"Error getting compositions: {e}")
-            return [
-                {'id': 'Scene-Landscape', 'description': 'Landscape format (16:9)'},
-                {'id': 'Scene-Portrait', 'description': 'Portrait format (9:16)'}
-            ]
+        """Lấy danh sách các composition (id, width, height, fps, thời lượng mặc định) từ cache"""
+        return self.composition_cache.get()
+    
+    def _load_compositions(self) -> List[Dict[str, Any]]:
+        """
+        Đọc metadata composition từ render server (nếu đang chạy) hoặc Remotion CLI
+        
+        Chỉ được gọi khi hash của src/ đổi, nên sidecar phải bundle lại trước khi đọc;
+        nếu không metadata của bundle cũ sẽ bị lưu dưới hash mới.
+        """
+        server = get_render_server()
+        if server is not None and server.is_running():
+            try:
+                server.ensure_fresh_bundle()
+                return server.get_compositions()
+            except RenderServerUnavailable as e:
+                print(f"⚠️ {e} - falling back to npx remotion compositions")
+        
+        result = subprocess.run(
+            ['npx', 'remotion', 'compositions'],
+            cwd=self.remotion_path,
+            capture_output=True,
+            text=True,
+            timeout=60
+        )
+        if result.returncode != 0:
+            raise RuntimeError(result.stderr.strip() or 'npx remotion compositions failed')
+        
+        compositions = parse_compositions_output(result.stdout)
+        if not compositions:
+            raise RuntimeError('Could not parse output of npx remotion compositions')
+        return compositions
     
-    def render_video(self, composition_id: str, props: Dict[str, Any], output_name: Optional[str] = None) -> str:
-        """Bắt đầu render video với composition và props chỉ định"""
+    def render_video(
+        self,
+        composition_id: str,
+        props: Dict[str, Any],
+        output_name: Optional[str] = None,
+        priority: int = PRIORITY_INTERACTIVE
+    ) -> str:
+        """
+        Đưa job render vào hàng đợi bền vững (bảng render_jobs)
+        
+        Args:
+            priority: Số nhỏ chạy trước (PRIORITY_INTERACTIVE cho chat, PRIORITY_BATCH cho batch)
+        """
         
         # Tạo job ID unique
-        job_id = f"render_{int(time.time())}_{composition_id}"
+        job_id = new_render_job_id(composition_id)
         
         # Tạo tên file output
         if not output_name:
@@ -78,76 +88,148 @@ class VideoService:
         
         output_path = os.path.join(self.output_dir, output_name)
         
-        # Khởi tạo job status
-        self.render_jobs[job_id] = {
-            'status': 'starting',
-            'progress': 0,
-            'output_path': output_path,
-            'composition_id': composition_id,
-            'props': props,
-            'start_time': datetime.now(),
-            'error': None
-        }
-        
-        # Chạy render trong thread riêng
-        thread = threading.Thread(target=self._render_thread, args=(job_id, composition_id, props, output_path))
-        thread.daemon = True
-        thread.start()
+        # Job còn nằm trong DB nếu process restart; worker (của process nào cũng được) sẽ claim
+        self.completion_events.register(job_id)
+        queue = get_render_queue()
+        queue.enqueue(job_id, composition_id, props, output_path, priority=priority)
+        self.start_render_workers()
         
         return job_id
     
-    def _render_thread(self, job_id: str, composition_id: str, props: Dict[str, Any], output_path: str):
-        """Thread function để render video"""
+    def start_render_workers(self) -> bool:
+        """Khởi động worker claim job từ render queue (một lần mỗi process)"""
+        queue = get_render_queue()
+        return queue.start_workers(self._process_job, num_workers=get_render_scheduler().max_concurrent_renders)
+    
+    def _process_job(self, job: Dict[str, Any]):
+        """Render một job đã được claim từ hàng đợi"""
+        queue = get_render_queue()
+        job_id = job['job_id']
+        composition_id, props, output_path = job['composition_id'], job['props'], job['output_path']
+        status = None
+        
         try:
-            self.render_jobs[job_id]['status'] = 'rendering'
-            
-            # Chuẩn bị input props
-            input_props = json.dumps(props)
-            
-            # Lệnh render
-            cmd = [
-                'npx', 'remotion', 'render',
-                composition_id,
-                output_path,
-                '--props', input_props,
-                '--concurrency', '1'
-            ]
-            
-            # Chạy lệnh render
-            process = subprocess.Popen(
-                cmd,
-                cwd=self.remotion_path,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                text=True
-            )
-            
-            # Theo dõi progress (đơn giản)
-            while process.poll() is None:
-                self.render_jobs[job_id]['progress'] = min(self.render_jobs[job_id]['progress'] + 5, 90)
-                time.sleep(2)
+            with queue.heartbeat(job_id):
+                # Render cache: input giống hệt một Video đã completed thì dùng lại MP4 đó
+                cache_key = None
+                if Config.RENDER_CACHE_ENABLED:
+                    try:
+                        cache_key = compute_render_cache_key(self.remotion_path, composition_id, props)
+                    except OSError as e:
+                        print(f"⚠️ Could not compute render cache key: {e}")
+                if cache_key:
+                    if reuse_cached_render(cache_key, output_path):
+                        queue.complete(job_id, render_cache_key=cache_key, cache_hit=True)
+                        status = 'completed'
+                        return
+                    queue.update(job_id, render_cache_key=cache_key, cache_hit=False)
+                
+                # Chờ slot render trống, scheduler quyết định --concurrency theo CPU/RAM
+                with get_render_scheduler().slot() as concurrency:
+                    returncode, output = self._run_render(job_id, composition_id, props, output_path, concurrency)
             
-            # Kiểm tra kết quả
-            if process.returncode == 0:
-                self.render_jobs[job_id]['status'] = 'completed'
-                self.render_jobs[job_id]['progress'] = 100
-                self.render_jobs[job_id]['end_time'] = datetime.now()
+            if returncode == 0:
+                queue.complete(job_id)
+                status = 'completed'
             else:
-                stdout, stderr = process.communicate()
-                self.render_jobs[job_id]['status'] = 'failed'
-                self.render_jobs[job_id]['error'] = stderr or stdout
+                status = queue.fail(job_id, output)
+        
+        except subprocess.TimeoutExpired:
+            status = queue.fail(job_id, f"Render timed out after {Config.RENDER_TIMEOUT_SECONDS:.0f}s")
                 
         except Exception as e:
-            self.render_jobs[job_id]['status'] = 'failed'
-            self.render_jobs[job_id]['error'] = str(e)
+            status = queue.fail(job_id, str(e))
+        
+        finally:
+            # Chỉ đánh thức caller khi job kết thúc hẳn (retry vẫn còn trong hàng đợi)
+            if status != 'queued':
+                self.completion_events.notify(job_id)
+    
+    def _run_render(
+        self,
+        job_id: str,
+        composition_id: str,
+        props: Dict[str, Any],
+        output_path: str,
+        concurrency: int
+    ) -> Tuple[int, str]:
+        """
+        Chạy remotion render với concurrency đã được cấp, trả về (returncode, output)
+        
+        Raises:
+            subprocess.TimeoutExpired: Render quá Config.RENDER_TIMEOUT_SECONDS (process đã bị kill)
+        """
+        queue = get_render_queue()
+        queue.update(job_id, concurrency=concurrency, render_stage='starting')
+        
+        # Chuẩn bị input props
+        input_props = json.dumps(props)
+        
+        # Lệnh render
+        cmd = [
+            'npx', 'remotion', 'render',
+            composition_id,
+            output_path,
+            '--props', input_props,
+            '--concurrency', str(concurrency)
+        ]
+            
+        # Chạy lệnh render, progress lấy từ log "Rendered x/y" / "Encoded x/y"
+        # Ghi DB tối đa mỗi giây một lần
+        last_write = [0.0]
+        
+        def on_progress(snapshot: Dict[str, Any]):
+            now = time.monotonic()
+            if now - last_write[0] < 1.0:
+                return
+            last_write[0] = now
+            queue.update(
+                job_id,
+                frames_rendered=snapshot['frames_rendered'],
+                frames_encoded=snapshot['frames_encoded'],
+                total_frames=snapshot['total_frames'],
+                fps=snapshot['fps'],
+                eta_seconds=snapshot['eta_seconds'],
+                render_stage=snapshot['stage'],
+                progress=min(snapshot['progress'], 99)
+            )
+        
+        # Ưu tiên render server (đã bundle sẵn, browser đang mở), fallback sang npx
+        timeout = Config.RENDER_TIMEOUT_SECONDS
+        result = render_with_server(
+            composition_id, output_path, props, concurrency, on_progress=on_progress, timeout=timeout
+        )
+        if result is None:
+            result = run_remotion_command(cmd, self.remotion_path, on_progress=on_progress, timeout=timeout)
+        return result
+    
+    def wait_for_completion(self, job_id: str, timeout: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """
+        Chờ render job kết thúc (completed/failed)
+        
+        Job có thể được worker của process/instance khác claim, nên status được đọc
+        lại từ render_jobs sau mỗi poll_interval; event local chỉ giúp thức dậy sớm.
+        
+        Returns:
+            Optional[Dict[str, Any]]: Status cuối cùng, chưa kết thúc nếu hết timeout,
+            None nếu không tìm thấy job
+        """
+        return self.completion_events.wait(job_id, self.get_render_status, timeout)
     
     def get_render_status(self, job_id: str) -> Optional[Dict[str, Any]]:
-        """Lấy trạng thái render job"""
-        return self.render_jobs.get(job_id)
+        """Lấy trạng thái render job (từ database, đúng trên mọi worker)"""
+        return get_render_queue().get(job_id)
     
     def get_all_render_jobs(self) -> Dict[str, Dict[str, Any]]:
-        """Lấy tất cả render jobs"""
-        return self.render_jobs
+        """Lấy các render job gần nhất"""
+        return get_render_queue().list_jobs()
+    
+    def get_scheduler_stats(self) -> Dict[str, Any]:
+        """Lấy cấu hình và tải hiện tại của render scheduler (kèm trạng thái render server)"""
+        stats = get_render_scheduler().get_stats()
+        server = get_render_server()
+        stats['render_server'] = server.get_stats() if server is not None else None
+        return stats
     
     def get_available_audio_files(self) -> List[str]:
         """Lấy danh sách file audio có sẵn"""
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Unit tests cho Audio Transcoder
+"""
+
+import unittest
+import os
+import sys
+import wave
+import shutil
+import tempfile
+import subprocess
+
+# Thêm thư mục emlinh_mng vào Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from src.utils.audio_transcoder import (
+    AudioTranscoder,
+    find_ffmpeg,
+    get_wav_duration,
+    parse_ffmpeg_time
+)
+
+
+class TestAudioTranscoderHelpers(unittest.TestCase):
+    """Test các hàm hỗ trợ không cần ffmpeg"""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def test_parse_ffmpeg_time_uses_last_progress_value(self):
+        """Lấy time= lớn nhất trong log ffmpeg"""
+        stderr = (
+            "size=  10KiB time=00:00:01.50 bitrate= 54.6kbits/s\r"
+            "size=  20KiB time=00:01:02.25 bitrate= 54.6kbits/s\n"
+        )
+        self.assertAlmostEqual(parse_ffmpeg_time(stderr), 62.25)
+        self.assertIsNone(parse_ffmpeg_time("no progress here"))
+
+    def test_get_wav_duration_reads_header(self):
+        """Duration được tính từ header WAV"""
+        wav_path = os.path.join(self.tmp_dir, 'test.wav')
+        with wave.open(wav_path, 'wb') as wav_file:
+            wav_file.setnchannels(2)
+            wav_file.setsampwidth(2)
+            wav_file.setframerate(44100)
+            wav_file.writeframes(b'\x00\x00\x00\x00' * 44100 * 2)
+
+        self.assertAlmostEqual(get_wav_duration(wav_path), 2.0)
+        self.assertIsNone(get_wav_duration(os.path.join(self.tmp_dir, 'missing.wav')))
+
+
+@unittest.skipUnless(find_ffmpeg(), "ffmpeg not installed")
+class TestAudioTranscoderFFmpeg(unittest.TestCase):
+    """Test transcode thật với ffmpeg"""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        mp3_path = os.path.join(self.tmp_dir, 'tone.mp3')
+        subprocess.run(
+            [find_ffmpeg(), '-f', 'lavfi', '-i', 'sine=frequency=440:duration=2',
+             '-c:a', 'libmp3lame', '-y', mp3_path],
+            capture_output=True, check=True
+        )
+        with open(mp3_path, 'rb') as f:
+            self.mp3_data = f.read()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def test_single_pass_writes_wav_and_ogg(self):
+        """Một lần chạy ffmpeg tạo cả WAV và OGG"""
+        wav_path = os.path.join(self.tmp_dir, 'out.wav')
+        ogg_path = os.path.join(self.tmp_dir, 'out.ogg')
+
+        duration = AudioTranscoder.transcode(self.mp3_data, wav_path, ogg_path)
+
+        self.assertAlmostEqual(duration, 2.0, delta=0.1)
+        self.assertTrue(os.path.getsize(wav_path) > 0)
+        self.assertTrue(os.path.getsize(ogg_path) > 0)
+
+    def test_chunked_write(self):
+        """Ghi từng chunk cho kết quả giống ghi một lần"""
+        wav_path = os.path.join(self.tmp_dir, 'chunked.wav')
+        transcoder = AudioTranscoder(wav_path)
+        transcoder.start()
+        for i in range(0, len(self.mp3_data), 1024):
+            transcoder.write(self.mp3_data[i:i + 1024])
+
+        self.assertAlmostEqual(transcoder.finish(), 2.0, delta=0.1)
+        self.assertEqual(transcoder.bytes_written, len(self.mp3_data))
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Unit tests cho Bounded Executor
+"""
+
+import unittest
+import os
+import sys
+import threading
+
+# Thêm thư mục emlinh_mng vào Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from src.utils.bounded_executor import BoundedExecutor, QueueFullError
+
+
+class TestBoundedExecutor(unittest.TestCase):
+    """Test class cho BoundedExecutor"""
+
+    def setUp(self):
+        self.release = threading.Event()
+        self.position_updates = []
+        self.executor = BoundedExecutor(
+            max_workers=1,
+            queue_size=2,
+            name='test',
+            on_queue_change=self.position_updates.append
+        )
+        self.addCleanup(self.executor.shutdown)
+        self.addCleanup(self.release.set)
+
+    def blocking_job(self, started=None):
+        if started:
+            started.set()
+        self.release.wait(timeout=5)
+
+    def test_rejects_when_queue_full(self):
+        """Quá max_workers + queue_size job thì raise QueueFullError"""
+        started = threading.Event()
+        self.executor.submit('job_1', self.blocking_job, started)
+        self.assertTrue(started.wait(timeout=5))
+
+        self.assertEqual(self.executor.submit('job_2', self.blocking_job), 1)
+        self.assertEqual(self.executor.submit('job_3', self.blocking_job), 2)
+
+        with self.assertRaises(QueueFullError) as ctx:
+            self.executor.submit('job_4', self.blocking_job)
+        self.assertGreaterEqual(ctx.exception.retry_after, 1)
+
+        stats = self.executor.get_stats()
+        self.assertEqual(stats['running'], 1)
+        self.assertEqual(stats['queued'], 2)
+        self.assertEqual(self.executor.queue_position('job_3'), 2)
+
+    def test_queue_positions_advance(self):
+        """Khi job đầu hàng bắt đầu chạy, vị trí các job sau giảm đi"""
+        started = threading.Event()
+        self.executor.submit('job_1', self.blocking_job, started)
+        self.assertTrue(started.wait(timeout=5))
+        self.executor.submit('job_2', self.blocking_job)
+        self.executor.submit('job_3', self.blocking_job)
+
+        self.release.set()
+        self.executor.shutdown(wait=True)
+
+        self.assertIn({'job_3': 1}, self.position_updates)
+        self.assertEqual(self.position_updates[-1], {})
+        self.assertEqual(self.executor.get_stats()['running'], 0)
+
+    def test_runs_at_most_max_workers_at_once(self):
+        """Không bao giờ có nhiều hơn max_workers job chạy cùng lúc"""
+        executor = BoundedExecutor(max_workers=2, queue_size=10)
+        lock = threading.Lock()
+        state = {'active': 0, 'peak': 0}
+
+        def job():
+            with lock:
+                state['active'] += 1
+                state['peak'] = max(state['peak'], state['active'])
+            threading.Event().wait(0.02)
+            with lock:
+                state['active'] -= 1
+
+        for i in range(8):
+            executor.submit(f'job_{i}', job)
+        executor.shutdown(wait=True)
+
+        self.assertEqual(state['peak'], 2)
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
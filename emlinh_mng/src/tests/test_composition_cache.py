@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Test CompositionCache: cache theo hash thư mục src, đọc lại từ file, parse output CLI
+"""
+
+import os
+import sys
+import tempfile
+import threading
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from src.utils.composition_cache import CompositionCache, hash_directory, parse_compositions_output
+
+
+CLI_OUTPUT = """
+The following compositions are available:
+
+Scene-Landscape    30      1920x1080      300 (10.00 sec)
+Scene-Portrait     30      1080x1920      300 (10.00 sec)
+"""
+
+LOADED = [{'id': 'Scene-Portrait', 'width': 1080, 'height': 1920, 'fps': 30, 'durationInFrames': 450}]
+
+
+class FakeClock:
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestCompositionCache(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.src_dir = os.path.join(self.temp_dir.name, 'src')
+        os.makedirs(self.src_dir)
+        self._write_source('export const a = 1;')
+        self.cache_file = os.path.join(self.temp_dir.name, '.cache', 'compositions.json')
+        self.clock = FakeClock()
+        self.calls = 0
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def _write_source(self, content):
+        with open(os.path.join(self.src_dir, 'Root.tsx'), 'w') as f:
+            f.write(content)
+
+    def _loader(self):
+        self.calls += 1
+        return LOADED
+
+    def _cache(self):
+        return CompositionCache(self.src_dir, self.cache_file, self._loader, check_interval=10, clock=self.clock)
+
+    def test_parse_cli_output(self):
+        compositions = parse_compositions_output(CLI_OUTPUT)
+
+        self.assertEqual([c['id'] for c in compositions], ['Scene-Landscape', 'Scene-Portrait'])
+        self.assertEqual((compositions[1]['width'], compositions[1]['height']), (1080, 1920))
+        self.assertEqual(compositions[0]['durationInSeconds'], 10.0)
+        self.assertEqual(compositions[0]['description'], 'Landscape 1920x1080, 30fps')
+
+    def test_loads_once_and_serves_from_memory(self):
+        cache = self._cache()
+
+        first = cache.get()
+        self.clock.now = 100
+        second = cache.get()
+
+        self.assertEqual(self.calls, 1)
+        self.assertEqual(first, second)
+        self.assertEqual(first[0]['durationInSeconds'], 15.0)
+
+    def test_file_cache_shared_between_instances(self):
+        self._cache().get()
+        self._cache().get()
+
+        self.assertEqual(self.calls, 1)
+        self.assertTrue(os.path.exists(self.cache_file))
+
+    def test_source_change_invalidates_after_interval(self):
+        cache = self._cache()
+        cache.get()
+
+        self._write_source('export const a = 2;')
+        cache.get()
+        self.assertEqual(self.calls, 1)  # Chưa tới lần kiểm tra hash tiếp theo
+
+        self.clock.now = 11
+        cache.get()
+        self.assertEqual(self.calls, 2)
+
+    def test_loader_failure_returns_defaults_without_caching(self):
+        def failing_loader():
+            raise RuntimeError('npx not found')
+
+        cache = CompositionCache(self.src_dir, self.cache_file, failing_loader, clock=self.clock)
+        compositions = cache.get()
+
+        self.assertEqual([c['id'] for c in compositions], ['Scene-Landscape', 'Scene-Portrait'])
+        self.assertFalse(os.path.exists(self.cache_file))
+
+    def test_concurrent_callers_share_one_load_outside_lock(self):
+        started = threading.Event()
+        release = threading.Event()
+
+        def slow_loader():
+            self.calls += 1
+            started.set()
+            release.wait(5)
+            return LOADED
+
+        cache = CompositionCache(self.src_dir, self.cache_file, slow_loader, check_interval=10, clock=self.clock)
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(cache.get())) for _ in range(3)]
+        threads[0].start()
+        self.assertTrue(started.wait(5))
+        for thread in threads[1:]:
+            thread.start()
+
+        # Lock không bị giữ trong lúc loader chạy
+        self.assertTrue(cache._lock.acquire(timeout=1))
+        cache._lock.release()
+
+        release.set()
+        for thread in threads:
+            thread.join(5)
+        self.assertEqual(self.calls, 1)
+        self.assertEqual(len(results), 3)
+        self.assertTrue(all(r == results[0] for r in results))
+
+    def test_hash_directory(self):
+        before = hash_directory(self.src_dir)
+        self._write_source('export const a = 3;')
+
+        self.assertNotEqual(before, hash_directory(self.src_dir))
+        self.assertIsNone(hash_directory(os.path.join(self.temp_dir.name, 'missing')))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Unit tests cho Embedding Cache (key chuẩn hóa, LRU, tầng SQLite, thống kê)
+"""
+
+import unittest
+import os
+import sys
+import shutil
+import sqlite3
+import tempfile
+from unittest.mock import MagicMock
+
+# Thêm thư mục emlinh_mng vào Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from src.utils.embedding_cache import EmbeddingCache
+from src.services.embedding_service import OllamaEmbeddingService
+
+MODEL = 'nomic-embed-text'
+
+
+class TestEmbeddingCache(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.disk_path = os.path.join(self.tmp_dir, 'embeddings.db')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def test_key_uses_model_and_normalized_text(self):
+        self.assertEqual(EmbeddingCache.make_key(MODEL, '  Xin   chào\n'), EmbeddingCache.make_key(MODEL, 'Xin chào'))
+        # Cùng chữ "à" dạng tổ hợp (NFD) và dựng sẵn (NFC)
+        self.assertEqual(EmbeddingCache.make_key(MODEL, 'cha\u0300o'), EmbeddingCache.make_key(MODEL, 'ch\u00e0o'))
+        self.assertNotEqual(EmbeddingCache.make_key(MODEL, 'Xin chào'), EmbeddingCache.make_key('other-model', 'Xin chào'))
+
+    def test_lru_eviction_and_stats(self):
+        cache = EmbeddingCache(max_entries=2)
+        cache.put(MODEL, 'a', [1.0])
+        cache.put(MODEL, 'b', [2.0])
+        self.assertEqual(cache.get(MODEL, 'a'), [1.0])  # 'a' thành mới dùng nhất
+        cache.put(MODEL, 'c', [3.0])
+
+        self.assertIsNone(cache.get(MODEL, 'b'))
+        self.assertEqual(cache.get(MODEL, 'c'), [3.0])
+        stats = cache.get_stats()
+        self.assertEqual((stats['hits'], stats['misses'], stats['evictions'], stats['entries']), (2, 1, 1, 2))
+        self.assertAlmostEqual(stats['hit_rate'], 2 / 3, places=3)
+
+    def test_disk_tier_survives_restart(self):
+        EmbeddingCache(max_entries=10, disk_path=self.disk_path).put(MODEL, 'Xin chào', [0.5, -0.25])
+
+        cache = EmbeddingCache(max_entries=10, disk_path=self.disk_path)
+        self.assertEqual(cache.get(MODEL, 'Xin chào'), [0.5, -0.25])
+        self.assertEqual(cache.get(MODEL, 'Xin chào'), [0.5, -0.25])
+        stats = cache.get_stats()
+        self.assertEqual((stats['disk_hits'], stats['memory_hits'], stats['disk_entries']), (1, 1, 1))
+
+    def test_disk_tier_is_bounded(self):
+        cache = EmbeddingCache(max_entries=10, disk_path=self.disk_path, max_disk_entries=2)
+        for text in ['a', 'b', 'c']:
+            cache.put(MODEL, text, [1.0])
+        self.assertEqual(cache.get_stats()['disk_entries'], 2)
+
+    def test_disk_pruning_runs_only_over_slack(self):
+        cache = EmbeddingCache(max_entries=10, disk_path=self.disk_path, max_disk_entries=100)
+        for i in range(110):
+            cache.put(MODEL, f'text {i}', [1.0])
+        # Cho phép vượt 10% trước khi COUNT + DELETE
+        self.assertEqual(cache.get_stats()['disk_entries'], 110)
+
+        cache.put(MODEL, 'text 110', [1.0])
+        self.assertEqual(cache.get_stats()['disk_entries'], 100)
+        self.assertIsNone(EmbeddingCache(max_entries=10, disk_path=self.disk_path).get(MODEL, 'text 0'))
+
+    def test_disk_hits_touch_last_used_in_batches(self):
+        writer = EmbeddingCache(max_entries=10, disk_path=self.disk_path)
+        writer.put(MODEL, 'a', [1.0])
+        writer.put(MODEL, 'b', [2.0])
+
+        def last_used():
+            conn = sqlite3.connect(self.disk_path)
+            try:
+                return dict(conn.execute("SELECT key, last_used_at FROM embedding_cache").fetchall())
+            finally:
+                conn.close()
+
+        before = last_used()
+        cache = EmbeddingCache(max_entries=10, disk_path=self.disk_path)
+        cache.TOUCH_BATCH_SIZE = 2
+        cache.get(MODEL, 'a')
+        self.assertEqual(last_used(), before)
+
+        cache.get(MODEL, 'b')
+        after = last_used()
+        self.assertTrue(all(after[key] > before[key] for key in before))
+
+
+class TestServiceUsesCache(unittest.TestCase):
+    """Câu trả lời lặp lại không gọi lại Ollama"""
+
+    def setUp(self):
+        self.service = OllamaEmbeddingService(base_url='http://ollama.test', model=MODEL, batch_size=8)
+        self.service.cache = EmbeddingCache(max_entries=100)
+        self.service.session = MagicMock()
+
+        def post(url, json, **kwargs):
+            inputs = json['input'] if isinstance(json['input'], list) else [json['input']]
+            response = MagicMock(status_code=200)
+            response.json.return_value = {'embeddings': [[float(len(t))] for t in inputs]}
+            return response
+
+        self.service.session.post.side_effect = post
+
+    def test_repeated_texts_are_embedded_once(self):
+        greeting = 'Xin chào! Mình có thể giúp gì cho bạn?'
+
+        self.assertEqual(self.service.get_embedding(greeting), [float(len(greeting))])
+        embeddings = self.service.get_embeddings_batch([greeting, 'mới', 'mới', greeting + '  '])
+
+        self.assertEqual(embeddings, [[float(len(greeting))], [3.0], [3.0], [float(len(greeting))]])
+        sent = [call.kwargs['json']['input'] for call in self.service.session.post.call_args_list]
+        self.assertEqual(sent, [[greeting], ['mới']])
+        self.assertEqual(self.service.get_cache_stats()['hits'], 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
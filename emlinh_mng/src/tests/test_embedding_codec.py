@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Unit tests cho Embedding Codec (blob float32/float16) và migrate dữ liệu JSON cũ
+"""
+
+import unittest
+import os
+import sys
+import shutil
+import tempfile
+
+import numpy as np
+from flask import Flask
+
+# Thêm thư mục emlinh_mng vào Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from src.app.extensions import db
+from src.utils.embedding_codec import decode_embedding, encode_embedding, migrate_json_embeddings
+
+
+class TestEmbeddingCodec(unittest.TestCase):
+
+    def setUp(self):
+        self.values = np.random.default_rng(0).normal(size=768).tolist()
+
+    def test_float32_round_trip(self):
+        blob = encode_embedding(self.values)
+
+        self.assertEqual(len(blob), 768 * 4)
+        decoded = decode_embedding(blob)
+        np.testing.assert_array_equal(decoded, np.asarray(self.values, dtype=np.float32))
+        # View trực tiếp trên bytes của blob, không copy
+        self.assertFalse(decoded.flags.owndata)
+        self.assertFalse(decoded.flags.writeable)
+
+    def test_float16_is_half_size(self):
+        blob = encode_embedding(self.values, 'float16')
+
+        self.assertEqual(len(blob), 768 * 2)
+        np.testing.assert_allclose(decode_embedding(blob, 'float16'), self.values, rtol=1e-3, atol=1e-3)
+
+    def test_unknown_dtype(self):
+        with self.assertRaises(ValueError):
+            encode_embedding(self.values, 'int8')
+
+
+class TestMigrateJsonEmbeddings(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.app = Flask(__name__)
+        self.app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///' + os.path.join(self.tmp_dir, 'app.db')
+        self.app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+        db.init_app(self.app)
+
+        import src.app.models  # noqa: F401
+        self.context = self.app.app_context()
+        self.context.push()
+        db.create_all()
+
+    def tearDown(self):
+        db.session.remove()
+        self.context.pop()
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def test_json_rows_are_converted(self):
+        from src.app.models import Vector
+        for i in range(5):
+            db.session.add(Vector(content_id=i, content_type='chat_user', content_text=f'text {i}',
+                                  embedding=[float(i), 0.5, -0.25]))
+        new_row = Vector(content_id=9, content_type='chat_ai', content_text='new')
+        new_row.set_embedding([1.0, 2.0, 3.0])
+        db.session.add(new_row)
+        db.session.commit()
+
+        self.assertEqual(migrate_json_embeddings(batch_size=2), 5)
+        self.assertEqual(migrate_json_embeddings(batch_size=2), 0)
+
+        db.session.expire_all()
+        vectors = Vector.query.order_by(Vector.id).all()
+        self.assertTrue(all(v.embedding is None and v.embedding_dtype == 'float32' for v in vectors))
+        np.testing.assert_array_equal(vectors[3].get_embedding_array(), [3.0, 0.5, -0.25])
+        np.testing.assert_array_equal(vectors[5].get_embedding_array(), [1.0, 2.0, 3.0])
+
+    def test_legacy_row_is_readable_before_migration(self):
+        from src.app.models import Vector
+        vector = Vector(content_id=1, content_type='chat_user', content_text='old', embedding=[0.5, 1.5])
+        db.session.add(vector)
+        db.session.commit()
+
+        np.testing.assert_array_equal(vector.get_embedding_array(), [0.5, 1.5])
+
+
+if __name__ == "__main__":
+    unittest.main()
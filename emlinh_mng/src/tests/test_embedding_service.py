@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+Unit tests cho OllamaEmbeddingService: batch /api/embed, retry từng sub-batch,
+connection pool keep-alive và retry HTTP (với Ollama giả chạy bằng http.server)
+"""
+
+import unittest
+import os
+import sys
+import json
+import socket
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import MagicMock, patch
+
+import requests
+
+# Thêm thư mục emlinh_mng vào Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from src.services.embedding_service import OllamaEmbeddingService, create_ollama_session
+
+
+def fake_embedding(text):
+    return [float(len(text)), 1.0]
+
+
+def embed_response(payload, status_code=200):
+    """Giả lập response của Ollama cho payload đã gửi"""
+    response = MagicMock(status_code=status_code, text='error')
+    inputs = payload['input'] if isinstance(payload['input'], list) else [payload['input']]
+    response.json.return_value = {'embeddings': [fake_embedding(t) for t in inputs]}
+    return response
+
+
+class TestEmbeddingsBatch(unittest.TestCase):
+    """Test gom nhiều text vào một request"""
+
+    def setUp(self):
+        self.service = OllamaEmbeddingService(base_url='http://ollama.test', model='nomic-embed-text',
+                                              batch_size=3, max_retries=1)
+        self.service.retry_backoff = 0
+        self.service.session = MagicMock()
+        self.service.session.post.side_effect = lambda url, json, **kwargs: embed_response(json)
+
+    def test_sub_batches_keep_input_order(self):
+        texts = ['a', 'bb', 'ccc', 'dddd', 'eeeee']
+
+        embeddings = self.service.get_embeddings_batch(texts)
+
+        self.assertEqual(embeddings, [fake_embedding(t) for t in texts])
+        sent = [call.kwargs['json']['input'] for call in self.service.session.post.call_args_list]
+        self.assertEqual(sent, [['a', 'bb', 'ccc'], ['dddd', 'eeeee']])
+
+    def test_failed_sub_batch_is_retried(self):
+        calls = []
+
+        def flaky(url, json, **kwargs):
+            calls.append(json['input'])
+            if len(calls) == 1:
+                raise requests.exceptions.ReadTimeout('read timed out')
+            return embed_response(json)
+
+        self.service.session.post.side_effect = flaky
+        self.assertEqual(self.service.get_embeddings_batch(['x', 'yy']), [fake_embedding('x'), fake_embedding('yy')])
+        self.assertEqual(len(calls), 2)
+
+    def test_exhausted_sub_batch_returns_none_only_for_its_items(self):
+        def broken_second_batch(url, json, **kwargs):
+            if 'dddd' in json['input']:
+                response = embed_response(json)
+                response.json.return_value = {'embeddings': []}
+                return response
+            return embed_response(json)
+
+        self.service.session.post.side_effect = broken_second_batch
+        with patch('src.services.embedding_service.time.sleep') as sleep:
+            embeddings = self.service.get_embeddings_batch(['a', 'bb', 'ccc', 'dddd'])
+
+        self.assertEqual(embeddings, [fake_embedding('a'), fake_embedding('bb'), fake_embedding('ccc'), None])
+        self.assertEqual(sleep.call_count, 1)
+
+    def test_status_error_is_not_retried_again(self):
+        # 5xx đã được session retry ở tầng HTTP
+        self.service.session.post.side_effect = lambda url, json, **kwargs: embed_response(json, status_code=500)
+        self.assertEqual(self.service.get_embeddings_batch(['x']), [None])
+        self.service.session.post.assert_called_once()
+
+    def test_single_embedding_uses_session(self):
+        self.assertEqual(self.service.get_embedding('hello'), fake_embedding('hello'))
+        self.service.session.post.assert_called_once()
+
+
+class FakeOllamaHandler(BaseHTTPRequestHandler):
+    """POST /api/embed; hành vi từng request lấy từ server.script ('ok', 503, 'reset', 'slow')"""
+
+    protocol_version = 'HTTP/1.1'  # Cho phép keep-alive
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+        server = self.server
+        with server.lock:
+            server.requests.append(self.client_address[1])
+            action = server.script.pop(0) if server.script else 'ok'
+
+        if action == 'reset':
+            # Đóng socket không trả lời, client nhận connection reset
+            self.connection.setsockopt(socket.SOL_SOCKET, socket.SO_LINGER, b'\x01\x00\x00\x00\x00\x00\x00\x00')
+            self.close_connection = True
+            return
+        if action == 'slow':
+            time.sleep(0.5)
+
+        status = action if isinstance(action, int) else 200
+        inputs = body['input'] if isinstance(body['input'], list) else [body['input']]
+        payload = json.dumps({'embeddings': [fake_embedding(t) for t in inputs]} if status == 200 else {'error': 'busy'})
+        data = payload.encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class TestHttpClient(unittest.TestCase):
+    """Test session keep-alive, retry 5xx/connection reset và timeout với server thật"""
+
+    def setUp(self):
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), FakeOllamaHandler)
+        self.server.lock = threading.Lock()
+        self.server.requests = []
+        self.server.script = []
+        # Client đã bỏ request 'slow' (read timeout) nên server ghi vào socket đã đóng
+        self.server.handle_error = lambda request, client_address: None
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+        self.service = OllamaEmbeddingService(base_url=f'http://127.0.0.1:{self.server.server_port}',
+                                              model='nomic-embed-text', max_retries=0)
+        self.service.session = create_ollama_session(pool_size=2, retries=2, backoff_factor=0)
+
+    def tearDown(self):
+        self.service.session.close()
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_connection_is_reused(self):
+        for text in ['a', 'bb', 'ccc']:
+            self.assertEqual(self.service.get_embedding(text), fake_embedding(text))
+
+        # Cùng client port: cả 3 request đi trên một TCP connection
+        self.assertEqual(len(self.server.requests), 3)
+        self.assertEqual(len(set(self.server.requests)), 1)
+
+    def test_5xx_is_retried(self):
+        self.server.script = [503, 502]
+
+        self.assertEqual(self.service.get_embeddings_batch(['x', 'yy']), [fake_embedding('x'), fake_embedding('yy')])
+        self.assertEqual(len(self.server.requests), 3)
+
+    def test_connection_reset_is_retried(self):
+        self.server.script = ['reset']
+        self.service.max_retries = 1
+
+        self.assertEqual(self.service.get_embedding('hello'), fake_embedding('hello'))
+        self.assertEqual(len(self.server.requests), 2)
+
+    def test_retries_are_bounded(self):
+        self.server.script = [503] * 10
+        self.service.max_retries = 2  # Không nhân thêm với retry của session
+
+        self.assertIsNone(self.service.get_embedding('hello'))
+        self.assertEqual(len(self.server.requests), 3)
+
+    def test_read_timeout_is_separate_from_connect_timeout(self):
+        self.service.session = create_ollama_session(retries=0)
+        self.service.timeout = (5, 0.2)
+        self.server.script = ['slow']
+
+        started = time.monotonic()
+        self.assertIsNone(self.service.get_embedding('hello'))
+        self.assertLess(time.monotonic() - started, 0.45)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Unit tests cho Job Completion Events
+"""
+
+import unittest
+import os
+import sys
+import time
+import threading
+
+# Thêm thư mục emlinh_mng vào Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from src.utils.job_events import JobCompletionEvents
+
+
+class TestJobCompletionEvents(unittest.TestCase):
+    """Test class cho JobCompletionEvents"""
+
+    def setUp(self):
+        self.jobs = {}
+        self.events = JobCompletionEvents(poll_interval=0.05)
+
+    def finish_later(self, job_id, status, delay, notify=True):
+        def finish():
+            time.sleep(delay)
+            self.jobs[job_id]['status'] = status
+            if notify:
+                self.events.notify(job_id)
+        thread = threading.Thread(target=finish)
+        thread.start()
+        self.addCleanup(thread.join)
+
+    def test_wakes_up_when_job_finishes(self):
+        """Caller được đánh thức ngay khi job kết thúc, không chờ hết timeout"""
+        self.events.register('job_1')
+        self.jobs['job_1'] = {'status': 'rendering'}
+        self.finish_later('job_1', 'completed', 0.1)
+
+        started = time.monotonic()
+        status = self.events.wait('job_1', self.jobs.get, timeout=10)
+
+        self.assertEqual(status['status'], 'completed')
+        self.assertLess(time.monotonic() - started, 2)
+
+    def test_timeout_returns_last_status(self):
+        """Hết timeout thì trả về status hiện tại (chưa kết thúc)"""
+        self.events.register('job_1')
+        self.jobs['job_1'] = {'status': 'rendering'}
+
+        status = self.events.wait('job_1', self.jobs.get, timeout=0.1)
+        self.assertEqual(status['status'], 'rendering')
+
+    def test_finished_or_unknown_job_returns_immediately(self):
+        """Job đã kết thúc hoặc không tồn tại không làm caller bị block"""
+        self.jobs['done'] = {'status': 'failed'}
+        self.assertEqual(self.events.wait('done', self.jobs.get, timeout=10)['status'], 'failed')
+        self.assertIsNone(self.events.wait('missing', self.jobs.get, timeout=10))
+
+    def test_job_from_other_process_is_polled(self):
+        """Job không có event trong process này vẫn được chờ bằng cách đọc lại status"""
+        self.jobs['remote'] = {'status': 'generating_speech'}
+        self.finish_later('remote', 'completed', 0.1, notify=False)
+
+        status = self.events.wait('remote', self.jobs.get, timeout=5)
+        self.assertEqual(status['status'], 'completed')
+
+    def test_registered_job_finished_elsewhere_is_polled(self):
+        """Event đã register nhưng job được chạy và notify ở instance khác: không chờ hết timeout"""
+        self.events.register('job_1')
+        self.jobs['job_1'] = {'status': 'rendering'}
+        self.finish_later('job_1', 'completed', 0.1, notify=False)
+
+        started = time.monotonic()
+        status = self.events.wait('job_1', self.jobs.get, timeout=10)
+
+        self.assertEqual(status['status'], 'completed')
+        self.assertLess(time.monotonic() - started, 2)
+
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
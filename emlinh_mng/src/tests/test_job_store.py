@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""
+Unit tests cho TTS Job Store
+"""
+
+import unittest
+import os
+import sys
+import shutil
+import tempfile
+import threading
+from datetime import datetime, timedelta
+
+from flask import Flask
+
+# Thêm thư mục emlinh_mng vào Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from src.app.extensions import db
+from unittest.mock import patch
+
+from src.services import job_store
+from src.services.job_store import InMemoryJobStore, SQLAlchemyJobStore, init_job_store
+
+
+class JobStoreContract:
+    """Các test dùng chung cho mọi backend"""
+
+    def make_store(self, ttl_seconds=3600):
+        raise NotImplementedError
+
+    def expire(self, store, job_id):
+        raise NotImplementedError
+
+    def test_create_get_update(self):
+        """Job được tạo, đọc và cập nhật qua job_id"""
+        store = self.make_store()
+        started = datetime(2024, 1, 1, 12, 0, 0)
+        store.create('job_1', {'status': 'starting', 'progress': 0, 'filename': 'a', 'start_time': started})
+
+        self.assertTrue(store.update('job_1', progress=40, wav_path='/tmp/a.wav'))
+        job = store.get('job_1')
+        self.assertEqual(job['status'], 'starting')
+        self.assertEqual(job['progress'], 40)
+        self.assertEqual(job['filename'], 'a')
+        self.assertEqual(job['wav_path'], '/tmp/a.wav')
+        self.assertEqual(job['start_time'], started)
+
+        self.assertIsNone(store.get('missing'))
+        self.assertFalse(store.update('missing', progress=1))
+
+    def test_transition_is_guarded_by_status(self):
+        """Job đã kết thúc không bị chuyển sang trạng thái khác"""
+        store = self.make_store()
+        store.create('job_1', {'status': 'starting', 'progress': 0})
+
+        self.assertFalse(store.transition('job_1', 'transcoding', from_statuses=['generating_speech']))
+        self.assertTrue(store.transition('job_1', 'completed', progress=100, wav_path='/tmp/a.wav'))
+        self.assertFalse(store.transition('job_1', 'failed', error='late error'))
+
+        job = store.get('job_1')
+        self.assertEqual(job['status'], 'completed')
+        self.assertEqual(job['progress'], 100)
+        self.assertEqual(job['wav_path'], '/tmp/a.wav')
+        self.assertIsNone(job.get('error'))
+
+    def test_ttl_eviction(self):
+        """Job không được cập nhật quá TTL bị xóa"""
+        store = self.make_store(ttl_seconds=60)
+        store.create('old', {'status': 'completed', 'progress': 100})
+        store.create('new', {'status': 'starting', 'progress': 0})
+        self.expire(store, 'old')
+
+        self.assertEqual(store.evict_expired(), 1)
+        self.assertEqual(set(store.list_jobs()), {'new'})
+
+
+class TestInMemoryJobStore(JobStoreContract, unittest.TestCase):
+    """Test InMemoryJobStore"""
+
+    def make_store(self, ttl_seconds=3600):
+        return InMemoryJobStore(ttl_seconds=ttl_seconds)
+
+    def expire(self, store, job_id):
+        store._updated_at[job_id] = datetime.utcnow() - timedelta(hours=2)
+
+    def test_get_returns_copy(self):
+        """Sửa dict trả về không làm thay đổi job trong store"""
+        store = self.make_store()
+        store.create('job_1', {'status': 'starting'})
+        store.get('job_1')['status'] = 'hacked'
+        self.assertEqual(store.get('job_1')['status'], 'starting')
+
+
+class TestSQLAlchemyJobStore(JobStoreContract, unittest.TestCase):
+    """Test SQLAlchemyJobStore trên SQLite"""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.app = Flask(__name__)
+        self.app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///' + os.path.join(self.tmp_dir, 'jobs.db')
+        self.app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+        db.init_app(self.app)
+
+        import src.app.models  # noqa: F401
+        with self.app.app_context():
+            db.create_all()
+
+    def tearDown(self):
+        with self.app.app_context():
+            db.engine.dispose()
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def make_store(self, ttl_seconds=3600):
+        return SQLAlchemyJobStore(self.app, ttl_seconds=ttl_seconds)
+
+    def expire(self, store, job_id):
+        from src.app.models import TTSJob
+        with self.app.app_context():
+            TTSJob.query.filter_by(job_id=job_id).update(
+                {'updated_at': datetime.utcnow() - timedelta(hours=2)}
+            )
+            db.session.commit()
+
+    def test_job_visible_from_other_store_instance(self):
+        """Hai worker (hai store) cùng thấy trạng thái của một job"""
+        worker_a = self.make_store()
+        worker_b = self.make_store()
+
+        worker_a.create('job_1', {'status': 'starting', 'progress': 0})
+        worker_a.update('job_1', status='transcoding', progress=50)
+
+        job = worker_b.get('job_1')
+        self.assertEqual(job['status'], 'transcoding')
+        self.assertEqual(job['progress'], 50)
+
+    def test_create_evicts_at_most_once_per_interval(self):
+        """create() không chạy DELETE mỗi lần, chỉ khi đã qua EVICT_INTERVAL"""
+        store = self.make_store(ttl_seconds=60)
+        store.create('old', {'status': 'completed', 'progress': 100})
+        self.expire(store, 'old')
+
+        store.create('job_1', {'status': 'starting', 'progress': 0})
+        self.assertIsNotNone(store.get('old'))
+
+        store.EVICT_INTERVAL = 0
+        store.create('job_2', {'status': 'starting', 'progress': 0})
+        self.assertIsNone(store.get('old'))
+
+    def test_concurrent_json_updates_are_not_lost(self):
+        """SQLite bỏ qua FOR UPDATE: các lần gộp JSON song song vẫn giữ đủ trường"""
+        store = self.make_store()
+        store.create('job_1', {'status': 'starting', 'progress': 0})
+
+        def writer(index):
+            for step in range(5):
+                store.update('job_1', **{f'field_{index}_{step}': step})
+
+        threads = [threading.Thread(target=writer, args=(i,)) for i in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(10)
+
+        job = store.get('job_1')
+        self.assertEqual(len([key for key in job if key.startswith('field_')]), 20)
+
+
+class TestInitJobStore(unittest.TestCase):
+    """Test init_job_store giữ store đã khởi tạo"""
+
+    def setUp(self):
+        patcher = patch.object(job_store, '_job_store', None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_memory_store_survives_repeated_init(self):
+        with patch.object(job_store.Config, 'TTS_JOB_STORE', 'memory'):
+            store = init_job_store(Flask(__name__))
+            store.create('job_1', {'status': 'processing'})
+
+            self.assertIs(init_job_store(Flask(__name__)), store)
+            self.assertEqual(store.get('job_1')['status'], 'processing')
+
+    def test_memory_fallback_is_replaced_once_app_exists(self):
+        with patch.object(job_store.Config, 'TTS_JOB_STORE', 'database'):
+            fallback = init_job_store()
+            self.assertIsInstance(fallback, InMemoryJobStore)
+
+            store = init_job_store(Flask(__name__))
+            self.assertIsInstance(store, SQLAlchemyJobStore)
+            self.assertIs(init_job_store(Flask(__name__)), store)
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Unit tests cho Progress Bus (pub/sub tiến độ video, ring buffer, backend memory và SQLite)
+"""
+
+import unittest
+import os
+import sys
+import time
+import shutil
+import tempfile
+import threading
+
+# Thêm thư mục emlinh_mng vào Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from src.services.progress_bus import InMemoryProgressBus, SQLiteProgressBus, make_progress_event
+
+
+class ProgressBusContract:
+    """Các test chung cho mọi backend"""
+
+    def make_bus(self):
+        raise NotImplementedError
+
+    def setUp(self):
+        self.bus = self.make_bus()
+
+    def _event(self, step, progress=0):
+        return make_progress_event('job_1', step, step, progress)
+
+    def test_publish_assigns_increasing_ids(self):
+        first = self.bus.publish('job_1', self._event('initializing', 10))
+        second = self.bus.publish('job_1', self._event('generating_script', 20))
+        self.bus.publish('job_2', make_progress_event('job_2', 'initializing', '', 10))
+
+        self.assertLess(first['id'], second['id'])
+        self.assertEqual([e['step'] for e in self.bus.events('job_1')], ['initializing', 'generating_script'])
+        self.assertEqual([e['step'] for e in self.bus.events('job_1', after_id=first['id'])], ['generating_script'])
+        self.assertEqual(self.bus.latest('job_1')['progress'], 20)
+        self.assertEqual(self.bus.job_count(), 2)
+
+    def test_wait_times_out_without_events(self):
+        started = time.monotonic()
+        self.assertEqual(self.bus.wait('job_1', timeout=0.2), [])
+        self.assertGreaterEqual(time.monotonic() - started, 0.2)
+
+    def test_wait_wakes_up_on_publish(self):
+        received = []
+
+        def subscriber():
+            received.extend(self.bus.wait('job_1', timeout=5))
+            received.append(time.monotonic())
+
+        thread = threading.Thread(target=subscriber)
+        thread.start()
+        time.sleep(0.1)
+        published_at = time.monotonic()
+        self.bus.publish('job_1', self._event('completed', 100))
+        thread.join(5)
+
+        self.assertEqual(received[0]['step'], 'completed')
+        self.assertLess(received[-1] - published_at, 0.5)
+
+    def test_clear_and_evict(self):
+        self.bus.publish('job_1', self._event('completed', 100))
+        self.bus.publish('job_2', make_progress_event('job_2', 'initializing', '', 10))
+
+        self.bus.clear('job_2')
+        self.assertEqual(self.bus.events('job_2'), [])
+        self.assertEqual(self.bus.evict_expired(max_age_seconds=60), 0)
+        time.sleep(0.05)
+        self.assertEqual(self.bus.evict_expired(max_age_seconds=0), 1)
+        self.assertIsNone(self.bus.latest('job_1'))
+
+    def test_ring_buffer_keeps_latest_events(self):
+        self.bus.max_events = 3
+        ids = [self.bus.publish('job_1', self._event(f'step_{i}', i))['id'] for i in range(5)]
+        self.bus.publish('job_2', make_progress_event('job_2', 'initializing', '', 10))
+
+        self.assertEqual([e['step'] for e in self.bus.events('job_1')], ['step_2', 'step_3', 'step_4'])
+        # Reconnect với Last-Event-ID chỉ nhận các event sau đó
+        self.assertEqual([e['id'] for e in self.bus.events('job_1', after_id=ids[3])], [ids[4]])
+        self.assertEqual(len(self.bus.events('job_2')), 1)
+
+    def test_publish_evicts_expired_jobs(self):
+        self.bus.publish('old_job', make_progress_event('old_job', 'completed', '', 100))
+        self.bus.ttl_seconds = 0
+        self.bus.EVICT_INTERVAL = 0
+        time.sleep(0.05)
+
+        self.bus.publish('job_1', self._event('initializing', 10))
+
+        self.assertEqual(self.bus.events('old_job'), [])
+        self.assertEqual(self.bus.job_count(), 1)
+
+
+class TestInMemoryProgressBus(ProgressBusContract, unittest.TestCase):
+
+    def make_bus(self):
+        return InMemoryProgressBus()
+
+
+class TestSQLiteProgressBus(ProgressBusContract, unittest.TestCase):
+
+    def make_bus(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmp_dir, 'progress.db')
+        return SQLiteProgressBus(self.path, poll_interval=0.05)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def test_events_are_shared_between_instances(self):
+        """Mỗi gunicorn worker có instance riêng trên cùng file"""
+        other_worker = SQLiteProgressBus(self.path, poll_interval=0.05)
+        received = []
+
+        thread = threading.Thread(target=lambda: received.extend(other_worker.wait('job_1', timeout=5)))
+        thread.start()
+        time.sleep(0.1)
+        self.bus.publish('job_1', self._event('audio_completed', 70))
+        thread.join(5)
+
+        self.assertEqual([e['step'] for e in received], ['audio_completed'])
+        self.assertEqual(received[0]['data'], {})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Unit tests cho Remotion progress parser và runner
+"""
+
+import unittest
+import os
+import sys
+import subprocess
+
+# Thêm thư mục emlinh_mng vào Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from src.utils.remotion_progress import RemotionProgressParser, run_remotion_command
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestRemotionProgressParser(unittest.TestCase):
+    """Test parse log của remotion render"""
+
+    def test_parses_rendered_and_encoded_lines(self):
+        """Frame, fps và ETA được tính từ các dòng Rendered/Encoded"""
+        clock = FakeClock()
+        parser = RemotionProgressParser(clock=clock)
+
+        self.assertIsNone(parser.feed("Bundling 100%"))
+        self.assertEqual(parser.feed("Rendered 0/300")['frames_rendered'], 0)
+
+        clock.now += 10
+        snapshot = parser.feed("Rendered 150/300, time remaining: 10s")
+        self.assertEqual(snapshot['stage'], 'rendering')
+        self.assertEqual(snapshot['total_frames'], 300)
+        self.assertEqual(snapshot['fps'], 15.0)
+        self.assertEqual(snapshot['eta_seconds'], 10.0)
+        self.assertEqual(snapshot['progress'], 40)
+
+        snapshot = parser.feed("Encoded 150/300")
+        self.assertEqual(snapshot['stage'], 'encoding')
+        self.assertEqual(snapshot['frames_encoded'], 150)
+        self.assertEqual(snapshot['progress'], 50)
+
+    def test_parses_terminal_progress_bar(self):
+        """Dạng progress bar "Rendering frames ━━━ 45/90" cũng được nhận"""
+        parser = RemotionProgressParser(clock=FakeClock())
+        snapshot = parser.feed("Rendering frames ━━━━━━━━━━━━━━━━━━ 45/90")
+        self.assertEqual((snapshot['frames_rendered'], snapshot['total_frames']), (45, 90))
+
+
+class TestRunRemotionCommand(unittest.TestCase):
+    """Test runner đọc stdout liên tục"""
+
+    def test_drains_large_output_and_reports_progress(self):
+        """Log lớn hơn pipe buffer không làm process bị treo"""
+        script = (
+            "import sys\n"
+            "for i in range(1, 301):\n"
+            "    print('x' * 500)\n"
+            "    print(f'Rendered {i}/300')\n"
+            "    sys.stderr.write(f'Encoded {i}/300\\n')\n"
+        )
+        snapshots = []
+        returncode, output = run_remotion_command(
+            [sys.executable, '-c', script], os.getcwd(), on_progress=snapshots.append, timeout=30
+        )
+
+        self.assertEqual(returncode, 0)
+        self.assertEqual(snapshots[-1]['frames_rendered'], 300)
+        self.assertEqual(snapshots[-1]['frames_encoded'], 300)
+        self.assertEqual(snapshots[-1]['progress'], 100)
+        self.assertIn('Encoded 300/300', output)
+
+    def test_returns_tail_on_failure(self):
+        """Render lỗi trả về returncode và các dòng log cuối"""
+        script = "import sys; print('Error: composition not found'); sys.exit(3)"
+        returncode, output = run_remotion_command([sys.executable, '-c', script], os.getcwd())
+
+        self.assertEqual(returncode, 3)
+        self.assertIn('composition not found', output)
+
+    def test_timeout_kills_process(self):
+        """Quá timeout thì process bị kill và TimeoutExpired được raise"""
+        with self.assertRaises(subprocess.TimeoutExpired):
+            run_remotion_command([sys.executable, '-c', 'import time; time.sleep(30)'], os.getcwd(), timeout=0.5)
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
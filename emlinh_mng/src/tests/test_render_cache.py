@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+Unit tests cho Render Cache (cache key theo input và tái sử dụng MP4 từ bảng videos)
+"""
+
+import unittest
+import os
+import sys
+import shutil
+import tempfile
+
+from flask import Flask
+
+# Thêm thư mục emlinh_mng vào Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from src.app.extensions import db
+from src.utils.render_cache import (
+    compute_render_cache_key,
+    find_cached_render,
+    referenced_assets,
+    reuse_cached_render
+)
+
+
+class RenderCacheTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.remotion_path = os.path.join(self.tmp_dir, 'emlinh-remotion')
+        os.makedirs(os.path.join(self.remotion_path, 'public', 'audios'))
+        os.makedirs(os.path.join(self.remotion_path, 'src'))
+        self._write('src/Root.tsx', 'export const Root = 1;')
+        self._write('public/audios/voice.wav', 'RIFF-audio-1')
+        self._write('public/audios/voice.json', '{"mouthCues": []}')
+        self.props = {'durationInSeconds': 15, 'audioFileName': 'voice.wav', 'backgroundScene': 'abstract'}
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def _write(self, relative_path, content):
+        path = os.path.join(self.remotion_path, relative_path)
+        with open(path, 'w') as f:
+            f.write(content)
+        return path
+
+    def _key(self, composition='Scene-Portrait', props=None):
+        return compute_render_cache_key(self.remotion_path, composition, props or self.props)
+
+
+class TestRenderCacheKey(RenderCacheTestCase):
+    """Test cache key"""
+
+    def test_key_is_deterministic(self):
+        reordered = dict(reversed(list(self.props.items())))
+        self.assertEqual(self._key(), self._key(props=reordered))
+
+    def test_referenced_assets_include_mouth_cues(self):
+        assets = referenced_assets(self.remotion_path, self.props)
+        self.assertEqual([os.path.basename(p) for p in assets], ['voice.wav', 'voice.json'])
+        self.assertEqual(referenced_assets(self.remotion_path, {'audioFileName': 'None'}), [])
+
+    def test_key_changes_with_inputs(self):
+        base = self._key()
+
+        self.assertNotEqual(base, self._key(composition='Scene-Landscape'))
+        self.assertNotEqual(base, self._key(props=dict(self.props, backgroundScene='office')))
+
+        self._write('public/audios/voice.json', '{"mouthCues": [{"value": "A"}]}')
+        changed_cues = self._key()
+        self.assertNotEqual(base, changed_cues)
+
+        self._write('src/Root.tsx', 'export const Root = 2;')
+        self.assertNotEqual(changed_cues, self._key())
+
+    def test_same_audio_content_under_other_name_hits(self):
+        self._write('public/audios/copy.wav', 'RIFF-audio-1')
+        self._write('public/audios/copy.json', '{"mouthCues": []}')
+
+        self.assertEqual(self._key(), self._key(props=dict(self.props, audioFileName='copy.wav')))
+
+
+class TestReuseCachedRender(RenderCacheTestCase):
+    """Test tra cứu Video đã render và hardlink sang output mới"""
+
+    def setUp(self):
+        super().setUp()
+        self.app = Flask(__name__)
+        self.app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///' + os.path.join(self.tmp_dir, 'app.db')
+        self.app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+        db.init_app(self.app)
+
+        import src.app.models  # noqa: F401
+        with self.app.app_context():
+            db.create_all()
+
+        self.context = self.app.app_context()
+        self.context.push()
+
+    def tearDown(self):
+        db.session.remove()
+        self.context.pop()
+        super().tearDown()
+
+    def _add_video(self, file_path, cache_key, status='completed'):
+        from src.app.models import Video
+        video = Video(
+            title='Video', topic='AI', file_path=file_path, file_name=os.path.basename(file_path),
+            status=status, render_cache_key=cache_key
+        )
+        db.session.add(video)
+        db.session.commit()
+        return video
+
+    def test_hit_links_existing_mp4(self):
+        cache_key = self._key()
+        rendered = os.path.join(self.tmp_dir, 'first.mp4')
+        with open(rendered, 'wb') as f:
+            f.write(b'mp4-bytes')
+        self._add_video(rendered, cache_key)
+
+        output_path = os.path.join(self.tmp_dir, 'second.mp4')
+        self.assertTrue(reuse_cached_render(cache_key, output_path))
+        with open(output_path, 'rb') as f:
+            self.assertEqual(f.read(), b'mp4-bytes')
+
+    def test_miss_when_file_missing_or_not_completed(self):
+        cache_key = self._key()
+        self._add_video(os.path.join(self.tmp_dir, 'deleted.mp4'), cache_key)
+
+        pending = os.path.join(self.tmp_dir, 'pending.mp4')
+        with open(pending, 'wb') as f:
+            f.write(b'partial')
+        self._add_video(pending, cache_key, status='processing')
+
+        self.assertIsNone(find_cached_render(cache_key))
+        self.assertFalse(reuse_cached_render(cache_key, os.path.join(self.tmp_dir, 'out.mp4')))
+        self.assertFalse(os.path.exists(os.path.join(self.tmp_dir, 'out.mp4')))
+
+    def test_lookup_requires_app_context(self):
+        self.context.pop()
+        try:
+            with self.assertRaises(RuntimeError):
+                find_cached_render(self._key())
+            self.assertFalse(reuse_cached_render(self._key(), os.path.join(self.tmp_dir, 'out.mp4')))
+        finally:
+            self.context.push()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+"""
+Unit tests cho Render Queue (priority, claim nguyên tử, retry backoff, recover job bị bỏ dở)
+"""
+
+import unittest
+import os
+import sys
+import shutil
+import tempfile
+import subprocess
+import threading
+from datetime import datetime, timedelta
+
+from unittest.mock import MagicMock, patch
+
+from flask import Flask, has_app_context
+
+# Thêm thư mục emlinh_mng vào Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from src.app.extensions import db
+from src.services.render_queue import PRIORITY_BATCH, PRIORITY_INTERACTIVE, RenderQueue
+
+
+class RenderQueueTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.app = Flask(__name__)
+        self.app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///' + os.path.join(self.tmp_dir, 'app.db')
+        self.app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+        db.init_app(self.app)
+
+        import src.app.models  # noqa: F401
+        with self.app.app_context():
+            db.create_all()
+
+        self.queue = self._queue('host-a:1')
+
+    def tearDown(self):
+        self.queue.stop_workers()
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def _queue(self, worker_id, **kwargs):
+        kwargs.setdefault('backoff_seconds', 30)
+        return RenderQueue(self.app, worker_id=worker_id, **kwargs)
+
+    def _enqueue(self, job_id, priority=PRIORITY_INTERACTIVE, **kwargs):
+        return self.queue.enqueue(job_id, 'Scene-Portrait', {'durationInSeconds': 5}, f'/tmp/{job_id}.mp4',
+                                  priority=priority, **kwargs)
+
+    def _set(self, job_id, **values):
+        from src.app.models import RenderJob
+        with self.app.app_context():
+            RenderJob.query.filter_by(job_id=job_id).update(values)
+            db.session.commit()
+
+
+class TestClaim(RenderQueueTestCase):
+    """Test thứ tự ưu tiên và claim nguyên tử"""
+
+    def test_interactive_before_batch_then_fifo(self):
+        self._enqueue('batch_1', priority=PRIORITY_BATCH)
+        self._enqueue('chat_1')
+        self._enqueue('chat_2')
+
+        claimed = [self.queue.claim()['job_id'] for _ in range(3)]
+        self.assertEqual(claimed, ['chat_1', 'chat_2', 'batch_1'])
+        self.assertIsNone(self.queue.claim())
+
+    def test_job_is_claimed_once(self):
+        self._enqueue('job_1')
+        other = self._queue('host-b:2')
+
+        job = self.queue.claim()
+        self.assertEqual(job['status'], 'rendering')
+        self.assertEqual(job['attempts'], 1)
+        self.assertEqual(job['worker_id'], 'host-a:1')
+        self.assertIsNone(other.claim())
+
+    def test_concurrent_claims_get_distinct_jobs(self):
+        for i in range(6):
+            self._enqueue(f'job_{i}')
+        claimed = []
+        lock = threading.Lock()
+
+        def drain(queue):
+            while True:
+                job = queue.claim()
+                if job is None:
+                    return
+                with lock:
+                    claimed.append(job['job_id'])
+
+        threads = [threading.Thread(target=drain, args=(self._queue(f'host:{i}'),)) for i in range(3)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(sorted(claimed), [f'job_{i}' for i in range(6)])
+
+    def test_active_limit_is_shared_across_processes(self):
+        self._enqueue('job_1')
+        self._enqueue('job_2')
+        first = self._queue('host-a:1', max_active_renders=1)
+        second = self._queue('host-a:2', max_active_renders=1)
+
+        self.assertEqual(first.claim()['job_id'], 'job_1')
+        self.assertIsNone(second.claim())
+
+        first.complete('job_1')
+        job = second.claim()
+        self.assertEqual(job['job_id'], 'job_2')
+        self.assertEqual(job['attempts'], 1)
+
+    def test_only_owner_updates_progress(self):
+        self._enqueue('job_1')
+        self.queue.claim()
+
+        self.assertFalse(self._queue('host-b:2').update('job_1', progress=50))
+        self.assertTrue(self.queue.update('job_1', progress=40, render_stage='rendering'))
+
+        job = self.queue.get('job_1')
+        self.assertEqual(job['progress'], 40)
+        self.assertEqual(job['render_stage'], 'rendering')
+
+
+class TestRetry(RenderQueueTestCase):
+    """Test retry với backoff và giới hạn số lần thử"""
+
+    def test_failure_requeues_with_backoff(self):
+        self._enqueue('job_1')
+        self.queue.claim()
+
+        self.assertEqual(self.queue.fail('job_1', 'chrome crashed'), 'queued')
+        job = self.queue.get('job_1')
+        self.assertEqual(job['status'], 'queued')
+        self.assertEqual(job['error'], 'chrome crashed')
+        # Chưa tới available_at nên chưa claim lại được
+        self.assertIsNone(self.queue.claim())
+
+        self._set('job_1', available_at=datetime.utcnow())
+        self.assertEqual(self.queue.claim()['attempts'], 2)
+
+    def test_backoff_is_exponential_and_capped(self):
+        queue = self._queue('host-a:1', backoff_seconds=10, backoff_max_seconds=60)
+        self.assertEqual([queue.backoff_delay(n) for n in (1, 2, 3, 4, 5)], [10, 20, 40, 60, 60])
+
+    def test_exhausted_attempts_fail(self):
+        self._enqueue('job_1', max_attempts=1)
+        self.queue.claim()
+
+        self.assertEqual(self.queue.fail('job_1', 'bad props'), 'failed')
+        job = self.queue.get('job_1')
+        self.assertEqual(job['status'], 'failed')
+        self.assertIsNotNone(job['end_time'])
+
+
+class TestRecoverOrphans(RenderQueueTestCase):
+    """Test đưa job 'rendering' bị bỏ dở về hàng đợi"""
+
+    def test_stale_heartbeat_is_requeued(self):
+        self._enqueue('job_1')
+        self._queue('other-host:7').claim()
+        self._set('job_1', heartbeat_at=datetime.utcnow() - timedelta(hours=1))
+
+        self.assertEqual(self.queue.recover_orphans(), 1)
+        job = self.queue.get('job_1')
+        self.assertEqual(job['status'], 'queued')
+        self.assertIsNone(job['worker_id'])
+        self.assertEqual(self.queue.claim()['job_id'], 'job_1')
+
+    def test_live_worker_is_left_alone(self):
+        self._enqueue('job_1')
+        self._queue('other-host:7').claim()
+
+        self.assertEqual(self.queue.recover_orphans(), 0)
+        self.assertEqual(self.queue.get('job_1')['status'], 'rendering')
+
+    def test_dead_local_worker_is_recovered_or_failed(self):
+        import socket
+        dead_worker = self._queue(f'{socket.gethostname()}:999999999')
+        self._enqueue('job_1')
+        self._enqueue('job_2', max_attempts=1)
+        dead_worker.claim()
+        dead_worker.claim()
+
+        self.assertEqual(self.queue.recover_orphans(), 2)
+        self.assertEqual(self.queue.get('job_1')['status'], 'queued')
+        self.assertEqual(self.queue.get('job_2')['status'], 'failed')
+
+
+class TestWorkers(RenderQueueTestCase):
+    """Test worker loop gọi handler và retry khi handler lỗi"""
+
+    def test_workers_process_jobs(self):
+        queue = self._queue('host-a:1', backoff_seconds=0, poll_interval=0.05)
+        self.queue = queue
+        done = threading.Event()
+        calls = []
+
+        def handler(job):
+            self.assertTrue(has_app_context())
+            calls.append(job['job_id'])
+            if len(calls) == 1:
+                raise RuntimeError('first attempt fails')
+            queue.complete(job['job_id'])
+            done.set()
+
+        queue.enqueue('job_1', 'Scene-Portrait', {}, '/tmp/job_1.mp4')
+        self.assertTrue(queue.start_workers(handler, num_workers=2))
+        self.assertFalse(queue.start_workers(handler, num_workers=2))
+
+        self.assertTrue(done.wait(5))
+        self.assertEqual(calls, ['job_1', 'job_1'])
+        job = queue.get('job_1')
+        self.assertEqual(job['status'], 'completed')
+        self.assertEqual(job['attempts'], 2)
+
+
+class TestRenderTimeout(RenderQueueTestCase):
+    """Test render quá RENDER_TIMEOUT_SECONDS được đưa lại hàng đợi thay vì treo job"""
+
+    def test_timed_out_render_is_retried(self):
+        from src.services.video_service import VideoService
+
+        self._enqueue('job_1')
+        job = self.queue.claim()
+        service = MagicMock()
+        service._run_render.side_effect = subprocess.TimeoutExpired('npx remotion render', 1200)
+
+        with patch('src.services.video_service.get_render_queue', return_value=self.queue), \
+                patch('src.services.video_service.Config.RENDER_CACHE_ENABLED', False):
+            VideoService._process_job(service, job)
+
+        stored = self.queue.get('job_1')
+        self.assertEqual(stored['status'], 'queued')
+        self.assertIn('timed out', stored['error'])
+        service.completion_events.notify.assert_not_called()
+
+
+if __name__ == "__main__":
+    unittest.main()
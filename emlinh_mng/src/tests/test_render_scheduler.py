@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Unit tests cho Render Scheduler
+"""
+
+import unittest
+import os
+import sys
+import threading
+
+# Thêm thư mục emlinh_mng vào Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from src.utils.render_scheduler import RenderScheduler, detect_cpu_count
+
+GB = 1024 ** 3
+
+
+class TestRenderScheduler(unittest.TestCase):
+    """Test class cho RenderScheduler"""
+
+    def test_many_core_host_runs_parallel_renders(self):
+        """Máy 32 core / 64GB: nhiều render song song, mỗi render nhiều tab"""
+        scheduler = RenderScheduler(cpu_count=32, memory_bytes=64 * GB)
+
+        self.assertEqual(scheduler.total_tabs, 31)
+        self.assertEqual(scheduler.max_concurrent_renders, 3)
+        self.assertEqual(scheduler.concurrency_per_render, 8)
+
+    def test_memory_limits_tabs(self):
+        """RAM ít thì số tab bị giới hạn theo memory_per_tab_mb"""
+        scheduler = RenderScheduler(cpu_count=32, memory_bytes=2 * GB, memory_per_tab_mb=512)
+
+        self.assertEqual(scheduler.total_tabs, 3)
+        self.assertEqual(scheduler.max_concurrent_renders, 1)
+        self.assertEqual(scheduler.concurrency_per_render, 3)
+
+    def test_small_host_falls_back_to_single_tab(self):
+        """Máy 1 core vẫn render được với concurrency 1"""
+        scheduler = RenderScheduler(cpu_count=1, memory_bytes=1 * GB)
+        self.assertEqual((scheduler.max_concurrent_renders, scheduler.concurrency_per_render), (1, 1))
+
+    def test_explicit_config_overrides_auto(self):
+        """Giá trị cấu hình > 0 được dùng trực tiếp"""
+        scheduler = RenderScheduler(
+            cpu_count=32, memory_bytes=64 * GB, max_concurrent_renders=2, concurrency_per_render=12
+        )
+        self.assertEqual((scheduler.max_concurrent_renders, scheduler.concurrency_per_render), (2, 12))
+
+    def test_fixed_concurrency_spreads_tabs_across_renders(self):
+        """RENDER_CONCURRENCY=1 (ThreeCanvas) thì số render song song = số tab"""
+        scheduler = RenderScheduler(cpu_count=9, memory_bytes=64 * GB, concurrency_per_render=1)
+        self.assertEqual((scheduler.max_concurrent_renders, scheduler.concurrency_per_render), (8, 1))
+
+    def test_slot_limits_in_flight_renders(self):
+        """Không quá max_concurrent_renders render chạy cùng lúc"""
+        scheduler = RenderScheduler(cpu_count=4, memory_bytes=8 * GB, max_concurrent_renders=1)
+        entered = threading.Event()
+        release = threading.Event()
+
+        def hold_slot():
+            with scheduler.slot():
+                entered.set()
+                release.wait(timeout=5)
+
+        thread = threading.Thread(target=hold_slot)
+        thread.start()
+        self.assertTrue(entered.wait(timeout=5))
+
+        with self.assertRaises(TimeoutError):
+            with scheduler.slot(timeout=0.05):
+                pass
+        self.assertEqual(scheduler.get_stats()['active_renders'], 1)
+
+        release.set()
+        thread.join()
+        with scheduler.slot(timeout=1) as concurrency:
+            self.assertEqual(concurrency, scheduler.concurrency_per_render)
+        self.assertEqual(scheduler.get_stats()['active_renders'], 0)
+
+    def test_detect_cpu_count(self):
+        self.assertGreaterEqual(detect_cpu_count(), 1)
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
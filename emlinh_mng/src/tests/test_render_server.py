@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+Test RenderServer với một sidecar giả (Python script nói cùng JSON protocol)
+"""
+
+import os
+import subprocess
+import sys
+import tempfile
+import textwrap
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from src.services.render_server import RenderServer, RenderServerUnavailable
+
+
+FAKE_SIDECAR = textwrap.dedent('''
+    import json, sys
+
+    def send(message):
+        sys.stdout.write(json.dumps(message) + "\\n")
+        sys.stdout.flush()
+
+    print("bundling...", file=sys.stderr)
+    send({"type": "ready", "bundleMs": 42})
+    for line in sys.stdin:
+        request = json.loads(line)
+        if request["type"] == "shutdown":
+            break
+        if request["type"] == "cancel":
+            send({"type": "error", "id": request["id"], "message": "cancelled"})
+            continue
+        if request["type"] == "rebundle":
+            send({"type": "ready", "bundleMs": 7})
+            continue
+        if request["type"] == "compositions":
+            send({"type": "compositions", "id": request["id"], "compositions": [
+                {"id": "Scene-Portrait", "width": 1080, "height": 1920, "fps": 30, "durationInFrames": 300}]})
+            continue
+        job_id, composition = request["id"], request["composition"]
+        if composition == "Crash":
+            print("chromium crashed", file=sys.stderr)
+            sys.exit(3)
+        if composition == "Hang":
+            continue
+        if composition == "Fail":
+            send({"type": "error", "id": job_id, "message": "composition not found"})
+            continue
+        for rendered in (5, 10):
+            send({"type": "progress", "id": job_id, "renderedFrames": rendered,
+                  "encodedFrames": 0, "totalFrames": 10, "progress": rendered / 10})
+        send({"type": "progress", "id": job_id, "renderedFrames": 10,
+              "encodedFrames": 10, "totalFrames": 10, "progress": 1})
+        send({"type": "done", "id": job_id, "outputPath": request["outputPath"]})
+''')
+
+
+class TestRenderServer(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.project = self.temp_dir.name
+        with open(os.path.join(self.project, 'fake_server.py'), 'w') as f:
+            f.write(FAKE_SIDECAR)
+        os.makedirs(os.path.join(self.project, 'node_modules', '@remotion', 'renderer'))
+        self.server = RenderServer(
+            self.project, script='fake_server.py', node_bin=sys.executable, startup_timeout=10
+        )
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.temp_dir.cleanup()
+
+    def test_render_reports_progress_and_result(self):
+        snapshots = []
+        output_path = os.path.join(self.project, 'out.mp4')
+
+        returncode, output = self.server.render(
+            'Scene-Portrait', output_path, {'durationInSeconds': 1}, concurrency=2,
+            on_progress=snapshots.append, timeout=10
+        )
+
+        self.assertEqual(returncode, 0)
+        self.assertEqual(output, output_path)
+        self.assertEqual([s['frames_rendered'] for s in snapshots], [5, 10, 10])
+        self.assertEqual(snapshots[0]['stage'], 'rendering')
+        self.assertEqual(snapshots[-1]['stage'], 'encoding')
+        self.assertEqual(snapshots[-1]['progress'], 100)
+        self.assertEqual(self.server.get_stats()['bundle_ms'], 42)
+
+    def test_sidecar_is_reused_between_renders(self):
+        self.server.render('Scene-Portrait', 'a.mp4', {}, timeout=10)
+        pid = self.server.get_stats()['pid']
+        self.server.render('Scene-Landscape', 'b.mp4', {}, timeout=10)
+
+        self.assertEqual(self.server.get_stats()['pid'], pid)
+        self.assertEqual(self.server.get_stats()['renders_completed'], 2)
+
+    def test_render_error_is_returned_not_raised(self):
+        returncode, output = self.server.render('Fail', 'out.mp4', {}, timeout=10)
+
+        self.assertEqual(returncode, 1)
+        self.assertIn('composition not found', output)
+
+    def test_crash_raises_unavailable_and_restarts(self):
+        with self.assertRaises(RenderServerUnavailable) as ctx:
+            self.server.render('Crash', 'out.mp4', {}, timeout=10)
+        self.assertIn('chromium crashed', str(ctx.exception))
+
+        returncode, _ = self.server.render('Scene-Portrait', 'out.mp4', {}, timeout=10)
+        self.assertEqual(returncode, 0)
+
+    def test_timeout_cancels_job(self):
+        with self.assertRaises(subprocess.TimeoutExpired):
+            self.server.render('Hang', 'out.mp4', {}, timeout=0.3)
+        self.assertEqual(self.server.get_stats()['active_renders'], 0)
+
+    def test_compositions_require_running_server(self):
+        with self.assertRaises(RenderServerUnavailable):
+            self.server.get_compositions()
+
+        self.assertTrue(self.server.start())
+        compositions = self.server.get_compositions(timeout=10)
+        self.assertEqual(compositions[0]['id'], 'Scene-Portrait')
+
+    def test_render_rebundles_after_src_change(self):
+        self.server.render('Scene-Portrait', 'a.mp4', {}, timeout=10)
+        self.assertEqual(self.server.get_stats()['rebundles'], 0)
+
+        os.makedirs(os.path.join(self.project, 'src'))
+        with open(os.path.join(self.project, 'src', 'Scene.tsx'), 'w') as f:
+            f.write('export const Scene = () => null;')
+        self.server.render('Scene-Portrait', 'b.mp4', {}, timeout=10)
+        self.server.render('Scene-Portrait', 'c.mp4', {}, timeout=10)
+
+        stats = self.server.get_stats()
+        self.assertEqual(stats['rebundles'], 1)
+        self.assertEqual(stats['bundle_ms'], 7)
+        self.assertEqual(stats['renders_completed'], 3)
+
+    def test_unavailable_without_node_modules(self):
+        server = RenderServer(tempfile.gettempdir(), script='missing.mjs', node_bin=sys.executable)
+
+        self.assertFalse(server.is_installed())
+        with self.assertRaises(RenderServerUnavailable):
+            server.render('Scene-Portrait', 'out.mp4', {})
+
+
+if __name__ == '__main__':
+    unittest.main()
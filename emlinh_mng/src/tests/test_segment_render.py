@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Unit tests cho Segment Render (chia frame, gộp tiến độ, nối bằng ffmpeg concat)
+"""
+
+import unittest
+import os
+import re
+import sys
+import shutil
+import tempfile
+import subprocess
+
+# Thêm thư mục emlinh_mng vào Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from src.utils.audio_transcoder import find_ffmpeg
+from src.utils.segment_render import SegmentProgress, render_in_segments, split_frame_ranges
+
+
+def _snapshot(rendered, encoded, total, stage='rendering', fps=10.0):
+    return {
+        'stage': stage, 'frames_rendered': rendered, 'frames_encoded': encoded,
+        'total_frames': total, 'fps': fps, 'eta_seconds': None, 'progress': 0
+    }
+
+
+class TestSplitFrameRanges(unittest.TestCase):
+    """Test chia frame range"""
+
+    def test_even_split_covers_every_frame(self):
+        ranges = split_frame_ranges(1800, 4)
+        self.assertEqual(ranges, [(0, 449), (450, 899), (900, 1349), (1350, 1799)])
+
+    def test_remainder_goes_to_first_segments(self):
+        self.assertEqual(split_frame_ranges(10, 3), [(0, 3), (4, 6), (7, 9)])
+
+    def test_min_segment_frames_limits_segment_count(self):
+        """Video ngắn không bị chia nhỏ hơn min_segment_frames"""
+        self.assertEqual(split_frame_ranges(450, 8, min_segment_frames=450), [(0, 449)])
+        self.assertEqual(len(split_frame_ranges(1800, 8, min_segment_frames=450)), 4)
+
+    def test_empty(self):
+        self.assertEqual(split_frame_ranges(0, 4), [])
+
+
+class TestSegmentProgress(unittest.TestCase):
+    """Test gộp tiến độ của nhiều đoạn"""
+
+    def test_aggregates_frames_and_fps(self):
+        snapshots = []
+        progress = SegmentProgress([(0, 49), (50, 99)], snapshots.append)
+
+        progress.for_segment(0)(_snapshot(50, 0, 50))
+        progress.for_segment(1)(_snapshot(25, 0, 50))
+
+        latest = snapshots[-1]
+        self.assertEqual(latest['frames_rendered'], 75)
+        self.assertEqual(latest['total_frames'], 100)
+        self.assertEqual(latest['fps'], 20.0)
+        self.assertAlmostEqual(latest['eta_seconds'], 1.25, delta=0.1)
+        self.assertEqual(latest['progress'], 60)
+        self.assertEqual(latest['stage'], 'rendering')
+
+    def test_encoding_only_when_all_segments_encoding(self):
+        snapshots = []
+        progress = SegmentProgress([(0, 49), (50, 99)], snapshots.append)
+
+        progress.for_segment(0)(_snapshot(50, 10, 50, stage='encoding'))
+        self.assertEqual(snapshots[-1]['stage'], 'rendering')
+
+        progress.for_segment(1)(_snapshot(50, 10, 50, stage='encoding'))
+        self.assertEqual(snapshots[-1]['stage'], 'encoding')
+
+        progress.concatenating()
+        self.assertEqual(snapshots[-1]['stage'], 'concatenating')
+
+
+@unittest.skipUnless(find_ffmpeg(), "ffmpeg not installed")
+class TestRenderInSegments(unittest.TestCase):
+    """Test render song song + concat không encode lại (cần ffmpeg)"""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.ffmpeg = find_ffmpeg()
+        self.audio_path = os.path.join(self.tmp_dir, 'voice.wav')
+        subprocess.run(
+            [self.ffmpeg, '-y', '-loglevel', 'error', '-f', 'lavfi', '-i', 'sine=frequency=440:duration=2',
+             self.audio_path],
+            check=True
+        )
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def _fake_segment(self, index, frame_range, segment_path, on_progress):
+        """Giả lập Remotion: render đoạn video không tiếng với số frame đúng bằng range"""
+        frames = frame_range[1] - frame_range[0] + 1
+        subprocess.run(
+            [self.ffmpeg, '-y', '-loglevel', 'error', '-f', 'lavfi', '-i', 'testsrc=size=64x64:rate=30',
+             '-frames:v', str(frames), '-c:v', 'libx264', '-pix_fmt', 'yuv420p', segment_path],
+            check=True
+        )
+        on_progress(_snapshot(frames, frames, frames, stage='encoding'))
+        return True
+
+    def _probe(self, path):
+        result = subprocess.run([self.ffmpeg, '-i', path], capture_output=True, text=True)
+        return result.stderr
+
+    def test_segments_are_joined_with_audio(self):
+        output_path = os.path.join(self.tmp_dir, 'out.mp4')
+        snapshots = []
+
+        ok = render_in_segments(
+            self._fake_segment, split_frame_ranges(60, 3), output_path,
+            audio_path=self.audio_path, progress_callback=snapshots.append
+        )
+
+        self.assertTrue(ok)
+        info = self._probe(output_path)
+        self.assertIn('Video: h264', info)
+        self.assertIn('Audio: aac', info)
+        duration = re.search(r'Duration: 00:00:(\d+\.\d+)', info)
+        self.assertAlmostEqual(float(duration.group(1)), 2.0, delta=0.1)
+        self.assertEqual(snapshots[-1]['stage'], 'concatenating')
+        # Thư mục segment tạm đã được xóa
+        self.assertEqual(sorted(os.listdir(self.tmp_dir)), ['out.mp4', 'voice.wav'])
+
+    def test_failed_segment_aborts(self):
+        output_path = os.path.join(self.tmp_dir, 'out.mp4')
+
+        def flaky(index, frame_range, segment_path, on_progress):
+            if index == 1:
+                return False
+            return self._fake_segment(index, frame_range, segment_path, on_progress)
+
+        self.assertFalse(render_in_segments(flaky, split_frame_ranges(60, 3), output_path))
+        self.assertFalse(os.path.exists(output_path))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Unit tests cho TTS Cache
+"""
+
+import unittest
+import os
+import sys
+import json
+import time
+import tempfile
+import shutil
+
+# Thêm thư mục emlinh_mng vào Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from src.utils.tts_cache import TTSCache
+
+
+class TestTTSCache(unittest.TestCase):
+    """Test class cho TTSCache"""
+
+    def setUp(self):
+        """Setup thư mục tạm và file audio giả"""
+        self.tmp_dir = tempfile.mkdtemp()
+        self.cache_dir = os.path.join(self.tmp_dir, '.tts_cache')
+        self.wav_path = os.path.join(self.tmp_dir, 'speech.wav')
+        self.ogg_path = os.path.join(self.tmp_dir, 'speech.ogg')
+        self.json_path = os.path.join(self.tmp_dir, 'speech.json')
+
+        with open(self.wav_path, 'wb') as f:
+            f.write(b'\x00' * 1000)
+        with open(self.ogg_path, 'wb') as f:
+            f.write(b'\x01' * 100)
+        with open(self.json_path, 'w') as f:
+            json.dump({'mouthCues': [{'start': 0.0, 'end': 1.0, 'value': 'A'}]}, f)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def test_make_key_is_deterministic_and_parameter_sensitive(self):
+        """Key giống nhau cho cùng tham số, khác nhau khi đổi voice/model/speed"""
+        key = TTSCache.make_key("Xin chào", "nova", "tts-1", 1.0)
+        self.assertEqual(key, TTSCache.make_key("Xin chào", "nova", "tts-1", 1))
+        self.assertNotEqual(key, TTSCache.make_key("Xin chào", "fable", "tts-1", 1.0))
+        self.assertNotEqual(key, TTSCache.make_key("Xin chào", "nova", "tts-1-hd", 1.0))
+        self.assertNotEqual(key, TTSCache.make_key("Xin chào", "nova", "tts-1", 1.25))
+
+    def test_miss_then_hit(self):
+        """Lần đầu miss, sau khi put thì hit với đúng duration"""
+        cache = TTSCache(self.cache_dir)
+        key = TTSCache.make_key("Xin chào", "nova", "tts-1", 1.0)
+
+        self.assertIsNone(cache.get(key))
+        cache.put(key, self.wav_path, self.json_path, 3.5, ogg_path=self.ogg_path)
+
+        entry = cache.get(key)
+        self.assertIsNotNone(entry)
+        self.assertEqual(entry['duration'], 3.5)
+        self.assertTrue(os.path.exists(entry['ogg_path']))
+
+        stats = cache.get_stats()
+        self.assertEqual(stats['hits'], 1)
+        self.assertEqual(stats['misses'], 1)
+        self.assertEqual(stats['entries'], 1)
+
+    def test_materialize_does_not_share_writes_with_cache(self):
+        """Ghi đè file output không làm hỏng entry trong cache"""
+        cache = TTSCache(self.cache_dir)
+        key = TTSCache.make_key("Xin chào", "nova", "tts-1", 1.0)
+        entry = cache.put(key, self.wav_path, self.json_path, 1.0)
+
+        dest = os.path.join(self.tmp_dir, 'out.wav')
+        TTSCache.materialize(entry['wav_path'], dest)
+        TTSCache.materialize(entry['wav_path'], dest)
+        os.remove(dest)
+        with open(dest, 'wb') as f:
+            f.write(b'changed')
+
+        with open(entry['wav_path'], 'rb') as f:
+            self.assertEqual(f.read(), b'\x00' * 1000)
+
+    def test_lru_eviction_by_entry_count(self):
+        """Entry ít được dùng nhất bị xóa khi vượt max_entries"""
+        cache = TTSCache(self.cache_dir, max_entries=2)
+        keys = [TTSCache.make_key(f"text {i}", "nova", "tts-1", 1.0) for i in range(3)]
+
+        cache.put(keys[0], self.wav_path, self.json_path, 1.0)
+        cache.put(keys[1], self.wav_path, self.json_path, 1.0)
+
+        # Đánh dấu keys[0] được dùng gần đây hơn keys[1]
+        old = time.time() - 100
+        os.utime(os.path.join(self.cache_dir, keys[1], TTSCache.META_FILE), (old, old))
+        cache.get(keys[0])
+
+        cache.put(keys[2], self.wav_path, self.json_path, 1.0)
+
+        self.assertIsNotNone(cache.get(keys[0]))
+        self.assertIsNone(cache.get(keys[1]))
+        self.assertIsNotNone(cache.get(keys[2]))
+        self.assertEqual(cache.get_stats()['evictions'], 1)
+
+    def test_eviction_by_size(self):
+        """Tổng dung lượng được giữ dưới max_bytes"""
+        cache = TTSCache(self.cache_dir, max_bytes=1500)
+        for i in range(3):
+            cache.put(TTSCache.make_key(f"text {i}", "nova", "tts-1", 1.0), self.wav_path, self.json_path, 1.0)
+
+        self.assertLessEqual(cache.get_stats()['total_bytes'], 1500)
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+"""
+Unit tests cho TTS Service (OpenAI client và ffmpeg được mock)
+"""
+
+import unittest
+import os
+import sys
+import json
+import wave
+import shutil
+import tempfile
+from unittest.mock import patch, MagicMock
+
+# Thêm thư mục emlinh_mng vào Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+os.environ.setdefault('OPENAI_API_KEY', 'test-key')
+
+from src.services.tts_service import TTSService
+from src.services.job_store import InMemoryJobStore
+from src.utils.tts_cache import TTSCache
+from src.utils.bounded_executor import QueueFullError
+from src.utils.audio_transcoder import get_wav_duration
+
+
+class FakeTranscoder:
+    """Thay thế AudioTranscoder, ghi lại các chunk nhận được"""
+
+    instances = []
+
+    def __init__(self, wav_path, ogg_path=None, input_format='mp3'):
+        self.wav_path = wav_path
+        self.ogg_path = ogg_path
+        self.bytes_written = 0
+        self.chunks = []
+        FakeTranscoder.instances.append(self)
+
+    def start(self):
+        pass
+
+    def write(self, chunk):
+        self.chunks.append(chunk)
+        self.bytes_written += len(chunk)
+
+    def finish(self, timeout=120):
+        # Mỗi byte input thành một frame PCM 16-bit mono 1000 Hz
+        data = b''.join(self.chunks)
+        with wave.open(self.wav_path, 'wb') as wav_file:
+            wav_file.setnchannels(1)
+            wav_file.setsampwidth(2)
+            wav_file.setframerate(1000)
+            wav_file.writeframes(b''.join(bytes([b, 0]) for b in data))
+        if self.ogg_path:
+            with open(self.ogg_path, 'wb') as f:
+                f.write(data)
+        return len(data) / 1000.0
+
+    def abort(self):
+        pass
+
+    @classmethod
+    def transcode(cls, audio_data, wav_path, ogg_path=None, input_format='mp3'):
+        transcoder = cls(wav_path, ogg_path, input_format)
+        transcoder.write(audio_data)
+        return transcoder.finish()
+
+
+class FakeStreamingResponse:
+    """Giả lập response của with_streaming_response.create"""
+
+    def __init__(self, chunks, job_snapshots, service, job_id_getter):
+        self.chunks = chunks
+        self.headers = {'content-length': str(sum(len(c) for c in chunks))}
+        self.job_snapshots = job_snapshots
+        self.service = service
+        self.job_id_getter = job_id_getter
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        return False
+
+    def iter_bytes(self, chunk_size=None):
+        for chunk in self.chunks:
+            yield chunk
+            job = self.service.get_tts_status(self.job_id_getter())
+            self.job_snapshots.append(job['progress'])
+
+
+class TestTTSService(unittest.TestCase):
+    """Test class cho TTSService"""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        FakeTranscoder.instances = []
+
+        self.service = TTSService()
+        self.service.audio_dir = self.tmp_dir
+        self.service.cache = TTSCache(os.path.join(self.tmp_dir, '.tts_cache'))
+        self.service.client = MagicMock()
+        self.service._job_store = InMemoryJobStore()
+
+        # Lip sync: một cue phủ toàn bộ đoạn audio, value là ký tự đầu của text
+        def fake_lip_sync(wav_path, ogg_path, text, json_path):
+            duration = get_wav_duration(wav_path)
+            with open(json_path, 'w') as f:
+                json.dump({'mouthCues': [{'start': 0.0, 'end': duration, 'value': text[0]}]}, f)
+
+        self.service._generate_lip_sync_json = fake_lip_sync
+
+        patcher = patch('src.services.tts_service.AudioTranscoder', FakeTranscoder)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    @patch('src.services.tts_service.Config.TTS_STREAMING', True)
+    @patch.object(TTSService, 'PROGRESS_UPDATE_INTERVAL', 0)
+    def test_streaming_updates_progress_from_bytes(self):
+        """Progress tăng dần theo số byte nhận được khi streaming"""
+        snapshots = []
+        chunks = [b'a' * 100, b'b' * 100, b'c' * 100, b'd' * 100]
+        self.service.client.audio.speech.with_streaming_response.create.return_value = \
+            FakeStreamingResponse(chunks, snapshots, self.service, lambda: 'job_stream')
+
+        self.service.generate_speech("Xin chào", "stream_test", "job_stream", chunked=False)
+
+        job = self.service.get_tts_status('job_stream')
+        self.assertEqual(job['status'], 'completed')
+        self.assertEqual(job['actual_duration'], 0.4)
+        self.assertEqual(job['bytes_received'], 400)
+        self.assertEqual(snapshots, sorted(snapshots))
+        self.assertEqual(snapshots[-1], 75)
+        self.assertEqual(FakeTranscoder.instances[0].chunks, chunks)
+
+    @patch('src.services.tts_service.Config.TTS_STREAMING', True)
+    def test_streaming_progress_writes_are_throttled(self):
+        """Không ghi job store cho từng chunk (database store commit mỗi lần ghi)"""
+        chunks = [bytes([i]) * 10 for i in range(100)]
+        self.service.client.audio.speech.with_streaming_response.create.return_value = \
+            FakeStreamingResponse(chunks, [], self.service, lambda: 'job_stream')
+
+        with patch.object(self.service, '_update_job', wraps=self.service._update_job) as update_job:
+            self.service.generate_speech("Xin chào", "stream_test", "job_stream", chunked=False)
+
+        progress_writes = [c for c in update_job.call_args_list if 'progress' in c.kwargs and 'status' not in c.kwargs]
+        self.assertLessEqual(len(progress_writes), 2)
+        self.assertEqual(self.service.get_tts_status('job_stream')['bytes_received'], 1000)
+
+    @patch('src.services.tts_service.Config.TTS_STREAMING', False)
+    def test_cache_hit_skips_openai(self):
+        """Lần gọi thứ hai với cùng tham số được phục vụ từ cache"""
+        self.service.client.audio.speech.create.return_value = MagicMock(content=b'mp3-bytes')
+
+        self.service.generate_speech("Xin chào", "first", "job_1", chunked=False)
+        self.service.generate_speech("Xin chào", "second", "job_2", chunked=False)
+
+        self.assertEqual(self.service.client.audio.speech.create.call_count, 1)
+        job = self.service.get_tts_status('job_2')
+        self.assertTrue(job['cache_hit'])
+        self.assertEqual(job['actual_duration'], 0.009)
+        self.assertTrue(os.path.exists(os.path.join(self.tmp_dir, 'second.wav')))
+        self.assertTrue(os.path.exists(os.path.join(self.tmp_dir, 'second.json')))
+        self.assertEqual(self.service.get_cache_stats()['hits'], 1)
+        self.assertEqual(self.service.wait_for_completion('job_2', timeout=1)['status'], 'completed')
+
+    def test_split_into_chunks_on_sentence_boundaries(self):
+        """Chia theo câu tiếng Việt và gom câu ngắn vào cùng chunk"""
+        text = "Xin chào các bạn! Hôm nay trời đẹp. Chúng ta học về AI… Cảm ơn đã lắng nghe?"
+        chunks = TTSService._split_into_chunks(text, 40)
+
+        self.assertEqual(chunks, [
+            "Xin chào các bạn! Hôm nay trời đẹp.",
+            "Chúng ta học về AI… Cảm ơn đã lắng nghe?"
+        ])
+        self.assertTrue(all(len(c) <= 40 for c in TTSService._split_into_chunks("từ " * 100, 40)))
+
+    @patch('src.services.tts_service.Config.TTS_CHUNK_MAX_CHARS', 12)
+    @patch('src.services.tts_service.Config.TTS_CHUNK_WORKERS', 3)
+    def test_chunked_synthesis_keeps_order_and_offsets_cues(self):
+        """Các chunk được ghép đúng thứ tự, mouthCues được dịch theo offset"""
+        self.service.client.audio.speech.create.side_effect = \
+            lambda **kwargs: MagicMock(content=kwargs['input'].encode('utf-8'))
+
+        text = "Aaaa aaaa. Bbbbbb. Cccccccc."
+        self.service.generate_speech(text, "chunked", "job_chunked", chunked=True)
+
+        job = self.service.get_tts_status('job_chunked')
+        self.assertEqual(job['status'], 'completed')
+        self.assertEqual(job['chunks_total'], 3)
+        self.assertEqual(self.service.client.audio.speech.create.call_count, 3)
+
+        with wave.open(os.path.join(self.tmp_dir, 'chunked.wav'), 'rb') as wav_file:
+            frames = wav_file.readframes(wav_file.getnframes())
+        self.assertEqual(frames[::2], b"Aaaa aaaa.Bbbbbb.Cccccccc.")
+        self.assertAlmostEqual(job['actual_duration'], 0.026)
+
+        with open(os.path.join(self.tmp_dir, 'chunked.json')) as f:
+            cues = json.load(f)['mouthCues']
+        self.assertEqual([c['value'] for c in cues], ['A', 'B', 'C'])
+        self.assertEqual([c['start'] for c in cues], [0.0, 0.01, 0.02])
+        self.assertFalse(any(name.startswith('.tts_chunks_') for name in os.listdir(self.tmp_dir)))
+
+    def test_submit_speech_rejects_when_queue_full(self):
+        """Khi worker pool đầy, job được đánh dấu failed và QueueFullError được raise"""
+        self.service.executor = MagicMock()
+        self.service.executor.submit.side_effect = QueueFullError(retry_after=7)
+
+        with self.assertRaises(QueueFullError) as ctx:
+            self.service.submit_speech("Xin chào", "busy", "job_busy")
+
+        self.assertEqual(ctx.exception.retry_after, 7)
+        self.assertEqual(self.service.wait_for_completion('job_busy', timeout=1)['status'], 'failed')
+
+    def test_submit_speech_reports_queue_position(self):
+        """Job chờ trong hàng đợi có status queued và queue_position"""
+        self.service.executor = MagicMock()
+        self.service.executor.submit.return_value = 3
+
+        job_id, position = self.service.submit_speech("Xin chào", "queued", "job_queued")
+
+        self.assertEqual((job_id, position), ('job_queued', 3))
+        job = self.service.get_tts_status('job_queued')
+        self.assertEqual(job['status'], 'queued')
+        self.assertEqual(job['queue_position'], 3)
+
+    def test_default_job_ids_are_unique_within_a_second(self):
+        """Các job gửi trong cùng một giây không được trùng job_id"""
+        self.service.executor = MagicMock()
+        self.service.executor.submit.return_value = 0
+
+        job_ids = {self.service.submit_speech("Xin chào")[0] for _ in range(5)}
+
+        self.assertEqual(len(job_ids), 5)
+        self.assertTrue(all(job_id.startswith('tts_') for job_id in job_ids))
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+"""
+Unit tests cho Vector Index (top-k cosine, lọc, thêm/xóa incremental) và
+ChatService.search_similar_conversations trên SQLite
+"""
+
+import unittest
+import os
+import sys
+import shutil
+import tempfile
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+from flask import Flask
+
+# Thêm thư mục emlinh_mng vào Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from src.app.extensions import db
+from src.utils.vector_index import VectorIndex
+
+
+class TestVectorIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.index = VectorIndex(initial_capacity=2)
+        self.index.add(1, [1, 0, 0], 10, 'chat_user', 's1')
+        self.index.add(2, [0.9, 0.1, 0], 10, 'chat_ai', 's1')
+        self.index.add(3, [0, 1, 0], 11, 'chat_user', 's2')
+        self.index.add(4, [-1, 0, 0], 12, 'idea')
+
+    def test_top_k_matches_brute_force(self):
+        rng = np.random.default_rng(0)
+        index = VectorIndex(initial_capacity=4)
+        vectors = rng.normal(size=(200, 16))
+        for i, vector in enumerate(vectors):
+            index.add(i + 1, vector, i, 'chat_user')
+        query = rng.normal(size=16)
+
+        expected = (vectors / np.linalg.norm(vectors, axis=1, keepdims=True)) @ (query / np.linalg.norm(query))
+        results = index.search(query, k=5)
+
+        self.assertEqual([r['vector_id'] for r in results], list(np.argsort(-expected)[:5] + 1))
+        self.assertAlmostEqual(results[0]['similarity'], float(expected.max()), places=5)
+
+    def test_filters(self):
+        self.assertEqual([r['vector_id'] for r in self.index.search([1, 0, 0], k=10)], [1, 2, 3, 4])
+        self.assertEqual([r['vector_id'] for r in self.index.search([1, 0, 0], k=10, content_types=['chat_user'])], [1, 3])
+        self.assertEqual([r['vector_id'] for r in self.index.search([1, 0, 0], k=10, session_id='s2')], [3])
+        self.assertEqual(self.index.search([1, 0, 0], k=10, session_id='missing'), [])
+        self.assertEqual([r['vector_id'] for r in self.index.search([1, 0, 0], k=10, min_similarity=0.5)], [1, 2])
+
+    def test_incremental_add_replace_and_remove(self):
+        self.index.add(5, [0, 0, 1], 13, 'chat_ai', 's3')
+        self.index.add(1, [0, 0, 2], 10, 'chat_user', 's1')  # Thay thế vector cũ
+        self.assertEqual(len(self.index), 5)
+        self.assertEqual({r['vector_id'] for r in self.index.search([0, 0, 1], k=2)}, {1, 5})
+
+        self.assertEqual(self.index.remove([1, 99]), 1)
+        top = self.index.search([0, 0, 1], k=1)[0]
+        self.assertEqual((top['vector_id'], top['content_id'], top['session_id']), (5, 13, 's3'))
+        self.assertEqual(len(self.index), 4)
+
+    def test_invalid_vectors_are_skipped(self):
+        self.assertFalse(self.index.add(9, [0, 0, 0], 1, 'chat_user'))
+        self.assertFalse(self.index.add(9, [1, 0], 1, 'chat_user'))
+        self.assertEqual(self.index.search([1, 0], k=3), [])
+
+
+class TestSearchSimilarConversations(unittest.TestCase):
+    """Kết quả search được join lại với bảng chats"""
+
+    EMBEDDINGS = {
+        'làm video về AI': [1.0, 0.0, 0.0],
+        'ý tưởng video AI': [0.9, 0.1, 0.0],
+        'du lịch Đà Nẵng': [0.0, 1.0, 0.0],
+        'lịch trình du lịch': [0.1, 0.9, 0.0],
+        'video trí tuệ nhân tạo': [0.95, 0.05, 0.0],
+    }
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.app = Flask(__name__)
+        self.app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///' + os.path.join(self.tmp_dir, 'app.db')
+        self.app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+        db.init_app(self.app)
+
+        import src.app.models  # noqa: F401
+        self.context = self.app.app_context()
+        self.context.push()
+        db.create_all()
+
+        from src.services.chat_service import ChatService
+        embedding_service = MagicMock()
+        embedding_service.get_embedding.side_effect = lambda text: self.EMBEDDINGS.get(text)
+        embedding_service.get_embeddings_batch.side_effect = lambda texts: [self.EMBEDDINGS.get(t) for t in texts]
+        with patch('src.services.chat_service.get_embedding_service', return_value=embedding_service):
+            self.service = ChatService()
+
+    def tearDown(self):
+        db.session.remove()
+        self.context.pop()
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def _chat(self, session_id, user_message, ai_response):
+        from src.app.models import Chat
+        chat = Chat(session_id=session_id, user_message=user_message, ai_response=ai_response)
+        db.session.add(chat)
+        db.session.commit()
+        self.service._create_embeddings(chat)
+        return chat
+
+    def test_results_join_chat_rows(self):
+        video = self._chat('s1', 'làm video về AI', 'ý tưởng video AI')
+        travel = self._chat('s2', 'du lịch Đà Nẵng', 'lịch trình du lịch')
+
+        results = self.service.search_similar_conversations('video trí tuệ nhân tạo', limit=5)
+
+        # Mỗi chat xuất hiện một lần, theo vector khớp nhất
+        self.assertEqual([r['id'] for r in results], [video.id, travel.id])
+        self.assertEqual(results[0]['matched_type'], 'chat_user')
+        self.assertEqual(results[0]['user_message'], 'làm video về AI')
+        self.assertGreater(results[0]['similarity'], results[1]['similarity'])
+
+        only_ai = self.service.search_similar_conversations('video trí tuệ nhân tạo', limit=1, content_type='chat_ai')
+        self.assertEqual(only_ai[0]['matched_type'], 'chat_ai')
+        in_session = self.service.search_similar_conversations('video trí tuệ nhân tạo', session_id='s2')
+        self.assertEqual([r['id'] for r in in_session], [travel.id])
+
+    def test_rows_written_elsewhere_are_picked_up(self):
+        from src.app.models import Chat, Vector
+        self.assertEqual(self.service.search_similar_conversations('làm video về AI'), [])
+
+        # Dòng do worker khác ghi: chưa có trong index của process này
+        chat = Chat(session_id='s9', user_message='làm video về AI', ai_response='ok')
+        db.session.add(chat)
+        db.session.commit()
+        db.session.add(Vector(content_id=chat.id, content_type='chat_user', content_text=chat.user_message,
+                              embedding=[1.0, 0.0, 0.0], meta_data={'session_id': 's9'}))
+        db.session.commit()
+
+        self.assertEqual([r['id'] for r in self.service.search_similar_conversations('làm video về AI')], [chat.id])
+
+    def test_deleted_session_is_removed(self):
+        from src.app.models import Vector
+        self._chat('s1', 'làm video về AI', 'ý tưởng video AI')
+        travel = self._chat('s2', 'du lịch Đà Nẵng', 'lịch trình du lịch')
+
+        self.assertTrue(self.service.delete_chat_session('s1')['success'])
+
+        self.assertEqual(Vector.query.count(), 2)
+        results = self.service.search_similar_conversations('làm video về AI')
+        self.assertEqual([r['id'] for r in results], [travel.id])
+
+    def test_late_committed_lower_id_is_picked_up(self):
+        from src.app.models import Chat, Vector
+        first = self._chat('s1', 'du lịch Đà Nẵng', 'lịch trình du lịch')
+        db.session.add(Vector(id=50, content_id=first.id, content_type='chat_user', content_text='x',
+                              embedding=[0.0, 0.0, 1.0], meta_data={'session_id': 's1'}))
+        db.session.commit()
+        self.service.search_similar_conversations('làm video về AI')
+
+        # Transaction của worker khác commit sau nhưng có id nhỏ hơn id đã sync
+        chat = Chat(session_id='s9', user_message='làm video về AI', ai_response='ok')
+        db.session.add(chat)
+        db.session.commit()
+        db.session.add(Vector(id=10, content_id=chat.id, content_type='chat_user', content_text=chat.user_message,
+                              embedding=[1.0, 0.0, 0.0], meta_data={'session_id': 's9'}))
+        db.session.commit()
+
+        results = self.service.search_similar_conversations('làm video về AI', limit=1)
+        self.assertEqual([r['id'] for r in results], [chat.id])
+
+    def test_chats_deleted_elsewhere_are_refilled_and_resynced(self):
+        from src.app.models import Chat, Vector
+        video = self._chat('s1', 'làm video về AI', 'ý tưởng video AI')
+        travel = self._chat('s2', 'du lịch Đà Nẵng', 'lịch trình du lịch')
+        self.service.search_similar_conversations('làm video về AI')
+
+        # Worker khác xóa chat nhưng vector còn trong index của process này
+        Chat.query.filter_by(id=video.id).delete()
+        db.session.commit()
+        results = self.service.search_similar_conversations('làm video về AI', limit=1)
+        self.assertEqual([r['id'] for r in results], [travel.id])
+
+        Vector.query.filter_by(content_id=travel.id).delete()
+        db.session.commit()
+        with patch('src.services.chat_service.Config.VECTOR_INDEX_RESYNC_INTERVAL', 0):
+            self.service._sync_vector_index()
+        self.assertEqual(len(self.service._vector_index), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""
+Unit tests cho batch video (gom script vào ít lần gọi LLM, tiến độ từng video và tổng)
+"""
+
+import unittest
+import os
+import sys
+import json
+from unittest.mock import MagicMock, patch
+
+# Thêm thư mục emlinh_mng vào Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from src.services import video_production_flow
+from src.services.video_production_flow import BatchProgress, create_videos_from_topics, generate_scripts_batch
+from src.utils.bounded_executor import QueueFullError
+
+SCRIPT = "Xin chào các bạn! Hôm nay mình nói về {}. Cảm ơn các bạn đã lắng nghe!"
+
+
+class FakeLLM:
+    """Trả lời batch bằng JSON array, trả lời lẻ bằng một bài nói"""
+
+    def __init__(self, batch_reply=None):
+        self.batch_reply = batch_reply
+        self.calls = []
+
+    def call(self, messages):
+        prompt = messages[-1]['content']
+        self.calls.append(prompt)
+        if 'Danh sách chủ đề' in prompt:
+            if self.batch_reply is not None:
+                return self.batch_reply(prompt)
+            topics = [line.split('. ', 1)[1] for line in prompt.splitlines() if line[:1].isdigit() and '. ' in line]
+            return json.dumps([{'index': i + 1, 'script': SCRIPT.format(t)} for i, t in enumerate(topics)])
+        return SCRIPT.format('riêng')
+
+
+class TestGenerateScriptsBatch(unittest.TestCase):
+    """Test gom nhiều chủ đề vào một lần gọi LLM"""
+
+    def test_topics_are_grouped_per_call(self):
+        llm = FakeLLM()
+        topics = [f'chủ đề {i}' for i in range(7)]
+
+        scripts = generate_scripts_batch(topics, 15, llm=llm, batch_size=5)
+
+        self.assertEqual(len(llm.calls), 2)
+        self.assertEqual(scripts[0], SCRIPT.format('chủ đề 0'))
+        self.assertEqual(scripts[6], SCRIPT.format('chủ đề 6'))
+
+    def test_missing_or_unparseable_items_fall_back_to_single_calls(self):
+        partial = FakeLLM(batch_reply=lambda prompt: '```json\n[{"index": 2, "script": "%s"}]\n```' % SCRIPT.format('b'))
+        scripts = generate_scripts_batch(['a', 'b', 'c'], 15, llm=partial, batch_size=5)
+        self.assertEqual(len(partial.calls), 3)
+        self.assertEqual(scripts, [SCRIPT.format('riêng'), SCRIPT.format('b'), SCRIPT.format('riêng')])
+
+        garbage = FakeLLM(batch_reply=lambda prompt: 'không phải JSON')
+        self.assertEqual(generate_scripts_batch(['a'], 15, llm=garbage), [SCRIPT.format('riêng')])
+
+
+class TestBatchProgress(unittest.TestCase):
+    """Test tiến độ tổng"""
+
+    def test_aggregate(self):
+        events = []
+        progress = BatchProgress('batch_1', ['a', 'b', 'c', 'd'], events.append)
+
+        progress.update(0, 'completed', video_id=1)
+        progress.update(1, 'failed', error='boom')
+        progress.update(2, 'rendering')
+
+        aggregate = events[-1]['aggregate']
+        self.assertEqual(events[-1]['item']['status'], 'rendering')
+        self.assertEqual(
+            {k: aggregate[k] for k in ('total', 'queued', 'in_progress', 'completed', 'failed')},
+            {'total': 4, 'queued': 1, 'in_progress': 1, 'completed': 1, 'failed': 1}
+        )
+        self.assertEqual(aggregate['progress'], 65)
+        self.assertEqual(progress.snapshot()['items'][0]['video_id'], 1)
+
+
+class FakeFlow:
+    """Giả lập VideoProductionFlow: chủ đề 'lỗi' thất bại ở bước render"""
+
+    def __init__(self):
+        self.state = MagicMock(video_id=None)
+        self.render_prep = None
+
+    def initialize_production(self):
+        return {}
+
+    def create_database_record(self, script_data):
+        self.state.video_id = abs(hash(self.state.topic)) % 1000
+        return {'video_id': self.state.video_id}
+
+    def start_tts_generation(self, record_data):
+        return {}
+
+    def start_queued_render(self, tts_data, priority):
+        if self.state.topic == 'lỗi':
+            raise RuntimeError('render failed')
+        return {}
+
+    def finalize_production(self, render_data):
+        return MagicMock(success=True, video_url=f'/api/videos/{self.state.video_id}/file')
+
+
+class TestCreateVideosFromTopics(unittest.TestCase):
+    """Test một video lỗi không làm hỏng cả batch"""
+
+    def test_failed_item_is_isolated(self):
+        events = []
+        with patch.object(video_production_flow, 'VideoProductionFlow', FakeFlow), \
+                patch.object(video_production_flow, 'generate_scripts_batch', return_value=['s1', None, 's3']), \
+                patch.object(video_production_flow.VideoUtils, 'prepare_render'), \
+                patch.object(video_production_flow, '_mark_video_failed') as mark_failed:
+            result = create_videos_from_topics(['ok', 'no script', 'lỗi'], batch_id='batch_1',
+                                               progress_callback=events.append, max_parallel=2)
+
+        statuses = [item['status'] for item in result['items']]
+        self.assertEqual(statuses, ['completed', 'failed', 'failed'])
+        self.assertTrue(result['success'])
+        self.assertEqual(result['aggregate']['completed'], 1)
+        self.assertEqual(result['items'][1]['error'], 'Script generation failed')
+        self.assertEqual(result['items'][2]['error'], 'render failed')
+        mark_failed.assert_called_once()
+        self.assertEqual(events[-1]['aggregate']['progress'], 100)
+
+
+class TestStartTTSGeneration(unittest.TestCase):
+    """Test TTS của flow đi qua worker pool dùng chung với job_id không trùng"""
+
+    def _run(self, tts_service):
+        flow = MagicMock()
+        flow.state = MagicMock(script='Xin chào', video_id=7, duration=15, voice='echo')
+        with patch('src.services.tts_service.get_tts_service', return_value=tts_service), \
+                patch.object(video_production_flow.os.path, 'exists', return_value=True):
+            return video_production_flow.VideoProductionFlow.start_tts_generation(flow, {})
+
+    def _service(self):
+        service = MagicMock()
+        service.submit_speech.side_effect = lambda text, filename, job_id, **kwargs: (job_id, 0)
+        service.wait_for_completion.return_value = {
+            'status': 'completed', 'wav_path': '/audios/a.wav', 'json_path': '/audios/a.json', 'actual_duration': 3.2
+        }
+        return service
+
+    def test_submits_to_shared_pool_with_unique_job_ids(self):
+        service = self._service()
+
+        first = self._run(service)
+        second = self._run(service)
+
+        self.assertEqual(service.submit_speech.call_count, 2)
+        service.generate_speech.assert_not_called()
+        self.assertNotEqual(first['tts_job_id'], second['tts_job_id'])
+        self.assertEqual(service.submit_speech.call_args[0][1], 'video_7_audio')
+        self.assertEqual(service.submit_speech.call_args[1]['voice'], 'echo')
+        self.assertEqual(first['actual_duration'], 3.2)
+
+    def test_full_queue_is_retried(self):
+        service = self._service()
+        submitted = []
+
+        def submit(text, filename, job_id, **kwargs):
+            submitted.append(job_id)
+            if len(submitted) == 1:
+                raise QueueFullError(retry_after=0)
+            return job_id, 0
+
+        service.submit_speech.side_effect = submit
+        result = self._run(service)
+
+        self.assertEqual(len(submitted), 2)
+        self.assertEqual(result['tts_job_id'], submitted[-1])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Unit tests cho VideoUtils: preview render và chuẩn bị render song song với TTS (Remotion được mock)
+"""
+
+import unittest
+import os
+import sys
+import shutil
+import tempfile
+import threading
+from unittest.mock import MagicMock, patch
+
+# Thêm thư mục emlinh_mng vào Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from src.utils.video_utils import PreviewRender, RenderPreparation, VideoUtils
+
+
+class TestRenderPreview(unittest.TestCase):
+    """Test preview tier: scale, fps và x264 preset được truyền xuống Remotion"""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.workspace = os.path.join(self.tmp_dir, 'workspace')
+        for name, value in {
+            'WORKSPACE_ROOT': self.workspace,
+            'REMOTION_PATH': self.tmp_dir,
+            'RENDER_SERVER_ENABLED': False,
+            'RENDER_CACHE_ENABLED': False,
+            'PREVIEW_SCALE': 0.5,
+            'PREVIEW_FPS': 15,
+            'PREVIEW_X264_PRESET': 'ultrafast'
+        }.items():
+            patcher = patch(f'src.utils.video_utils.Config.{name}', value, create=True)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+        patcher = patch.object(VideoUtils, '_check_remotion_availability', return_value=True)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def test_cli_receives_preview_options(self):
+        with patch('src.utils.video_utils.run_remotion_command', return_value=(0, 'ok')) as run:
+            path = VideoUtils.render_preview('/audios/voice.wav', 12, 'Scene-Portrait', 'office', 'AI news')
+
+        self.assertTrue(os.path.basename(path).startswith('preview_'))
+        self.assertEqual(os.path.dirname(path), self.workspace)
+
+        cmd = run.call_args[0][0]
+        self.assertIn('--scale=0.5', cmd)
+        self.assertIn('--x264-preset=ultrafast', cmd)
+        props = cmd[cmd.index('--props') + 1]
+        self.assertIn('"fps": 15', props)
+        self.assertIn('"audioFileName": "voice.wav"', props)
+
+    def test_failed_preview_returns_none(self):
+        with patch('src.utils.video_utils.run_remotion_command', return_value=(1, 'boom')):
+            self.assertIsNone(VideoUtils.render_preview('/audios/voice.wav', 12))
+
+    def test_skipped_when_full_render_is_cached(self):
+        with patch('src.utils.video_utils.Config.RENDER_CACHE_ENABLED', True), \
+                patch('src.utils.video_utils.find_cached_render', return_value='/videos/cached.mp4'), \
+                patch('src.utils.video_utils.run_remotion_command') as run:
+            self.assertIsNone(VideoUtils.render_preview('/audios/voice.wav', 12))
+        run.assert_not_called()
+
+    def test_preview_render_does_not_block_full_render(self):
+        """Bản full bắt đầu khi preview đã có slot, trong lúc preview vẫn đang render"""
+        release = threading.Event()
+        finished = []
+
+        def slow_preview(*args, **kwargs):
+            release.wait(5)
+            return True
+
+        with patch.object(VideoUtils, '_render_with_remotion', side_effect=slow_preview):
+            preview = PreviewRender(on_done=finished.append, audio_file='/audios/voice.wav', duration=12).start()
+            self.assertTrue(preview.wait_submitted(5))
+            self.assertFalse(preview.is_done())
+
+            release.set()
+            self.assertTrue(preview.wait(5))
+
+        self.assertEqual(finished, [preview.preview_file])
+        self.assertTrue(os.path.basename(preview.preview_file).startswith('preview_'))
+
+
+class TestRenderPreparation(unittest.TestCase):
+    """Test chuẩn bị render chạy nền song song với TTS"""
+
+    def setUp(self):
+        self.remotion_path = tempfile.mkdtemp()
+        os.makedirs(os.path.join(self.remotion_path, 'node_modules'))
+        with open(os.path.join(self.remotion_path, 'package.json'), 'w') as f:
+            f.write('{}')
+        VideoUtils._remotion_checked_at.clear()
+
+    def tearDown(self):
+        VideoUtils._remotion_checked_at.clear()
+        shutil.rmtree(self.remotion_path, ignore_errors=True)
+
+    def _prepare(self, server):
+        service = MagicMock()
+        with patch('src.services.render_server.get_render_server', return_value=server), \
+                patch('src.services.video_service.get_video_service', return_value=service):
+            prep = RenderPreparation(self.remotion_path).start()
+            self.assertTrue(prep.wait(5))
+        service.get_compositions.assert_called_once()
+        return prep
+
+    def test_starts_render_server(self):
+        server = MagicMock()
+        server.start.return_value = True
+        with patch('src.utils.video_utils.subprocess.run') as run:
+            prep = self._prepare(server)
+
+        self.assertTrue(prep.server_ready)
+        server.start.assert_called_once_with(wait=True)
+        run.assert_not_called()
+
+    def test_without_server_checks_cli_once(self):
+        version = MagicMock(returncode=0, stdout='4.0.314', stderr='')
+        with patch('src.utils.video_utils.subprocess.run', return_value=version) as run:
+            prep = self._prepare(None)
+            self.assertTrue(prep.remotion_available)
+            # render_video dùng lại kết quả kiểm tra của bước chuẩn bị
+            self.assertTrue(VideoUtils._check_remotion_availability(self.remotion_path))
+        self.assertEqual(run.call_count, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
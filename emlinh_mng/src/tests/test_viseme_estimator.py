@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Unit tests cho Viseme Estimator
+"""
+
+import unittest
+import os
+import sys
+import json
+import wave
+import shutil
+import tempfile
+
+import numpy as np
+
+# Thêm thư mục emlinh_mng vào Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from src.utils.viseme_estimator import VisemeEstimator, read_wav_samples
+
+SAMPLE_RATE = 22050
+RHUBARB_SHAPES = set('ABCDEFGHX')
+
+
+def make_signal(*segments):
+    """Ghép các đoạn (kind, seconds, amplitude) thành một tín hiệu"""
+    rng = np.random.default_rng(0)
+    parts = []
+    for kind, seconds, amplitude in segments:
+        t = np.arange(int(seconds * SAMPLE_RATE)) / SAMPLE_RATE
+        if kind == 'silence':
+            parts.append(np.zeros_like(t))
+        elif kind == 'vowel':
+            # Nguyên âm mở: năng lượng tập trung ở dải F1
+            parts.append(amplitude * (np.sin(2 * np.pi * 220 * t) + 0.5 * np.sin(2 * np.pi * 700 * t)))
+        elif kind == 'hiss':
+            # Phụ âm xát: nhiễu trắng lọc thông cao
+            noise = rng.standard_normal(len(t))
+            parts.append(amplitude * np.diff(noise, prepend=0.0))
+    return np.concatenate(parts).astype(np.float32)
+
+
+class TestVisemeEstimator(unittest.TestCase):
+    """Test class cho VisemeEstimator"""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.estimator = VisemeEstimator()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def value_at(self, cues, seconds):
+        return next(cue['value'] for cue in cues if cue['start'] <= seconds < cue['end'])
+
+    def test_classifies_silence_vowel_and_fricative(self):
+        """Im lặng -> X, nguyên âm mạnh -> miệng mở, nhiễu cao tần -> B/G"""
+        samples = make_signal(('silence', 0.5, 0), ('vowel', 0.5, 0.4), ('hiss', 0.3, 0.3), ('silence', 0.3, 0))
+        cues = self.estimator.estimate(samples, SAMPLE_RATE)
+
+        self.assertEqual(self.value_at(cues, 0.2), 'X')
+        self.assertIn(self.value_at(cues, 0.75), {'C', 'D', 'E'})
+        self.assertIn(self.value_at(cues, 1.15), {'B', 'G'})
+        self.assertEqual(self.value_at(cues, 1.45), 'X')
+
+    def test_cues_are_contiguous_and_respect_min_duration(self):
+        """Cue liền mạch từ 0 tới hết audio, không có cue ngắn hơn min_cue_duration"""
+        samples = make_signal(('vowel', 0.3, 0.4), ('silence', 0.03, 0), ('vowel', 0.4, 0.4), ('hiss', 0.2, 0.3))
+        cues = self.estimator.estimate(samples, SAMPLE_RATE)
+
+        self.assertEqual(cues[0]['start'], 0.0)
+        self.assertAlmostEqual(cues[-1]['end'], len(samples) / SAMPLE_RATE, places=2)
+        for previous, current in zip(cues, cues[1:]):
+            self.assertEqual(previous['end'], current['start'])
+            self.assertNotEqual(previous['value'], current['value'])
+        for cue in cues[1:-1]:
+            self.assertGreaterEqual(round(cue['end'] - cue['start'], 2), self.estimator.min_cue_duration)
+        self.assertTrue({cue['value'] for cue in cues} <= RHUBARB_SHAPES)
+
+    def test_write_json_matches_rhubarb_schema(self):
+        """File JSON có metadata và mouthCues như output của Rhubarb"""
+        samples = make_signal(('silence', 0.2, 0), ('vowel', 0.6, 0.4))
+        wav_path = os.path.join(self.tmp_dir, 'speech.wav')
+        json_path = os.path.join(self.tmp_dir, 'speech.json')
+
+        # WAV stereo 16-bit giống output của AudioTranscoder
+        pcm = (np.repeat(samples[:, None], 2, axis=1) * 32767).astype('<i2')
+        with wave.open(wav_path, 'wb') as wav_file:
+            wav_file.setnchannels(2)
+            wav_file.setsampwidth(2)
+            wav_file.setframerate(SAMPLE_RATE)
+            wav_file.writeframes(pcm.tobytes())
+
+        mono, sample_rate = read_wav_samples(wav_path)
+        self.assertEqual(sample_rate, SAMPLE_RATE)
+        self.assertEqual(len(mono), len(samples))
+
+        duration = self.estimator.write_json(wav_path, json_path)
+        with open(json_path) as f:
+            data = json.load(f)
+
+        self.assertAlmostEqual(duration, 0.8, places=2)
+        self.assertEqual(data['metadata'], {'soundFile': 'speech.wav', 'duration': 0.8})
+        self.assertEqual(data['mouthCues'][0]['value'], 'X')
+        self.assertEqual(set(data['mouthCues'][0]), {'start', 'end', 'value'})
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
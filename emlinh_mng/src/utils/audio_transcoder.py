@@ -0,0 +1,175 @@
+"""
+Audio Transcoder - Chuyển đổi audio TTS sang WAV và OGG bằng một tiến trình ffmpeg duy nhất
+"""
+
+import os
+import re
+import wave
+import shutil
+import subprocess
+import threading
+from typing import Optional, List
+
+
+# ffmpeg in tiến độ dạng "time=00:01:02.34" trên stderr
+_FFMPEG_TIME_RE = re.compile(r'time=\s*(\d+):(\d{2}):(\d{2}(?:\.\d+)?)')
+
+
+def find_ffmpeg() -> Optional[str]:
+    """Tìm ffmpeg executable phù hợp với hệ điều hành"""
+    if os.name == 'nt':
+        candidates = ['ffmpeg.exe', 'ffmpeg']
+    else:
+        candidates = ['ffmpeg']
+
+    for candidate in candidates:
+        path = shutil.which(candidate)
+        if path:
+            return path
+    return None
+
+
+def parse_ffmpeg_time(stderr_text: str) -> Optional[float]:
+    """Lấy giá trị time= lớn nhất trong log ffmpeg (giây)"""
+    durations = [
+        int(h) * 3600 + int(m) * 60 + float(s)
+        for h, m, s in _FFMPEG_TIME_RE.findall(stderr_text)
+    ]
+    return max(durations) if durations else None
+
+
+def get_wav_duration(wav_path: str) -> Optional[float]:
+    """Đọc duration từ header WAV (không cần spawn ffprobe)"""
+    try:
+        with wave.open(wav_path, 'rb') as wav_file:
+            frame_rate = wav_file.getframerate()
+            if frame_rate <= 0:
+                return None
+            return wav_file.getnframes() / float(frame_rate)
+    except (wave.Error, EOFError, OSError):
+        return None
+
+
+class AudioTranscoder:
+    """
+    Một tiến trình ffmpeg đọc audio từ stdin và ghi WAV (+ OGG) cùng lúc
+
+    Cách dùng:
+        transcoder = AudioTranscoder(wav_path, ogg_path)
+        transcoder.start()
+        transcoder.write(chunk)   # có thể gọi nhiều lần
+        duration = transcoder.finish()
+    """
+
+    def __init__(self, wav_path: str, ogg_path: Optional[str] = None, input_format: str = 'mp3'):
+        self.wav_path = wav_path
+        self.ogg_path = ogg_path
+        self.input_format = input_format
+        self.bytes_written = 0
+
+        self._process = None
+        self._stderr_chunks: List[str] = []
+        self._stderr_thread = None
+
+    def _build_command(self, ffmpeg_cmd: str) -> List[str]:
+        cmd = [
+            ffmpeg_cmd, '-hide_banner',
+            '-f', self.input_format,
+            '-i', 'pipe:0',
+            # Output 1: WAV cho Remotion
+            '-map', '0:a',
+            '-acodec', 'pcm_s16le',
+            '-ar', '44100',
+            '-ac', '2',
+            '-y', self.wav_path
+        ]
+        if self.ogg_path:
+            # Output 2: OGG cho Rhubarb
+            cmd += [
+                '-map', '0:a',
+                '-c:a', 'libvorbis',
+                '-q:a', '4',  # Quality level
+                '-y', self.ogg_path
+            ]
+        return cmd
+
+    def start(self):
+        """Khởi động tiến trình ffmpeg"""
+        ffmpeg_cmd = find_ffmpeg()
+        if not ffmpeg_cmd:
+            raise Exception("FFmpeg not found. Please install FFmpeg: https://ffmpeg.org/download.html")
+
+        self._process = subprocess.Popen(
+            self._build_command(ffmpeg_cmd),
+            stdin=subprocess.PIPE,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.PIPE
+        )
+
+        # Đọc stderr liên tục để ffmpeg không bị block khi pipe đầy
+        self._stderr_thread = threading.Thread(target=self._drain_stderr, daemon=True)
+        self._stderr_thread.start()
+
+    def _drain_stderr(self):
+        for raw in iter(lambda: self._process.stderr.read(4096), b''):
+            self._stderr_chunks.append(raw.decode('utf-8', errors='replace'))
+
+    def write(self, chunk: bytes):
+        """Đẩy một đoạn audio vào stdin của ffmpeg"""
+        if not chunk:
+            return
+        try:
+            self._process.stdin.write(chunk)
+        except BrokenPipeError:
+            # ffmpeg đã thoát sớm, lỗi chi tiết sẽ được báo trong finish()
+            return
+        self.bytes_written += len(chunk)
+
+    def finish(self, timeout: int = 120) -> float:
+        """
+        Đóng stdin, chờ ffmpeg kết thúc và trả về duration của audio
+
+        Returns:
+            float: Thời lượng audio (giây)
+        """
+        try:
+            self._process.stdin.close()
+        except BrokenPipeError:
+            pass
+
+        try:
+            self._process.wait(timeout=timeout)
+        except subprocess.TimeoutExpired:
+            self._process.kill()
+            self._process.wait()
+            raise Exception(f"FFmpeg transcode timeout after {timeout} seconds")
+        finally:
+            self._stderr_thread.join(timeout=5)
+
+        stderr_text = ''.join(self._stderr_chunks)
+        if self._process.returncode != 0:
+            raise Exception(f"FFmpeg transcode failed: {stderr_text[-1000:]}")
+
+        duration = get_wav_duration(self.wav_path) or parse_ffmpeg_time(stderr_text)
+        if not duration:
+            raise Exception("FFmpeg transcode produced no audio")
+        return duration
+
+    def abort(self):
+        """Dừng ffmpeg khi quá trình tải audio bị lỗi"""
+        if self._process and self._process.poll() is None:
+            self._process.kill()
+            self._process.wait()
+
+    @classmethod
+    def transcode(cls, audio_data: bytes, wav_path: str, ogg_path: Optional[str] = None,
+                  input_format: str = 'mp3') -> float:
+        """Transcode toàn bộ audio trong bộ nhớ, trả về duration"""
+        transcoder = cls(wav_path, ogg_path, input_format)
+        transcoder.start()
+        try:
+            transcoder.write(audio_data)
+        except Exception:
+            transcoder.abort()
+            raise
+        return transcoder.finish()
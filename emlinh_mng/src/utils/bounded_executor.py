@@ -0,0 +1,118 @@
+"""
+Bounded Executor - Thread pool giới hạn số job chạy đồng thời và độ dài hàng đợi
+"""
+
+import math
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+
+class QueueFullError(Exception):
+    """Hàng đợi đã đầy, client nên thử lại sau retry_after giây"""
+
+    def __init__(self, retry_after: int, message: str = "Queue is full"):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class BoundedExecutor:
+    """
+    Tối đa max_workers job chạy cùng lúc, tối đa queue_size job chờ
+
+    on_queue_change(positions) được gọi mỗi khi thứ tự hàng đợi thay đổi,
+    với positions là dict {key: vị trí (bắt đầu từ 1)} của các job đang chờ.
+    """
+
+    def __init__(
+        self,
+        max_workers: int,
+        queue_size: int,
+        name: str = 'worker',
+        on_queue_change: Optional[Callable[[Dict[str, int]], None]] = None,
+        default_job_seconds: float = 10.0
+    ):
+        self.max_workers = max(1, max_workers)
+        self.queue_size = max(0, queue_size)
+        self.on_queue_change = on_queue_change
+
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix=name)
+        self._lock = threading.Lock()
+        self._waiting = deque()
+        self._running = 0
+        # Thời gian chạy trung bình (EMA) để ước lượng Retry-After
+        self._avg_job_seconds = default_job_seconds
+
+    def submit(self, key: str, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> int:
+        """
+        Đưa job vào hàng đợi
+
+        Returns:
+            int: Vị trí trong hàng đợi (bắt đầu từ 1)
+
+        Raises:
+            QueueFullError: Khi đã có max_workers + queue_size job
+        """
+        with self._lock:
+            if self._running + len(self._waiting) >= self.max_workers + self.queue_size:
+                raise QueueFullError(self._estimate_retry_after())
+            self._waiting.append(key)
+            position = len(self._waiting)
+
+        self._executor.submit(self._run, key, fn, args, kwargs)
+        return position
+
+    def _run(self, key: str, fn: Callable[..., Any], args: tuple, kwargs: dict):
+        with self._lock:
+            self._waiting.remove(key)
+            self._running += 1
+            positions = self._positions()
+        self._notify(positions)
+
+        started = time.time()
+        try:
+            fn(*args, **kwargs)
+        except Exception as e:
+            print(f"❌ Job {key} failed: {e}")
+        finally:
+            elapsed = time.time() - started
+            with self._lock:
+                self._running -= 1
+                self._avg_job_seconds = 0.8 * self._avg_job_seconds + 0.2 * elapsed
+
+    def _positions(self) -> Dict[str, int]:
+        return {key: index + 1 for index, key in enumerate(self._waiting)}
+
+    def _notify(self, positions: Dict[str, int]):
+        if not self.on_queue_change:
+            return
+        try:
+            self.on_queue_change(positions)
+        except Exception as e:
+            print(f"⚠️ Could not publish queue positions: {e}")
+
+    def _estimate_retry_after(self) -> int:
+        # Số "lượt" cần chạy trước khi có chỗ trống trong hàng đợi
+        rounds = (len(self._waiting) + 1) / self.max_workers
+        return max(1, math.ceil(self._avg_job_seconds * rounds))
+
+    def queue_position(self, key: str) -> Optional[int]:
+        """Vị trí hiện tại của job trong hàng đợi, None nếu job không còn chờ"""
+        with self._lock:
+            return self._positions().get(key)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Thống kê pool: số job đang chạy, đang chờ và giới hạn"""
+        with self._lock:
+            return {
+                'running': self._running,
+                'queued': len(self._waiting),
+                'max_workers': self.max_workers,
+                'queue_size': self.queue_size,
+                'avg_job_seconds': round(self._avg_job_seconds, 2)
+            }
+
+    def shutdown(self, wait: bool = True):
+        self._executor.shutdown(wait=wait)
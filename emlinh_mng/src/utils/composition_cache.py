@@ -0,0 +1,200 @@
+"""
+Composition Cache - Metadata composition Remotion (id, kích thước, fps, thời lượng mặc định)
+
+Metadata chỉ đổi khi code trong emlinh-remotion/src đổi, nên được tính một lần rồi lưu
+vào file JSON kèm hash của thư mục src. Các lần gọi sau đọc từ bộ nhớ; hash chỉ được
+tính lại sau mỗi check_interval giây để phát hiện code mới.
+"""
+
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, List, Optional
+
+
+# Dòng bảng của `npx remotion compositions`, vd: "Scene-Landscape  30  1920x1080  300 (10.00 sec)"
+_COMPOSITION_LINE_RE = re.compile(
+    r'^(?P<id>[A-Za-z0-9_-]+)\s+(?P<fps>\d+(?:\.\d+)?)\s+(?P<width>\d+)\s*x\s*(?P<height>\d+)\s+(?P<frames>\d+)'
+)
+
+DEFAULT_COMPOSITIONS = [
+    {'id': 'Scene-Landscape', 'width': 1920, 'height': 1080, 'fps': 30, 'durationInFrames': 300},
+    {'id': 'Scene-Portrait', 'width': 1080, 'height': 1920, 'fps': 30, 'durationInFrames': 300}
+]
+
+
+def hash_directory(path: str) -> Optional[str]:
+    """SHA-256 của đường dẫn tương đối và nội dung mọi file trong thư mục, None nếu không tồn tại"""
+    if not os.path.isdir(path):
+        return None
+
+    digest = hashlib.sha256()
+    for root, dirs, files in os.walk(path):
+        dirs[:] = sorted(d for d in dirs if not d.startswith('.') and d != 'node_modules')
+        for name in sorted(files):
+            file_path = os.path.join(root, name)
+            digest.update(os.path.relpath(file_path, path).replace(os.sep, '/').encode('utf-8'))
+            digest.update(b'\0')
+            with open(file_path, 'rb') as f:
+                for block in iter(lambda: f.read(65536), b''):
+                    digest.update(block)
+            digest.update(b'\0')
+    return digest.hexdigest()
+
+
+def describe_composition(composition: Dict[str, Any]) -> Dict[str, Any]:
+    """Chuẩn hóa metadata và thêm durationInSeconds, description cho UI"""
+    fps = float(composition.get('fps') or 30)
+    frames = int(composition.get('durationInFrames') or 0)
+    width, height = int(composition.get('width') or 0), int(composition.get('height') or 0)
+    orientation = 'Landscape' if width >= height else 'Portrait'
+    return {
+        'id': composition['id'],
+        'width': width,
+        'height': height,
+        'fps': int(fps) if fps.is_integer() else fps,
+        'durationInFrames': frames,
+        'durationInSeconds': round(frames / fps, 2) if fps else 0,
+        'description': f"{orientation} {width}x{height}, {int(fps) if fps.is_integer() else fps}fps"
+    }
+
+
+def parse_compositions_output(output: str) -> List[Dict[str, Any]]:
+    """Parse bảng composition in bởi `npx remotion compositions`"""
+    compositions = []
+    for line in output.splitlines():
+        match = _COMPOSITION_LINE_RE.match(line.strip())
+        if not match:
+            continue
+        compositions.append(describe_composition({
+            'id': match.group('id'),
+            'fps': float(match.group('fps')),
+            'width': int(match.group('width')),
+            'height': int(match.group('height')),
+            'durationInFrames': int(match.group('frames'))
+        }))
+    return compositions
+
+
+class CompositionCache:
+    """
+    Cache metadata composition theo hash của thư mục src
+
+    loader() trả về list metadata (dict có id, width, height, fps, durationInFrames)
+    và chỉ được gọi khi chưa có cache hoặc hash đã thay đổi. Loader lỗi thì trả về
+    DEFAULT_COMPOSITIONS và thử lại sau check_interval giây.
+    """
+
+    def __init__(
+        self,
+        src_dir: str,
+        cache_file: str,
+        loader: Callable[[], List[Dict[str, Any]]],
+        check_interval: float = 10.0,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        self.src_dir = src_dir
+        self.cache_file = cache_file
+        self.loader = loader
+        self.check_interval = check_interval
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._compositions: Optional[List[Dict[str, Any]]] = None
+        self._source_hash: Optional[str] = None
+        self._checked_at: Optional[float] = None
+        # source_hash -> Future của lần load đang chạy
+        self._loading: Dict[Optional[str], Future] = {}
+
+    def get(self) -> List[Dict[str, Any]]:
+        """
+        Lấy metadata composition (bộ nhớ -> file cache -> loader)
+
+        Loader chạy ngoài lock: mỗi hash chỉ có một lần load, các caller khác chờ
+        kết quả của lần load đó thay vì bị chặn trên lock của cache.
+        """
+        with self._lock:
+            now = self._clock()
+            if self._compositions is not None and now - self._checked_at < self.check_interval:
+                return self._copy()
+
+            source_hash = hash_directory(self.src_dir)
+            if self._compositions is not None and source_hash == self._source_hash:
+                self._checked_at = now
+                return self._copy()
+
+            cached = self._read_file()
+            if cached is not None and cached.get('source_hash') == source_hash:
+                self._set(cached['compositions'], source_hash)
+                self._checked_at = now
+                return self._copy()
+
+            future = self._loading.get(source_hash)
+            is_loader = future is None
+            if is_loader:
+                future = self._loading[source_hash] = Future()
+
+        if not is_loader:
+            return [dict(c) for c in future.result()]
+
+        stored_hash = source_hash
+        try:
+            try:
+                compositions = [describe_composition(c) for c in self.loader()]
+            except Exception as e:
+                # Dùng mặc định đến lần kiểm tra sau, không ghi ra file để lần sau thử lại
+                print(f"⚠️ Could not load compositions, using defaults: {e}")
+                compositions = [describe_composition(c) for c in DEFAULT_COMPOSITIONS]
+                stored_hash = None
+
+            if stored_hash is not None:
+                self._write_file(compositions, stored_hash)
+            with self._lock:
+                self._set(compositions, stored_hash)
+                self._checked_at = now
+                self._loading.pop(source_hash, None)
+            future.set_result(compositions)
+        except BaseException as e:
+            with self._lock:
+                self._loading.pop(source_hash, None)
+            future.set_exception(e)
+            raise
+        return [dict(c) for c in compositions]
+
+    def invalidate(self):
+        """Xóa cache trong bộ nhớ và trên đĩa"""
+        with self._lock:
+            self._compositions = None
+            self._source_hash = None
+            try:
+                os.remove(self.cache_file)
+            except OSError:
+                pass
+
+    def _set(self, compositions: List[Dict[str, Any]], source_hash: Optional[str]):
+        self._compositions = compositions
+        self._source_hash = source_hash
+
+    def _copy(self) -> List[Dict[str, Any]]:
+        return [dict(c) for c in self._compositions]
+
+    def _read_file(self) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self.cache_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            return data if isinstance(data.get('compositions'), list) else None
+        except (OSError, ValueError, AttributeError):
+            return None
+
+    def _write_file(self, compositions: List[Dict[str, Any]], source_hash: str):
+        try:
+            os.makedirs(os.path.dirname(self.cache_file) or '.', exist_ok=True)
+            tmp_path = f"{self.cache_file}.{os.getpid()}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({'source_hash': source_hash, 'compositions': compositions}, f, indent=2)
+            os.replace(tmp_path, self.cache_file)
+        except OSError as e:
+            print(f"⚠️ Could not write composition cache: {e}")
@@ -0,0 +1,229 @@
+"""
+Embedding Cache - Cache embedding theo (model, hash của text đã chuẩn hóa)
+
+Hai tầng:
+    - Bộ nhớ: LRU (OrderedDict) giới hạn số entry
+    - Đĩa (tùy chọn): file SQLite, vector lưu dạng float32 blob, dùng chung giữa
+      các process và còn lại sau khi restart
+
+Ghi đĩa được gom lại: last_used_at của các lần hit được cập nhật theo lô và tầng đĩa
+chỉ bị cắt khi ước lượng số entry vượt giới hạn hoặc sau mỗi PRUNE_EVERY lần put.
+
+Câu chào, câu trả lời fallback lặp lại liên tục nên chỉ tốn một lần gọi Ollama.
+"""
+
+import os
+import re
+import time
+import logging
+import sqlite3
+import hashlib
+import threading
+import unicodedata
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+from .embedding_codec import decode_embedding, encode_embedding
+
+
+logger = logging.getLogger(__name__)
+
+_WHITESPACE = re.compile(r'\s+')
+
+
+class EmbeddingCache:
+    """
+    Cache embedding hai tầng (LRU trong bộ nhớ + SQLite trên đĩa)
+
+    Entry đọc được từ đĩa được đưa lên tầng bộ nhớ. Tầng đĩa bị cắt theo
+    thời điểm dùng gần nhất khi vượt quá max_disk_entries (cho phép vượt tạm thời
+    tối đa 10% để không phải COUNT + DELETE ở mỗi lần put).
+    """
+
+    # Số lần put tối đa giữa hai lần kiểm tra kích thước (process khác cũng ghi vào file)
+    PRUNE_EVERY = 256
+    # Gom cập nhật last_used_at: ghi khi đủ TOUCH_BATCH_SIZE key hoặc sau TOUCH_FLUSH_INTERVAL giây
+    TOUCH_BATCH_SIZE = 64
+    TOUCH_FLUSH_INTERVAL = 5.0
+
+    def __init__(self, max_entries: int = 2048, disk_path: Optional[str] = None, max_disk_entries: int = 100000):
+        self.max_entries = max_entries
+        self.disk_path = disk_path
+        self.max_disk_entries = max_disk_entries
+
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: 'OrderedDict[str, List[float]]' = OrderedDict()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._pending_touches: Dict[str, float] = {}
+        self._touches_flushed_at = time.monotonic()
+        self._disk_estimate = 0
+        self._puts_since_prune = 0
+
+        if disk_path:
+            os.makedirs(os.path.dirname(os.path.abspath(disk_path)), exist_ok=True)
+            conn = self._connection()
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS embedding_cache ("
+                " key TEXT PRIMARY KEY,"
+                " model TEXT NOT NULL,"
+                " vector BLOB NOT NULL,"
+                " last_used_at REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_embedding_cache_used ON embedding_cache(last_used_at)")
+            conn.commit()
+            self._disk_estimate = self._disk_count()
+
+    @staticmethod
+    def normalize_text(text: str) -> str:
+        """Chuẩn hóa Unicode (NFC) và khoảng trắng; giữ nguyên hoa/thường vì model phân biệt"""
+        return _WHITESPACE.sub(' ', unicodedata.normalize('NFC', text or '')).strip()
+
+    @classmethod
+    def make_key(cls, model: str, text: str) -> str:
+        """SHA-256 của model và text đã chuẩn hóa"""
+        raw = f"{model}\n{cls.normalize_text(text)}"
+        return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.disk_path, timeout=10)
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, model: str, text: str) -> Optional[List[float]]:
+        """Lấy embedding từ cache (bộ nhớ trước, rồi tới đĩa) hoặc None nếu miss"""
+        key = self.make_key(model, text)
+
+        with self._lock:
+            embedding = self._entries.get(key)
+            if embedding is not None:
+                self._entries.move_to_end(key)
+                self.memory_hits += 1
+                return list(embedding)
+
+        embedding = self._disk_get(key)
+        with self._lock:
+            if embedding is None:
+                self.misses += 1
+                return None
+            self.disk_hits += 1
+        self._memory_put(key, embedding)
+        return list(embedding)
+
+    def put(self, model: str, text: str, embedding: List[float]):
+        """Lưu embedding vào cả hai tầng"""
+        key = self.make_key(model, text)
+        embedding = [float(v) for v in embedding]
+        self._memory_put(key, embedding)
+        self._disk_put(key, model, embedding)
+
+    def _memory_put(self, key: str, embedding: List[float]):
+        with self._lock:
+            self._entries[key] = embedding
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def _disk_get(self, key: str) -> Optional[List[float]]:
+        if not self.disk_path:
+            return None
+        try:
+            conn = self._connection()
+            row = conn.execute("SELECT vector FROM embedding_cache WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            with self._lock:
+                self._pending_touches[key] = time.time()
+            self._flush_touches(conn)
+            return decode_embedding(row[0]).tolist()
+        except sqlite3.Error as e:
+            logger.warning(f"Embedding cache read error: {e}")
+            return None
+
+    def _flush_touches(self, conn: sqlite3.Connection, force: bool = False):
+        """Ghi các last_used_at đang chờ trong một transaction"""
+        with self._lock:
+            due = len(self._pending_touches) >= self.TOUCH_BATCH_SIZE or \
+                time.monotonic() - self._touches_flushed_at >= self.TOUCH_FLUSH_INTERVAL
+            if not self._pending_touches or not (force or due):
+                return
+            touches = [(used_at, key) for key, used_at in self._pending_touches.items()]
+            self._pending_touches.clear()
+            self._touches_flushed_at = time.monotonic()
+        with conn:
+            conn.executemany("UPDATE embedding_cache SET last_used_at = ? WHERE key = ?", touches)
+
+    def _disk_put(self, key: str, model: str, embedding: List[float]):
+        if not self.disk_path:
+            return
+        try:
+            conn = self._connection()
+            with conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO embedding_cache (key, model, vector, last_used_at) VALUES (?, ?, ?, ?)",
+                    (key, model, encode_embedding(embedding), time.time())
+                )
+            with self._lock:
+                self._pending_touches.pop(key, None)
+                self._disk_estimate += 1
+                self._puts_since_prune += 1
+                slack = self.max_disk_entries // 10
+                due = self._disk_estimate > self.max_disk_entries + slack or \
+                    self._puts_since_prune >= self.PRUNE_EVERY
+                if due:
+                    self._puts_since_prune = 0
+            if due:
+                self._prune(conn)
+        except sqlite3.Error as e:
+            logger.warning(f"Could not store embedding cache entry {key[:12]}: {e}")
+
+    def _prune(self, conn: sqlite3.Connection):
+        """Xóa các entry lâu không dùng nhất cho tới khi còn max_disk_entries"""
+        # Ghi last_used_at đang chờ trước để không xóa nhầm entry vừa được dùng
+        self._flush_touches(conn, force=True)
+        count = conn.execute("SELECT COUNT(*) FROM embedding_cache").fetchone()[0]
+        excess = count - self.max_disk_entries
+        if excess > 0:
+            with conn:
+                conn.execute(
+                    "DELETE FROM embedding_cache WHERE key IN ("
+                    " SELECT key FROM embedding_cache ORDER BY last_used_at ASC LIMIT ?)",
+                    (excess,)
+                )
+        with self._lock:
+            self._disk_estimate = min(count, self.max_disk_entries)
+
+    def _disk_count(self) -> int:
+        if not self.disk_path:
+            return 0
+        try:
+            return self._connection().execute("SELECT COUNT(*) FROM embedding_cache").fetchone()[0]
+        except sqlite3.Error:
+            return 0
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Thống kê cache: hit/miss từng tầng, hit rate, số entry"""
+        disk_entries = self._disk_count()
+        with self._lock:
+            hits = self.memory_hits + self.disk_hits
+            lookups = hits + self.misses
+            return {
+                'hits': hits,
+                'memory_hits': self.memory_hits,
+                'disk_hits': self.disk_hits,
+                'misses': self.misses,
+                'hit_rate': round(hits / lookups, 4) if lookups else 0.0,
+                'evictions': self.evictions,
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'disk_enabled': bool(self.disk_path),
+                'disk_entries': disk_entries,
+            }
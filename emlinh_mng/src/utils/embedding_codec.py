@@ -0,0 +1,73 @@
+"""
+Embedding Codec - Lưu embedding dạng blob nhị phân (float32/float16) thay cho list JSON
+
+Một embedding 768 chiều (nomic-embed-text) chiếm khoảng 15 KB dạng JSON, chỉ còn
+3 KB khi lưu float32 và 1.5 KB khi lưu float16. Khi đọc, np.frombuffer trả về view
+trên chính bytes của blob (không parse, không copy).
+"""
+
+from typing import Optional, Sequence
+
+import numpy as np
+
+
+# Little-endian cố định để blob đọc được trên mọi máy
+EMBEDDING_DTYPES = {
+    'float32': np.dtype('<f4'),
+    'float16': np.dtype('<f2'),
+}
+DEFAULT_EMBEDDING_DTYPE = 'float32'
+
+
+def _resolve_dtype(dtype: Optional[str]) -> np.dtype:
+    try:
+        return EMBEDDING_DTYPES[dtype or DEFAULT_EMBEDDING_DTYPE]
+    except KeyError:
+        raise ValueError(f"Unsupported embedding dtype: {dtype} (expected one of {', '.join(EMBEDDING_DTYPES)})")
+
+
+def encode_embedding(values: Sequence[float], dtype: Optional[str] = None) -> bytes:
+    """Chuyển embedding thành bytes (float32 mặc định hoặc float16)"""
+    return np.asarray(values, dtype=_resolve_dtype(dtype)).ravel().tobytes()
+
+
+def decode_embedding(blob: bytes, dtype: Optional[str] = None) -> np.ndarray:
+    """Đọc blob thành mảng NumPy read-only (zero-copy)"""
+    return np.frombuffer(blob, dtype=_resolve_dtype(dtype))
+
+
+def migrate_json_embeddings(batch_size: int = 500, dtype: Optional[str] = None) -> int:
+    """
+    Chuyển các dòng vectors còn lưu embedding dạng JSON sang blob
+
+    Chạy trong app context; commit theo từng batch nên có thể dừng và chạy lại.
+    Cột JSON được set NULL sau khi chuyển để giải phóng dung lượng.
+
+    Returns:
+        int: Số dòng đã chuyển
+    """
+    from sqlalchemy import null
+    from ..app.extensions import db
+    from ..app.models import Vector
+
+    dtype = dtype or DEFAULT_EMBEDDING_DTYPE
+    _resolve_dtype(dtype)
+
+    migrated = 0
+    last_id = 0
+    while True:
+        rows = Vector.query.filter(Vector.id > last_id, Vector.embedding_blob.is_(None))\
+                           .order_by(Vector.id)\
+                           .limit(batch_size)\
+                           .all()
+        if not rows:
+            break
+        for vector in rows:
+            last_id = vector.id
+            if vector.embedding:
+                vector.set_embedding(vector.embedding, dtype)
+                vector.embedding = null()
+                migrated += 1
+        db.session.commit()
+        print(f"🔄 Migrated {migrated} embeddings to {dtype} blobs (up to vector {last_id})")
+    return migrated
@@ -0,0 +1,69 @@
+"""
+Job Events - Báo hiệu khi job kết thúc để caller chờ bằng event thay vì sleep polling
+"""
+
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, Optional
+
+
+class JobCompletionEvents:
+    """
+    Một threading.Event cho mỗi job đang chạy trong process hiện tại
+
+    Event chỉ là tín hiệu đánh thức sớm: job có thể được chạy (và notify) bởi
+    process hoặc instance khác không dùng chung object này, nên wait() luôn đọc
+    lại status đã lưu sau tối đa poll_interval giây, kể cả khi đã có event.
+    """
+
+    def __init__(self, terminal_statuses: Iterable[str] = ('completed', 'failed'), poll_interval: float = 0.5):
+        self.terminal_statuses = tuple(terminal_statuses)
+        self.poll_interval = poll_interval
+        self._events: Dict[str, threading.Event] = {}
+        self._lock = threading.Lock()
+
+    def register(self, job_id: str) -> threading.Event:
+        """Đăng ký event cho job sắp chạy trong process này"""
+        with self._lock:
+            return self._events.setdefault(job_id, threading.Event())
+
+    def notify(self, job_id: str):
+        """Đánh thức mọi caller đang chờ job (gọi sau khi đã lưu trạng thái cuối)"""
+        with self._lock:
+            event = self._events.pop(job_id, None)
+        if event:
+            event.set()
+
+    def wait(
+        self,
+        job_id: str,
+        get_status: Callable[[str], Optional[Dict[str, Any]]],
+        timeout: Optional[float] = None
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Chờ job kết thúc hoặc hết timeout
+
+        Returns:
+            Optional[Dict[str, Any]]: Status cuối cùng đọc được (có thể chưa kết thúc
+            nếu timeout), None nếu job không tồn tại
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._lock:
+            event = self._events.get(job_id)
+
+        while True:
+            status = get_status(job_id)
+            if status is None or status.get('status') in self.terminal_statuses:
+                return status
+
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if remaining is not None and remaining <= 0:
+                return status
+
+            wait_for = self.poll_interval if remaining is None else min(self.poll_interval, remaining)
+            if event is not None:
+                if event.wait(wait_for):
+                    # Event chỉ bắn một lần, các vòng sau quay về đọc status
+                    event = None
+            else:
+                time.sleep(wait_for)
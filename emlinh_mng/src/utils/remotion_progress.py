@@ -0,0 +1,175 @@
+"""
+Remotion Progress - Đọc stdout của `remotion render` theo từng dòng và parse tiến độ thật
+
+Remotion in các dòng dạng "Rendered 120/450" / "Encoded 96/450" (hoặc
+"Rendering frames ... 120/450" khi chạy trong terminal). Runner đọc stdout liên
+tục nên pipe không bao giờ bị đầy, đồng thời gọi callback với số frame, fps và ETA.
+"""
+
+import re
+import subprocess
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+
+
+_PROGRESS_RE = re.compile(
+    r'\b(Rendered|Rendering frames|Encoded|Encoding(?: video)?)\b\D*?(\d+)\s*/\s*(\d+)',
+    re.IGNORECASE
+)
+
+# Tỉ trọng của từng giai đoạn trong progress tổng (0-100)
+RENDER_WEIGHT = 0.8
+ENCODE_WEIGHT = 0.2
+
+
+class RemotionProgressParser:
+    """Giữ trạng thái tiến độ render và cập nhật theo từng dòng log"""
+
+    def __init__(self, clock: Callable[[], float] = time.monotonic):
+        self._clock = clock
+        self._render_started_at: Optional[float] = None
+        self.frames_rendered = 0
+        self.frames_encoded = 0
+        self.total_frames = 0
+        self.stage = 'starting'
+
+    def feed(self, line: str) -> Optional[Dict[str, Any]]:
+        """
+        Parse một dòng log
+
+        Returns:
+            Optional[Dict[str, Any]]: Snapshot tiến độ nếu dòng chứa thông tin frame
+        """
+        match = _PROGRESS_RE.search(line)
+        if not match:
+            return None
+
+        label, done, total = match.group(1).lower(), int(match.group(2)), int(match.group(3))
+        if label.startswith('render'):
+            return self.update(total, frames_rendered=done)
+        return self.update(total, frames_encoded=done)
+
+    def update(
+        self,
+        total_frames: int,
+        frames_rendered: Optional[int] = None,
+        frames_encoded: Optional[int] = None
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Cập nhật số frame trực tiếp (dùng cho render server báo tiến độ dạng JSON)
+
+        Returns:
+            Optional[Dict[str, Any]]: Snapshot tiến độ, None nếu total_frames không hợp lệ
+        """
+        if total_frames <= 0:
+            return None
+
+        self.total_frames = total_frames
+        if frames_rendered is not None:
+            if self._render_started_at is None:
+                self._render_started_at = self._clock()
+            self.frames_rendered = max(self.frames_rendered, frames_rendered)
+            self.stage = 'rendering'
+        if frames_encoded is not None:
+            self.frames_encoded = max(self.frames_encoded, frames_encoded)
+            # Render server báo cả hai số cùng lúc: chỉ coi là encoding khi đã render xong
+            if frames_rendered is None or self.frames_rendered >= self.total_frames:
+                self.stage = 'encoding'
+
+        return self.snapshot()
+
+    @property
+    def fps(self) -> Optional[float]:
+        """Tốc độ render trung bình từ frame đầu tiên (frame/giây)"""
+        if self._render_started_at is None or self.frames_rendered == 0:
+            return None
+        elapsed = self._clock() - self._render_started_at
+        if elapsed <= 0:
+            return None
+        return self.frames_rendered / elapsed
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Trạng thái hiện tại: frame, fps, ETA và progress tổng"""
+        fps = self.fps
+        eta_seconds = None
+        if fps and self.total_frames:
+            eta_seconds = max(self.total_frames - self.frames_rendered, 0) / fps
+
+        progress = 0
+        if self.total_frames:
+            progress = int(100 * (
+                RENDER_WEIGHT * self.frames_rendered + ENCODE_WEIGHT * self.frames_encoded
+            ) / self.total_frames)
+
+        return {
+            'stage': self.stage,
+            'frames_rendered': self.frames_rendered,
+            'frames_encoded': self.frames_encoded,
+            'total_frames': self.total_frames,
+            'fps': round(fps, 2) if fps else None,
+            'eta_seconds': round(eta_seconds, 1) if eta_seconds is not None else None,
+            'progress': min(progress, 100)
+        }
+
+
+def run_remotion_command(
+    cmd: Union[List[str], str],
+    cwd: str,
+    on_progress: Optional[Callable[[Dict[str, Any]], None]] = None,
+    timeout: Optional[float] = None,
+    shell: bool = False,
+    tail_lines: int = 50
+) -> Tuple[int, str]:
+    """
+    Chạy lệnh Remotion, đọc stdout/stderr liên tục và báo tiến độ
+
+    Returns:
+        Tuple[int, str]: (returncode, các dòng log cuối cùng)
+
+    Raises:
+        subprocess.TimeoutExpired: Khi render chạy quá timeout (process đã bị kill)
+    """
+    process = subprocess.Popen(
+        cmd,
+        cwd=cwd,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,  # Gộp stderr để chỉ cần một thread đọc
+        text=True,
+        encoding='utf-8',
+        errors='replace',
+        shell=shell
+    )
+
+    parser = RemotionProgressParser()
+    tail = deque(maxlen=tail_lines)
+
+    def drain():
+        # text mode chuyển cả '\r' (progress bar của terminal) thành '\n'
+        for line in iter(process.stdout.readline, ''):
+            line = line.strip()
+            if not line:
+                continue
+            tail.append(line)
+            snapshot = parser.feed(line)
+            if snapshot and on_progress:
+                try:
+                    on_progress(snapshot)
+                except Exception as e:
+                    print(f"⚠️ Render progress callback error: {e}")
+        process.stdout.close()
+
+    reader = threading.Thread(target=drain, daemon=True)
+    reader.start()
+
+    try:
+        process.wait(timeout=timeout)
+    except subprocess.TimeoutExpired:
+        process.kill()
+        process.wait()
+        raise
+    finally:
+        reader.join(timeout=5)
+
+    return process.returncode, '\n'.join(tail)
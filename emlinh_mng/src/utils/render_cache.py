@@ -0,0 +1,123 @@
+"""
+Render Cache - Tái sử dụng MP4 đã render khi composition, props và asset giống hệt
+
+Cache key là SHA-256 của composition id, props (JSON sort_keys), hash nội dung của các
+asset được tham chiếu (audio + mouth cues JSON) và hash code emlinh-remotion/src.
+Bảng videos là index: một Video đã completed có cùng render_cache_key và file còn tồn
+tại thì được hardlink (hoặc copy) sang output mới thay vì render lại.
+"""
+
+import hashlib
+import json
+import os
+from typing import Any, Dict, List, Optional
+
+from .composition_cache import hash_directory
+from .tts_cache import TTSCache
+
+
+def hash_file(path: str) -> str:
+    """SHA-256 nội dung file"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def referenced_assets(remotion_path: str, props: Dict[str, Any]) -> List[str]:
+    """File trong public/ mà composition đọc theo props (audio và mouth cues cùng tên)"""
+    audio_filename = props.get('audioFileName')
+    if not audio_filename or audio_filename == 'None':
+        return []
+
+    audio_path = os.path.join(remotion_path, 'public', 'audios', audio_filename)
+    cues_path = os.path.splitext(audio_path)[0] + '.json'
+    return [path for path in (audio_path, cues_path) if os.path.exists(path)]
+
+
+def make_render_cache_key(
+    composition: str,
+    props: Dict[str, Any],
+    asset_paths: List[str],
+    source_hash: Optional[str] = None
+) -> str:
+    """
+    Digest xác định của mọi input ảnh hưởng tới video đầu ra
+
+    Tên file asset không nằm trong key (chỉ nội dung), nên cùng một audio được lưu
+    dưới tên khác vẫn hit cache.
+    """
+    normalized_props = dict(props)
+    if 'audioFileName' in normalized_props and asset_paths:
+        normalized_props['audioFileName'] = '<asset>'
+
+    payload = {
+        'composition': composition,
+        'props': normalized_props,
+        'assets': sorted(hash_file(path) for path in asset_paths),
+        'source': source_hash
+    }
+    raw = json.dumps(payload, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+
+def compute_render_cache_key(remotion_path: str, composition: str, props: Dict[str, Any]) -> str:
+    """Cache key cho một render trong project Remotion tại remotion_path"""
+    return make_render_cache_key(
+        composition,
+        props,
+        referenced_assets(remotion_path, props),
+        source_hash=hash_directory(os.path.join(remotion_path, 'src'))
+    )
+
+
+def find_cached_render(cache_key: str, exclude_path: Optional[str] = None) -> Optional[str]:
+    """
+    Tìm MP4 của Video đã completed có cùng render_cache_key và file còn trên đĩa
+
+    Cần app context của caller (request, worker của render queue, thread nền tự push context).
+    """
+    from flask import has_app_context
+    from ..app.models import Video
+
+    if not has_app_context():
+        raise RuntimeError("find_cached_render cần app context")
+
+    videos = (
+        Video.query
+        .filter(Video.render_cache_key == cache_key, Video.status == 'completed')
+        .order_by(Video.created_at.desc())
+        .all()
+    )
+    for video in videos:
+        path = video.file_path
+        if not path or path == exclude_path or not path.endswith('.mp4'):
+            continue
+        if os.path.isfile(path) and os.path.getsize(path) > 0:
+            return path
+    return None
+
+
+def reuse_cached_render(cache_key: str, output_path: str) -> bool:
+    """
+    Hardlink (hoặc copy) MP4 đã render vào output_path nếu có cache hit
+
+    Returns:
+        bool: True nếu cache hit và output_path đã sẵn sàng
+    """
+    try:
+        cached_path = find_cached_render(cache_key, exclude_path=output_path)
+    except Exception as e:
+        print(f"⚠️ Render cache lookup failed: {e}")
+        return False
+
+    if not cached_path:
+        return False
+    try:
+        TTSCache.materialize(cached_path, output_path)
+    except OSError as e:
+        print(f"⚠️ Could not reuse cached render {cached_path}: {e}")
+        return False
+    print(f"♻️ Render cache hit: {cached_path} -> {output_path}")
+    return True
@@ -0,0 +1,157 @@
+"""
+Render Scheduler - Quyết định `--concurrency` cho mỗi render và số render chạy cùng lúc
+
+Mỗi đơn vị concurrency của Remotion là một tab Chromium, tốn một core và vài trăm MB
+RAM (WebGL/ThreeCanvas). Scheduler chia số tab mà máy chịu được cho các render đang
+chạy và dùng semaphore để giới hạn tổng số render in-flight.
+"""
+
+import os
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional
+
+from ..app.config import Config
+
+
+def detect_cpu_count() -> int:
+    """Số core process được phép dùng (tôn trọng CPU affinity / cpuset)"""
+    try:
+        return max(1, len(os.sched_getaffinity(0)))
+    except (AttributeError, OSError):
+        return max(1, os.cpu_count() or 1)
+
+
+def detect_memory_bytes() -> Optional[int]:
+    """Tổng RAM khả dụng, ưu tiên giới hạn cgroup khi chạy trong container"""
+    physical = None
+    try:
+        physical = os.sysconf('SC_PAGE_SIZE') * os.sysconf('SC_PHYS_PAGES')
+    except (AttributeError, ValueError, OSError):
+        pass
+
+    for cgroup_file in ('/sys/fs/cgroup/memory.max', '/sys/fs/cgroup/memory/memory.limit_in_bytes'):
+        try:
+            with open(cgroup_file, 'r') as f:
+                value = f.read().strip()
+            if value.isdigit():
+                limit = int(value)
+                # cgroup v1 dùng số rất lớn cho "không giới hạn"
+                if physical is None or limit < physical:
+                    return limit
+        except OSError:
+            continue
+    return physical
+
+
+class RenderScheduler:
+    """
+    Cấp slot render kèm concurrency cho từng job
+
+    Cách dùng:
+        with scheduler.slot() as concurrency:
+            cmd += ['--concurrency', str(concurrency)]
+    """
+
+    def __init__(
+        self,
+        cpu_count: Optional[int] = None,
+        memory_bytes: Optional[int] = None,
+        max_concurrent_renders: int = 0,
+        concurrency_per_render: int = 0,
+        max_concurrency_per_render: int = 8,
+        memory_per_tab_mb: int = 512,
+        reserved_cores: int = 1
+    ):
+        self.cpu_count = cpu_count or detect_cpu_count()
+        self.memory_bytes = memory_bytes if memory_bytes is not None else detect_memory_bytes()
+
+        # Tổng số tab Chromium máy chịu được (giữ lại core cho Flask/ffmpeg, 25% RAM cho hệ thống)
+        usable_cores = max(1, self.cpu_count - reserved_cores)
+        if self.memory_bytes:
+            tabs_by_memory = int(self.memory_bytes * 0.75 // (memory_per_tab_mb * 1024 * 1024))
+            self.total_tabs = max(1, min(usable_cores, tabs_by_memory))
+        else:
+            self.total_tabs = usable_cores
+
+        per_render_cap = max(1, max_concurrency_per_render)
+        if concurrency_per_render > 0:
+            per_render_cap = concurrency_per_render
+        if max_concurrent_renders > 0:
+            self.max_concurrent_renders = max_concurrent_renders
+        else:
+            # Đủ render để dùng hết số tab, mỗi render không vượt quá per_render_cap
+            # (hoặc đúng concurrency_per_render nếu được cấu hình, vd. 1 cho ThreeCanvas)
+            self.max_concurrent_renders = max(1, self.total_tabs // per_render_cap)
+
+        if concurrency_per_render > 0:
+            self.concurrency_per_render = concurrency_per_render
+        else:
+            self.concurrency_per_render = max(1, min(per_render_cap, self.total_tabs // self.max_concurrent_renders))
+
+        self._semaphore = threading.BoundedSemaphore(self.max_concurrent_renders)
+        self._lock = threading.Lock()
+        self._active = 0
+        self._waiting = 0
+
+    @contextmanager
+    def slot(self, timeout: Optional[float] = None) -> Iterator[int]:
+        """
+        Chờ tới lượt render, trả về giá trị --concurrency cho job
+
+        Raises:
+            TimeoutError: Khi không có slot trống sau timeout giây
+        """
+        with self._lock:
+            self._waiting += 1
+        acquired = self._semaphore.acquire(timeout=timeout) if timeout is not None else self._semaphore.acquire()
+        with self._lock:
+            self._waiting -= 1
+            if acquired:
+                self._active += 1
+        if not acquired:
+            raise TimeoutError(f"No render slot available after {timeout} seconds")
+
+        try:
+            yield self.concurrency_per_render
+        finally:
+            with self._lock:
+                self._active -= 1
+            self._semaphore.release()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Cấu hình đã tính và số render đang chạy / đang chờ"""
+        with self._lock:
+            return {
+                'cpu_count': self.cpu_count,
+                'memory_mb': self.memory_bytes // (1024 * 1024) if self.memory_bytes else None,
+                'total_tabs': self.total_tabs,
+                'max_concurrent_renders': self.max_concurrent_renders,
+                'concurrency_per_render': self.concurrency_per_render,
+                'active_renders': self._active,
+                'waiting_renders': self._waiting
+            }
+
+
+# Singleton instance, tạo khi cần để đọc Config mới nhất
+_render_scheduler = None
+_render_scheduler_lock = threading.Lock()
+
+
+def get_render_scheduler() -> RenderScheduler:
+    """Lấy RenderScheduler dùng chung trong process"""
+    global _render_scheduler
+    with _render_scheduler_lock:
+        if _render_scheduler is None:
+            _render_scheduler = RenderScheduler(
+                max_concurrent_renders=Config.RENDER_MAX_CONCURRENT,
+                concurrency_per_render=Config.RENDER_CONCURRENCY,
+                max_concurrency_per_render=Config.RENDER_MAX_CONCURRENCY_PER_JOB,
+                memory_per_tab_mb=Config.RENDER_MEMORY_PER_TAB_MB,
+                reserved_cores=Config.RENDER_RESERVED_CORES
+            )
+            stats = _render_scheduler.get_stats()
+            print(f"🎛️ Render scheduler: {stats['max_concurrent_renders']} render(s) x "
+                  f"concurrency {stats['concurrency_per_render']} "
+                  f"({stats['cpu_count']} cores, {stats['memory_mb']} MB)")
+        return _render_scheduler
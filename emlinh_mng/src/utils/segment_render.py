@@ -0,0 +1,195 @@
+"""
+Segment Render - Chia composition thành nhiều đoạn frame, render song song rồi nối lại
+
+Mỗi đoạn được render riêng (--frames=start-end --muted), sau đó ffmpeg concat demuxer
+nối các đoạn bằng `-c:v copy` (không encode lại) và mux audio một lần duy nhất.
+Dùng khi ThreeCanvas buộc mỗi render chạy concurrency thấp: nhiều process song song
+vẫn tận dụng được hết core.
+"""
+
+import os
+import shutil
+import subprocess
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .audio_transcoder import find_ffmpeg
+from .remotion_progress import ENCODE_WEIGHT, RENDER_WEIGHT
+
+
+FrameRange = Tuple[int, int]
+
+
+def split_frame_ranges(total_frames: int, segments: int, min_segment_frames: int = 1) -> List[FrameRange]:
+    """
+    Chia [0, total_frames) thành tối đa `segments` đoạn liên tiếp gần bằng nhau
+
+    Returns:
+        List[FrameRange]: Các cặp (start, end) với end inclusive như --frames của Remotion
+    """
+    if total_frames <= 0:
+        return []
+    segments = max(1, min(segments, total_frames // max(1, min_segment_frames)))
+
+    base, remainder = divmod(total_frames, segments)
+    ranges = []
+    start = 0
+    for index in range(segments):
+        length = base + (1 if index < remainder else 0)
+        ranges.append((start, start + length - 1))
+        start += length
+    return ranges
+
+
+class SegmentProgress:
+    """Gộp snapshot tiến độ của từng đoạn thành một snapshot cho cả video"""
+
+    def __init__(self, frame_ranges: List[FrameRange], callback: Optional[Callable[[Dict[str, Any]], None]]):
+        self.callback = callback
+        self.total_frames = sum(end - start + 1 for start, end in frame_ranges)
+        self.segment_count = len(frame_ranges)
+        self._segments: Dict[int, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def for_segment(self, index: int) -> Callable[[Dict[str, Any]], None]:
+        def on_progress(snapshot: Dict[str, Any]):
+            with self._lock:
+                self._segments[index] = snapshot
+                aggregated = self._aggregate()
+            self._emit(aggregated)
+        return on_progress
+
+    def _aggregate(self, stage: Optional[str] = None) -> Dict[str, Any]:
+        rendered = sum(s['frames_rendered'] for s in self._segments.values())
+        encoded = sum(s['frames_encoded'] for s in self._segments.values())
+        # Các đoạn chạy song song nên tốc độ tổng là tổng fps của từng đoạn
+        fps = sum(s['fps'] or 0 for s in self._segments.values()) or None
+        eta_seconds = max(self.total_frames - rendered, 0) / fps if fps else None
+        progress = int(100 * (RENDER_WEIGHT * rendered + ENCODE_WEIGHT * encoded) / self.total_frames)
+
+        if stage is None:
+            # Chỉ coi là encoding khi mọi đoạn đã render xong frame
+            stages = {s['stage'] for s in self._segments.values()}
+            all_reported = len(self._segments) == self.segment_count
+            stage = 'encoding' if all_reported and stages == {'encoding'} else 'rendering'
+        return {
+            'stage': stage,
+            'frames_rendered': rendered,
+            'frames_encoded': encoded,
+            'total_frames': self.total_frames,
+            'fps': round(fps, 2) if fps else None,
+            'eta_seconds': round(eta_seconds, 1) if eta_seconds is not None else None,
+            'progress': min(progress, 100)
+        }
+
+    def concatenating(self):
+        with self._lock:
+            aggregated = self._aggregate(stage='concatenating')
+        self._emit(aggregated)
+
+    def _emit(self, snapshot: Dict[str, Any]):
+        if not self.callback:
+            return
+        try:
+            self.callback(snapshot)
+        except Exception as e:
+            print(f"⚠️ Render progress callback error: {e}")
+
+
+def concat_segments(
+    segment_paths: List[str],
+    output_path: str,
+    audio_path: Optional[str] = None,
+    ffmpeg_path: Optional[str] = None,
+    timeout: float = 600
+):
+    """
+    Nối các đoạn video bằng concat demuxer (copy stream) và mux audio một lần
+
+    Raises:
+        RuntimeError: Không tìm thấy ffmpeg hoặc ffmpeg lỗi
+    """
+    ffmpeg_path = ffmpeg_path or find_ffmpeg()
+    if not ffmpeg_path:
+        raise RuntimeError("ffmpeg not found, cannot concat video segments")
+
+    list_dir = tempfile.mkdtemp(prefix='concat_')
+    list_path = os.path.join(list_dir, 'segments.txt')
+    try:
+        with open(list_path, 'w', encoding='utf-8') as f:
+            for path in segment_paths:
+                escaped = os.path.abspath(path).replace("'", "'\\''")
+                f.write(f"file '{escaped}'\n")
+
+        cmd = [ffmpeg_path, '-y', '-loglevel', 'error', '-f', 'concat', '-safe', '0', '-i', list_path]
+        if audio_path:
+            cmd += ['-i', audio_path, '-map', '0:v:0', '-map', '1:a:0', '-c:v', 'copy', '-c:a', 'aac', '-shortest']
+        else:
+            cmd += ['-c', 'copy']
+        cmd += ['-movflags', '+faststart', output_path]
+
+        result = subprocess.run(cmd, capture_output=True, text=True, timeout=timeout)
+        if result.returncode != 0:
+            raise RuntimeError(f"ffmpeg concat failed: {result.stderr.strip()[-500:]}")
+    finally:
+        shutil.rmtree(list_dir, ignore_errors=True)
+
+
+def render_in_segments(
+    render_segment: Callable[[int, FrameRange, str, Callable[[Dict[str, Any]], None]], bool],
+    frame_ranges: List[FrameRange],
+    output_path: str,
+    audio_path: Optional[str] = None,
+    progress_callback: Optional[Callable[[Dict[str, Any]], None]] = None,
+    max_workers: Optional[int] = None,
+    ffmpeg_path: Optional[str] = None
+) -> bool:
+    """
+    Render các đoạn song song rồi nối thành output_path
+
+    Args:
+        render_segment: fn(index, frame_range, segment_path, on_progress) -> bool,
+            render một đoạn (muted) ra segment_path
+        frame_ranges: Kết quả của split_frame_ranges
+        output_path: File video cuối cùng
+        audio_path: Audio mux vào video sau khi nối (None = không có audio)
+        progress_callback: Nhận snapshot tiến độ gộp của mọi đoạn
+        max_workers: Số đoạn render cùng lúc (mặc định: tất cả)
+
+    Returns:
+        bool: True nếu mọi đoạn render thành công và nối được
+    """
+    if not frame_ranges:
+        return False
+
+    segment_dir = tempfile.mkdtemp(prefix='segments_', dir=os.path.dirname(os.path.abspath(output_path)))
+    segment_paths = [os.path.join(segment_dir, f"segment_{i:03d}.mp4") for i in range(len(frame_ranges))]
+    progress = SegmentProgress(frame_ranges, progress_callback)
+
+    def run(index: int) -> bool:
+        try:
+            return bool(render_segment(index, frame_ranges[index], segment_paths[index], progress.for_segment(index)))
+        except Exception as e:
+            print(f"❌ Segment {index} render error: {e}")
+            return False
+
+    try:
+        with ThreadPoolExecutor(max_workers=max_workers or len(frame_ranges), thread_name_prefix='segment') as pool:
+            results = list(pool.map(run, range(len(frame_ranges))))
+
+        if not all(results):
+            failed = [str(i) for i, ok in enumerate(results) if not ok]
+            print(f"❌ Segment render failed: {', '.join(failed)}")
+            return False
+
+        progress.concatenating()
+        concat_segments(segment_paths, output_path, audio_path=audio_path, ffmpeg_path=ffmpeg_path)
+        print(f"✅ Concatenated {len(segment_paths)} segments -> {output_path}")
+        return True
+    except (RuntimeError, OSError, subprocess.TimeoutExpired) as e:
+        print(f"❌ Segment concat failed: {e}")
+        return False
+    finally:
+        shutil.rmtree(segment_dir, ignore_errors=True)
@@ -0,0 +1,223 @@
+"""
+TTS Cache - Content-addressed cache cho kết quả Text-to-Speech
+"""
+
+import os
+import json
+import time
+import shutil
+import hashlib
+import threading
+from typing import Dict, Any, Optional
+
+
+class TTSCache:
+    """
+    Cache kết quả TTS theo hash của (text, voice, model, speed)
+
+    Mỗi entry là một thư mục con `<cache_dir>/<key>/` chứa WAV, OGG,
+    mouthCues JSON và file meta.json (duration, thời điểm tạo).
+    Thời gian truy cập gần nhất được lưu bằng mtime của meta.json để
+    eviction theo LRU khi vượt quá giới hạn dung lượng/số entry.
+    """
+
+    META_FILE = 'meta.json'
+    WAV_FILE = 'audio.wav'
+    OGG_FILE = 'audio.ogg'
+    JSON_FILE = 'audio.json'
+
+    def __init__(self, cache_dir: str, max_bytes: int = 1024 * 1024 * 1024, max_entries: int = 500):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    @staticmethod
+    def make_key(text: str, voice: str, model: str, speed: float, **extra: Any) -> str:
+        """
+        Tạo cache key từ các tham số ảnh hưởng tới audio đầu ra
+
+        Args:
+            text: Text cần đọc
+            voice: Giọng đọc
+            model: TTS model
+            speed: Tốc độ đọc
+            extra: Các tham số bổ sung (ví dụ: lip sync engine)
+
+        Returns:
+            str: SHA-256 hex digest
+        """
+        payload = {
+            'text': text,
+            'voice': voice,
+            'model': model,
+            'speed': float(speed),
+        }
+        payload.update(extra)
+        raw = json.dumps(payload, sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+    def _entry_dir(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key)
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        Lấy entry từ cache và cập nhật thời gian truy cập
+
+        Returns:
+            Dict chứa wav_path, ogg_path, json_path, duration hoặc None nếu miss
+        """
+        entry_dir = self._entry_dir(key)
+        meta_path = os.path.join(entry_dir, self.META_FILE)
+
+        try:
+            with open(meta_path, 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+
+            entry = {
+                'key': key,
+                'wav_path': os.path.join(entry_dir, self.WAV_FILE),
+                'ogg_path': os.path.join(entry_dir, self.OGG_FILE),
+                'json_path': os.path.join(entry_dir, self.JSON_FILE),
+                'duration': meta.get('duration'),
+            }
+
+            if not (os.path.exists(entry['wav_path']) and os.path.exists(entry['json_path'])):
+                raise FileNotFoundError(entry_dir)
+
+            # Đánh dấu entry vừa được dùng (LRU)
+            os.utime(meta_path, None)
+
+            with self._lock:
+                self.hits += 1
+            return entry
+
+        except (OSError, ValueError):
+            with self._lock:
+                self.misses += 1
+            return None
+
+    def put(
+        self,
+        key: str,
+        wav_path: str,
+        json_path: str,
+        duration: float,
+        ogg_path: Optional[str] = None
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Lưu kết quả TTS vào cache (copy file để cache độc lập với file output)
+
+        Returns:
+            Dict entry đã lưu hoặc None nếu không lưu được
+        """
+        entry_dir = self._entry_dir(key)
+        tmp_dir = f"{entry_dir}.tmp-{os.getpid()}-{threading.get_ident()}"
+
+        try:
+            os.makedirs(tmp_dir, exist_ok=True)
+            shutil.copyfile(wav_path, os.path.join(tmp_dir, self.WAV_FILE))
+            shutil.copyfile(json_path, os.path.join(tmp_dir, self.JSON_FILE))
+            if ogg_path and os.path.exists(ogg_path):
+                shutil.copyfile(ogg_path, os.path.join(tmp_dir, self.OGG_FILE))
+
+            with open(os.path.join(tmp_dir, self.META_FILE), 'w', encoding='utf-8') as f:
+                json.dump({'duration': duration, 'created_at': time.time()}, f)
+
+            # Rename atomically; nếu process khác đã ghi cùng key thì giữ bản cũ
+            try:
+                os.rename(tmp_dir, entry_dir)
+            except OSError:
+                shutil.rmtree(tmp_dir, ignore_errors=True)
+
+        except OSError as e:
+            print(f"⚠️ Could not store TTS cache entry {key[:12]}: {e}")
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            return None
+
+        self._evict()
+
+        return {
+            'key': key,
+            'wav_path': os.path.join(entry_dir, self.WAV_FILE),
+            'ogg_path': os.path.join(entry_dir, self.OGG_FILE),
+            'json_path': os.path.join(entry_dir, self.JSON_FILE),
+            'duration': duration,
+        }
+
+    @staticmethod
+    def materialize(src_path: str, dest_path: str):
+        """
+        Đưa file từ cache ra thư mục output (hardlink nếu được, fallback copy)
+
+        File đích cũ được xóa trước để không ghi đè lên inode đang được cache dùng chung.
+        """
+        if os.path.lexists(dest_path):
+            os.remove(dest_path)
+        try:
+            os.link(src_path, dest_path)
+        except OSError:
+            shutil.copyfile(src_path, dest_path)
+
+    def _evict(self):
+        """Xóa các entry ít được dùng nhất khi vượt quá giới hạn"""
+        try:
+            entries = []
+            total_bytes = 0
+            for name in os.listdir(self.cache_dir):
+                entry_dir = os.path.join(self.cache_dir, name)
+                meta_path = os.path.join(entry_dir, self.META_FILE)
+                if '.tmp-' in name or not os.path.isfile(meta_path):
+                    continue
+                size = sum(
+                    os.path.getsize(os.path.join(entry_dir, f))
+                    for f in os.listdir(entry_dir)
+                )
+                entries.append((os.path.getmtime(meta_path), size, entry_dir))
+                total_bytes += size
+
+            entries.sort()
+            while entries and (total_bytes > self.max_bytes or len(entries) > self.max_entries):
+                _, size, entry_dir = entries.pop(0)
+                shutil.rmtree(entry_dir, ignore_errors=True)
+                total_bytes -= size
+                with self._lock:
+                    self.evictions += 1
+
+        except OSError as e:
+            print(f"⚠️ TTS cache eviction error: {e}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Thống kê cache: hit/miss, số entry, dung lượng"""
+        entries = 0
+        total_bytes = 0
+        try:
+            for name in os.listdir(self.cache_dir):
+                entry_dir = os.path.join(self.cache_dir, name)
+                if '.tmp-' not in name and os.path.isfile(os.path.join(entry_dir, self.META_FILE)):
+                    entries += 1
+                    total_bytes += sum(
+                        os.path.getsize(os.path.join(entry_dir, f))
+                        for f in os.listdir(entry_dir)
+                    )
+        except OSError:
+            pass
+
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+                'evictions': self.evictions,
+                'entries': entries,
+                'total_bytes': total_bytes,
+                'max_bytes': self.max_bytes,
+                'max_entries': self.max_entries,
+            }
@@ -26,7 +26,7 @@ class TTSUtils:
         """
         try:
             # Import TTS Service
-            from ..services.tts_service import TTSService
+            from ..services.tts_service import get_tts_service
             
             # Tạo tên file output
             timestamp = time.strftime("%Y%m%d_%H%M%S")
@@ -36,8 +36,8 @@ class TTSUtils:
             print(f"   - Text: {text[:100]}...")
             print(f"   - Voice: {voice}")
             
-            # Khởi tạo TTS Service
-            tts_service = TTSService()
+            # Dùng TTS Service chung của process (job store, executor, completion events)
+            tts_service = get_tts_service()
             
             # Tạo speech với TTS Service
             job_id = tts_service.generate_speech(text, output_filename)
@@ -45,25 +45,20 @@ class TTSUtils:
             # Chờ TTS hoàn thành
             print("⏳ Waiting for TTS to complete...")
             max_wait = 60  # 60 seconds timeout
-            wait_interval = 2
             
-            for i in range(max_wait // wait_interval):
-                status = tts_service.get_tts_status(job_id)
-                if status and status['status'] == 'completed':
-                    audio_file = status['wav_path']
-                    json_file = status['json_path']
-                    
-                    print(f"✅ TTS completed: {audio_file}")
-                    print(f"✅ LipSync JSON: {json_file}")
-                    
-                    return audio_file
-                    
-                elif status and status['status'] == 'failed':
-                    error = status.get('error', 'Unknown error')
-                    raise Exception(f"TTS generation failed: {error}")
+            status = tts_service.wait_for_completion(job_id, timeout=max_wait)
+            if status and status['status'] == 'completed':
+                audio_file = status['wav_path']
+                json_file = status['json_path']
+                
+                print(f"✅ TTS completed: {audio_file}")
+                print(f"✅ LipSync JSON: {json_file}")
+                
+                return audio_file
                 
-                print(f"⏳ TTS progress: {status.get('progress', 0)}% - {status.get('status', 'unknown')}")
-                time.sleep(wait_interval)
+            elif status and status['status'] == 'failed':
+                error = status.get('error', 'Unknown error')
+                raise Exception(f"TTS generation failed: {error}")
             
             # Timeout
             raise Exception(f"TTS generation timeout after {max_wait} seconds")
@@ -0,0 +1,176 @@
+"""
+Vector Index - Tìm kiếm top-k cosine similarity trên ma trận NumPy (không cần pgvector)
+
+Embedding được chuẩn hóa L2 khi thêm vào nên cosine similarity là một phép nhân
+ma trận-vector. Ma trận tăng kích thước theo kiểu amortized (gấp đôi capacity)
+để add từng vector mới không phải copy lại toàn bộ.
+"""
+
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Set
+
+import numpy as np
+
+
+class VectorIndex:
+    """
+    Index trong bộ nhớ cho bảng vectors
+
+    Mỗi dòng giữ vector_id, content_id, content_type và session_id để lọc
+    trước khi xếp hạng. content_type/session_id được đổi thành mã số nguyên
+    để lọc bằng phép so sánh trên mảng NumPy.
+    """
+
+    def __init__(self, dimension: Optional[int] = None, initial_capacity: int = 1024):
+        self.dimension = dimension
+        self._capacity = initial_capacity
+        self._size = 0
+        self._matrix: Optional[np.ndarray] = None
+        self._vector_ids = np.zeros(initial_capacity, dtype=np.int64)
+        self._content_ids = np.zeros(initial_capacity, dtype=np.int64)
+        self._type_codes = np.zeros(initial_capacity, dtype=np.int32)
+        self._session_codes = np.zeros(initial_capacity, dtype=np.int32)
+        # Giá trị chuỗi <-> mã số (mã 0 dành cho None)
+        self._codes: Dict[str, int] = {}
+        self._values: List[Optional[str]] = [None]
+        self._positions: Dict[int, int] = {}
+        self._lock = threading.RLock()
+
+    def __len__(self) -> int:
+        return len(self._positions)
+
+    def vector_ids(self) -> Set[int]:
+        """Tập vector_id đang có trong index"""
+        with self._lock:
+            return set(self._positions)
+
+    def _code(self, value: Optional[str]) -> int:
+        if value is None:
+            return 0
+        code = self._codes.get(value)
+        if code is None:
+            code = self._codes[value] = len(self._values)
+            self._values.append(value)
+        return code
+
+    def _ensure_capacity(self, needed: int):
+        if self._matrix is not None and needed <= self._capacity:
+            return
+        capacity = self._capacity
+        while capacity < needed:
+            capacity *= 2
+        matrix = np.zeros((capacity, self.dimension), dtype=np.float32)
+        if self._matrix is not None:
+            matrix[:self._size] = self._matrix[:self._size]
+        self._matrix = matrix
+        for name in ('_vector_ids', '_content_ids', '_type_codes', '_session_codes'):
+            old = getattr(self, name)
+            grown = np.zeros(capacity, dtype=old.dtype)
+            grown[:self._size] = old[:self._size]
+            setattr(self, name, grown)
+        self._capacity = capacity
+
+    def add(self, vector_id: int, embedding: Sequence[float], content_id: Optional[int],
+            content_type: str, session_id: Optional[str] = None) -> bool:
+        """
+        Thêm (hoặc thay thế) một vector
+
+        Returns:
+            bool: False nếu embedding rỗng, sai số chiều hoặc có norm bằng 0
+        """
+        vector = np.asarray(embedding, dtype=np.float32).ravel()
+        norm = float(np.linalg.norm(vector)) if vector.size else 0.0
+        if not norm or not np.isfinite(norm):
+            return False
+
+        with self._lock:
+            if self.dimension is None:
+                self.dimension = vector.size
+            if vector.size != self.dimension:
+                return False
+
+            position = self._positions.get(vector_id)
+            if position is None:
+                self._ensure_capacity(self._size + 1)
+                position = self._size
+                self._size += 1
+                self._positions[vector_id] = position
+
+            self._matrix[position] = vector / norm
+            self._vector_ids[position] = vector_id
+            self._content_ids[position] = content_id if content_id is not None else -1
+            self._type_codes[position] = self._code(content_type)
+            self._session_codes[position] = self._code(session_id)
+        return True
+
+    def remove(self, vector_ids: Iterable[int]) -> int:
+        """Xóa vector khỏi index (dòng cuối được chuyển vào chỗ trống)"""
+        removed = 0
+        with self._lock:
+            for vector_id in vector_ids:
+                position = self._positions.pop(vector_id, None)
+                if position is None:
+                    continue
+                last = self._size - 1
+                if position != last:
+                    moved_id = int(self._vector_ids[last])
+                    for array in (self._matrix, self._vector_ids, self._content_ids,
+                                  self._type_codes, self._session_codes):
+                        array[position] = array[last]
+                    self._positions[moved_id] = position
+                self._size -= 1
+                removed += 1
+        return removed
+
+    def search(self, query: Sequence[float], k: int = 5, content_types: Optional[Iterable[str]] = None,
+               session_id: Optional[str] = None, min_similarity: Optional[float] = None) -> List[Dict[str, Any]]:
+        """
+        Top-k vector có cosine similarity cao nhất với query
+
+        Args:
+            query: Embedding của câu truy vấn
+            k: Số kết quả tối đa
+            content_types: Chỉ lấy các content_type này (None = tất cả)
+            session_id: Chỉ lấy vector thuộc session này
+            min_similarity: Bỏ kết quả có similarity thấp hơn ngưỡng
+
+        Returns:
+            List[Dict]: vector_id, content_id, content_type, session_id, similarity (giảm dần)
+        """
+        query = np.asarray(query, dtype=np.float32).ravel()
+        norm = float(np.linalg.norm(query)) if query.size else 0.0
+
+        with self._lock:
+            if not self._size or not norm or k <= 0 or query.size != self.dimension:
+                return []
+
+            scores = self._matrix[:self._size] @ (query / norm)
+
+            mask = None
+            if content_types is not None:
+                allowed = [self._codes[t] for t in content_types if t in self._codes]
+                mask = np.isin(self._type_codes[:self._size], allowed)
+            if session_id is not None:
+                session_mask = self._session_codes[:self._size] == self._codes.get(session_id, -1)
+                mask = session_mask if mask is None else mask & session_mask
+            if mask is not None:
+                scores = np.where(mask, scores, -np.inf)
+
+            k = min(k, self._size)
+            top = np.argpartition(-scores, k - 1)[:k]
+            top = top[np.argsort(-scores[top], kind='stable')]
+
+            results = []
+            for position in top:
+                similarity = float(scores[position])
+                if similarity == -np.inf or (min_similarity is not None and similarity < min_similarity):
+                    break
+                content_id = int(self._content_ids[position])
+                results.append({
+                    'vector_id': int(self._vector_ids[position]),
+                    'content_id': content_id if content_id >= 0 else None,
+                    'content_type': self._values[self._type_codes[position]],
+                    'session_id': self._values[self._session_codes[position]],
+                    'similarity': round(similarity, 6)
+                })
+            return results
@@ -5,21 +5,137 @@ Video Utilities - Utility functions cho video rendering và processing
 import os
 import time
 import subprocess
+import threading
 import json
-from typing import Dict, Any, Optional
+from contextlib import nullcontext
+from typing import Dict, Any, Optional, Callable, List, Tuple
 from ..app.config import Config
+from .viseme_estimator import VisemeEstimator
+from .remotion_progress import run_remotion_command
+from .render_scheduler import get_render_scheduler
+from .segment_render import render_in_segments, split_frame_ranges
+from .render_cache import compute_render_cache_key, find_cached_render, reuse_cached_render
+
+
+class RenderPreparation:
+    """
+    Chuẩn bị render chạy nền, không phụ thuộc audio: khởi động render server (bundle +
+    mở Chromium), hoặc kiểm tra Remotion CLI khi không có server, và nạp metadata composition
+    
+    Cách dùng:
+        prep = RenderPreparation(remotion_path).start()   # cùng lúc với TTS
+        ...
+        prep.wait(timeout=300)                            # trước khi render frame
+    """
+    
+    def __init__(self, remotion_path: str):
+        self.remotion_path = remotion_path
+        self.server_ready = False
+        self.remotion_available: Optional[bool] = None
+        self.elapsed_seconds: Optional[float] = None
+        self._done = threading.Event()
+    
+    def start(self) -> 'RenderPreparation':
+        threading.Thread(target=self._run, name='render-prep', daemon=True).start()
+        return self
+    
+    def _run(self):
+        started = time.monotonic()
+        try:
+            from ..services.render_server import get_render_server
+            server = get_render_server()
+            if server is not None:
+                self.server_ready = server.start(wait=True)
+            if not self.server_ready:
+                # Kết quả được nhớ lại nên render_video không phải chạy `npx remotion --version` lần nữa
+                self.remotion_available = VideoUtils._check_remotion_availability(self.remotion_path)
+            
+            from ..services.video_service import get_video_service
+            get_video_service().get_compositions()
+        except Exception as e:
+            print(f"⚠️ Render preparation failed: {e}")
+        finally:
+            self.elapsed_seconds = round(time.monotonic() - started, 2)
+            print(f"🔥 Render preparation finished in {self.elapsed_seconds}s (server ready: {self.server_ready})")
+            self._done.set()
+    
+    def is_done(self) -> bool:
+        return self._done.is_set()
+    
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Chờ chuẩn bị xong, trả về False nếu quá timeout (render vẫn chạy được, chỉ chậm hơn)"""
+        return self._done.wait(timeout)
+
+
+class PreviewRender:
+    """
+    Render preview ở thread riêng với slot scheduler riêng, để bản full không phải
+    chờ preview render xong
+
+    Cách dùng:
+        preview = PreviewRender(audio_file=..., duration=..., on_done=save, app=app).start()
+        preview.wait_submitted()      # preview đã được cấp slot (hoặc đã bỏ qua)
+        VideoUtils.render_video(...)  # chạy song song với preview
+    """
+    
+    def __init__(self, on_done: Optional[Callable[[Optional[str]], None]] = None, app=None, **render_kwargs):
+        self.render_kwargs = render_kwargs
+        self.on_done = on_done
+        self.app = app  # Flask app để push app context trên thread preview (render cache cần DB)
+        self.preview_file: Optional[str] = None
+        self._submitted = threading.Event()
+        self._done = threading.Event()
+    
+    def start(self) -> 'PreviewRender':
+        threading.Thread(target=self._run, name='render-preview', daemon=True).start()
+        return self
+    
+    def _run(self):
+        try:
+            with self.app.app_context() if self.app else nullcontext():
+                self.preview_file = VideoUtils.render_preview(on_submitted=self._submitted.set, **self.render_kwargs)
+                if self.on_done:
+                    self.on_done(self.preview_file)
+        except Exception as e:
+            print(f"⚠️ Preview render thread failed: {e}")
+        finally:
+            self._submitted.set()
+            self._done.set()
+    
+    def wait_submitted(self, timeout: Optional[float] = None) -> bool:
+        """Chờ tới khi preview có slot render, bị bỏ qua hoặc đã kết thúc"""
+        return self._submitted.wait(timeout)
+    
+    def is_done(self) -> bool:
+        return self._done.is_set()
+    
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Chờ preview render xong (kể cả on_done), trả về False nếu quá timeout"""
+        return self._done.wait(timeout)
 
 
 class VideoUtils:
     """Utility class cho video operations"""
     
+    # remotion_path -> thời điểm `npx remotion --version` thành công gần nhất
+    _remotion_checked_at: Dict[str, float] = {}
+    REMOTION_CHECK_TTL = 300
+    
+    @staticmethod
+    def prepare_render(remotion_path: Optional[str] = None) -> RenderPreparation:
+        """Bắt đầu chuẩn bị render ở nền (xem RenderPreparation)"""
+        return RenderPreparation(remotion_path or Config.REMOTION_PATH or '').start()
+    
     @staticmethod
     def render_video(
         audio_file: str,
         duration: int,
         composition: str = "Scene-Portrait",
         background: str = "abstract",
-        topic: str = ""
+        topic: str = "",
+        progress_callback: Optional[Callable[[Dict[str, Any]], None]] = None,
+        segments: Optional[int] = None,
+        cache_info: Optional[Dict[str, Any]] = None
     ) -> str:
         """
         Render video với audio và thông số đã cho sử dụng Remotion
@@ -31,50 +147,27 @@ class VideoUtils:
             composition: Loại composition
             background: Background scene
             topic: Chủ đề video (để tạo tên file)
+            progress_callback: Nhận snapshot tiến độ (frames, fps, eta_seconds, progress)
+            segments: Số đoạn frame render song song (None = Config.RENDER_SEGMENTS, <= 1 = tắt)
+            cache_info: Dict được điền render_cache_key và cache_hit để lưu vào Video
             
         Returns:
             str: Đường dẫn file video đã render hoặc placeholder
         """
         try:
             # Tạo tên file output
-            timestamp = time.strftime("%Y%m%d_%H%M%S")
-            safe_topic = topic.replace(" ", "_").replace("/", "_")[:20]
-            output_filename = f"video_{timestamp}_{safe_topic}.mp4"
-            
-            # Sử dụng config để lấy đường dẫn
-            output_dir = Config.WORKSPACE_ROOT or '/tmp'
-            output_path = os.path.join(output_dir, output_filename)
+            output_filename = VideoUtils._output_filename('video', topic)
+            output_path = VideoUtils._resolve_output_path(output_filename)
             
             # Đường dẫn Remotion project
             remotion_path = Config.REMOTION_PATH or ''
             
-            # Tạo directory nếu chưa tồn tại và có quyền
-            try:
-                parent_dir = os.path.dirname(output_dir or '')
-                if os.path.exists(parent_dir) and os.access(parent_dir, os.W_OK):
-                    os.makedirs(output_dir, exist_ok=True)
-                else:
-                    print(f"Warning: Cannot create output directory {output_dir} - no write permission")
-                    # Fallback to temp directory
-                    output_dir = "/tmp"
-                    output_path = os.path.join(output_dir, output_filename)
-            except (OSError, PermissionError) as e:
-                print(f"Warning: Cannot create output directory {output_dir}: {e}")
-                # Fallback to temp directory
-                output_dir = "/tmp"
-                output_path = os.path.join(output_dir, output_filename)
-            
             print(f"🎬 Rendering video với Remotion: {output_filename}")
             print(f"   - Audio: {audio_file}")
             print(f"   - Duration: {duration}s")
             print(f"   - Composition: {composition}")
             print(f"   - Background: {background}")
             
-            # Kiểm tra Remotion availability trước khi render
-            if not VideoUtils._check_remotion_availability(remotion_path):
-                print("⚠️ Remotion not available, creating placeholder video...")
-                return VideoUtils._create_placeholder_video(output_path, duration, topic)
-            
             # Chuẩn bị props cho Remotion
             # Lấy tên file audio (không có đường dẫn)
             audio_filename = os.path.basename(audio_file)
@@ -86,13 +179,51 @@ class VideoUtils:
                 "backgroundScene": background
             }
             
-            # Chạy Remotion render
-            result = VideoUtils._render_with_remotion(
-                remotion_path, composition, output_path, props
-            )
+            # Render cache: cùng composition + props + nội dung audio/mouth cues thì dùng lại MP4 cũ
+            cache_key = None
+            if Config.RENDER_CACHE_ENABLED:
+                try:
+                    cache_key = compute_render_cache_key(remotion_path, composition, props)
+                except OSError as e:
+                    print(f"⚠️ Could not compute render cache key: {e}")
+            if cache_key and reuse_cached_render(cache_key, output_path):
+                if cache_info is not None:
+                    cache_info.update({'render_cache_key': cache_key, 'cache_hit': True})
+                return output_path
+            
+            # Kiểm tra Remotion availability trước khi render (bỏ qua khi render server đang chạy)
+            from ..services.render_server import get_render_server
+            server = get_render_server()
+            server_running = server is not None and server.is_running()
+            if not server_running and not VideoUtils._check_remotion_availability(remotion_path):
+                print("⚠️ Remotion not available, creating placeholder video...")
+                return VideoUtils._create_placeholder_video(output_path, duration, topic)
+            
+            segments = Config.RENDER_SEGMENTS if segments is None else segments
+            frame_ranges = []
+            if segments > 1:
+                fps = VideoUtils._get_composition_fps(composition)
+                frame_ranges = split_frame_ranges(
+                    int(round(duration * fps)), segments,
+                    min_segment_frames=int(Config.RENDER_SEGMENT_MIN_SECONDS * fps)
+                )
+            
+            if len(frame_ranges) > 1:
+                # Video dài: render nhiều đoạn song song, mỗi đoạn chờ slot riêng của scheduler
+                result = VideoUtils._render_segmented(
+                    remotion_path, composition, output_path, props, frame_ranges, progress_callback
+                )
+            else:
+                # Chạy Remotion render khi scheduler cấp slot (giới hạn render đồng thời)
+                with get_render_scheduler().slot() as concurrency:
+                    result = VideoUtils._render_with_remotion(
+                        remotion_path, composition, output_path, props, progress_callback, concurrency
+                    )
             
             if result:
                 print(f"✅ Video rendered successfully: {output_path}")
+                if cache_info is not None and cache_key:
+                    cache_info.update({'render_cache_key': cache_key, 'cache_hit': False})
                 return output_path
             else:
                 print("⚠️ Remotion render failed, creating placeholder video...")
@@ -113,10 +244,102 @@ class VideoUtils:
                 print(f"❌ Fallback creation failed: {fallback_error}")
                 raise Exception("Both Remotion render and fallback creation failed")
     
+    @staticmethod
+    def render_preview(
+        audio_file: str,
+        duration: int,
+        composition: str = "Scene-Portrait",
+        background: str = "abstract",
+        topic: str = "",
+        progress_callback: Optional[Callable[[Dict[str, Any]], None]] = None,
+        on_submitted: Optional[Callable[[], None]] = None
+    ) -> Optional[str]:
+        """
+        Render bản preview nhanh: độ phân giải thấp (--scale), fps thấp và x264 preset nhanh
+        
+        Bản full-quality vẫn render riêng bằng render_video; preview chỉ để người dùng
+        xem sớm nên không tạo placeholder khi lỗi. on_submitted được gọi khi preview đã
+        được scheduler cấp slot (xem PreviewRender).
+        
+        Returns:
+            Optional[str]: Đường dẫn file preview, None nếu không render được
+        """
+        try:
+            remotion_path = Config.REMOTION_PATH or ''
+            props = {
+                "durationInSeconds": duration,
+                "audioFileName": os.path.basename(audio_file),
+                "backgroundScene": background
+            }
+            
+            # Bản full sẽ lấy từ render cache ngay lập tức, không cần preview
+            if Config.RENDER_CACHE_ENABLED:
+                try:
+                    if find_cached_render(compute_render_cache_key(remotion_path, composition, props)):
+                        print("♻️ Full render is cached, skipping preview")
+                        return None
+                except Exception as e:
+                    print(f"⚠️ Render cache lookup failed: {e}")
+            props["fps"] = Config.PREVIEW_FPS
+            
+            from ..services.render_server import get_render_server
+            server = get_render_server()
+            server_running = server is not None and server.is_running()
+            if not server_running and not VideoUtils._check_remotion_availability(remotion_path):
+                print("⚠️ Remotion not available, skipping preview render")
+                return None
+            
+            output_path = VideoUtils._resolve_output_path(VideoUtils._output_filename('preview', topic))
+            print(f"👀 Rendering preview: {output_path} (scale {Config.PREVIEW_SCALE}, {Config.PREVIEW_FPS}fps)")
+            
+            with get_render_scheduler().slot() as concurrency:
+                if on_submitted:
+                    on_submitted()
+                result = VideoUtils._render_with_remotion(
+                    remotion_path, composition, output_path, props, progress_callback, concurrency,
+                    scale=Config.PREVIEW_SCALE, x264_preset=Config.PREVIEW_X264_PRESET
+                )
+            return output_path if result else None
+            
+        except Exception as e:
+            print(f"❌ Preview rendering failed: {str(e)}")
+            return None
+    
+    @staticmethod
+    def _output_filename(prefix: str, topic: str) -> str:
+        timestamp = time.strftime("%Y%m%d_%H%M%S")
+        safe_topic = topic.replace(" ", "_").replace("/", "_")[:20]
+        return f"{prefix}_{timestamp}_{safe_topic}.mp4"
+    
+    @staticmethod
+    def _resolve_output_path(output_filename: str) -> str:
+        """Đường dẫn output trong WORKSPACE_ROOT, fallback /tmp nếu không ghi được"""
+        # Sử dụng config để lấy đường dẫn
+        output_dir = Config.WORKSPACE_ROOT or '/tmp'
+        
+        # Tạo directory nếu chưa tồn tại và có quyền
+        try:
+            parent_dir = os.path.dirname(output_dir or '')
+            if os.path.exists(parent_dir) and os.access(parent_dir, os.W_OK):
+                os.makedirs(output_dir, exist_ok=True)
+            else:
+                print(f"Warning: Cannot create output directory {output_dir} - no write permission")
+                # Fallback to temp directory
+                output_dir = "/tmp"
+        except (OSError, PermissionError) as e:
+            print(f"Warning: Cannot create output directory {output_dir}: {e}")
+            # Fallback to temp directory
+            output_dir = "/tmp"
+        
+        return os.path.join(output_dir, output_filename)
+    
     @staticmethod
     def _check_remotion_availability(remotion_path: str) -> bool:
-        """Check if Remotion is available and working"""
+        """Check if Remotion is available and working (kết quả OK được nhớ REMOTION_CHECK_TTL giây)"""
         import platform
+        checked_at = VideoUtils._remotion_checked_at.get(remotion_path)
+        if checked_at is not None and time.monotonic() - checked_at < VideoUtils.REMOTION_CHECK_TTL:
+            return True
         try:
             # Check basic requirements
             if not os.path.exists(remotion_path):
@@ -156,6 +379,7 @@ class VideoUtils:
                     )
                 if result.returncode == 0 or ("remotion" in result.stdout.lower() or "@remotion/cli" in result.stdout.lower()):
                     print("✅ Remotion CLI available")
+                    VideoUtils._remotion_checked_at[remotion_path] = time.monotonic()
                     return True
                 else:
                     print(f"⚠️ Remotion CLI test failed: {result.stderr[:100]}")
@@ -200,50 +424,135 @@ The actual video would contain animated avatar content.
             print(f"❌ Placeholder creation failed: {str(e)}")
             raise
     
+    @staticmethod
+    def _get_composition_fps(composition: str) -> float:
+        """Lấy fps của composition từ cache metadata (mặc định 30)"""
+        try:
+            from ..services.video_service import get_video_service
+            for item in get_video_service().get_compositions():
+                if item['id'] == composition and item.get('fps'):
+                    return float(item['fps'])
+        except Exception as e:
+            print(f"⚠️ Could not read composition fps: {e}")
+        return 30.0
+    
+    @staticmethod
+    def _render_segmented(
+        remotion_path: str,
+        composition: str,
+        output_path: str,
+        props: Dict[str, Any],
+        frame_ranges: List[Tuple[int, int]],
+        progress_callback: Optional[Callable[[Dict[str, Any]], None]] = None
+    ) -> bool:
+        """
+        Render composition theo từng đoạn frame (muted) song song, nối bằng ffmpeg concat
+        và mux audio một lần
+        
+        Returns:
+            bool: True nếu thành công
+        """
+        audio_path = None
+        audio_filename = props.get('audioFileName')
+        if audio_filename and audio_filename != 'None':
+            candidate = os.path.join(remotion_path, 'public', 'audios', audio_filename)
+            if os.path.exists(candidate):
+                audio_path = candidate
+        
+        print(f"🧩 Segment render: {len(frame_ranges)} segments {frame_ranges}")
+        scheduler = get_render_scheduler()
+        
+        def render_segment(index, frame_range, segment_path, on_progress) -> bool:
+            with scheduler.slot() as concurrency:
+                return VideoUtils._render_with_remotion(
+                    remotion_path, composition, segment_path, props, on_progress, concurrency,
+                    frame_range=frame_range, muted=True
+                )
+        
+        return render_in_segments(
+            render_segment, frame_ranges, output_path,
+            audio_path=audio_path, progress_callback=progress_callback
+        )
+    
     @staticmethod
     def _render_with_remotion(
         remotion_path: str,
         composition: str,
         output_path: str,
-        props: Dict[str, Any]
+        props: Dict[str, Any],
+        progress_callback: Optional[Callable[[Dict[str, Any]], None]] = None,
+        concurrency: int = 1,
+        frame_range: Optional[Tuple[int, int]] = None,
+        muted: bool = False,
+        scale: float = 1.0,
+        x264_preset: Optional[str] = None
     ) -> bool:
         """
-        Render video sử dụng Remotion CLI
+        Render video qua render server, hoặc Remotion CLI nếu server không khả dụng
         
         Args:
             remotion_path: Đường dẫn project Remotion
             composition: ID composition
             output_path: Đường dẫn file output
             props: Properties cho composition
+            progress_callback: Nhận snapshot tiến độ parse từ stdout của Remotion
+            concurrency: Số tab Chromium render song song (--concurrency)
+            frame_range: Chỉ render frame start-end (inclusive), dùng cho segment render
+            muted: Không render audio (segment render mux audio sau khi nối)
+            scale: Hệ số scale độ phân giải (--scale), < 1 cho preview
+            x264_preset: Preset x264 (--x264-preset), vd. 'ultrafast' cho preview
             
         Returns:
             bool: True nếu thành công
         """
         import platform
+        from ..services.render_server import render_with_server
         try:
+            # Render server đã bundle sẵn và giữ browser mở, chỉ dùng CLI khi không có
+            result = render_with_server(
+                composition, output_path, props, concurrency, on_progress=progress_callback, timeout=Config.RENDER_TIMEOUT_SECONDS,
+                frame_range=frame_range, muted=muted, scale=scale, x264_preset=x264_preset
+            )
+            if result is not None:
+                returncode, output = result
+                if returncode == 0:
+                    print("✅ Remotion render completed successfully (render server)")
+                    return True
+                print(f"❌ Remotion render failed (render server):")
+                print(f"output: {output}")
+                return False
+            
             # Chuẩn bị command
             props_json = json.dumps(props)
+            extra_args = []
+            if frame_range:
+                extra_args.append(f"--frames={frame_range[0]}-{frame_range[1]}")
+            if muted:
+                extra_args.append("--muted")
+            if scale != 1.0:
+                extra_args.append(f"--scale={scale}")
+            if x264_preset:
+                extra_args.append(f"--x264-preset={x264_preset}")
             if os.name == 'nt':
                 # Windows: ghi props ra file tạm
                 import tempfile
                 with tempfile.NamedTemporaryFile(mode='w', suffix='.json', delete=False, encoding='utf-8') as f:
                     f.write(props_json)
                     props_file = f.name
-                cmd = f'npx remotion render {composition} {output_path} --props={props_file} --concurrency 1'
+                cmd = f'npx remotion render {composition} {output_path} --props={props_file} --concurrency {concurrency}'
+                if extra_args:
+                    cmd += ' ' + ' '.join(extra_args)
                 print(f"🔧 Running Remotion command (Windows): {cmd}")
-                result = subprocess.run(
-                    cmd,
-                    cwd=remotion_path,
-                    capture_output=True,
-                    text=True,
-                    shell=True,
-                    timeout=1200
-                )
-                # Xóa file tạm sau khi render
                 try:
-                    os.remove(props_file)
-                except Exception as e:
-                    print(f"⚠️ Could not remove temp props file: {e}")
+                    returncode, output = run_remotion_command(
+                        cmd, remotion_path, on_progress=progress_callback, timeout=Config.RENDER_TIMEOUT_SECONDS, shell=True
+                    )
+                finally:
+                    # Xóa file tạm sau khi render
+                    try:
+                        os.remove(props_file)
+                    except Exception as e:
+                        print(f"⚠️ Could not remove temp props file: {e}")
             else:
                 # Linux/Mac: dùng list như cũ
                 cmd = [
@@ -251,23 +560,18 @@ The actual video would contain animated avatar content.
                     composition,
                     output_path,
                     "--props", props_json,
-                    "--concurrency", "1"
-                ]
+                    "--concurrency", str(concurrency)
+                ] + extra_args
                 print(f"🔧 Running Remotion command (Linux/Mac): {' '.join(cmd)}")
-                result = subprocess.run(
-                    cmd,
-                    cwd=remotion_path,
-                    capture_output=True,
-                    text=True,
-                    timeout=1200
+                returncode, output = run_remotion_command(
+                    cmd, remotion_path, on_progress=progress_callback, timeout=Config.RENDER_TIMEOUT_SECONDS
                 )
-            if result.returncode == 0:
+            if returncode == 0:
                 print("✅ Remotion render completed successfully")
                 return True
             else:
                 print(f"❌ Remotion render failed:")
-                print(f"stdout: {result.stdout}")
-                print(f"stderr: {result.stderr}")
+                print(f"output: {output}")
                 return False
         except subprocess.TimeoutExpired:
             print("❌ Remotion render timeout (20 minutes)")
@@ -353,17 +657,21 @@ The actual video would contain animated avatar content.
             # Tạo đường dẫn file JSON
             json_path = audio_file.replace('.wav', '.json')
             
-            # Tính toán duration từ text (ước tính)
-            estimated_duration = max(5, len(text) // 20)
-            
-            # Tạo mouthCues đơn giản dựa trên duration
-            mouth_cues = VideoUtils._generate_simple_mouth_cues(estimated_duration)
+            if audio_file.endswith('.wav') and os.path.exists(audio_file):
+                # Ước lượng mouthCues từ chính audio (NumPy, không cần Rhubarb)
+                mouth_cues, duration = VisemeEstimator().estimate_file(audio_file)
+            else:
+                # Tính toán duration từ text (ước tính)
+                duration = max(5, len(text) // 20)
+                
+                # Tạo mouthCues đơn giản dựa trên duration
+                mouth_cues = VideoUtils._generate_simple_mouth_cues(duration)
             
             # Tạo metadata
             metadata = {
                 "metadata": {
                     "soundFile": audio_file,
-                    "duration": estimated_duration
+                    "duration": duration
                 },
                 "mouthCues": mouth_cues
             }
@@ -0,0 +1,212 @@
+"""
+Viseme Estimator - Ước lượng mouthCues trực tiếp từ WAV bằng NumPy (không cần Rhubarb)
+
+Output giữ nguyên schema của Rhubarb mà useMouthCues đang đọc:
+    {"metadata": {"soundFile": ..., "duration": ...},
+     "mouthCues": [{"start": 0.0, "end": 0.12, "value": "X"}, ...]}
+"""
+
+import os
+import json
+import wave
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+
+# Dải tần dùng để phân loại khẩu hình (Hz)
+LOW_BAND = (80.0, 900.0)      # F1 - nguyên âm mở / tròn môi
+MID_BAND = (900.0, 2500.0)    # F2 - nguyên âm dẹt, âm L
+HIGH_BAND = (2500.0, 8000.0)  # Phụ âm xát (S, X, F, V)
+
+
+def read_wav_samples(wav_path: str) -> Tuple[np.ndarray, int]:
+    """
+    Đọc WAV PCM thành mảng float32 mono trong khoảng [-1, 1]
+
+    Returns:
+        Tuple[np.ndarray, int]: (samples, sample_rate)
+    """
+    with wave.open(wav_path, 'rb') as wav_file:
+        channels = wav_file.getnchannels()
+        sample_width = wav_file.getsampwidth()
+        sample_rate = wav_file.getframerate()
+        raw = wav_file.readframes(wav_file.getnframes())
+
+    if sample_width == 1:
+        samples = (np.frombuffer(raw, dtype=np.uint8).astype(np.float32) - 128.0) / 128.0
+    elif sample_width == 2:
+        samples = np.frombuffer(raw, dtype='<i2').astype(np.float32) / 32768.0
+    elif sample_width == 4:
+        samples = np.frombuffer(raw, dtype='<i4').astype(np.float32) / 2147483648.0
+    else:
+        raise ValueError(f"Unsupported WAV sample width: {sample_width}")
+
+    if channels > 1:
+        samples = samples.reshape(-1, channels).mean(axis=1)
+
+    return samples, sample_rate
+
+
+class VisemeEstimator:
+    """
+    Phân loại từng frame audio thành khẩu hình Rhubarb (A-H, X)
+
+    Mỗi frame được mô tả bằng năng lượng RMS (chuẩn hóa theo mức nói của clip),
+    tỉ lệ zero-crossing và tỉ lệ năng lượng của ba dải tần. Các frame liên tiếp
+    cùng khẩu hình được gộp thành một cue, cue quá ngắn được nhập vào cue trước.
+    """
+
+    def __init__(
+        self,
+        frame_duration: float = 0.025,
+        hop_duration: float = 0.01,
+        min_cue_duration: float = 0.06,
+        silence_threshold: float = 0.08
+    ):
+        self.frame_duration = frame_duration
+        self.hop_duration = hop_duration
+        self.min_cue_duration = min_cue_duration
+        self.silence_threshold = silence_threshold
+
+    def extract_features(self, samples: np.ndarray, sample_rate: int) -> Dict[str, np.ndarray]:
+        """
+        Tính đặc trưng cho từng frame
+
+        Returns:
+            Dict[str, np.ndarray]: energy (0-1), zcr, low/mid/high band ratio
+        """
+        frame_len = max(1, int(round(self.frame_duration * sample_rate)))
+        hop_len = max(1, int(round(self.hop_duration * sample_rate)))
+
+        if len(samples) < frame_len:
+            samples = np.pad(samples, (0, frame_len - len(samples)))
+
+        frames = np.lib.stride_tricks.sliding_window_view(samples, frame_len)[::hop_len]
+
+        rms = np.sqrt(np.mean(frames ** 2, axis=1))
+        # Chuẩn hóa theo percentile 95 để một đỉnh đơn lẻ không kéo cả clip về "im lặng"
+        reference = np.percentile(rms, 95) if rms.size else 0.0
+        energy = np.clip(rms / reference, 0.0, 1.0) if reference > 1e-6 else np.zeros_like(rms)
+
+        signs = np.signbit(frames)
+        zcr = np.mean(signs[:, 1:] != signs[:, :-1], axis=1)
+
+        spectrum = np.abs(np.fft.rfft(frames * np.hanning(frame_len), axis=1)) ** 2
+        freqs = np.fft.rfftfreq(frame_len, d=1.0 / sample_rate)
+
+        def band_power(band: Tuple[float, float]) -> np.ndarray:
+            mask = (freqs >= band[0]) & (freqs < band[1])
+            return spectrum[:, mask].sum(axis=1)
+
+        low, mid, high = band_power(LOW_BAND), band_power(MID_BAND), band_power(HIGH_BAND)
+        total = low + mid + high + 1e-12
+
+        return {
+            'energy': energy,
+            'zcr': zcr,
+            'low': low / total,
+            'mid': mid / total,
+            'high': high / total
+        }
+
+    def classify_frames(self, features: Dict[str, np.ndarray]) -> List[str]:
+        """Gán khẩu hình cho từng frame dựa trên đặc trưng"""
+        visemes = []
+        for energy, zcr, low, mid, high in zip(
+            features['energy'], features['zcr'], features['low'], features['mid'], features['high']
+        ):
+            if energy < self.silence_threshold:
+                visemes.append('X')      # Im lặng
+            elif high > 0.5 and zcr > 0.2:
+                # Phụ âm xát: S/X mạnh -> răng khép (B), F/V nhẹ -> môi chạm răng (G)
+                visemes.append('B' if energy >= 0.25 else 'G')
+            elif energy < 0.2:
+                visemes.append('A')      # M/B/P - môi khép
+            elif low > 0.75:
+                visemes.append('F' if energy < 0.45 else 'E')  # U/O - tròn môi
+            elif mid > 0.5 and high > 0.15:
+                visemes.append('H')      # L
+            elif energy >= 0.6:
+                visemes.append('D')      # A - mở rộng
+            else:
+                visemes.append('C')      # E/Ê - mở vừa
+        return visemes
+
+    def _build_cues(self, visemes: List[str], duration: float) -> List[Dict[str, Any]]:
+        """Gộp frame liên tiếp thành cue và loại bỏ cue quá ngắn"""
+        cues: List[Dict[str, Any]] = []
+        for index, value in enumerate(visemes):
+            start = index * self.hop_duration
+            if start >= duration:
+                break
+            if cues and cues[-1]['value'] == value:
+                continue
+            if cues:
+                cues[-1]['end'] = start
+            cues.append({'start': start, 'end': duration, 'value': value})
+
+        if not cues:
+            return [{'start': 0.0, 'end': round(duration, 2), 'value': 'X'}]
+
+        merged: List[Dict[str, Any]] = []
+        for cue in cues:
+            if merged and cue['end'] - cue['start'] < self.min_cue_duration:
+                merged[-1]['end'] = cue['end']
+            elif merged and merged[-1]['end'] - merged[-1]['start'] < self.min_cue_duration:
+                # Cue đầu tiên quá ngắn: nhường thời gian cho cue kế tiếp
+                cue['start'] = merged[-1]['start']
+                merged[-1] = cue
+            elif merged and merged[-1]['value'] == cue['value']:
+                merged[-1]['end'] = cue['end']
+            else:
+                merged.append(cue)
+
+        for cue in merged:
+            cue['start'] = round(cue['start'], 2)
+            cue['end'] = round(cue['end'], 2)
+        return [cue for cue in merged if cue['end'] > cue['start']]
+
+    def estimate(self, samples: np.ndarray, sample_rate: int) -> List[Dict[str, Any]]:
+        """
+        Ước lượng mouthCues từ mảng samples mono
+
+        Returns:
+            List[Dict[str, Any]]: Danh sách cue {start, end, value}
+        """
+        duration = len(samples) / float(sample_rate) if sample_rate else 0.0
+        if duration <= 0:
+            return []
+
+        features = self.extract_features(samples, sample_rate)
+        return self._build_cues(self.classify_frames(features), duration)
+
+    def estimate_file(self, wav_path: str) -> Tuple[List[Dict[str, Any]], float]:
+        """
+        Ước lượng mouthCues từ file WAV
+
+        Returns:
+            Tuple[List[Dict[str, Any]], float]: (mouthCues, duration)
+        """
+        samples, sample_rate = read_wav_samples(wav_path)
+        duration = len(samples) / float(sample_rate)
+        return self.estimate(samples, sample_rate), duration
+
+    def write_json(self, wav_path: str, json_path: str, sound_file: Optional[str] = None) -> float:
+        """
+        Ghi file JSON mouthCues theo schema của Rhubarb
+
+        Returns:
+            float: Thời lượng audio (giây)
+        """
+        mouth_cues, duration = self.estimate_file(wav_path)
+        data = {
+            "metadata": {
+                "soundFile": sound_file or os.path.basename(wav_path),
+                "duration": round(duration, 2)
+            },
+            "mouthCues": mouth_cues
+        }
+        with open(json_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=2)
+        return duration
@@ -291,6 +291,7 @@ class VideoManager {
             'script_completed',
             'record_created', 
             'audio_completed',
+            'preview_ready',
             'video_rendering',
             'completed',
             'failed'
@@ -319,6 +320,10 @@ class VideoManager {
                 stepMessage += `\n🆔 **Video ID:** ${stepData.video_id}`;
             }
             
+            if (step === 'preview_ready' && stepData && stepData.preview_url) {
+                stepMessage += `\n👀 **Xem trước:** [Tại đây](${stepData.preview_url})`;
+            }
+            
             console.log(`📺 [VideoManager] Adding step message for ${step}:`, stepMessage);
             // Thêm AI message để user thấy rõ tiến trình
             this.uiManager.addAIMessage(stepMessage);
@@ -348,6 +353,9 @@ class VideoManager {
             'record_created': 'Lưu thông tin video',
             'generating_audio': 'Tạo file âm thanh',
             'audio_completed': 'Hoàn thành âm thanh',
+            'rendering_preview': 'Render bản xem trước',
+            'preview_progress': 'Đang render bản xem trước',
+            'preview_ready': 'Bản xem trước đã sẵn sàng',
             'rendering_video': 'Bắt đầu render video',
             'video_rendering': 'Đang render video',
             'finalizing': 'Hoàn thiện video',
@@ -367,6 +375,9 @@ class VideoManager {
             'record_created': '✅',
             'generating_audio': '🎵',
             'audio_completed': '🔊',
+            'rendering_preview': '👀',
+            'preview_progress': '👀',
+            'preview_ready': '👀',
             'rendering_video': '🎬',
             'video_rendering': '⚡',
             'finalizing': '🎯',
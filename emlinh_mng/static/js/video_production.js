@@ -391,7 +391,7 @@ class VideoProductionManager {
                                 <i class="${statusIcon} me-1"></i>
                                 ${this.getTTSStatusText(job.status)}
                             </span>
-                            ${job.status === 'generating_speech' || job.status === 'converting_to_wav' || job.status === 'converting_to_ogg' || job.status === 'generating_lip_sync' ? `
+                            ${job.status === 'generating_speech' || job.status === 'streaming_speech' || job.status === 'concatenating' || job.status === 'transcoding' || job.status === 'converting_to_wav' || job.status === 'converting_to_ogg' || job.status === 'generating_lip_sync' ? `
                                 <div class="progress mt-1" style="height: 4px;">
                                     <div class="progress-bar bg-success" style="width: ${progress}%"></div>
                                 </div>
@@ -410,8 +410,12 @@ class VideoProductionManager {
 
     getTTSStatusClass(status) {
         const classes = {
+            'queued': 'bg-secondary',
             'starting': 'bg-info',
             'generating_speech': 'bg-warning',
+            'streaming_speech': 'bg-warning',
+            'concatenating': 'bg-warning',
+            'transcoding': 'bg-warning',
             'converting_to_wav': 'bg-warning',
             'converting_to_ogg': 'bg-warning', 
             'generating_lip_sync': 'bg-warning',
@@ -423,8 +427,12 @@ class VideoProductionManager {
 
     getTTSStatusIcon(status) {
         const icons = {
+            'queued': 'fas fa-clock',
             'starting': 'fas fa-hourglass-start',
             'generating_speech': 'fas fa-magic',
+            'streaming_speech': 'fas fa-stream',
+            'concatenating': 'fas fa-link',
+            'transcoding': 'fas fa-cogs',
             'converting_to_wav': 'fas fa-cogs',
             'converting_to_ogg': 'fas fa-exchange-alt',
             'generating_lip_sync': 'fas fa-comments',
@@ -436,8 +444,12 @@ class VideoProductionManager {
 
     getTTSStatusText(status) {
         const texts = {
+            'queued': 'Đang chờ trong hàng đợi',
             'starting': 'Đang khởi động',
             'generating_speech': 'Đang tạo speech',
+            'streaming_speech': 'Đang nhận audio',
+            'concatenating': 'Đang ghép audio',
+            'transcoding': 'Chuyển đổi WAV/OGG',
             'converting_to_wav': 'Chuyển đổi WAV',
             'converting_to_ogg': 'Chuyển đổi OGG',
             'generating_lip_sync': 'Tạo lip-sync',
@@ -10,7 +10,7 @@ import os
 # Add the src directory to Python path
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
 
-from src.app.app import create_app
+from src.app.app import create_app, start_background_workers
 
 # Create Flask application instance
 app = create_app()
@@ -20,4 +20,5 @@ application = app
 
 if __name__ == "__main__":
     # This allows running the file directly for testing
+    start_background_workers(app)
     app.run(host='0.0.0.0', port=5000, debug=False) 
\ No newline at end of file